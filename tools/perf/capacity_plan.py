@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""Capacity planner: load-test results -> Helm replicas, resources and partitions.
+
+Reads throughput/latency measurements from load and benchmark runs (CSV, JSON
+or NDJSON, one row per run and service) and fits a saturation curve per
+service with the Universal Scalability Law:
+
+    X(N) = lambda * N / (1 + sigma * (N - 1) + kappa * N * (N - 1))
+
+N is the work in flight in one pod and X the pod's throughput. A row that
+only has latency gets N from Little's law (N = X * R); a row that only has N
+gets its latency the same way. With rows from runs at several replica
+counts, a second USL fit over replicas captures contention between pods
+(MongoDB, Hazelcast); otherwise pods are assumed to scale linearly.
+
+Target traffic comes from the datasource schedules (the same loader and cron
+semantics as cron_load.py), multiplied out to polls, files, MB and records
+per second. Each stage has to keep up with the busiest --window seconds of
+that traffic, since the queues absorb shorter bursts.
+
+For every measured service it recommends a consumer concurrency limit (the
+operating N), replicas, CPU/memory requests and limits, and partition counts
+for the topics in MassTransitConfiguration.ConfigureKafkaTopics and the
+Output destination topic. The pipeline services consume through RabbitMQ
+today, so the concurrency limits apply now and the partition counts once the
+Kafka rider carries that traffic. Headroom is shown against the current
+helm/ez-platform/values.yaml and the recommendation.
+
+Results columns (aliases in RESULT_COLUMNS):
+    service, unit (polls | files | mb | records), concurrency, throughput,
+    latency_ms, cpu_cores, memory_mb, replicas
+throughput is the total over `replicas` pods; concurrency, cpu_cores and
+memory_mb are per pod.
+
+Usage:
+    python capacity_plan.py results.csv --from-api --synthetic 10000 --cron "0 */15 * * * *"
+    python capacity_plan.py runs/*.json --synthetic 20000 --files-per-poll 2 --file-mb 8 --records-per-file 40000
+    python capacity_plan.py results.csv --from-api --max-latency-ms 30000 --values-out sizing-values.yaml
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cron_load import build_calendar, fire_histogram, load_schedules
+
+DEFAULT_VALUES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                              "helm", "ez-platform", "values.yaml")
+UNITS = ("polls", "files", "mb", "records")
+
+RESULT_COLUMNS = {
+    "service": ("service", "service_name", "name"),
+    "unit": ("unit", "units"),
+    "concurrency": ("concurrency", "n", "in_flight", "inflight", "threads", "vus", "users"),
+    "throughput": ("throughput", "x", "rate", "per_second", "rps", "tps"),
+    "latency_ms": ("latency_ms", "mean_ms", "avg_ms", "r_ms"),
+    "latency_s": ("latency_s", "latency", "mean_s", "r"),
+    "cpu_cores": ("cpu_cores", "cpu"),
+    "memory_mb": ("memory_mb", "rss_mb", "mem_mb", "memory"),
+    "replicas": ("replicas", "pods", "instances"),
+}
+
+# Helm service key -> (unit it is sized in when a result row gives none, consumer concurrency in code)
+SERVICES = {
+    "filediscovery": ("polls", "FileDiscoveryService/Program.cs UseConcurrentMessageLimit(5)"),
+    "fileprocessor": ("files", "FileProcessorService/Program.cs UseConcurrentMessageLimit(10)"),
+    "validation": ("files", "ValidationService/Program.cs (MassTransit default)"),
+    "output": ("files", "OutputService/Program.cs (MassTransit default)"),
+}
+
+# Topic -> (consuming helm service, unit of one message, default KB per message)
+TOPICS = {
+    "dataprocessing.scheduling.filepolling": ("filediscovery", "polls", 1),
+    "dataprocessing.filesreceiver.validationrequest": ("validation", "files", 2),
+    "dataprocessing.validation.completed": ("output", "files", 2),
+    "output destination (KafkaOutputHandler)": (None, "records", None),
+}
+
+
+# ---------------------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------------------
+
+def service_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        text = f.read()
+    try:
+        document = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(document, dict):
+        document = document.get("results") or document.get("runs") or [document]
+    return document
+
+
+def normalize_row(raw, source):
+    lowered = {service_key(k): v for k, v in raw.items()}
+
+    def pick(field):
+        for alias in RESULT_COLUMNS[field]:
+            value = lowered.get(service_key(alias))
+            if value not in (None, ""):
+                return value
+        return None
+
+    def number(field):
+        value = pick(field)
+        try:
+            return None if value is None else float(value)
+        except (TypeError, ValueError):
+            raise SystemExit(f"{source}: {field} is not a number: {value!r}")
+
+    service = pick("service")
+    throughput = number("throughput")
+    if not service or not throughput:
+        raise SystemExit(f"{source}: row needs service and throughput: {raw}")
+    replicas = max(1, int(number("replicas") or 1))
+    pod_x = throughput / replicas
+    latency = number("latency_s")
+    if number("latency_ms") is not None:
+        latency = number("latency_ms") / 1000
+    concurrency = number("concurrency")
+    # Little's law fills in whichever of N and R is missing
+    if concurrency is None and latency is not None:
+        concurrency = pod_x * latency
+    if concurrency is None:
+        raise SystemExit(f"{source}: row needs concurrency or latency: {raw}")
+    if latency is None:
+        latency = concurrency / pod_x
+    key = service_key(service)
+    helm = next((k for k in SERVICES if k in key or key in k), key)
+    unit = (pick("unit") or SERVICES.get(helm, ("files",))[0]).lower()
+    if unit not in UNITS:
+        raise SystemExit(f"{source}: unit must be one of {', '.join(UNITS)}, got '{unit}'")
+    return {"service": helm, "unit": unit, "n": concurrency, "x": pod_x, "total": throughput,
+            "latency": latency, "cpu": number("cpu_cores"), "memory": number("memory_mb"), "replicas": replicas}
+
+
+def load_results(paths):
+    rows = []
+    for path in paths:
+        rows.extend(normalize_row(raw, f"{path} row {i}") for i, raw in enumerate(read_rows(path), 1))
+    by_service = {}
+    for row in rows:
+        by_service.setdefault(row["service"], []).append(row)
+    for service, group in by_service.items():
+        units = {r["unit"] for r in group}
+        if len(units) > 1:
+            raise SystemExit(f"{service}: rows mix units {sorted(units)}")
+    return by_service
+
+
+# ---------------------------------------------------------------------------
+# Universal Scalability Law
+# ---------------------------------------------------------------------------
+
+def usl(n, fit):
+    n = np.asarray(n, dtype=np.float64)
+    return fit["lambda"] * n / (1 + fit["sigma"] * (n - 1) + fit["kappa"] * n * (n - 1))
+
+
+def fit_usl(n, x):
+    """Least squares on N/X = a + b(N-1) + cN(N-1), refitting without negative terms.
+
+    Weighted by X/N so the fit minimises relative error. Fewer than three
+    distinct N fall back to Amdahl (kappa=0), one N to linear scaling.
+    """
+    n, x = np.asarray(n, dtype=np.float64), np.asarray(x, dtype=np.float64)
+    distinct = len(np.unique(n))
+    terms = ["sigma", "kappa"][:max(0, min(2, distinct - 1))]
+    y, w = n / x, x / n
+    while True:
+        columns = [np.ones_like(n)] + [n - 1 if t == "sigma" else n * (n - 1) for t in terms]
+        design = np.column_stack(columns) * w[:, None]
+        coef, *_ = np.linalg.lstsq(design, y * w, rcond=None)
+        negative = [t for t, c in zip(terms, coef[1:]) if c < 0]
+        if coef[0] <= 0:
+            coef = np.array([float(np.mean(y))] + [0.0] * len(terms))
+            break
+        if not negative:
+            break
+        terms.remove(negative[-1])
+    params = dict(zip(["a"] + terms, coef))
+    fit = {"lambda": 1 / params["a"], "sigma": params.get("sigma", 0.0) / params["a"],
+           "kappa": params.get("kappa", 0.0) / params["a"], "points": int(n.size),
+           "model": "usl" if "kappa" in terms else "amdahl" if "sigma" in terms else "linear"}
+    predicted = usl(n, fit)
+    ss_res = float(((x - predicted) ** 2).sum())
+    ss_tot = float(((x - x.mean()) ** 2).sum())
+    fit["r2"] = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    fit["peak_n"] = math.sqrt((1 - fit["sigma"]) / fit["kappa"]) if fit["kappa"] > 0 and fit["sigma"] < 1 else math.inf
+    return fit
+
+
+def operating_point(fit, max_measured, max_latency, extrapolate):
+    """Largest whole N up to the USL peak (and extrapolate x the measured range) within the latency SLO"""
+    limit = min(fit["peak_n"], max_measured * extrapolate)
+    candidates = np.arange(1, max(1, int(math.floor(limit))) + 1, dtype=np.float64)
+    x = usl(candidates, fit)
+    ok = np.ones_like(candidates, dtype=bool) if not max_latency else candidates / x <= max_latency
+    if not ok.any():
+        return 1, float(x[0])
+    best = int(np.flatnonzero(ok)[-1])
+    return int(candidates[best]), float(x[best])
+
+
+def in_flight_for(fit, rate, n_max):
+    """N at which one pod runs at `rate` (bisection on the rising side of the curve)"""
+    if rate <= 0:
+        return 0.0
+    low, high = 0.0, float(n_max)
+    if usl(high, fit) < rate:
+        return math.inf
+    for _ in range(60):
+        mid = (low + high) / 2
+        low, high = (mid, high) if usl(max(mid, 1e-9), fit) < rate else (low, mid)
+    return high
+
+
+def linear_fit(x, y):
+    """y = a + b*x by least squares, falling back to proportional with one distinct x"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(np.unique(x)) < 2:
+        return 0.0, float(y.mean() / x.mean()) if x.mean() else 0.0
+    b, a = np.polyfit(x, y, 1)
+    return float(max(a, 0.0)), float(max(b, 0.0))
+
+
+# ---------------------------------------------------------------------------
+# Target traffic
+# ---------------------------------------------------------------------------
+
+def target_traffic(args):
+    """Mean and busiest-window rates per unit from the datasource schedules"""
+    schedules = load_schedules(args)
+    if not schedules:
+        raise SystemExit("No datasources: use --from-api, --file or --synthetic")
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    calendar = build_calendar(start, int(args.hours * 3600))
+    load, groups, errors = fire_histogram(schedules, calendar)
+    for schedule, error in errors[:5]:
+        print(f"✗ {schedule['name']} '{schedule['cron']}': {error}", file=sys.stderr)
+    window = max(1, min(int(args.window), load.size))
+    rolling = np.convolve(load, np.ones(window, dtype=np.int64), mode="valid") / window
+    polls = {"mean": float(load.mean()), "peak": float(rolling.max())}
+    per_poll = {"polls": 1.0, "files": args.files_per_poll, "mb": args.files_per_poll * args.file_mb,
+                "records": args.files_per_poll * args.records_per_file}
+    rates = {unit: {k: v * factor * args.growth for k, v in polls.items()} for unit, factor in per_poll.items()}
+    return {"datasources": len(schedules), "expressions": len(groups), "window": window, "rates": rates}
+
+
+# ---------------------------------------------------------------------------
+# Current values.yaml
+# ---------------------------------------------------------------------------
+
+def read_values(path):
+    """Nested mappings of scalars from a values.yaml (enough for replicas/resources; lists are skipped)"""
+    root, stack = {}, [(-1, None)]
+    stack[0] = (-1, root)
+    if not path or not os.path.exists(path):
+        return root
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stripped = line.split(" #")[0].rstrip()
+            if not stripped.strip() or stripped.lstrip().startswith(("#", "-")):
+                continue
+            indent = len(stripped) - len(stripped.lstrip())
+            key, _, value = stripped.strip().partition(":")
+            while stack[-1][0] >= indent:
+                stack.pop()
+            parent = stack[-1][1]
+            value = value.strip().strip('"')
+            if value:
+                parent[key] = value
+            else:
+                parent[key] = {}
+                stack.append((indent, parent[key]))
+    return root
+
+
+def format_cpu(cores, step):
+    millis = max(step, int(math.ceil(cores * 1000 / step)) * step)
+    return f"{millis}m"
+
+
+def format_memory(mb, step):
+    mb = max(step, int(math.ceil(mb / step)) * step)
+    return f"{mb // 1024}Gi" if mb % 1024 == 0 else f"{mb}Mi"
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+def plan_service(service, rows, traffic, current, args):
+    unit = rows[0]["unit"]
+    demand = traffic["rates"][unit]
+    pod = fit_usl([r["n"] for r in rows], [r["x"] for r in rows])
+    max_n = max(r["n"] for r in rows)
+    n_op, pod_capacity = operating_point(pod, max_n, args.max_latency_ms / 1000 if args.max_latency_ms else None,
+                                         args.extrapolate)
+
+    # Contention between pods, if the runs varied the replica count: each multi-pod run's
+    # throughput relative to what that many independent pods would do at the same N
+    scaled = [(r["replicas"], r["total"] / float(usl(r["n"], pod))) for r in rows if r["replicas"] > 1]
+    cluster = fit_usl([1] + [r for r, _ in scaled], [1.0] + [s for _, s in scaled]) if scaled else None
+
+    def capacity(replicas):
+        if cluster is None:
+            return replicas * pod_capacity
+        return float(usl(replicas, cluster)) / cluster["lambda"] * pod_capacity
+
+    needed = demand["peak"] / args.target_utilization
+    replicas = max(args.min_replicas, 1)
+    while capacity(replicas) < needed and replicas < args.max_replicas:
+        if capacity(replicas + 1) <= capacity(replicas):
+            break
+        replicas += 1
+    note = ""
+    if capacity(replicas) < needed:
+        if replicas < args.max_replicas:
+            note = f"pods stop scaling at {replicas} replicas ({capacity(replicas):.3g} {unit}/s)"
+        else:
+            note = f"needs more than --max-replicas {args.max_replicas}"
+
+    # Load on one pod in single-pod terms, so contention between pods shows up as a busier pod
+    per_pod_peak = min(demand["peak"] / capacity(replicas), 1.0) * pod_capacity
+    in_flight = in_flight_for(pod, per_pod_peak, n_op)
+    latency = in_flight / per_pod_peak if per_pod_peak and math.isfinite(in_flight) else None
+
+    plan = {"service": service, "unit": unit, "fit": pod, "cluster": cluster, "operatingN": n_op,
+            "podCapacity": pod_capacity, "demand": demand, "replicas": replicas, "capacity": capacity(replicas),
+            "headroom": 1 - demand["peak"] / capacity(replicas), "inFlightPerPod": in_flight,
+            "predictedLatencyS": latency, "note": note}
+
+    cpu_rows = [r for r in rows if r["cpu"] is not None]
+    if cpu_rows:
+        a, b = linear_fit([r["x"] for r in cpu_rows], [r["cpu"] for r in cpu_rows])
+        request = (a + b * per_pod_peak) * (1 + args.cpu_margin)
+        plan["cpu"] = {"request": format_cpu(request, 50),
+                       "limit": format_cpu(max(request, (a + b * pod_capacity) * (1 + args.cpu_margin)), 250)}
+    mem_rows = [r for r in rows if r["memory"] is not None]
+    if mem_rows:
+        a, b = linear_fit([r["n"] for r in mem_rows], [r["memory"] for r in mem_rows])
+        at_op = a + b * n_op
+        plan["memory"] = {"request": format_memory(at_op * (1 + args.memory_margin), 64),
+                          "limit": format_memory(max(at_op * args.memory_limit_factor,
+                                                     max(r["memory"] for r in mem_rows)), 256)}
+
+    if current:
+        now = int(current.get("replicas") or 0)
+        plan["current"] = {"replicas": now, "resources": current.get("resources") or {}}
+        if now:
+            plan["current"]["headroom"] = 1 - demand["peak"] / capacity(now)
+    return plan
+
+
+def plan_partitions(plans, traffic, kafka_brokers, args):
+    """Partitions per topic: enough for every consumer pod's in-flight work and for the byte rate"""
+    by_service = {p["service"]: p for p in plans}
+    sizes = dict(args.message_kb or {})
+    out = []
+    for topic, (consumer, unit, default_kb) in TOPICS.items():
+        rate = traffic["rates"][unit]["peak"]
+        kb = sizes.get(topic.split()[0], default_kb if default_kb is not None else args.record_bytes / 1024)
+        mb_per_s = rate * kb / 1024
+        reasons = {"bytes": math.ceil(mb_per_s / args.partition_mbps)}
+        plan = by_service.get(consumer)
+        if plan:
+            # A partition feeds one consumer pod and --partition-concurrency messages at a time,
+            # so the partitions bound how much of the consumer's work can be in flight
+            reasons["consumers"] = plan["replicas"]
+            if plan["unit"] == unit and math.isfinite(plan["inFlightPerPod"]):
+                reasons["in-flight"] = math.ceil(plan["replicas"] * plan["inFlightPerPod"] / args.partition_concurrency)
+        partitions = max(1, max(reasons.values()))
+        partitions = int(math.ceil(partitions / kafka_brokers) * kafka_brokers)
+        out.append({"topic": topic, "consumer": consumer, "messagesPerSecond": rate, "mbPerSecond": mb_per_s,
+                    "partitions": partitions, "drivenBy": max(reasons, key=reasons.get), "current": 3 if consumer else None})
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def print_plan(traffic, plans, topics, args):
+    rates = traffic["rates"]
+    print(f"{traffic['datasources']:,} datasources, {traffic['expressions']:,} distinct cron expressions"
+          + (f", growth x{args.growth:g}" if args.growth != 1 else ""))
+    print(f"{'unit':<8} {'mean/s':>10} {'peak/s':>10}   (busiest {traffic['window']}s window)")
+    for unit in UNITS:
+        print(f"{unit:<8} {rates[unit]['mean']:>10.2f} {rates[unit]['peak']:>10.2f}")
+
+    print(f"\n{'service':<14} {'model':<7} {'lambda':>8} {'sigma':>7} {'kappa':>8} {'R2':>5} {'N*':>6} "
+          f"{'N op':>5} {'X/pod':>9}")
+    for p in plans:
+        f = p["fit"]
+        peak = f"{f['peak_n']:.0f}" if math.isfinite(f["peak_n"]) else "-"
+        print(f"{p['service']:<14} {f['model']:<7} {f['lambda']:>8.3g} {f['sigma']:>7.4f} {f['kappa']:>8.5f} "
+              f"{f['r2']:>5.2f} {peak:>6} {p['operatingN']:>5} {p['podCapacity']:>9.3g}")
+        if p["cluster"]:
+            c = p["cluster"]
+            print(f"{'  pods':<14} {c['model']:<7} {c['lambda']:>8.3g} {c['sigma']:>7.4f} {c['kappa']:>8.5f} "
+                  f"{c['r2']:>5.2f}")
+
+    print(f"\n{'service':<14} {'unit':<8} {'peak/s':>9} {'replicas':>12} {'headroom':>17} {'in flight':>10} "
+          f"{'latency':>9}  {'cpu req/lim':<14} {'memory req/lim':<16}")
+    for p in plans:
+        current = p.get("current") or {}
+        replicas = f"{current.get('replicas', '?')} → {p['replicas']}" if current else str(p["replicas"])
+        headroom = f"{p['headroom']:.0%}"
+        if "headroom" in current:
+            headroom = f"{current['headroom']:.0%} → {headroom}"
+        flight = f"{p['inFlightPerPod']:.1f}" if math.isfinite(p["inFlightPerPod"]) else "∞"
+        seconds = p["predictedLatencyS"]
+        latency = "-" if seconds is None else f"{seconds:.2f}s" if seconds >= 1 else f"{seconds * 1000:.3g}ms"
+        cpu = f"{p['cpu']['request']}/{p['cpu']['limit']}" if "cpu" in p else "-"
+        memory = f"{p['memory']['request']}/{p['memory']['limit']}" if "memory" in p else "-"
+        print(f"{p['service']:<14} {p['unit']:<8} {p['demand']['peak']:>9.2f} {replicas:>12} {headroom:>17} "
+              f"{flight:>10} {latency:>9}  {cpu:<14} {memory:<16}")
+        if p["note"]:
+            print(f"{'':<14} ! {p['note']}")
+        if p["service"] in SERVICES:
+            print(f"{'':<14} concurrency limit {p['operatingN']} per pod (now: {SERVICES[p['service']][1]})")
+
+    print(f"\n{'topic':<48} {'msg/s':>9} {'MB/s':>7} {'partitions':>11}  driven by")
+    for t in topics:
+        current = f"{t['current']} → " if t["current"] else ""
+        print(f"{t['topic']:<48} {t['messagesPerSecond']:>9.2f} {t['mbPerSecond']:>7.2f} "
+              f"{current + str(t['partitions']):>11}  {t['drivenBy']}")
+
+
+def values_overlay(plans, topics):
+    lines = ["# Generated by tools/perf/capacity_plan.py - merge with helm/ez-platform/values.yaml", "services:"]
+    for p in plans:
+        if p["service"] not in SERVICES:
+            continue
+        lines += [f"  {p['service']}:", f"    replicas: {p['replicas']}"]
+        if "cpu" in p or "memory" in p:
+            lines.append("    resources:")
+            for part in ("request", "limit"):
+                lines.append(f"      {part}s:")
+                if "cpu" in p:
+                    lines.append(f"        cpu: {p['cpu'][part]}")
+                if "memory" in p:
+                    lines.append(f"        memory: {p['memory'][part]}")
+        lines.append(f"    # consumer concurrency limit: {p['operatingN']}")
+    lines.append("# Kafka topic partitions (NumPartitions in MassTransitConfiguration.ConfigureKafkaTopics):")
+    lines += [f"#   {t['topic']}: {t['partitions']}" for t in topics]
+    return "\n".join(lines) + "\n"
+
+
+def to_json(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_json(v) for v in value]
+    return value
+
+
+def parse_sizes(values):
+    sizes = {}
+    for value in values or []:
+        topic, _, kb = value.partition("=")
+        if not kb:
+            raise SystemExit(f"--message-kb expects TOPIC=KB, got '{value}'")
+        sizes[topic] = float(kb)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results", nargs="+", help="Load-test result files (CSV, JSON, NDJSON)")
+    traffic = parser.add_argument_group("target traffic (datasources as in cron_load.py)")
+    traffic.add_argument("--api-url", help="DataSourceManagementService base URL")
+    traffic.add_argument("--from-api", action="store_true", help="Current active datasources from the API")
+    traffic.add_argument("--file", action="append", help="Datasource list JSON (API response or array)")
+    traffic.add_argument("--synthetic", type=int, default=0, help="Add N datasources using --cron (onboarding)")
+    traffic.add_argument("--cron", default="0 */15 * * * *", help="Cron for synthetic datasources")
+    traffic.add_argument("--hours", type=float, default=24, help="Schedule horizon to simulate")
+    traffic.add_argument("--window", type=float, default=300,
+                         help="Seconds of burst the queues absorb; stages are sized for the busiest window")
+    traffic.add_argument("--files-per-poll", type=float, default=1.0)
+    traffic.add_argument("--file-mb", type=float, default=1.0)
+    traffic.add_argument("--records-per-file", type=float, default=10000)
+    traffic.add_argument("--growth", type=float, default=1.0, help="Multiply all traffic (e.g. 1.3 for 30%% growth)")
+    sizing = parser.add_argument_group("sizing")
+    sizing.add_argument("--target-utilization", type=float, default=0.7, help="Planned peak load / capacity")
+    sizing.add_argument("--max-latency-ms", type=float, help="Per-item latency SLO that caps the operating N")
+    sizing.add_argument("--extrapolate", type=float, default=1.5,
+                        help="Never operate beyond this multiple of the largest measured N")
+    sizing.add_argument("--min-replicas", type=int, default=2)
+    sizing.add_argument("--max-replicas", type=int, default=100)
+    sizing.add_argument("--cpu-margin", type=float, default=0.2)
+    sizing.add_argument("--memory-margin", type=float, default=0.2)
+    sizing.add_argument("--memory-limit-factor", type=float, default=1.5)
+    sizing.add_argument("--partition-mbps", type=float, default=10, help="MB/s one partition sustains")
+    sizing.add_argument("--partition-concurrency", type=int, default=1,
+                        help="Messages one partition has in flight at a consumer")
+    sizing.add_argument("--message-kb", action="append", metavar="TOPIC=KB", help="Message size per topic")
+    sizing.add_argument("--record-bytes", type=float, default=500, help="Bytes per output record")
+    parser.add_argument("--values", default=DEFAULT_VALUES, help="Current values.yaml to compare against")
+    parser.add_argument("--values-out", help="Write the recommendation as a values overlay")
+    parser.add_argument("--json", help="Write the plan as JSON")
+    args = parser.parse_args()
+    args.message_kb = parse_sizes(args.message_kb)
+    if args.api_url:
+        args.api_url = args.api_url.rstrip("/")
+
+    results = load_results(args.results)
+    traffic = target_traffic(args)
+    values = read_values(args.values)
+    services = values.get("services") or {}
+    plans = [plan_service(service, rows, traffic, services.get(service), args)
+             for service, rows in sorted(results.items())]
+    brokers = int((values.get("kafka") or {}).get("replicas") or 1)
+    topics = plan_partitions(plans, traffic, brokers, args)
+    print_plan(traffic, plans, topics, args)
+
+    if args.values_out:
+        with open(args.values_out, "w", encoding="utf-8") as f:
+            f.write(values_overlay(plans, topics))
+        print(f"\nvalues overlay written to {args.values_out}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(to_json({"traffic": traffic, "services": plans, "topics": topics}), f, indent=2)
+        print(f"plan written to {args.json}")
+    return 1 if any(p["note"] for p in plans) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
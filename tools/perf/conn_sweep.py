@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Parallel connection-test sweep across all active datasources.
+
+Pages through the active datasources once and works out each one's endpoint
+from FilePath (sftp://host:port/path, kafka://brokers/topic, a folder path)
+and from the connectionConfig block in AdditionalConfiguration
+(ConfigurationSettings) or the connector keys (SftpServer, KafkaBootstrapServers,
+...). Datasources sharing an endpoint are tested once, through the typed
+ConnectionTestController endpoints:
+
+    POST /api/v1/test-connection/sftp | kafka | folder
+
+DataSourceController's POST /{id}/test-connection is not used. It does not
+test anything yet and always answers success with latencyMs 150.
+
+The sweep runs up to --workers tests at once but at most --per-host against
+one host, with --host-gap between starts on the same host, so a partner SFTP
+server shared by hundreds of datasources sees a couple of logins rather than
+hundreds. Results are cached on disk with a TTL (--ttl, --ttl-failed for
+failures) together with the recent history of each endpoint. That history
+marks endpoints whose status keeps changing as flapping.
+
+FTP and HTTP sources have no test endpoint. --tcp checks them with a TCP
+connect from the machine running the sweep.
+
+Usage:
+    python conn_sweep.py
+    python conn_sweep.py --per-host 2 --host-gap 0.5 --workers 64 --json sweep.json
+    python conn_sweep.py --file datasources.json --refresh
+    python conn_sweep.py --every 300 --rounds 12          # watch for flapping
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from ezapi import get_field, iter_pages, new_session, page_items, service_url
+
+API = "/api/v1/test-connection"
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ez-conn-sweep.json")
+HISTORY = 20
+DEFAULT_PORTS = {"sftp": 22, "ftp": 21, "http": 80, "https": 443, "kafka": 9092}
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+class Target:
+    """One endpoint to test, with every datasource that uses it"""
+
+    def __init__(self, kind, host, key, request, label):
+        self.kind = kind
+        self.host = host
+        self.key = key
+        self.request = request
+        self.label = label
+        self.datasources = []
+        self.result = None
+        self.cached = False
+
+
+def connection_config(ds):
+    """Merged connection settings from ConfigurationSettings and connector keys"""
+    extra = get_field(ds, "AdditionalConfiguration") or {}
+    config = {}
+    settings = get_field(extra, "ConfigurationSettings")
+    if isinstance(settings, str):
+        try:
+            settings = json.loads(settings)
+        except ValueError:
+            settings = None
+    if isinstance(settings, dict):
+        config.update({k: v for k, v in (settings.get("connectionConfig") or {}).items()
+                       if v not in (None, "")})
+    for prefix, kind in (("Sftp", "SFTP"), ("Ftp", "FTP")):
+        if get_field(extra, prefix + "Server"):
+            config.update(type=kind, host=get_field(extra, prefix + "Server"))
+            for field in ("Port", "Username", "Password"):
+                if get_field(extra, prefix + field) is not None:
+                    config[field.lower()] = get_field(extra, prefix + field)
+    if get_field(extra, "KafkaBootstrapServers"):
+        config.update(type="Kafka", brokers=get_field(extra, "KafkaBootstrapServers"))
+    return config
+
+
+def target_for(ds, per_path, tcp):
+    """Target for a datasource, or (None, reason) when it cannot be tested"""
+    config = connection_config(ds)
+    path = get_field(ds, "FilePath") or ""
+    url = urlsplit(path) if "://" in path else None
+    kind = (config.get("type") or (url.scheme if url else "local")).lower()
+    if kind in ("http", "https") and not tcp:
+        return None, "no test endpoint for HTTP sources (use --tcp)"
+
+    if kind == "kafka":
+        brokers = config.get("brokers") or (url.netloc if url else "")
+        topic = config.get("topic") or (url.path.strip("/") if url else "")
+        if not brokers:
+            return None, "no Kafka brokers configured"
+        brokers = ",".join(sorted(b.strip().lower() for b in brokers.split(",") if b.strip()))
+        key = ("kafka", brokers, topic if per_path else "")
+        request = {"BrokerServer": brokers, "Topic": topic or "__consumer_offsets",
+                   "Username": config.get("username"), "Password": config.get("password")}
+        return Target("kafka", brokers.split(",")[0].split(":")[0], key, request,
+                      f"kafka://{brokers}" + (f"/{topic}" if per_path else "")), None
+
+    if kind in ("sftp", "ftp", "http", "https"):
+        host = (config.get("host") or (url.hostname if url else "") or "").lower()
+        if not host:
+            return None, f"no {kind.upper()} host configured"
+        port = int(config.get("port") or (url.port if url and url.port else DEFAULT_PORTS[kind]))
+        user = config.get("username") or (unquote(url.username) if url and url.username else "")
+        password = config.get("password") or (unquote(url.password) if url and url.password else None)
+        remote = config.get("path") or (url.path if url else "") or "/"
+        secret = hashlib.blake2b((password or "").encode(), digest_size=6).hexdigest()
+        key = (kind, host, port, user, secret, remote if per_path else "")
+        label = f"{kind}://{user + '@' if user else ''}{host}:{port}" + (remote if per_path else "")
+        if kind == "sftp":
+            request = {"Host": host, "Port": port, "Username": user, "Password": password,
+                       "RemotePath": remote}
+            return Target("sftp", host, key, request, label), None
+        if not tcp:
+            return None, "no test endpoint for FTP sources (use --tcp)"
+        return Target("tcp", host, key[:3], {"host": host, "port": port},
+                      f"tcp://{host}:{port}"), None
+
+    # Local or network folder
+    folder = config.get("path") or path
+    if not folder:
+        return None, "no folder path configured"
+    host = "local"
+    if folder.startswith(("\\\\", "//")):
+        host = folder.replace("\\", "/").lstrip("/").split("/")[0].lower()
+    request = {"Path": folder, "CheckWritePermissions": False, "CheckDiskSpace": False}
+    return Target("folder", host, ("folder", folder), request, folder), None
+
+
+def load_datasources(args):
+    datasources = []
+    if args.file:
+        for path in args.file:
+            with open(path, encoding="utf-8-sig") as f:
+                document = json.load(f)
+            datasources.extend(document if isinstance(document, list) else page_items(document)[0])
+    else:
+        session = new_session("conn-sweep")
+        url = f"{args.api_url or service_url('datasource')}/api/v1/datasource"
+        datasources.extend(iter_pages(session, url, params={"isActive": "true"}, size=100))
+    return [ds for ds in datasources
+            if get_field(ds, "IsActive") is not False and not get_field(ds, "IsDeleted")]
+
+
+def group_targets(datasources, args):
+    targets, skipped = {}, defaultdict(list)
+    for ds in datasources:
+        name = get_field(ds, "Name", "")
+        target, reason = target_for(ds, args.per_path, args.tcp)
+        if target is None:
+            skipped[reason].append(name)
+            continue
+        target = targets.setdefault(target.key, target)
+        target.datasources.append(name)
+    return list(targets.values()), skipped
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def cache_key(target):
+    return hashlib.blake2b(json.dumps(target.key).encode(), digest_size=10).hexdigest()
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def flapping(history, window, changes):
+    """True when the status changed at least `changes` times in the last `window` results"""
+    recent = [ok for _, ok in history[-window:]]
+    return sum(1 for a, b in zip(recent, recent[1:]) if a != b) >= changes
+
+
+# ---------------------------------------------------------------------------
+# Testing
+# ---------------------------------------------------------------------------
+
+def run_test(session, base_url, target, timeout):
+    started = time.monotonic()
+    if target.kind == "tcp":
+        try:
+            with socket.create_connection((target.request["host"], target.request["port"]), timeout):
+                pass
+            ok, message, server_ms = True, "TCP connect ok", None
+        except OSError as e:
+            ok, message, server_ms = False, f"TCP connect failed: {e}", None
+    else:
+        body = dict(target.request, TimeoutSeconds=int(timeout))
+        try:
+            response = session.post(f"{base_url}{API}/{target.kind}", json=body, timeout=timeout + 5)
+            try:
+                result = response.json()
+            except ValueError:
+                result = {}
+            # 400 carries a failed ConnectionTestResult; anything else is the service failing
+            if response.status_code in (200, 400) and isinstance(result, dict):
+                ok = bool(get_field(result, "Success"))
+                message = get_field(result, "ErrorDetails") or get_field(result, "Message") or ""
+                server_ms = get_field(result, "DurationMs")
+            else:
+                ok, message, server_ms = False, f"HTTP {response.status_code}: {response.text[:200]}", None
+        except requests.RequestException as e:
+            ok, message, server_ms = False, f"request failed: {e}", None
+    return {"ok": ok, "message": message, "server_ms": server_ms,
+            "rtt_ms": round((time.monotonic() - started) * 1000, 1), "at": time.time()}
+
+
+def sweep(targets, args, cache):
+    """Test every target not fresh in the cache, honouring per-host limits"""
+    now = time.time()
+    pending = defaultdict(deque)
+    for target in targets:
+        entry = cache.get(cache_key(target))
+        if entry and not args.refresh:
+            ttl = args.ttl if entry["last"]["ok"] else args.ttl_failed
+            if now - entry["last"]["at"] < ttl:
+                target.result, target.cached = entry["last"], True
+                continue
+        pending[target.host].append(target)
+
+    todo = sum(len(q) for q in pending.values())
+    session = new_session("conn-sweep")
+    adapter = HTTPAdapter(pool_connections=args.workers, pool_maxsize=args.workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    base_url = args.api_url or service_url("datasource")
+    inflight = {}
+    # Local folders are checked by the service itself; only partner hosts need protecting
+    limit = defaultdict(lambda: args.per_host, local=args.workers)
+    spacing = defaultdict(lambda: args.host_gap, local=0.0)
+    per_host = defaultdict(int)
+    next_start = defaultdict(float)
+    done = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        while pending or inflight:
+            clock = time.monotonic()
+            for host in list(pending):
+                while (pending[host] and len(inflight) < args.workers
+                       and per_host[host] < limit[host] and next_start[host] <= clock):
+                    target = pending[host].popleft()
+                    future = pool.submit(run_test, session, base_url, target, args.timeout)
+                    inflight[future] = target
+                    per_host[host] += 1
+                    next_start[host] = clock + spacing[host]
+                if not pending[host]:
+                    del pending[host]
+            # Wake for the next host whose spacing gap ends, else for a finished test
+            ready = [next_start[h] for h in pending
+                     if per_host[h] < limit[h] and len(inflight) < args.workers]
+            timeout = max(min(ready) - time.monotonic(), 0.001) if ready else None
+            if not inflight:
+                time.sleep(timeout or 0.001)
+                continue
+            finished, _ = wait(list(inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in finished:
+                target = inflight.pop(future)
+                per_host[target.host] -= 1
+                target.result = future.result()
+                entry = cache.setdefault(cache_key(target), {"label": target.label, "history": []})
+                entry["last"] = target.result
+                entry["history"] = (entry["history"] + [[target.result["at"], target.result["ok"]]])[-HISTORY:]
+                done += 1
+                if done % 100 == 0 or done == todo:
+                    print(f"  {done:,}/{todo:,} tested ({done / (time.monotonic() - started):.0f}/s)",
+                          file=sys.stderr)
+    return todo, time.monotonic() - started
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def report(targets, skipped, cache, tested, elapsed, args):
+    datasource_count = sum(len(t.datasources) for t in targets)
+    failed = [t for t in targets if not t.result["ok"]]
+    flaps = [t for t in targets
+             if flapping(cache.get(cache_key(t), {}).get("history", []), args.flap_window, args.flap_changes)]
+    print(f"\n{datasource_count:,} datasources -> {len(targets):,} endpoints "
+          f"on {len({t.host for t in targets}):,} hosts; {tested:,} tested in {elapsed:.1f}s, "
+          f"{len(targets) - tested:,} from cache")
+    for reason, names in skipped.items():
+        print(f"  skipped {len(names):,}: {reason}")
+
+    print(f"\n{'endpoint':<48} {'kind':<6} {'ds':>5} {'status':<6} {'server ms':>10} {'rtt ms':>9}")
+    rows = sorted(targets, key=lambda t: (t.result["ok"], -t.result["rtt_ms"]))
+    for t in rows[:args.show]:
+        status = "ok" if t.result["ok"] else "FAIL"
+        server = "" if t.result["server_ms"] is None else f"{t.result['server_ms']:,}"
+        mark = " flapping" if t in flaps else (" cached" if t.cached else "")
+        print(f"{t.label[:48]:<48} {t.kind:<6} {len(t.datasources):>5} {status:<6} {server:>10} "
+              f"{t.result['rtt_ms']:>9,.0f}{mark}")
+    if len(rows) > args.show:
+        print(f"... {len(rows) - args.show} more")
+
+    by_host = defaultdict(list)
+    for t in targets:
+        by_host[t.host].append(t.result["rtt_ms"])
+    slow = sorted(by_host.items(), key=lambda kv: -np.percentile(kv[1], 95))[:10]
+    print(f"\n{'host':<40} {'endpoints':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for host, values in slow:
+        p50, p95 = np.percentile(values, [50, 95])
+        print(f"{host[:40]:<40} {len(values):>9} {p50:>9.0f} {p95:>9.0f}")
+
+    if failed:
+        print(f"\n{len(failed)} failing endpoints ({sum(len(t.datasources) for t in failed):,} datasources):")
+        for t in failed[:args.show]:
+            names = ", ".join(t.datasources[:5]) + (" ..." if len(t.datasources) > 5 else "")
+            print(f"  {t.label}: {t.result['message'][:120]}\n    {names}")
+    if flaps:
+        print(f"\n{len(flaps)} flapping endpoints (>= {args.flap_changes} status changes "
+              f"in the last {args.flap_window} results):")
+        for t in flaps:
+            history = "".join("+" if ok else "-" for _, ok in cache[cache_key(t)]["history"])
+            print(f"  {t.label}  {history}")
+
+    return {
+        "datasources": datasource_count, "endpoints": len(targets), "tested": tested,
+        "elapsed_s": elapsed, "skipped": {k: v for k, v in skipped.items()},
+        "results": [{"endpoint": t.label, "kind": t.kind, "host": t.host, "datasources": t.datasources,
+                     "cached": t.cached, "flapping": t in flaps, **t.result} for t in rows],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", help="DataSourceManagementService base URL")
+    parser.add_argument("--file", action="append", help="Datasource list export instead of the API")
+    parser.add_argument("--workers", type=int, default=32, help="Tests in flight in total")
+    parser.add_argument("--per-host", type=int, default=2, help="Tests in flight per host")
+    parser.add_argument("--host-gap", type=float, default=0.2, help="Seconds between starts on one host")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-test timeout in seconds")
+    parser.add_argument("--per-path", action="store_true",
+                        help="Test each remote path / Kafka topic, not just each host and login")
+    parser.add_argument("--tcp", action="store_true", help="TCP-connect FTP/HTTP sources from here")
+    parser.add_argument("--cache", default=DEFAULT_CACHE)
+    parser.add_argument("--ttl", type=float, default=600, help="Seconds a passing result is reused")
+    parser.add_argument("--ttl-failed", type=float, default=60, help="Seconds a failing result is reused")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached results")
+    parser.add_argument("--flap-window", type=int, default=10)
+    parser.add_argument("--flap-changes", type=int, default=3)
+    parser.add_argument("--every", type=float, default=0, help="Repeat the sweep every N seconds")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--show", type=int, default=25)
+    parser.add_argument("--json", help="Write the last sweep as JSON")
+    args = parser.parse_args()
+
+    if args.every:
+        # Each round retests whatever the previous round saw
+        args.ttl, args.ttl_failed = min(args.ttl, args.every), min(args.ttl_failed, args.every)
+    datasources = load_datasources(args)
+    cache = load_cache(args.cache)
+    result = None
+    try:
+        for round_no in range(args.rounds):
+            if round_no:
+                time.sleep(args.every)
+            targets, skipped = group_targets(datasources, args)
+            tested, elapsed = sweep(targets, args, cache)
+            save_cache(args.cache, cache)
+            result = report(targets, skipped, cache, tested, elapsed, args)
+    except KeyboardInterrupt:
+        save_cache(args.cache, cache)
+    if result and args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\nreport written to {args.json}")
+    return 1 if result and any(not r["ok"] for r in result["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""Corpus generator, golden outputs and throughput benchmark for the format converters.
+
+Works with the reference implementations in refconvert.py:
+
+- corpus   generates benchmark inputs: narrow transaction rows, wide rows
+           (200 columns), Hebrew/UTF-8 text with quotes and delimiters, nested
+           JSON/XML and large Excel sheets
+- golden   runs every applicable conversion over a corpus and writes the outputs
+           plus a manifest of SHA-256 hashes to compare service output against
+- compare  checks a service-produced file against its golden output
+- bench    measures records/s, MB/s and peak memory per conversion, for the
+           streaming reference and for a stage-by-stage model of the service
+           path (FileProcessorService read -> encode -> parse -> convert ->
+           serialize -> metadata; OutputService JObject parse -> JArray.ToString
+           -> Deserialize -> build -> stream -> string), so the report shows
+           which stage dominates for each format
+
+Usage:
+    python converter_bench.py corpus corpus/ --rows 100000
+    python converter_bench.py golden corpus/ golden/
+    python converter_bench.py compare golden/hebrew.csv_to_json.json service-output.json
+    python converter_bench.py bench corpus/ --json converter-bench.json
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import refconvert
+
+HEBREW_WORDS = ["שלום", "עסקה", "לקוח", "תשלום", "מאושר", "ממתין", "ירושלים", "תל אביב", "חיפה", "באר שבע",
+                "כרטיס אשראי", "העברה בנקאית", "מזומן", "שירותים", "קמעונאות"]
+STATUSES = ["Approved", "Pending", "Rejected"]
+CATEGORIES = ["Retail", "Services", "Online"]
+METHODS = ["Credit Card", "Bank Transfer", "Cash"]
+
+# Which conversions apply to which corpus file extension
+CONVERSIONS_BY_EXTENSION = {
+    ".csv": ["csv_to_json"],
+    ".xml": ["xml_to_json"],
+    ".xlsx": ["excel_to_json"],
+    ".json": ["json_to_json", "json_to_csv", "json_to_xml", "json_to_excel"],
+}
+OUTPUT_EXTENSION = {"csv_to_json": ".json", "xml_to_json": ".json", "excel_to_json": ".json",
+                    "json_to_json": ".json", "json_to_csv": ".csv", "json_to_xml": ".xml",
+                    "json_to_excel": ".xlsx"}
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def narrow_record(i, rng):
+    return {"TransactionId": f"TXN-{i:08d}", "CustomerName": f"Customer {rng.randint(1, 50000)}",
+            "Amount": f"{rng.randint(100, 999999) / 100:.2f}", "Date": "2025-12-14",
+            "Status": rng.choice(STATUSES), "Category": rng.choice(CATEGORIES),
+            "PaymentMethod": rng.choice(METHODS), "IsRecurring": rng.choice(["true", "false"])}
+
+
+def wide_record(i, rng, columns=200):
+    record = {"TransactionId": f"TXN-{i:08d}"}
+    for c in range(1, columns):
+        kind = c % 4
+        if kind == 0:
+            record[f"Metric{c:03d}"] = str(rng.randint(0, 100000))
+        elif kind == 1:
+            record[f"Ratio{c:03d}"] = f"{rng.random():.6f}"
+        elif kind == 2:
+            record[f"Flag{c:03d}"] = rng.choice(["True", "False"])
+        else:
+            record[f"Label{c:03d}"] = rng.choice(CATEGORIES) + f"-{rng.randint(1, 99)}"
+    return record
+
+
+def hebrew_record(i, rng):
+    words = " ".join(rng.choice(HEBREW_WORDS) for _ in range(rng.randint(2, 6)))
+    return {"TransactionId": f"TXN-{i:08d}", "CustomerName": f"{rng.choice(HEBREW_WORDS)} {i}",
+            "Description": f'{words}, "{rng.choice(HEBREW_WORDS)}" & <{rng.choice(HEBREW_WORDS)}>',
+            "City": rng.choice(HEBREW_WORDS[6:10]), "Amount": f"{rng.randint(1, 99999)},{rng.randint(10, 99)}",
+            "Notes": f"  {rng.choice(HEBREW_WORDS)}  " if i % 7 == 0 else rng.choice(HEBREW_WORDS)}
+
+
+def nested_record(i, rng):
+    return {"TransactionId": f"TXN-{i:08d}",
+            "Customer": {"Name": f"Customer {i}", "Address": {"City": rng.choice(HEBREW_WORDS[6:10]),
+                                                               "Zip": f"{rng.randint(10000, 99999)}"}},
+            "Amount": rng.randint(100, 999999) / 100,
+            "Items": [{"Sku": f"SKU-{rng.randint(1, 999)}", "Qty": rng.randint(1, 5)}
+                      for _ in range(rng.randint(1, 4))],
+            "Approved": rng.random() > 0.2}
+
+
+CASES = {
+    "narrow": (narrow_record, [".csv", ".xml", ".json", ".xlsx"]),
+    "wide": (wide_record, [".csv", ".json", ".xlsx"]),
+    "hebrew": (hebrew_record, [".csv", ".xml", ".json", ".xlsx"]),
+    "nested": (nested_record, [".xml", ".json"]),
+}
+
+
+def typed(record):
+    """Values as the CSV converter would type them, for the JSON corpus files"""
+    return {k: (refconvert.csv_value(v) if isinstance(v, str) else v) for k, v in record.items()}
+
+
+def write_xml_value(out, name, value, indent):
+    pad = "  " * indent
+    if isinstance(value, dict):
+        out.write(f"{pad}<{name}>\n")
+        for k, v in value.items():
+            write_xml_value(out, k, v, indent + 1)
+        out.write(f"{pad}</{name}>\n")
+    elif isinstance(value, list):
+        for v in value:
+            write_xml_value(out, name, v, indent)
+    else:
+        text = str(value).lower() if isinstance(value, bool) else str(value)
+        out.write(f"{pad}<{name}>{refconvert.xml_escape(text)}</{name}>\n")
+
+
+def build_corpus(directory, rows, cases, sheet_rows, seed=42):
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for case in cases:
+        factory, extensions = CASES[case]
+        for extension in extensions:
+            rng = random.Random(seed)
+            count = min(rows, sheet_rows) if extension == ".xlsx" else rows
+            path = os.path.join(directory, case + extension)
+            records = (factory(i, rng) for i in range(count))
+            if extension == ".csv":
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    writer = None
+                    for record in records:
+                        if writer is None:
+                            writer = csv.DictWriter(f, fieldnames=list(record))
+                            writer.writeheader()
+                        writer.writerow(record)
+            elif extension == ".json":
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("[\n")
+                    for i, record in enumerate(records):
+                        f.write((",\n" if i else "") + json.dumps(typed(record), ensure_ascii=False))
+                    f.write("\n]\n")
+            elif extension == ".xml":
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write('<?xml version="1.0" encoding="utf-8"?>\n<Transactions>\n')
+                    for record in records:
+                        write_xml_value(f, "Transaction", record, 1)
+                    f.write("</Transactions>\n")
+            elif extension == ".xlsx":
+                try:
+                    openpyxl = refconvert.require_openpyxl()
+                except SystemExit:
+                    print(f"  ⚠ skipping {path}: openpyxl not installed")
+                    continue
+                workbook = openpyxl.Workbook(write_only=True)
+                sheet = workbook.create_sheet("Sheet1")
+                header = None
+                for record in records:
+                    values = typed(record)
+                    if header is None:
+                        header = list(values)
+                        sheet.append(header)
+                    sheet.append([values[h] for h in header])
+                workbook.save(path)
+            written.append((path, count))
+            print(f"  ✓ {path} ({count:,} records, {os.path.getsize(path) / 1e6:,.1f} MB)")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Golden outputs and comparison
+# ---------------------------------------------------------------------------
+
+def corpus_jobs(directory):
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        for conversion in CONVERSIONS_BY_EXTENSION.get(extension, []):
+            jobs.append((os.path.join(directory, name), stem, extension, conversion))
+    return jobs
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cmd_corpus(args):
+    cases = args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"Unknown cases {unknown}; choose from {', '.join(CASES)}")
+    build_corpus(args.directory, args.rows, cases, args.sheet_rows)
+    return 0
+
+
+def cmd_golden(args):
+    os.makedirs(args.golden, exist_ok=True)
+    manifest = {}
+    for source, stem, extension, conversion in corpus_jobs(args.corpus):
+        target = os.path.join(args.golden, f"{stem}{extension.replace('.', '-')}.{conversion}{OUTPUT_EXTENSION[conversion]}")
+        try:
+            refconvert.CONVERSIONS[conversion](source, target)
+        except refconvert.ConversionError as e:
+            manifest[os.path.basename(target)] = {"source": os.path.basename(source), "error": str(e)}
+            print(f"  ✗ {conversion} {source}: {e} (the service rejects this input too)")
+            continue
+        except SystemExit as e:
+            print(f"  ⚠ {conversion} {source}: {e}")
+            continue
+        manifest[os.path.basename(target)] = {"source": os.path.basename(source), "conversion": conversion,
+                                              "sha256": sha256(target), "bytes": os.path.getsize(target)}
+        print(f"  ✓ {os.path.basename(target)}")
+    with open(os.path.join(args.golden, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Golden outputs and manifest.json written to {args.golden}")
+    return 0
+
+
+def excel_rows(path):
+    openpyxl = refconvert.require_openpyxl()
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    rows = [[("" if v is None else str(v)) for v in row] for row in workbook.worksheets[0].iter_rows(values_only=True)]
+    workbook.close()
+    return rows
+
+
+def first_difference(expected, actual):
+    for index, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return index, a, b
+    if len(expected) != len(actual):
+        index = min(len(expected), len(actual))
+        return index, expected[index] if index < len(expected) else "<end>", actual[index] if index < len(actual) else "<end>"
+    return None
+
+
+def cmd_compare(args):
+    """Exact byte match first; otherwise JSON is compared semantically and text line by line"""
+    if sha256(args.golden) == sha256(args.actual):
+        print("✅ identical")
+        return 0
+    extension = os.path.splitext(args.golden)[1].lower()
+    if extension == ".xlsx":
+        expected, actual = excel_rows(args.golden), excel_rows(args.actual)
+        difference = first_difference(expected, actual)
+        if difference is None:
+            print("✅ same cell values (workbook packaging differs)")
+            return 0
+        print(f"✗ row {difference[0] + 1}: expected {difference[1]} got {difference[2]}")
+        return 1
+    with open(args.golden, encoding="utf-8-sig") as f:
+        expected_text = f.read()
+    with open(args.actual, encoding="utf-8-sig") as f:
+        actual_text = f.read()
+    if extension == ".json":
+        expected_value, actual_value = json.loads(expected_text), json.loads(actual_text)
+        if expected_value == actual_value:
+            print("≈ same JSON value, different text (escaping, number format or whitespace)")
+            return 0
+        if isinstance(expected_value, list) and isinstance(actual_value, list):
+            difference = first_difference(expected_value, actual_value)
+            print(f"✗ record {difference[0]}: expected {json.dumps(difference[1], ensure_ascii=False)[:300]}")
+            print(f"  {'':>{len(str(difference[0])) + 8}} got {json.dumps(difference[2], ensure_ascii=False)[:300]}")
+        else:
+            print("✗ JSON values differ")
+        return 1
+    difference = first_difference(expected_text.splitlines(), actual_text.splitlines())
+    if difference is None:
+        print("≈ same lines, different line endings or BOM")
+        return 0
+    print(f"✗ line {difference[0] + 1}:\n  expected {difference[1]!r}\n  got      {difference[2]!r}")
+    return 1
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+class Stages:
+    """Accumulates wall time per named stage"""
+
+    def __init__(self):
+        self.timings = {}
+
+    def run(self, name, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - started
+        return result
+
+
+def service_file_processor(source, extension, stages):
+    """Model of FileDiscoveredEventConsumer + IFormatConverter (whole file in memory)"""
+    if extension == ".xlsx":
+        content = stages.run("read", lambda: open(source, "rb").read())
+        openpyxl = refconvert.require_openpyxl()
+        workbook = stages.run("parse", lambda: openpyxl.load_workbook(io.BytesIO(content), data_only=True))
+        rows = list(workbook.worksheets[0].iter_rows(values_only=True))
+        header = [str(h) for h in rows[0]] if rows else []
+        records = stages.run("convert", lambda: [{h: refconvert.excel_cell(v) for h, v in zip(header, row)}
+                                                 for row in rows[1:]])
+        json_text = stages.run("serialize", refconvert.stj_dumps, records)
+        stages.run("metadata", lambda: openpyxl.load_workbook(io.BytesIO(content)).worksheets[0].max_row)
+        return len(records), len(json_text)
+    text = stages.run("read", lambda: open(source, encoding="utf-8-sig").read())
+    data = stages.run("encode", lambda: text.encode("utf-8"))
+    if extension == ".csv":
+        rows = stages.run("parse", lambda: list(csv.DictReader(io.StringIO(data.decode("utf-8")))))
+        records = stages.run("convert", lambda: [{k: refconvert.csv_value(v or "") for k, v in r.items()} for r in rows])
+        json_text = stages.run("serialize", refconvert.stj_dumps, records)
+        stages.run("metadata", lambda: data.decode("utf-8").split("\n", 1)[0])
+        return len(records), len(json_text)
+    if extension == ".xml":
+        root = stages.run("parse", lambda: ET.fromstring(data))
+        value = stages.run("convert", refconvert.xml_object, root)
+        json_text = stages.run("serialize", refconvert.stj_dumps, value)
+        stages.run("metadata", lambda: ET.fromstring(data).tag)  # ExtractMetadataAsync parses again
+        return len(root), len(json_text)
+    value = stages.run("parse", lambda: json.loads(data))  # JsonDocument.Parse validation only
+    stages.run("metadata", lambda: None)
+    return (len(value) if isinstance(value, list) else 1), len(text)
+
+
+def service_output(source, conversion, stages):
+    """Model of FormatReconstructorService + IFormatReconstructor"""
+    text = stages.run("read", lambda: open(source, encoding="utf-8-sig").read())
+    records = stages.run("parse", lambda: json.loads(text))  # List<JObject>
+    json_string = stages.run("serialize", lambda: json.dumps(records, separators=(",", ":"), ensure_ascii=False))
+    raw = stages.run("reparse", refconvert.load_raw, json_string)  # Deserialize<List<Dictionary>>
+    if conversion == "json_to_csv":
+        def build():
+            out = io.StringIO()
+            header = list(raw[0]) if raw else []
+            out.write(",".join(header) + "\r\n")
+            for record in raw:
+                out.write(",".join(refconvert.csv_field(refconvert.json_element_string(record.get(h, "")), ",")
+                                   for h in header) + "\r\n")
+            return out
+        out = stages.run("build", build)
+    elif conversion == "json_to_xml":
+        def build():
+            out = io.StringIO()
+            for record in raw:
+                refconvert.xml_element("Item", record, 1, out)
+            return out
+        out = stages.run("build", build)
+    else:
+        openpyxl = refconvert.require_openpyxl()
+
+        def build():
+            workbook = openpyxl.Workbook()
+            sheet = workbook.active
+            header = list(raw[0]) if raw else []
+            sheet.append(header)
+            for record in raw:
+                sheet.append([refconvert.json_element_string(record[h]) if h in record else None for h in header])
+            out = io.BytesIO()
+            workbook.save(out)
+            return out
+        out = stages.run("build", build)
+    payload = stages.run("stream", lambda: out.getvalue().encode("utf-8") if isinstance(out, io.StringIO) else out.getvalue())
+    stages.run("to-string", lambda: payload.decode("utf-8", errors="replace"))  # StreamReader.ReadToEndAsync
+    return len(raw), len(payload)
+
+
+def bench_child(source, conversion, mode, output_dir):
+    """Runs in a fresh process; prints one JSON result line"""
+    extension = os.path.splitext(source)[1].lower()
+    stages = Stages()
+    # tracemalloc would slow allocation-heavy code several-fold; max RSS growth is the peak here
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == "reference":
+        target = os.path.join(output_dir, f"bench-{os.getpid()}{OUTPUT_EXTENSION[conversion]}")
+        records = refconvert.CONVERSIONS[conversion](source, target)
+        output_bytes = os.path.getsize(target)
+        os.unlink(target)
+    elif conversion.startswith("json_to_") and conversion != "json_to_json":
+        records, output_bytes = service_output(source, conversion, stages)
+    else:
+        records, output_bytes = service_file_processor(source, extension, stages)
+    elapsed = time.perf_counter() - started
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"source": os.path.basename(source), "conversion": conversion, "mode": mode,
+            "records": records, "inputBytes": os.path.getsize(source), "outputBytes": output_bytes,
+            "seconds": elapsed, "peakBytes": (max_rss_kb - baseline_kb) * 1024,
+            "maxRssKb": max_rss_kb, "stages": stages.timings}
+
+
+def cmd_bench(args):
+    results = []
+    for source, stem, extension, conversion in corpus_jobs(args.corpus):
+        if args.only and conversion not in args.only.split(","):
+            continue
+        for mode in ("reference", "service"):
+            command = [sys.executable, os.path.abspath(__file__), "_child", source, conversion, mode,
+                       "--output-dir", args.output_dir or os.path.dirname(os.path.abspath(source))]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                error = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+                print(f"  ✗ {stem}{extension} {conversion} {mode}: {error}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print_result(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+def print_result(r):
+    records = r["records"] or 1
+    line = (f"  {r['source']:<14} {r['conversion']:<14} {r['mode']:<9} "
+            f"{records / r['seconds']:>10,.0f} rec/s {r['inputBytes'] / 1e6 / r['seconds']:>7.1f} MB/s "
+            f"peak {r['peakBytes'] / 1e6:>7.1f} MB")
+    if r["stages"]:
+        total = sum(r["stages"].values()) or 1
+        top = sorted(r["stages"].items(), key=lambda kv: -kv[1])[:3]
+        line += "  [" + ", ".join(f"{name} {seconds / total:.0%}" for name, seconds in top) + "]"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    corpus = sub.add_parser("corpus", help="Generate benchmark inputs")
+    corpus.add_argument("directory")
+    corpus.add_argument("--rows", type=int, default=10000)
+    corpus.add_argument("--sheet-rows", type=int, default=100000, help="Cap for .xlsx files")
+    corpus.add_argument("--cases", default=",".join(CASES))
+    corpus.set_defaults(func=cmd_corpus)
+
+    golden = sub.add_parser("golden", help="Write reference outputs and a hash manifest")
+    golden.add_argument("corpus")
+    golden.add_argument("golden")
+    golden.set_defaults(func=cmd_golden)
+
+    compare = sub.add_parser("compare", help="Compare a service output with a golden output")
+    compare.add_argument("golden")
+    compare.add_argument("actual")
+    compare.set_defaults(func=cmd_compare)
+
+    bench = sub.add_parser("bench", help="Throughput and memory per conversion")
+    bench.add_argument("corpus")
+    bench.add_argument("--only", help="Comma-separated conversions")
+    bench.add_argument("--output-dir", help="Scratch directory for reference outputs")
+    bench.add_argument("--json")
+    bench.set_defaults(func=cmd_bench)
+
+    child = sub.add_parser("_child")
+    child.add_argument("source")
+    child.add_argument("conversion")
+    child.add_argument("mode")
+    child.add_argument("--output-dir", default=".")
+    child.set_defaults(func=lambda a: print(json.dumps(bench_child(a.source, a.conversion, a.mode, a.output_dir))) or 0)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
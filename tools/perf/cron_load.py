@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""Cron load-density simulator and jitter planner for datasource schedules.
+
+Loads every datasource's 6-field cron expression, computes all fire times over
+a horizon at one-second resolution, and reports how many polls start in the
+same second and how many FileDiscovery polls overlap. The planner then
+proposes jittered expressions that spread identical schedules across their
+period and applies them in bulk with bounded concurrency.
+
+Fire times are computed per distinct expression as NumPy masks over the whole
+horizon (second & minute & hour & day fields evaluated as array lookups), so
+10k datasources sharing a handful of expressions cost a handful of passes.
+
+Cron semantics follow SchedulingService: Unix 6-field expressions
+(sec min hour day-of-month month day-of-week) converted with the same rules
+as Shared/Utilities/CronExpressionConverter.cs, day-of-week 1-7 = SUN-SAT.
+Times are UTC.
+
+Usage:
+    python cron_load.py simulate --from-api
+    python cron_load.py simulate --synthetic 10000 --cron "0 */15 * * * *"
+    python cron_load.py plan --from-api --out jitter-plan.json
+    python cron_load.py apply jitter-plan.json --concurrency 8
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+FIELD_RANGES = [(0, 59), (0, 59), (0, 23), (1, 31), (1, 12), (1, 7)]
+MONTH_NAMES = {n: i + 1 for i, n in enumerate(
+    ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"])}
+DAY_NAMES = {n: i + 1 for i, n in enumerate(["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"])}
+DAY = 86400
+
+
+class CronError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Parsing (mirrors CronExpressionConverter + DataProcessingDataSource)
+# ---------------------------------------------------------------------------
+
+def convert_unix_to_quartz(unix_cron):
+    """Port of CronExpressionConverter.ConvertUnixToQuartz"""
+    if not unix_cron or not unix_cron.strip():
+        raise CronError("Cron expression cannot be empty")
+    parts = unix_cron.split()
+    if len(parts) != 6:
+        raise CronError(f"Unix cron must have 6 fields. Got: {len(parts)} fields in '{unix_cron}'")
+    dom, dow = parts[3], parts[5]
+    if dom == "*" and dow == "*":
+        parts[5] = "?"
+    elif dom not in ("*", "?") and dow == "*":
+        parts[5] = "?"
+    elif dow not in ("*", "?") and dom == "*":
+        parts[3] = "?"
+    return " ".join(parts)
+
+
+def normalize_cron(expression):
+    """Canonical spelling for comparisons: */N and 0/N fire alike, as do ? and *"""
+    fields = []
+    for field in (expression or "").split():
+        if field.startswith("*/"):
+            field = "0" + field[1:]
+        fields.append("*" if field == "?" else field)
+    return " ".join(fields)
+
+
+def same_schedule(a, b):
+    return normalize_cron(a) == normalize_cron(b)
+
+
+def effective_cron(datasource):
+    """Port of DataProcessingDataSource.GetEffectiveCronExpression"""
+    from ezapi import get_field
+
+    cron = get_field(datasource, "CronExpression")
+    if cron:
+        return cron
+    polling = get_field(datasource, "PollingRate") or "00:05:00"
+    total_minutes = int(_parse_timespan(polling) // 60)
+    if total_minutes < 1:
+        return "*/30 * * * * ?"
+    if total_minutes == 1:
+        return "0 * * * * ?"
+    if total_minutes < 60:
+        return f"0 */{total_minutes} * * * ?"
+    return f"0 0 */{total_minutes // 60} * * ?"
+
+
+def _parse_timespan(value):
+    """Seconds from a .NET TimeSpan string ([d.]hh:mm:ss[.fff])"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    days = 0
+    if "." in value.split(":")[0]:
+        day_part, value = value.split(".", 1)
+        days = int(day_part)
+    hours, minutes, seconds = value.split(":")
+    return days * DAY + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_field(text, index):
+    """Expand one Quartz field into the sorted list of allowed values"""
+    low, high = FIELD_RANGES[index]
+    names = MONTH_NAMES if index == 4 else DAY_NAMES if index == 5 else {}
+    if text in ("*", "?"):
+        return list(range(low, high + 1))
+    if any(c in text for c in "LW#"):
+        raise CronError(f"unsupported Quartz modifier in '{text}'")
+
+    def value(token):
+        token = token.upper()
+        if token in names:
+            return names[token]
+        number = int(token)
+        if not low <= number <= high:
+            raise CronError(f"value {number} out of range {low}-{high}")
+        return number
+
+    allowed = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise CronError(f"invalid step in '{text}'")
+        if part in ("*", "?"):
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = value(start_text), value(end_text)
+        else:
+            start = value(part)
+            end = high if step > 1 or "/" in text else start
+        allowed.update(range(start, end + 1, step))
+    return sorted(allowed)
+
+
+class Cron:
+    """Parsed 6-field expression in Quartz form"""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.quartz = convert_unix_to_quartz(expression)
+        self.fields = self.quartz.split()
+        self.values = [parse_field(f, i) for i, f in enumerate(self.fields)]
+
+    def fire_mask(self, calendar):
+        """Boolean mask over the calendar's seconds where this expression fires"""
+        masks = []
+        for index, key in enumerate(("second", "minute", "hour")):
+            lookup = np.zeros(60, dtype=bool)
+            lookup[self.values[index]] = True
+            masks.append(lookup[calendar[key]])
+        day = self._day_lookup(calendar)
+        return masks[0] & masks[1] & masks[2] & day
+
+    def _day_lookup(self, calendar):
+        month = np.zeros(13, dtype=bool)
+        month[self.values[4]] = True
+        dom_field, dow_field = self.fields[3], self.fields[5]
+        if dom_field == "?":
+            day = np.zeros(8, dtype=bool)
+            day[self.values[5]] = True
+            day_ok = day[calendar["dow"]]
+        else:
+            dom = np.zeros(32, dtype=bool)
+            dom[self.values[3]] = True
+            day_ok = dom[calendar["dom"]]
+            if dow_field not in ("?", "*"):
+                dow = np.zeros(8, dtype=bool)
+                dow[self.values[5]] = True
+                day_ok &= dow[calendar["dow"]]
+        return month[calendar["month"]] & day_ok
+
+
+def build_calendar(start, seconds):
+    """Per-second calendar field arrays for the horizon, computed once"""
+    offsets = np.arange(seconds, dtype=np.int64)
+    epoch = int(start.timestamp())
+    absolute = epoch + offsets
+    days = absolute // DAY
+    seconds_of_day = absolute % DAY
+    dates = np.array(days, dtype="datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    years = dates.astype("datetime64[Y]")
+    return {
+        "start": start,
+        "size": seconds,
+        "second": (seconds_of_day % 60).astype(np.int8),
+        "minute": (seconds_of_day // 60 % 60).astype(np.int8),
+        "hour": (seconds_of_day // 3600).astype(np.int8),
+        "dom": ((dates - months).astype(np.int64) + 1).astype(np.int8),
+        "month": ((months - years).astype(np.int64) + 1).astype(np.int8),
+        # 1970-01-01 was a Thursday (Quartz 5)
+        "dow": (((days + 4) % 7) + 1).astype(np.int8),
+    }
+
+
+def next_fires(expression, start, count=5, horizon=7 * DAY):
+    """Next `count` fire times after `start` (vectorized over the horizon)"""
+    calendar = build_calendar(start, horizon)
+    hits = np.flatnonzero(Cron(expression).fire_mask(calendar))[:count]
+    return [start + timedelta(seconds=int(s)) for s in hits]
+
+
+# ---------------------------------------------------------------------------
+# Loading schedules
+# ---------------------------------------------------------------------------
+
+def load_schedules(args):
+    """List of {id, name, cron, filePath} for active datasources"""
+    from ezapi import get_field
+
+    datasources = []
+    if args.from_api:
+        from ezapi import iter_pages, new_session, service_url
+        session = new_session("cron-load")
+        url = f"{args.api_url or service_url('datasource')}/api/v1/datasource"
+        datasources.extend(iter_pages(session, url, params={"isActive": "true"}, size=100))
+    for path in args.file or []:
+        with open(path, encoding="utf-8-sig") as f:
+            document = json.load(f)
+        from ezapi import page_items
+        items = document if isinstance(document, list) else page_items(document)[0]
+        datasources.extend(items)
+
+    schedules = []
+    for ds in datasources:
+        if get_field(ds, "IsActive") is False or get_field(ds, "IsDeleted"):
+            continue
+        schedules.append({
+            "id": get_field(ds, "ID") or get_field(ds, "Id"),
+            "name": get_field(ds, "Name", ""),
+            "cron": effective_cron(ds),
+            "filePath": get_field(ds, "FilePath", ""),
+            "datasource": ds,
+        })
+    for i in range(args.synthetic or 0):
+        schedules.append({"id": f"synthetic-{i}", "name": f"LoadTest-{i}", "cron": args.cron,
+                          "filePath": "", "datasource": None})
+    return schedules
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+def fire_histogram(schedules, calendar):
+    """Per-second count of fires across all schedules, plus parse errors"""
+    load = np.zeros(calendar["size"], dtype=np.int32)
+    groups = {}
+    for schedule in schedules:
+        groups.setdefault(schedule["cron"], []).append(schedule)
+    errors = []
+    for expression, members in groups.items():
+        try:
+            mask = Cron(expression).fire_mask(calendar)
+        except (CronError, ValueError) as e:
+            errors.extend((m, str(e)) for m in members)
+            continue
+        load += mask.astype(np.int32) * len(members)
+    return load, groups, errors
+
+
+def summarize(load, poll_seconds, files_per_poll):
+    """Peak/percentile statistics of fires and in-flight discovery polls"""
+    window = max(1, int(round(poll_seconds)))
+    in_flight = np.convolve(load, np.ones(window, dtype=np.int32))[:len(load)]
+    busy = load[load > 0]
+    per_minute = load[: len(load) // 60 * 60].reshape(-1, 60).sum(axis=1)
+    return {
+        "totalFires": int(load.sum()),
+        "secondsWithFires": int(busy.size),
+        "peakFiresPerSecond": int(load.max()) if load.size else 0,
+        "p99FiresPerSecond": float(np.percentile(busy, 99)) if busy.size else 0.0,
+        "meanFiresPerBusySecond": float(busy.mean()) if busy.size else 0.0,
+        "peakConcurrentPolls": int(in_flight.max()) if in_flight.size else 0,
+        "peakFilesPerMinute": int(per_minute.max() * files_per_poll) if per_minute.size else 0,
+        "meanFilesPerMinute": float(per_minute.mean() * files_per_poll) if per_minute.size else 0.0,
+        "peakToMeanRatio": float(load.max() / busy.mean()) if busy.size else 0.0,
+    }
+
+
+def print_summary(title, stats, load, calendar, top=5):
+    print(f"\n=== {title} ===")
+    print(f"  Fires in horizon:        {stats['totalFires']:,}")
+    print(f"  Seconds with a fire:     {stats['secondsWithFires']:,} / {calendar['size']:,}")
+    print(f"  Peak fires / second:     {stats['peakFiresPerSecond']:,}  (p99 {stats['p99FiresPerSecond']:.0f},"
+          f" mean {stats['meanFiresPerBusySecond']:.1f})")
+    print(f"  Peak concurrent polls:   {stats['peakConcurrentPolls']:,}")
+    print(f"  Peak files / minute:     {stats['peakFilesPerMinute']:,}  (mean {stats['meanFilesPerMinute']:.1f})")
+    if load.any():
+        busiest = np.argsort(load)[::-1][:top]
+        for second in sorted(busiest):
+            moment = calendar["start"] + timedelta(seconds=int(second))
+            print(f"    {moment:%Y-%m-%d %H:%M:%S}  {load[second]:>6,} fires")
+        print(f"  Fires by second-of-hour: {sparkline(fold(load, 3600))}")
+
+
+def fold(load, period):
+    usable = len(load) // period * period
+    if not usable:
+        return load
+    return load[:usable].reshape(-1, period).sum(axis=0)
+
+
+def sparkline(values, width=60):
+    bars = " ▁▂▃▄▅▆▇█"
+    values = np.asarray(values, dtype=float)
+    if values.size > width:
+        values = values[: values.size // width * width].reshape(width, -1).max(axis=1)
+    peak = values.max() or 1.0
+    return "".join(bars[int(round(v / peak * (len(bars) - 1)))] for v in values)
+
+
+# ---------------------------------------------------------------------------
+# Jitter planning
+# ---------------------------------------------------------------------------
+
+def shift_shape(cron):
+    """Describe how an expression can be phase-shifted without changing cadence.
+
+    Returns (period, phase, window_limit, render) or None. `render(phase)`
+    produces the 6-field Unix expression for a new phase within the period.
+    """
+    sec, minute, hour = cron.fields[0], cron.fields[1], cron.fields[2]
+    tail = [f.replace("?", "*") for f in cron.fields[3:]]
+
+    def stepped(field, span):
+        if field == "*":
+            return 0, 1
+        if "/" in field:
+            base, step = field.split("/", 1)
+            if base in ("*", "") or base.isdigit():
+                step = int(step)
+                if span % step == 0:
+                    return (0 if base in ("*", "") else int(base)), step
+        return None
+
+    if stepped(sec, 60) and not sec.isdigit() and stepped(sec, 60)[1] > 1:
+        start, step = stepped(sec, 60)
+        return step, start % step, None, lambda p: " ".join([f"{p}/{step}", minute, hour] + tail)
+    if not sec.isdigit():
+        return None
+    s = int(sec)
+    minute_step = stepped(minute, 60)
+    if minute_step and not minute.isdigit():
+        start, step = minute_step
+        period = 60 * step
+        return period, (start % step) * 60 + s, None, \
+            lambda p: " ".join([str(p % 60), f"{p // 60}/{step}" if step > 1 else "*", hour] + tail)
+    if not minute.isdigit():
+        return None
+    m = int(minute)
+    hour_step = stepped(hour, 24)
+    if hour_step and not hour.isdigit():
+        start, step = hour_step
+        period = 3600 * step
+        return period, (start % step) * 3600 + m * 60 + s, "limit", \
+            lambda p: " ".join([str(p % 60), str(p // 60 % 60),
+                                f"{p // 3600}/{step}" if step > 1 else "*"] + tail)
+    # Fixed hours: only move within the same hour
+    return 3600, m * 60 + s, "hour", \
+        lambda p: " ".join([str(p % 60), str(p // 60 % 60), hour] + tail)
+
+
+def plan_jitter(schedules, calendar, max_shift, min_group):
+    """Greedy water-filling: place each shiftable schedule at its cheapest phase"""
+    load, groups, _ = fire_histogram(schedules, calendar)
+    size = calendar["size"]
+    plan = []
+    placements = []
+    for expression, members in groups.items():
+        if len(members) < min_group:
+            continue
+        try:
+            cron = Cron(expression)
+        except (CronError, ValueError):
+            continue
+        shape = shift_shape(cron)
+        if shape is None:
+            continue
+        base_fires = np.flatnonzero(cron.fire_mask(calendar))
+        if base_fires.size == 0:
+            continue
+        load[base_fires] -= len(members)
+        placements.append((shape, base_fires, members, expression))
+
+    # Most frequent schedules first: they constrain the load curve the most
+    placements.sort(key=lambda p: (p[0][0], -len(p[2])))
+    for (period, phase, limit, render), base_fires, members, expression in placements:
+        if limit is None:
+            window = np.arange(period) - phase
+        elif limit == "limit":
+            window = np.arange(min(period, max_shift))
+        else:  # stay inside the hour
+            window = np.arange(min(max_shift, period - phase))
+        for member in members:
+            targets = (base_fires[:, None] + window[None, :]) % size
+            gathered = load[targets]
+            cost = gathered.max(axis=0).astype(np.int64) * size + gathered.sum(axis=0)
+            best = int(window[int(np.argmin(cost))])
+            load[(base_fires + best) % size] += 1
+            new_phase = (phase + best) % period
+            new_expression = render(new_phase)
+            if not same_schedule(new_expression, expression):
+                plan.append({"id": member["id"], "name": member["name"],
+                             "from": expression, "to": new_expression})
+            member["planned"] = new_expression
+    return plan
+
+
+# ---------------------------------------------------------------------------
+# Applying
+# ---------------------------------------------------------------------------
+
+def update_request_from(datasource, cron_expression):
+    """UpdateDataSourceRequest body that preserves every mapped field"""
+    from ezapi import get_field
+
+    extra = get_field(datasource, "AdditionalConfiguration") or {}
+    body = {
+        "Id": get_field(datasource, "ID") or get_field(datasource, "Id"),
+        "Name": get_field(datasource, "Name"),
+        "SupplierName": get_field(datasource, "SupplierName"),
+        "Category": get_field(datasource, "Category"),
+        "Description": get_field(datasource, "Description"),
+        "FilePath": get_field(datasource, "FilePath"),
+        "IsActive": get_field(datasource, "IsActive", True),
+        "FilePattern": get_field(datasource, "FilePattern"),
+        "CronExpression": cron_expression,
+        "ScheduleFrequency": get_field(datasource, "ScheduleFrequency"),
+        "ScheduleEnabled": get_field(datasource, "ScheduleEnabled"),
+        "JsonSchema": get_field(datasource, "JsonSchema"),
+        "SchemaVersion": get_field(datasource, "SchemaVersion"),
+        "Output": get_field(datasource, "Output"),
+    }
+    for key in ("ConfigurationSettings", "ValidationRules", "Metadata", "RetentionDays"):
+        if key in extra:
+            body[key] = extra[key]
+    return body
+
+
+def apply_plan(plan, base_url, concurrency, reschedule, dry_run):
+    """PUT each jittered expression, at most `concurrency` requests in flight"""
+    from ezapi import get_field, new_session, unwrap
+
+    session = new_session("cron-jitter")
+    adapter_size = max(concurrency, 10)
+    from requests.adapters import HTTPAdapter
+    session.mount("http://", HTTPAdapter(pool_connections=adapter_size, pool_maxsize=adapter_size))
+    session.mount("https://", HTTPAdapter(pool_connections=adapter_size, pool_maxsize=adapter_size))
+
+    def apply_one(entry):
+        url = f"{base_url}/api/v1/datasource/{entry['id']}"
+        if dry_run:
+            return entry, None
+        if reschedule:
+            # PUT /{id} updates CronExpression and publishes DataSourceUpdatedEvent,
+            # which is what makes SchedulingService re-register the trigger.
+            # It also rebuilds AdditionalConfiguration, so it must run first.
+            current = session.get(url, timeout=30)
+            current.raise_for_status()
+            datasource = unwrap(current.json())
+            if same_schedule(get_field(datasource, "CronExpression"), entry["to"]):
+                return entry, "unchanged"
+            update = session.put(url, json=update_request_from(datasource, entry["to"]), timeout=30)
+            if update.status_code != 200:
+                return entry, f"PUT /{entry['id']} -> {update.status_code}: {update.text[:200]}"
+        schedule_config = json.dumps({"cronExpression": entry["to"], "jitteredFrom": entry["from"]})
+        response = session.put(f"{url}/schedule", data=json.dumps(schedule_config), timeout=30)
+        if response.status_code != 200:
+            return entry, f"PUT /{entry['id']}/schedule -> {response.status_code}: {response.text[:200]}"
+        return entry, None
+
+    done = failed = unchanged = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(apply_one, entry) for entry in plan]
+        for future in as_completed(futures):
+            entry, error = future.result()
+            if error == "unchanged":
+                unchanged += 1
+            elif error:
+                failed += 1
+                print(f"✗ {entry['name']}: {error}")
+            else:
+                done += 1
+            if (done + failed + unchanged) % 100 == 0:
+                print(f"  … {done + failed + unchanged}/{len(plan)} ({done / (time.monotonic() - started):.0f}/s)")
+    print(f"\n{'Would apply' if dry_run else 'Applied'} {done} schedules, {failed} failed"
+          + (f", {unchanged} already on the planned schedule" if unchanged else ""))
+    return 1 if failed else 0
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def horizon_calendar(args):
+    start = datetime.fromisoformat(args.start) if args.start else \
+        datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return build_calendar(start, int(args.hours * 3600))
+
+
+def cmd_simulate(args):
+    schedules = load_schedules(args)
+    calendar = horizon_calendar(args)
+    load, groups, errors = fire_histogram(schedules, calendar)
+    for schedule, error in errors[:20]:
+        print(f"✗ {schedule['name']} '{schedule['cron']}': {error}")
+    print(f"Loaded {len(schedules):,} schedules, {len(groups):,} distinct expressions")
+    for expression, members in sorted(groups.items(), key=lambda g: -len(g[1]))[:10]:
+        print(f"  {len(members):>7,} × {expression}")
+    stats = summarize(load, args.poll_seconds, args.files_per_poll)
+    print_summary(f"Load over {args.hours:g}h from {calendar['start']:%Y-%m-%d %H:%M} UTC", stats, load, calendar)
+    if args.csv:
+        np.savetxt(args.csv, np.column_stack([np.arange(load.size), load]), fmt="%d",
+                   delimiter=",", header="second,fires", comments="")
+        print(f"Per-second histogram written to {args.csv}")
+    return 0
+
+
+def cmd_plan(args):
+    schedules = load_schedules(args)
+    calendar = horizon_calendar(args)
+    before, _, _ = fire_histogram(schedules, calendar)
+    plan = plan_jitter(schedules, calendar, args.max_shift, args.min_group)
+    after, _, _ = fire_histogram(
+        [dict(s, cron=s.get("planned", s["cron"])) for s in schedules], calendar)
+    before_stats = summarize(before, args.poll_seconds, args.files_per_poll)
+    after_stats = summarize(after, args.poll_seconds, args.files_per_poll)
+    print_summary("Before jitter", before_stats, before, calendar)
+    print_summary("After jitter", after_stats, after, calendar)
+    print(f"\n{len(plan):,} of {len(schedules):,} schedules change; peak fires/s "
+          f"{before_stats['peakFiresPerSecond']:,} → {after_stats['peakFiresPerSecond']:,}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"generatedAt": datetime.now(timezone.utc).isoformat(), "before": before_stats,
+                       "after": after_stats, "changes": plan}, f, ensure_ascii=False, indent=2)
+        print(f"Plan written to {args.out}")
+    return 0
+
+
+def cmd_apply(args):
+    from ezapi import service_url
+
+    with open(args.plan, encoding="utf-8") as f:
+        plan = json.load(f)["changes"]
+    # Synthetic and id-less entries cannot be PUT; older plans may hold no-op rewrites
+    plan = [p for p in plan if p.get("id") and not p["id"].startswith("synthetic-")
+            and not same_schedule(p["from"], p["to"])]
+    return apply_plan(plan, args.api_url or service_url("datasource"), args.concurrency,
+                      not args.schedule_only, args.dry_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--api-url", default=None, help="DataSourceManagementService base URL")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in (("simulate", cmd_simulate, "Per-second fire histogram over a horizon"),
+                                  ("plan", cmd_plan, "Propose jittered expressions that flatten peaks")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--from-api", action="store_true", help="Load active datasources from the API")
+        p.add_argument("--file", action="append", help="Datasource list JSON (API response or array)")
+        p.add_argument("--synthetic", type=int, default=0, help="Add N synthetic datasources using --cron")
+        p.add_argument("--cron", default="0 */15 * * * *", help="Cron for synthetic datasources")
+        p.add_argument("--start", help="Horizon start (ISO 8601, default today 00:00 UTC)")
+        p.add_argument("--hours", type=float, default=24, help="Horizon length in hours")
+        p.add_argument("--poll-seconds", type=float, default=2.0, help="Duration of one discovery poll")
+        p.add_argument("--files-per-poll", type=float, default=1.0, help="Files found per poll on average")
+        p.set_defaults(func=func)
+        if name == "simulate":
+            p.add_argument("--csv", help="Write the per-second histogram to CSV")
+        else:
+            p.add_argument("--max-shift", type=int, default=900,
+                           help="Max seconds to move hourly-or-slower schedules")
+            p.add_argument("--min-group", type=int, default=2,
+                           help="Only jitter expressions shared by at least this many datasources")
+            p.add_argument("--out", help="Write the plan JSON here")
+
+    apply = sub.add_parser("apply", help="Apply a plan with bounded concurrency")
+    apply.add_argument("plan")
+    apply.add_argument("--concurrency", type=int, default=8)
+    apply.add_argument("--schedule-only", action="store_true",
+                       help="Only PUT /{id}/schedule (stores the config, does not reschedule)")
+    apply.add_argument("--dry-run", action="store_true")
+    apply.set_defaults(func=cmd_apply)
+
+    args = parser.parse_args()
+    if getattr(args, "api_url", None):
+        args.api_url = args.api_url.rstrip("/")
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""Streaming data profiler with sketches for schema, filePattern and label design.
+
+Reads a partner drop (CSV, JSON/NDJSON, XML, Excel, any mix of files,
+folders and globs) once, with bounded memory, and profiles every field. Values are
+buffered per column (--chunk values in total) and folded into fixed-size sketches,
+so memory depends on the number of fields, not on the size of the drop:
+
+- type histogram (integer, number, boolean, string, null) and null/blank ratios
+- string formats (date-time, date, email, uuid), checked on every value
+- HyperLogLog distinct count (--hll-precision 14: 16 KB per field, about 0.8%
+  error)
+- t-digest quantiles of numbers and string lengths (--compression 200)
+- top-k values with Misra-Gries (--top; counts are lower bounds with a known
+  error)
+
+All three sketches merge, so --workers profiles the files of a drop in parallel
+processes and combines the results. One core profiles about 3.5 MB/s of CSV
+(1.1M records, 76 MB in 21-23 s), so a 50 GB drop takes about 4 hours without
+--workers.
+
+CSV and XML values are typed the way CsvToJsonConverter and XmlToJsonConverter
+type them before ValidationService sees them, so the draft schema matches what
+is validated. The profiler also flags what that conversion does to the data:
+
+- codes with leading zeros become numbers
+- blank cells stay "" strings in numeric columns
+- long integers turn into doubles
+
+It then proposes:
+
+- a draft jsonSchema (types, required, formats, small enums) to paste into
+  the datasource
+- a filePattern for the file names in the drop
+- metric label advice: fields with more than --label-max distinct values are
+  flagged before they become Prometheus labels (see label_cardinality.py)
+
+Usage:
+    python data_profile.py /mnt/partner-drop/orders/
+    python data_profile.py 'drop/*.csv' --schema-out orders.schema.json --json profile.json
+    python data_profile.py huge.ndjson --limit 1000000 --top 20
+    python data_profile.py '/mnt/archive/2025-*/' --workers 8 --progress
+    python data_profile.py sample-data/ --raw        # types as stored, without converter coercion
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from reconcile import READERS, expand_paths
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS = {
+    "date-time": re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$"),
+    "date": re.compile(r"^\d{4}-\d{2}-\d{2}$"),
+    "email": re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+    "uuid": re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"),
+}
+JSON_TYPES = {int: "integer", float: "number", bool: "boolean", str: "string", type(None): "null"}
+INT32 = 2 ** 31
+EXACT_DOUBLE = 2 ** 53
+
+
+# ---------------------------------------------------------------------------
+# Converter coercion (what the validated JSON holds)
+# ---------------------------------------------------------------------------
+
+# Approximates .NET NumberStyles.Any with the invariant culture: surrounding
+# blanks, sign before or after, parentheses, thousands commas, exponent
+NUMBER_RE = re.compile(r"^\(?[+-]?(\d[\d,]*\.?\d*|\.\d+)([eE][+-]?\d+)?[+-]?\)?$")
+LEADING_ZERO_RE = re.compile(r"^[+-]?0\d")
+
+
+def parse_number(text):
+    stripped = text.strip()
+    if not NUMBER_RE.match(stripped):
+        return None
+    negative = stripped.startswith("(") or stripped.startswith("-") or stripped.endswith("-")
+    digits = stripped.strip("()+-").replace(",", "")
+    try:
+        value = float(digits)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def coerce_csv(text):
+    """CsvToJsonConverter.ConvertTypes -> (value, what the conversion lost or None)"""
+    number = parse_number(text)
+    if number is not None:
+        note = "leadingZeros" if LEADING_ZERO_RE.match(text.strip()) and "." not in text else None
+        if "." in text or "," in text:
+            return number, note
+        if -INT32 <= number < INT32:
+            return int(number), note
+        if math.isinf(number):
+            return text, "overflow"
+        return number, "precisionLost" if abs(number) >= EXACT_DOUBLE else note
+    lowered = text.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true", None
+    return text, None
+
+
+def coerce_xml(text):
+    """XmlToJsonConverter.ParseValue: whole int32 decimals become int, others decimal"""
+    if not text:
+        return text, None
+    number = parse_number(text)
+    if number is not None:
+        note = "leadingZeros" if LEADING_ZERO_RE.match(text.strip()) and "." not in text else None
+        return (int(number) if number.is_integer() and -INT32 <= number < INT32 else number), note
+    lowered = text.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true", None
+    return text, None
+
+
+def excel_text(value):
+    """Cell types JSON has no name for are serialized as text (DateTime as ISO 8601)"""
+    if value.__class__ in JSON_TYPES:
+        return value
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def flatten(record, prefix="", out=None):
+    """(path, value) pairs; array elements share the path name[]"""
+    out = [] if out is None else out
+    if isinstance(record, dict):
+        for key, value in record.items():
+            flatten(value, f"{prefix}{key}.", out)
+    elif isinstance(record, list):
+        for value in record:
+            flatten(value, prefix[:-1] + "[].", out)
+    else:
+        out.append((prefix[:-1], record))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Sketches
+# ---------------------------------------------------------------------------
+
+def mix64(hashes):
+    """splitmix64 finalizer: spreads Python's hash() (identity for small ints) over 64 bits"""
+    with np.errstate(over="ignore"):
+        z = hashes.astype(np.uint64)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    def __init__(self, precision=14):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        p = np.uint64(self.p)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = (hashes << p) >> np.uint64(11)  # 53 bits: exact as float64
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, 64 - self.p + 1, 54 - exponent).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+
+class TDigest:
+    """Merging t-digest (k1 scale), compressed with numpy a buffer at a time"""
+
+    def __init__(self, compression=200):
+        self.delta = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []  # (values, weights) not yet compressed
+        self.buffered = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values, weights=None):
+        if len(values):
+            values = np.asarray(values, dtype=np.float64)
+            self.buffer.append((values, np.ones(len(values)) if weights is None else weights))
+            self.buffered += len(values)
+            self.count += len(values) if weights is None else int(weights.sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            if self.buffered > 20 * self.delta:
+                self.compress()
+
+    def merge(self, other):
+        other.compress()
+        count = self.count + other.count
+        self.add(other.means, other.weights)
+        self.count = count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    def compress(self):
+        if not self.buffer:
+            return
+        means = np.concatenate([self.means] + [v for v, _ in self.buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self.buffer])
+        self.buffer, self.buffered = [], 0
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        left = (np.cumsum(weights) - weights) / total
+        # k1(q) = delta / (2 pi) * asin(2q - 1): points whose left edge falls in the same unit of k merge
+        cluster = np.floor(self.delta / (2 * math.pi) * np.arcsin(2 * left - 1)).astype(np.int64)
+        cluster -= cluster[0]
+        w = np.bincount(cluster, weights=weights)
+        m = np.bincount(cluster, weights=weights * means)
+        keep = w > 0
+        self.weights, self.means = w[keep], m[keep] / w[keep]
+
+    def quantile(self, q):
+        self.compress()
+        if not self.count:
+            return math.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        return float(np.interp(q, np.concatenate([[0], centers, [1]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+
+class TopK:
+    """Misra-Gries heavy hitters, merged a chunk Counter at a time"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = Counter()
+        self.error = 0  # every count is at most this much too low
+
+    def add(self, counter):
+        self.counts.update(counter)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.error += cut
+            self.counts = Counter({k: c - cut for k, c in self.counts.items() if c > cut})
+
+    def merge(self, other):
+        self.error += other.error
+        self.add(other.counts)
+
+    def top(self, n):
+        return self.counts.most_common(n)
+
+
+# ---------------------------------------------------------------------------
+# Field profile
+# ---------------------------------------------------------------------------
+
+class FieldProfile:
+    def __init__(self, path, args):
+        self.path = path
+        self.records = 0  # records where the field appears
+        self.values = 0
+        self.types = Counter()
+        self.blanks = 0
+        self.formats = Counter()
+        self.candidates = set(FORMATS)
+        self.strings = 0
+        self.hll = HyperLogLog(args.hll_precision)
+        self.numbers = TDigest(args.compression)
+        self.lengths = TDigest(args.compression)
+        self.top = TopK(args.top * 50)
+        self.flags = Counter()
+
+    def update(self, values, records):
+        self.records += records
+        self.values += len(values)
+        kinds = [JSON_TYPES.get(type(v), "string") for v in values]
+        self.types.update(kinds)
+        numbers = [v for v, k in zip(values, kinds) if k in ("integer", "number")]
+        strings = [v for v, k in zip(values, kinds) if k == "string"]
+        self.numbers.add(numbers)
+        if strings:
+            self.strings += len(strings)
+            self.blanks += sum(1 for s in strings if not s.strip())
+            self.lengths.add([len(s) for s in strings])
+            for name in list(self.candidates):
+                self.formats[name] += len(list(filter(FORMATS[name].match, strings)))
+                if self.formats[name] < 0.95 * (self.strings - self.blanks):
+                    self.candidates.discard(name)  # stop paying for formats that clearly do not apply
+        present = [v for v in values if v is not None]
+        if present:
+            self.hll.add_hashes(mix64(np.fromiter(map(hash, present), dtype=np.int64, count=len(present))))
+            self.top.add(Counter(present))
+
+    def merge(self, other):
+        for name in ("records", "values", "blanks", "strings"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.types.update(other.types)
+        self.formats.update(other.formats)
+        self.candidates &= other.candidates
+        self.flags.update(other.flags)
+        self.hll.merge(other.hll)
+        self.numbers.merge(other.numbers)
+        self.lengths.merge(other.lengths)
+        self.top.merge(other.top)
+
+    # --- derived figures ---
+
+    def distinct(self):
+        return min(self.hll.estimate(), self.values - self.types["null"])
+
+    def main_type(self):
+        typed = Counter({t: c for t, c in self.types.items() if t != "null"})
+        if not typed:
+            return "null"
+        if set(typed) <= {"integer", "number"}:
+            return "integer" if "number" not in typed else "number"
+        if self.blanks and set(typed) - {"string"} and typed["string"] == self.blanks:
+            # numeric or boolean column whose blanks stay "" after conversion
+            return max((t for t in typed if t != "string"), key=typed.get)
+        return typed.most_common(1)[0][0]
+
+    def format(self):
+        nonblank = self.strings - self.blanks
+        for name in FORMATS:
+            if nonblank and name in self.candidates and self.formats[name] >= 0.999 * nonblank:
+                return name
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+
+def file_pattern(names):
+    """Glob per family of file names: digit runs become *"""
+    families = Counter(re.sub(r"\d+", "*", name) for name in names)
+    return families.most_common()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def coerce_column(values, coerce, flags):
+    """Converter typing for one chunk of a column; repeated strings are typed once"""
+    typed = {}
+    out = []
+    for value in values:
+        if value.__class__ is str:
+            hit = typed.get(value)
+            if hit is None:
+                hit = typed[value] = coerce(value)
+            value, note = hit
+            if note:
+                flags[note] += 1
+        out.append(value)
+    return out
+
+
+def profile_file(path, args, limit=0):
+    """Profile one file; the result merges into others with merge_into()"""
+    fields = {}
+    overflow = Counter()
+    total = 0
+
+    def flush(columns, repeats, coerce):
+        for name, values in columns.items():
+            field = fields.get(name)
+            if field is None:
+                if len(fields) >= args.max_fields:
+                    overflow[name.split(".")[0]] += len(values)
+                    continue
+                field = fields[name] = FieldProfile(name, args)
+            if coerce:
+                values = coerce_column(values, coerce, field.flags)
+            elif ext == ".xlsx":
+                values = [excel_text(v) for v in values]
+            field.update(values, len(values) - repeats[name])
+
+    ext = os.path.splitext(path)[1].lower()
+    coerce = None if args.raw else {".csv": coerce_csv, ".xml": coerce_xml}.get(ext)
+    flat = ext in (".csv", ".xlsx")
+    # repeats: values beyond the first of a path within one record (array elements),
+    # so presence per record is len(values) - repeats without a set per record
+    columns, repeats, pending = defaultdict(list), Counter(), 0
+    reported = 0
+    for record in READERS[ext](path):
+        if flat or isinstance(record, dict) and not any(isinstance(v, (dict, list)) for v in record.values()):
+            for name, value in record.items():
+                columns[name].append(value)
+            pending += len(record)
+        else:
+            pairs = flatten(record)
+            for name, value in pairs:
+                columns[name].append(value)
+            if len(pairs) > 1:
+                counts = Counter(name for name, _ in pairs)
+                repeats.update({name: n - 1 for name, n in counts.items() if n > 1})
+            pending += len(pairs)
+        total += 1
+        if limit and total >= limit:
+            break
+        if pending >= args.chunk:
+            flush(columns, repeats, coerce)
+            columns, repeats, pending = defaultdict(list), Counter(), 0
+            if args.progress and total >= reported + 500000:
+                reported = total
+                print(f"  {os.path.basename(path)}: {total:,} records", file=sys.stderr)
+    flush(columns, repeats, coerce)
+    return {"fields": fields, "records": total, "overflow": overflow, "bytes": os.path.getsize(path)}
+
+
+def merge_into(result, part, args):
+    result["records"] += part["records"]
+    result["bytes"] += part["bytes"]
+    result["files"] += 1
+    result["overflow"].update(part["overflow"])
+    for name, field in part["fields"].items():
+        if name in result["fields"]:
+            result["fields"][name].merge(field)
+        elif len(result["fields"]) < args.max_fields:
+            result["fields"][name] = field
+        else:
+            result["overflow"][name.split(".")[0]] += field.values
+
+
+def _profile_worker(job):
+    path, args = job
+    return profile_file(path, args, args.limit)
+
+
+def profile(paths, args):
+    started = time.perf_counter()
+    result = {"fields": {}, "records": 0, "overflow": Counter(), "bytes": 0, "files": 0}
+    supported = [p for p in paths if os.path.splitext(p)[1].lower() in READERS]
+    for path in sorted(set(paths) - set(supported)):
+        print(f"  ⚠ skipping {path}: unsupported format", file=sys.stderr)
+    if args.workers > 1 and len(supported) > 1:
+        # str hashes are salted per process; spawned workers read the seed at startup
+        # (forked ones inherit the parent's), so their HyperLogLogs merge consistently
+        os.environ.setdefault("PYTHONHASHSEED", "0")
+        with multiprocessing.Pool(min(args.workers, len(supported))) as pool:
+            for part in pool.imap_unordered(_profile_worker, [(p, args) for p in supported]):
+                merge_into(result, part, args)
+                if args.progress:
+                    print(f"  {result['records']:,} records", file=sys.stderr)
+    else:
+        for path in supported:
+            remaining = args.limit - result["records"] if args.limit else 0
+            merge_into(result, profile_file(path, args, remaining), args)
+            if args.limit and result["records"] >= args.limit:
+                break
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Proposals
+# ---------------------------------------------------------------------------
+
+def field_schema(field, args):
+    """Draft for one field that accepts everything observed, including blanks, nulls and stray types"""
+    kind = field.main_type()
+    types = [kind if kind != "null" else "string"]
+    types += [t for t, _ in field.types.most_common() if t not in types and t != "null"]
+    if "number" in types and "integer" in types:
+        types.remove("integer")
+    if field.types["null"]:
+        types.append("null")
+    schema = {"type": types[0] if len(types) == 1 else types}
+    if kind == "string":
+        fmt = field.format()
+        top = field.top.top(args.enum_max + 1)
+        if (args.enum_max and field.distinct() <= args.enum_max and field.top.error == 0
+                and len(top) <= args.enum_max and field.records >= 20 * len(top)):
+            schema["enum"] = sorted(v for v, _ in top if isinstance(v, str))  # keeps "" when blanks occur
+            if field.types["null"]:
+                schema["enum"].append(None)
+        elif fmt and field.blanks:
+            schema["anyOf"] = [{"format": fmt}, {"maxLength": 0}]
+        elif fmt:
+            schema["format"] = fmt
+        elif args.bounds and field.lengths.count:
+            schema["maxLength"] = int(field.lengths.max)
+    elif kind in ("integer", "number") and args.bounds:
+        cast = int if kind == "integer" else float
+        schema["minimum"] = cast(field.numbers.min)
+        schema["maximum"] = cast(field.numbers.max)
+    return schema
+
+
+def draft_schema(result, args):
+    """Nested draft-07 schema from the dotted paths"""
+    root = {"$schema": "http://json-schema.org/draft-07/schema#", "type": "object", "properties": {},
+            "required": []}
+    records = result["records"]
+    for path in sorted(result["fields"]):
+        field = result["fields"][path]
+        node, parent_records = root, records
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            array = part.endswith("[]")
+            name = part[:-2] if array else part
+            last = depth == len(parts) - 1
+            props = node.setdefault("properties", {})
+            if name not in props:
+                if last:
+                    leaf = field_schema(field, args)
+                    props[name] = {"type": "array", "items": leaf} if array else leaf
+                else:
+                    child = {"type": "object", "properties": {}}
+                    props[name] = {"type": "array", "items": child} if array else child
+            target = props[name]
+            if last and depth == 0 and not array:
+                complete = field.records >= parent_records and not field.types["null"] and not field.blanks
+                if complete:
+                    node.setdefault("required", []).append(name)
+            node = target["items"] if target.get("type") == "array" else target
+    return root
+
+
+def label_advice(field, args):
+    kind = field.main_type()
+    distinct = field.distinct()
+    present = field.values - field.types["null"]
+    if kind in ("integer", "number") and distinct > args.label_max:
+        return "value, not a label"
+    if present and distinct >= 0.9 * present and present > 100:
+        return "identifier: never a label"
+    if distinct > args.label_max * 20:
+        return "too many values for a label"
+    if distinct > args.label_max:
+        return f"only with relabeling (> {args.label_max})"
+    return "ok as label"
+
+
+def quantile_text(value):
+    return "-" if math.isnan(value) else f"{value:.4g}"
+
+
+def json_safe(value):
+    """Replace NaN and infinities (empty sketches, 1e400 in JSON input) with null"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
+
+def print_report(result, paths, args):
+    fields = result["fields"]
+    records = result["records"]
+    mb = result["bytes"] / 1024 / 1024
+    rate = records / max(result["seconds"], 1e-9)
+    peak = peak_rss_mb()
+    throughput = "" if args.limit else f", {mb / max(result['seconds'], 1e-9):,.1f} MB/s"
+    print(f"\n{records:,} records from {result['files']} files ({mb:,.1f} MB) in {result['seconds']:.1f}s: "
+          f"{rate:,.0f} records/s{throughput}" + (f", peak RSS {peak:,.0f} MB" if peak else ""))
+    if not fields:
+        return
+    width = min(40, max(len(p) for p in fields))
+    print(f"\n{'field':<{width}} {'present':>8} {'null':>6} {'blank':>6} {'type':<10} {'distinct':>10}  "
+          f"{'p50':>10} {'p99':>10}  top values / label")
+    for path in sorted(fields):
+        f = fields[path]
+        kind = f.main_type()
+        mixed = len([t for t in f.types if t != "null"]) > 1
+        type_text = kind + ("*" if mixed else "")
+        if f.format():
+            type_text = f.format()
+        if kind in ("integer", "number"):
+            p50, p99 = f.numbers.quantile(0.5), f.numbers.quantile(0.99)
+        else:
+            p50, p99 = f.lengths.quantile(0.5), f.lengths.quantile(0.99)
+        top = ", ".join(f"{str(v)[:16]}×{c}" for v, c in f.top.top(3))
+        print(f"{path[:width]:<{width}} {f.records / records:>8.1%} {f.types['null'] / max(1, f.values):>6.1%} "
+              f"{f.blanks / max(1, f.values):>6.1%} {type_text:<10} {f.distinct():>10,.0f}  "
+              f"{quantile_text(p50):>10} {quantile_text(p99):>10}  {top}  [{label_advice(f, args)}]")
+    print("  (p50/p99: values for numbers, lengths for strings; * = mixed types)")
+
+    warnings = []
+    for path, f in sorted(fields.items()):
+        if f.flags["leadingZeros"]:
+            warnings.append(f"{path}: {f.flags['leadingZeros']:,} codes with leading zeros are turned into numbers "
+                            f"by the converter (e.g. 00123 -> 123)")
+        if f.flags["overflow"]:
+            warnings.append(f"{path}: {f.flags['overflow']:,} values such as 12e345 (hex ids?) overflow a double; "
+                            f"they are kept as strings here")
+        if f.flags["precisionLost"]:
+            warnings.append(f"{path}: {f.flags['precisionLost']:,} integers beyond 2^53 become doubles and lose digits")
+        typed = set(f.types) - {"null"}
+        if f.blanks and typed - {"string"}:
+            warnings.append(f"{path}: {f.blanks:,} blank cells stay \"\" next to {'/'.join(sorted(typed - {'string'}))} "
+                            f"values; the draft allows string, or fix the feed")
+        elif len(typed) > 1:
+            warnings.append(f"{path}: mixed types {dict(f.types)}")
+    for prefix, count in result["overflow"].most_common(5):
+        warnings.append(f"{prefix}.*: more than --max-fields {args.max_fields} distinct paths ({count:,} values "
+                        f"not profiled); the keys look like data (a map), not a schema")
+    if warnings:
+        print("\nConversion and typing:")
+        for text in warnings:
+            print(f"  ⚠ {text}")
+
+    patterns = file_pattern(os.path.basename(p) for p in paths)
+    if patterns:
+        print("\nfilePattern: " + ", ".join(f"{pattern} ({count} files)" for pattern, count in patterns[:5]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Files, folders or globs")
+    parser.add_argument("--raw", action="store_true", help="Profile values as stored, without converter typing")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many records")
+    parser.add_argument("--chunk", type=int, default=200000,
+                        help="Values buffered per sketch update (bounds memory for wide records)")
+    parser.add_argument("--max-fields", type=int, default=2000, help="Stop adding new field paths after this many")
+    parser.add_argument("--hll-precision", type=int, default=14, choices=range(8, 19), metavar="8..18")
+    parser.add_argument("--compression", type=int, default=200, help="t-digest compression")
+    parser.add_argument("--top", type=int, default=10, help="Top values kept per field (x50 tracked)")
+    parser.add_argument("--enum-max", type=int, default=12, help="Propose an enum up to this many values (0: never)")
+    parser.add_argument("--bounds", action="store_true", help="Put observed minimum/maximum into the draft")
+    parser.add_argument("--label-max", type=int, default=50, help="Distinct values above which a label is flagged")
+    parser.add_argument("--schema-out", help="Write the draft jsonSchema here")
+    parser.add_argument("--json", help="Write the field profiles as JSON")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Profile files in parallel processes and merge the sketches (--limit then applies per file)")
+    parser.add_argument("--progress", action="store_true")
+    args = parser.parse_args()
+
+    paths = expand_paths(args.inputs)
+    if not paths:
+        print("✗ no input files")
+        return 1
+    result = profile(paths, args)
+    print_report(result, paths, args)
+    schema = draft_schema(result, args)
+    if args.schema_out:
+        with open(args.schema_out, "w", encoding="utf-8") as f:
+            json.dump(json_safe(schema), f, indent=2, ensure_ascii=False, allow_nan=False)
+        print(f"\nDraft jsonSchema written to {args.schema_out}")
+    else:
+        print("\nDraft jsonSchema (--schema-out to save):")
+        print(json.dumps(json_safe(schema), indent=2, ensure_ascii=False, allow_nan=False))
+    if args.json:
+        report = {"records": result["records"], "files": len(paths), "seconds": result["seconds"],
+                  "filePatterns": dict(file_pattern(os.path.basename(p) for p in paths)), "fields": {}}
+        for path, f in sorted(result["fields"].items()):
+            numeric = f.main_type() in ("integer", "number")
+            sketch = f.numbers if numeric else f.lengths
+            report["fields"][path] = {
+                "presentPct": 100.0 * f.records / max(1, result["records"]), "types": dict(f.types),
+                "blanks": f.blanks, "format": f.format(), "distinct": round(f.distinct()),
+                "quantiles": {q: sketch.quantile(q / 100) for q in (1, 50, 90, 99)} if sketch.count else {},
+                "of": "value" if numeric else "length",
+                "top": [[v, c] for v, c in f.top.top(args.top)], "topError": f.top.error,
+                "label": label_advice(f, args), "conversion": dict(f.flags)}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(json_safe(report), f, indent=2, ensure_ascii=False, allow_nan=False, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
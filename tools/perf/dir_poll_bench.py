@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""Directory-polling benchmark suite for FileDiscoveryService-scale folders.
+
+Builds synthetic drop trees (1k-1M files, flat or nested like
+/mnt/external-test-data/LoadTest-10000/batch-N) and measures how long each
+discovery strategy takes, how many filesystem calls it issues and how much
+memory it needs:
+
+- scandir    full recursive os.scandir walk, every entry stat'ed
+- pattern    walk filtered by a FilePattern glob before stat (what
+             LocalFileConnector.EnumerateFiles + GetFileMetadata does)
+- watermark  incremental scan: skip directories whose mtime is older than the
+             last poll, stat only entries in changed directories
+- inotify    kernel events (Linux): watch setup cost and time until every
+             dropped file has been reported
+
+Each strategy runs in a fresh child process so peak RSS is its own. Timed
+runs never go through strace. When `strace` is on PATH two more untimed
+children run under `strace -c -f`, one doing a single pass and one doing only
+the setup (interpreter start, touch_sample), and the report shows the
+difference as the syscalls of the walk itself; otherwise it shows the calls
+the strategy issued.
+
+Usage:
+    python dir_poll_bench.py build /tmp/drop --files 100000 --layout nested --fanout 1000
+    python dir_poll_bench.py run /tmp/drop --pattern "*.csv" --repeat 5
+    python dir_poll_bench.py suite /tmp/bench --sizes 1000,10000,100000,1000000 --json polling.json
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import os
+import resource
+import select
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+STRATEGIES = ["scandir", "pattern", "watermark", "inotify"]
+EXTENSIONS = ["csv", "json", "xml", "xlsx"]
+
+
+# ---------------------------------------------------------------------------
+# Tree builder
+# ---------------------------------------------------------------------------
+
+def build_tree(root, files, layout="nested", fanout=1000, size=0, extensions=("csv",)):
+    """Create `files` files under root; nested layout puts `fanout` per batch-N dir"""
+    os.makedirs(root, exist_ok=True)
+    payload = b"x" * size
+    started = time.perf_counter()
+    for i in range(files):
+        directory = root if layout == "flat" else os.path.join(root, f"batch-{i // fanout}")
+        if layout != "flat" and i % fanout == 0:
+            os.makedirs(directory, exist_ok=True)
+        name = f"file-{i:07d}.{extensions[i % len(extensions)]}"
+        with open(os.path.join(directory, name), "wb") as f:
+            if payload:
+                f.write(payload)
+    return time.perf_counter() - started
+
+
+# ---------------------------------------------------------------------------
+# Strategies (run inside the child process)
+# ---------------------------------------------------------------------------
+
+class Counters:
+    def __init__(self):
+        self.scandir = 0
+        self.stat = 0
+        self.entries = 0
+        self.matched = 0
+
+
+def walk_scandir(root, counters, pattern=None, watermark_ns=None):
+    """Iterative walk; returns matched (path, size, mtime_ns)"""
+    match = fnmatch.fnmatchcase
+    found = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        if watermark_ns is not None and directory != root:
+            counters.stat += 1
+            if os.stat(directory).st_mtime_ns <= watermark_ns:
+                continue
+        counters.scandir += 1
+        with os.scandir(directory) as it:
+            for entry in it:
+                counters.entries += 1
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if pattern and not match(entry.name, pattern):
+                    continue
+                counters.stat += 1
+                st = entry.stat()
+                if watermark_ns is not None and st.st_mtime_ns <= watermark_ns:
+                    continue
+                counters.matched += 1
+                found.append((entry.path, st.st_size, st.st_mtime_ns))
+    return found
+
+
+def touch_sample(root, fraction, counters=None):
+    """Modify a fraction of files spread over the tree (the 'new drop' for watermark)"""
+    touched = []
+    for dirpath, _, names in os.walk(root):
+        step = max(1, int(1 / fraction)) if fraction > 0 else 0
+        for name in names[::step] if step else []:
+            path = os.path.join(dirpath, name)
+            with open(path, "ab"):
+                pass
+            os.utime(path, None)
+            touched.append(path)
+        if touched:
+            os.utime(dirpath, None)
+    return touched
+
+
+class Inotify:
+    """Minimal ctypes inotify binding (Linux only, no third-party package)"""
+
+    IN_CREATE = 0x100
+    IN_CLOSE_WRITE = 0x08
+    IN_MOVED_TO = 0x80
+    IN_NONBLOCK = 0o4000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, path.encode(), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read_events(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return 0, 0
+        data = os.read(self.fd, 1 << 20)
+        count, offset = 0, 0
+        while offset < len(data):
+            _, _, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size + length
+            count += 1
+        return count, 1
+
+    def close(self):
+        os.close(self.fd)
+
+
+def run_inotify(root, drop_files, counters):
+    """Watch every directory, drop files from a thread, time until all are reported"""
+    notifier = Inotify()
+    mask = Inotify.IN_CLOSE_WRITE | Inotify.IN_MOVED_TO
+    setup_start = time.perf_counter()
+    directories = [root]
+    for dirpath, dirnames, _ in os.walk(root):
+        counters.scandir += 1
+        directories.extend(os.path.join(dirpath, d) for d in dirnames)
+    for directory in directories:
+        notifier.add_watch(directory, mask)
+    setup = time.perf_counter() - setup_start
+
+    targets = [directories[i % len(directories)] for i in range(drop_files)]
+    drop_started = time.perf_counter()
+
+    def dropper():
+        for i, directory in enumerate(targets):
+            with open(os.path.join(directory, f"inotify-drop-{os.getpid()}-{i}.csv"), "wb") as f:
+                f.write(b"id\n")
+
+    thread = threading.Thread(target=dropper)
+    thread.start()
+    seen = reads = 0
+    deadline = time.perf_counter() + 60
+    while seen < drop_files and time.perf_counter() < deadline:
+        events, did_read = notifier.read_events(0.5)
+        seen += events
+        reads += did_read
+    thread.join()
+    latency = time.perf_counter() - drop_started
+    notifier.close()
+    for i, directory in enumerate(targets):
+        os.unlink(os.path.join(directory, f"inotify-drop-{os.getpid()}-{i}.csv"))
+    counters.matched = seen
+    counters.stat = 0
+    return {"watches": len(directories), "setupSeconds": setup, "captureSeconds": latency,
+            "events": seen, "reads": reads, "dropped": drop_files}
+
+
+def run_once(strategy, root, pattern, touch_fraction, drop_files, counters, walk=True):
+    """One discovery pass; returns (seconds, extra metrics)
+
+    With walk=False only the setup runs, which gives the strace baseline.
+    """
+    extra = {}
+    if strategy not in STRATEGIES:
+        raise SystemExit(f"unknown strategy {strategy}")
+    if strategy == "watermark":
+        watermark = time.time_ns()
+        time.sleep(0.01)
+        touch_sample(root, touch_fraction)
+    start = time.perf_counter()
+    if not walk:
+        pass
+    elif strategy == "scandir":
+        walk_scandir(root, counters)
+    elif strategy == "pattern":
+        walk_scandir(root, counters, pattern=pattern)
+    elif strategy == "watermark":
+        walk_scandir(root, counters, pattern=pattern, watermark_ns=watermark)
+    elif strategy == "inotify":
+        extra = run_inotify(root, drop_files, counters)
+    return time.perf_counter() - start, extra
+
+
+def run_strategy(strategy, root, pattern, repeat, touch_fraction, drop_files):
+    """Child-process entry point: run one strategy `repeat` times and return metrics"""
+    counters = Counters()
+    timings = []
+    extra = {}
+    for _ in range(repeat):
+        counters.__init__()
+        seconds, extra = run_once(strategy, root, pattern, touch_fraction, drop_files, counters)
+        timings.append(seconds)
+    # tracemalloc slows every allocation (~12x on a 20k-file walk), so the
+    # Python peak comes from one extra untimed pass
+    tracemalloc.start()
+    run_once(strategy, root, pattern, touch_fraction, drop_files, Counters())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "strategy": strategy,
+        "repeat": repeat,
+        "medianSeconds": statistics.median(timings),
+        "minSeconds": min(timings),
+        "maxSeconds": max(timings),
+        "entries": counters.entries,
+        "matched": counters.matched,
+        "issuedCalls": {"scandir": counters.scandir, "stat": counters.stat},
+        "pythonPeakBytes": peak,
+        "maxRssKb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "procIo": read_proc_io(),
+        **extra,
+    }
+
+
+def read_proc_io():
+    try:
+        with open("/proc/self/io") as f:
+            values = dict(line.split(": ") for line in f.read().splitlines())
+        return {"syscr": int(values["syscr"]), "syscw": int(values["syscw"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Parent orchestration
+# ---------------------------------------------------------------------------
+
+def parse_strace(path):
+    """Per-syscall call counts from an `strace -c` summary"""
+    counts = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5 and parts[0].replace(".", "").isdigit() and parts[-1] != "total":
+                try:
+                    counts[parts[-1]] = int(parts[3])
+                except ValueError:
+                    continue
+    return counts
+
+
+def count_syscalls(command):
+    """Run `command` under `strace -c -f` and return its per-syscall counts"""
+    fd, strace_out = tempfile.mkstemp(suffix=".strace")
+    os.close(fd)
+    try:
+        completed = subprocess.run(["strace", "-c", "-f", "-o", strace_out] + command,
+                                   capture_output=True, text=True)
+        return parse_strace(strace_out) if completed.returncode == 0 else None
+    finally:
+        os.unlink(strace_out)
+
+
+def bench(strategy, root, args):
+    """Run a strategy in a fresh interpreter, then count its walk's syscalls separately"""
+    command = [sys.executable, os.path.abspath(__file__), "_child", strategy, root,
+               "--pattern", args.pattern, "--repeat", str(args.repeat),
+               "--touch-fraction", str(args.touch_fraction), "--drop-files", str(args.drop_files)]
+    if args.drop_caches:
+        drop_page_cache()
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"strategy": strategy, "error": completed.stderr.strip().splitlines()[-1:]}
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if shutil.which("strace") and not args.no_strace:
+        # strace slows every call and the child also pays for startup, the
+        # repeats and the tracemalloc pass, so count one pass against a
+        # setup-only baseline instead of tracing the timed run
+        walk = count_syscalls(command + ["--syscall-pass", "walk"])
+        baseline = count_syscalls(command + ["--syscall-pass", "setup"])
+        if walk is not None and baseline is not None:
+            delta = {name: count - baseline.get(name, 0) for name, count in walk.items()}
+            delta = {name: count for name, count in delta.items() if count > 0}
+            busiest = dict(sorted(delta.items(), key=lambda kv: -kv[1])[:6])
+            result["syscalls"] = {"total": sum(delta.values()), "top": busiest}
+    return result
+
+
+def drop_page_cache():
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except OSError as e:
+        print(f"  (cannot drop caches: {e}; timings are warm-cache)", file=sys.stderr)
+
+
+def print_results(label, results):
+    print(f"\n=== {label} ===")
+    print(f"  {'strategy':<10} {'median':>10} {'min':>10} {'entries':>10} {'matched':>9} "
+          f"{'syscalls':>10} {'py peak':>9} {'max RSS':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"  {r['strategy']:<10} ✗ {r['error']}")
+            continue
+        if "syscalls" in r:
+            calls = f"{r['syscalls']['total']:,}"
+        else:
+            issued = r["issuedCalls"]
+            calls = f"~{issued['scandir'] + issued['stat']:,}"
+        print(f"  {r['strategy']:<10} {fmt_seconds(r['medianSeconds']):>10} {fmt_seconds(r['minSeconds']):>10} "
+              f"{r['entries']:>10,} {r['matched']:>9,} {calls:>10} "
+              f"{r['pythonPeakBytes'] / 1e6:>7.1f}MB {r['maxRssKb'] / 1024:>7.1f}MB")
+        if r["strategy"] == "inotify" and "watches" in r:
+            print(f"  {'':<10} {r['watches']:,} watches set up in {fmt_seconds(r['setupSeconds'])}, "
+                  f"{r['events']:,}/{r['dropped']:,} drops seen in {fmt_seconds(r['captureSeconds'])}")
+    if any("syscalls" not in r for r in results if "error" not in r):
+        print("  (~ = scandir + stat calls issued by the strategy; install strace for exact counts)")
+
+
+def fmt_seconds(value):
+    if value < 1e-3:
+        return f"{value * 1e6:.0f}µs"
+    if value < 1:
+        return f"{value * 1e3:.1f}ms"
+    return f"{value:.2f}s"
+
+
+def cmd_build(args):
+    seconds = build_tree(args.root, args.files, args.layout, args.fanout, args.size, args.extensions.split(","))
+    print(f"✓ Built {args.files:,} files under {args.root} ({args.layout}) in {seconds:.1f}s")
+    return 0
+
+
+def cmd_run(args):
+    results = [bench(s, args.root, args) for s in args.strategies.split(",")]
+    print_results(f"{args.root} (pattern {args.pattern})", results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def cmd_suite(args):
+    """Build a tree per size and layout, run every strategy, then clean up"""
+    report = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for layout in args.layouts.split(","):
+            root = os.path.join(args.workdir, f"{layout}-{size}")
+            if not os.path.isdir(root):
+                print(f"Building {size:,} files ({layout})…")
+                build_tree(root, size, layout, args.fanout, 0, args.extensions.split(","))
+            results = [bench(s, root, args) for s in args.strategies.split(",")]
+            print_results(f"{size:,} files, {layout}", results)
+            report.append({"files": size, "layout": layout, "results": results})
+            if not args.keep:
+                shutil.rmtree(root)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 0
+
+
+def cmd_child(args):
+    """Timed runs print their metrics; strace passes run once and print nothing"""
+    if args.syscall_pass:
+        run_once(args.strategy, args.root, args.pattern, args.touch_fraction, args.drop_files,
+                 Counters(), walk=args.syscall_pass == "walk")
+        return 0
+    print(json.dumps(run_strategy(args.strategy, args.root, args.pattern, args.repeat,
+                                  args.touch_fraction, args.drop_files)))
+    return 0
+
+
+def add_run_options(parser):
+    parser.add_argument("--pattern", default="*.csv", help="FilePattern glob")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--touch-fraction", type=float, default=0.01,
+                        help="Share of files modified before each watermark scan")
+    parser.add_argument("--drop-files", type=int, default=1000, help="Files dropped during the inotify run")
+    parser.add_argument("--drop-caches", action="store_true", help="Drop the page cache before each run (root)")
+    parser.add_argument("--no-strace", action="store_true")
+    parser.add_argument("--json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Create a synthetic drop tree")
+    build.add_argument("root")
+    build.add_argument("--files", type=int, default=10000)
+    build.add_argument("--layout", choices=["flat", "nested"], default="nested")
+    build.add_argument("--fanout", type=int, default=1000, help="Files per batch-N directory")
+    build.add_argument("--size", type=int, default=0, help="Bytes per file")
+    build.add_argument("--extensions", default=",".join(EXTENSIONS))
+    build.set_defaults(func=cmd_build)
+
+    run = sub.add_parser("run", help="Benchmark strategies against an existing tree")
+    run.add_argument("root")
+    add_run_options(run)
+    run.set_defaults(func=cmd_run)
+
+    suite = sub.add_parser("suite", help="Build trees of several sizes and benchmark all strategies")
+    suite.add_argument("workdir")
+    suite.add_argument("--sizes", default="1000,10000,100000,1000000")
+    suite.add_argument("--layouts", default="flat,nested")
+    suite.add_argument("--fanout", type=int, default=1000)
+    suite.add_argument("--extensions", default=",".join(EXTENSIONS))
+    suite.add_argument("--keep", action="store_true", help="Keep the generated trees")
+    add_run_options(suite)
+    suite.set_defaults(func=cmd_suite)
+
+    child = sub.add_parser("_child")
+    child.add_argument("strategy")
+    child.add_argument("root")
+    child.add_argument("--pattern", default="*.csv")
+    child.add_argument("--repeat", type=int, default=3)
+    child.add_argument("--touch-fraction", type=float, default=0.01)
+    child.add_argument("--drop-files", type=int, default=1000)
+    child.add_argument("--syscall-pass", choices=["walk", "setup"])
+    child.set_defaults(func=cmd_child)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
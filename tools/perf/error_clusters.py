@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+"""Error-signature clustering for bulk correction of invalid records.
+
+After a schema mistake most invalid records fail for the same reason. This
+tool streams an invalid-record export (invalid_records.py export) or the live
+list endpoint and groups records by error signature: datasource, field, rule
+and the normalized shape of the offending value ("05/01/2025" -> "99/99/9999",
+"1,234.50" -> "9,999.99"). Clusters are ranked by size, each with example
+values and a suggested transform.
+
+analyze  Counts clusters exactly, or with a count-min sketch plus a bounded
+         heavy-hitter table (--sketch) when the number of distinct signatures
+         is too large to keep. Writes clusters.json.
+apply    Applies one transform per cluster to every record in it.
+         --via file (default) writes the corrected records as one JSON file
+         per datasource, to be dropped into the datasource's input folder, and
+         an ID list; --reprocess then marks the originals through bulk/reprocess
+         with invalid_records.py. --via correct sends PUT {id}/correct per
+         record instead, concurrently and resumably.
+
+CorrectionService.BulkReprocessAsync only updates each record's status; the
+corrected data is revalidated only through PUT {id}/correct (one
+ValidationRequestEvent per record) or by ingesting a corrected file, which is
+why the file route is the bulk one.
+
+Rules are read from the Corvus JSON Schema messages the same way
+InvalidRecordService extracts expected/actual values.
+
+Transforms:
+    strip | upper | lower | number | drop
+    set:VALUE | default:VALUE | truncate:N | clamp:MIN:MAX
+    date:INPUT_FORMAT[=>OUTPUT_FORMAT]      strptime formats, output default %Y-%m-%d
+    replace:REGEX=>REPLACEMENT
+
+Usage:
+    python error_clusters.py analyze invalid.ndjson --top 30
+    python error_clusters.py analyze --from-api --datasource-id 6751d3... --sketch
+    python error_clusters.py apply invalid.ndjson --cluster c1a2b3c4 --transform "date:%d/%m/%Y"
+    python error_clusters.py apply invalid.ndjson --plan plan.json --reprocess
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from ezapi import get_field, new_session, service_url
+from invalid_records import API, Progress, iter_keyset, iter_source
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (rule, regex) in the order InvalidRecordService checks them; length checks
+# come before the numeric ones for the same reason as there.
+RULES = (
+    ("maxLength", re.compile(r"maxLength\b.*?greater\s+than\s+(\d+)")),
+    ("minLength", re.compile(r"minLength\b.*?less\s+than\s+(\d+)")),
+    ("maximum", re.compile(r"\d+(?:\.\d+)?\s+is\s+greater\s+than\s+(\d+(?:\.\d+)?)")),
+    ("minimum", re.compile(r"\d+(?:\.\d+)?\s+is\s+less\s+than\s+(\d+(?:\.\d+)?)")),
+    ("format", re.compile(r"should\s+have\s+been\s*'([^']+)'")),
+    ("pattern", re.compile(r"did\s+not\s+match\s+'([^']+)'")),
+    ("enum", re.compile(r"enumeration()")),
+    ("required", re.compile(r"required\s+property\s+'?([^'\s]*)")),
+    ("type", re.compile(r"should\s+have\s+been\s+(?:of\s+type\s+)?'?(\w+)'?\s+but")),
+)
+FIELD_RE = re.compile(r"^#/(\S+)")
+
+
+def classify(message):
+    """(rule, expected) from a validation message"""
+    for rule, regex in RULES:
+        m = regex.search(message or "")
+        if m:
+            return rule, m.group(1) or None
+    return "other", None
+
+
+def value_shape(value, max_len=24):
+    """Normalized shape of an offending value.
+
+    Digits become 9 and Latin letters a/A, keeping lengths so date and ID
+    layouts stay distinct; Hebrew letter runs become one א; runs of other
+    letters become one ~. Long values keep their prefix shape and length.
+    """
+    if value is None:
+        return "(missing)"
+    if isinstance(value, bool):
+        return "(bool)"
+    if isinstance(value, (int, float)):
+        return "(number)"
+    if isinstance(value, (dict, list)):
+        return "(object)" if isinstance(value, dict) else "(array)"
+    text = str(value)
+    if text in ("", "(empty)"):
+        return "(empty)"
+    if text != text.strip():
+        return "(padded)" + value_shape(text.strip(), max_len)
+    out = []
+    for ch in text[:max_len]:
+        if "0" <= ch <= "9":
+            c = "9"
+        elif "a" <= ch <= "z":
+            c = "a"
+        elif "A" <= ch <= "Z":
+            c = "A"
+        elif "א" <= ch <= "ת":
+            c = "א"
+        elif ch.isalpha():
+            c = "~"
+        elif ch.isspace():
+            c = " "
+        else:
+            c = ch
+        if c in "א~ " and out and out[-1] == c:
+            continue
+        out.append(c)
+    shape = "".join(out)
+    return shape + f"…[{len(text)}]" if len(text) > max_len else shape
+
+
+def lookup(data, field):
+    """Value of a top-level or dotted field in OriginalData"""
+    node = data
+    for part in field.split("."):
+        if not isinstance(node, dict):
+            return None
+        node = get_field(node, part)
+    return node
+
+
+def error_signatures(record):
+    """Sorted (field, rule, expected, shape) tuples for a record's errors"""
+    data = get_field(record, "originalData") or {}
+    signatures = set()
+    for error in get_field(record, "errors") or []:
+        message = get_field(error, "message") or ""
+        rule, expected = classify(message)
+        field = get_field(error, "field")
+        if not field or field == "Unknown":
+            m = FIELD_RE.match(message)
+            field = m.group(1) if m else "?"
+        field = field.replace("/", ".")
+        if rule == "required" and expected:
+            field = expected
+        actual = lookup(data, field)
+        if actual is None and rule != "required":
+            actual = get_field(error, "actualValue")
+        signatures.add((field, rule, expected or get_field(error, "expectedValue"), value_shape(actual)))
+    return sorted(signatures, key=lambda s: tuple(str(x) for x in s))
+
+
+def cluster_key(datasource_id, signatures):
+    text = json.dumps([datasource_id, signatures], ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def iter_input(args):
+    if args.from_api:
+        filters = {"DataSourceId": args.datasource_id, "ErrorType": args.error_type,
+                   "StartDate": args.start_date, "EndDate": args.end_date}
+        state = {"end_date": args.end_date, "page": 1}
+        for records, _ in iter_keyset(new_session("perf-error-clusters"), filters, 500, state):
+            yield from records
+    else:
+        for record in iter_source(args.input):
+            if args.datasource_id and get_field(record, "dataSourceId") != args.datasource_id:
+                continue
+            yield record
+
+
+# ---------------------------------------------------------------------------
+# Counting
+# ---------------------------------------------------------------------------
+
+class ExactCounter:
+    def __init__(self, examples):
+        self.counts = Counter()
+        self.info = {}
+        self.examples = examples
+
+    def add(self, key, make_info, record):
+        self.counts[key] += 1
+        info = self.info.get(key)
+        if info is None:
+            info = self.info[key] = make_info()
+        remember(info, record, self.examples)
+
+    def top(self, n):
+        return [(k, c, self.info[k]) for k, c in self.counts.most_common(n)]
+
+
+class SketchCounter:
+    """Count-min sketch with a bounded heavy-hitter table.
+
+    Every key updates the sketch; only the `capacity` keys with the largest
+    estimates keep their details. Counts are over-estimates by at most
+    e/width of the total with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, examples, width=1 << 16, depth=4, capacity=2000):
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.width = width
+        self.rows = np.arange(depth)
+        self.capacity = capacity
+        self.examples = examples
+        self.info = {}
+        self.heap = []  # (estimate when pushed, key); stale entries are skipped, compacted past 2x capacity
+
+    def _cells(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * len(self.rows)).digest()
+        return np.frombuffer(digest, dtype=np.uint64) % self.width
+
+    def add(self, key, make_info, record):
+        cells = self._cells(key)
+        self.table[self.rows, cells] += 1
+        estimate = int(self.table[self.rows, cells].min())
+        info = self.info.get(key)
+        if info is None:
+            if len(self.info) >= self.capacity:
+                if estimate <= self._floor():
+                    return
+                del self.info[heapq.heappop(self.heap)[1]]
+            info = self.info[key] = make_info()
+        info["estimate"] = estimate
+        heapq.heappush(self.heap, (estimate, key))
+        if len(self.heap) > 2 * self.capacity:
+            self._compact()
+        remember(info, record, self.examples)
+
+    def _compact(self):
+        """Rebuild the heap from the live estimates so it stays O(capacity)"""
+        self.heap = [(info["estimate"], key) for key, info in self.info.items()]
+        heapq.heapify(self.heap)
+
+    def _floor(self):
+        """Smallest live estimate, left on top of the heap; stale entries are dropped"""
+        while self.heap:
+            estimate, key = self.heap[0]
+            info = self.info.get(key)
+            if info is not None and info["estimate"] == estimate:
+                return estimate
+            heapq.heappop(self.heap)
+        return 0
+
+    def top(self, n):
+        ranked = sorted(self.info.items(), key=lambda kv: -kv[1]["estimate"])[:n]
+        return [(k, info["estimate"], info) for k, info in ranked]
+
+
+def remember(info, record, limit):
+    if len(info["record_ids"]) < limit:
+        info["record_ids"].append(get_field(record, "id"))
+    data = get_field(record, "originalData") or {}
+    values = info["values"]
+    for sig in info["signatures"]:
+        seen = values.setdefault(sig[0], [])
+        value = lookup(data, sig[0])
+        if len(seen) < limit and value not in seen:
+            seen.append(value)
+
+
+def suggest(signature):
+    """Transform suggestion for one (field, rule, expected, shape) signature"""
+    field, rule, expected, shape = signature
+    if shape.startswith("(padded)"):
+        return "strip"
+    if rule == "maxLength" and expected:
+        return f"truncate:{expected}"
+    if rule in ("format", "pattern") and "date" in str(expected):
+        layouts = {"99/99/9999": "%d/%m/%Y", "99.99.9999": "%d.%m.%Y", "9999/99/99": "%Y/%m/%d",
+                   "99-99-9999": "%d-%m-%Y", "99999999": "%Y%m%d"}
+        if shape in layouts:
+            return f"date:{layouts[shape]}"
+    if rule in ("type", "pattern", "format") and re.fullmatch(r"[9,.]+", shape) and "," in shape:
+        return "number"
+    if rule == "type" and expected in ("number", "integer") and shape.startswith("9"):
+        return "number"
+    if rule == "required":
+        return "default:VALUE"
+    if rule == "maximum" and expected:
+        return f"clamp::{expected}"
+    if rule == "minimum" and expected:
+        return f"clamp:{expected}:"
+    return None
+
+
+def analyze(args):
+    counter = SketchCounter(args.examples, capacity=args.capacity) if args.sketch else ExactCounter(args.examples)
+    progress = Progress("records")
+    total = 0
+    errors = 0
+    for record in iter_input(args):
+        total += 1
+        signatures = error_signatures(record)
+        errors += len(signatures)
+        datasource_id = get_field(record, "dataSourceId")
+        key = cluster_key(datasource_id, signatures)
+
+        def make_info():
+            return {"dataSourceId": datasource_id, "dataSourceName": get_field(record, "dataSourceName"),
+                    "signatures": signatures, "record_ids": [], "values": {}}
+
+        counter.add(key, make_info, record)
+        if total % 1000 == 0:
+            progress.update(total)
+    progress.finish(total)
+
+    clusters = []
+    for key, count, info in counter.top(args.top if args.top else 10 ** 9):
+        clusters.append({
+            "cluster": key,
+            "count": count,
+            "share": count / total if total else 0,
+            "dataSourceId": info["dataSourceId"],
+            "dataSourceName": info["dataSourceName"],
+            "signatures": [dict(zip(("field", "rule", "expected", "shape"), s)) for s in info["signatures"]],
+            "suggested": {s[0]: suggest(s) for s in info["signatures"]},
+            "exampleValues": info["values"],
+            "exampleIds": info["record_ids"],
+        })
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump({"records": total, "errors": errors, "mode": "sketch" if args.sketch else "exact",
+                   "clusters": clusters}, f, ensure_ascii=False, indent=2, default=str)
+
+    covered = 0
+    print(f"\n{total:,} records, {errors:,} error signatures "
+          f"({'count-min estimates' if args.sketch else 'exact counts'})\n")
+    print(f"{'cluster':<9} {'records':>10} {'share':>6} {'cum':>6}  signature -> suggested transform")
+    for c in clusters[:args.show]:
+        covered += c["count"]
+        print(f"{c['cluster']:<9} {c['count']:>10,} {c['share']:>6.1%} {covered / max(total, 1):>6.1%}  "
+              f"[{c['dataSourceName'] or c['dataSourceId']}]")
+        for s in c["signatures"]:
+            example = (c["exampleValues"].get(s["field"]) or [None])[0]
+            hint = c["suggested"].get(s["field"])
+            print(f"{'':>35}{s['field']} {s['rule']}"
+                  + (f"={s['expected']}" if s["expected"] else "")
+                  + f" shape {s['shape']} e.g. {example!r}" + (f" -> {hint}" if hint else ""))
+    print(f"\nClusters written to {args.json}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Transforms
+# ---------------------------------------------------------------------------
+
+DROP = object()
+
+
+def compile_transform(spec):
+    """Function value -> corrected value for a transform spec"""
+    name, _, arg = spec.partition(":")
+    if name == "strip":
+        return lambda v: v.strip() if isinstance(v, str) else v
+    if name == "upper":
+        return lambda v: v.upper() if isinstance(v, str) else v
+    if name == "lower":
+        return lambda v: v.lower() if isinstance(v, str) else v
+    if name == "drop":
+        return lambda v: DROP
+    if name == "set":
+        value = json.loads(arg) if re.fullmatch(r"-?\d+(\.\d+)?|true|false|null", arg) else arg
+        return lambda v: value
+    if name == "default":
+        value = json.loads(arg) if re.fullmatch(r"-?\d+(\.\d+)?|true|false|null", arg) else arg
+        return lambda v: value if v in (None, "") else v
+    if name == "truncate":
+        n = int(arg)
+        return lambda v: v[:n] if isinstance(v, str) else v
+    if name == "clamp":
+        low, _, high = arg.partition(":")
+        low = float(low) if low else None
+        high = float(high) if high else None
+
+        def clamp(v):
+            if not isinstance(v, (int, float)) or isinstance(v, bool):
+                return v
+            if low is not None and v < low:
+                v = low
+            if high is not None and v > high:
+                v = high
+            return int(v) if float(v).is_integer() else v
+        return clamp
+    if name == "number":
+        def number(v):
+            if not isinstance(v, str):
+                return v
+            text = v.strip().replace(",", "").replace(" ", "")
+            try:
+                return int(text) if re.fullmatch(r"-?\d+", text) else float(text)
+            except ValueError:
+                return v
+        return number
+    if name == "date":
+        in_fmt, _, out_fmt = arg.partition("=>")
+        out_fmt = out_fmt or "%Y-%m-%d"
+
+        def date(v):
+            try:
+                return datetime.strptime(str(v).strip(), in_fmt).strftime(out_fmt)
+            except ValueError:
+                return v
+        return date
+    if name == "replace":
+        pattern, sep, repl = arg.partition("=>")
+        if not sep:
+            raise ValueError("replace needs REGEX=>REPLACEMENT")
+        regex = re.compile(pattern)
+        return lambda v: regex.sub(repl, v) if isinstance(v, str) else v
+    raise ValueError(f"unknown transform {spec!r}")
+
+
+def apply_fix(data, field, fn):
+    """Return a copy of OriginalData with fn applied to a (dotted) field"""
+    data = json.loads(json.dumps(data))
+    parts = field.split(".")
+    node = data
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    value = fn(node.get(parts[-1]))
+    if value is DROP:
+        node.pop(parts[-1], None)
+    else:
+        node[parts[-1]] = value
+    return data
+
+
+def load_plan(args, clusters):
+    """{cluster: [(field, fn, spec)]} from --plan or --cluster/--transform"""
+    if args.plan:
+        with open(args.plan, encoding="utf-8") as f:
+            raw = json.load(f)
+    else:
+        if not args.cluster or not args.transform:
+            sys.exit("apply needs --plan, or --cluster with --transform")
+        raw = {args.cluster: args.transform}
+    plan = {}
+    for cluster, spec in raw.items():
+        info = clusters.get(cluster)
+        if info is None:
+            sys.exit(f"cluster {cluster} not in {args.clusters}")
+        fields = [s["field"] for s in info["signatures"]]
+        # "transform" for the cluster's only field, or {"Field": "transform"}
+        specs = spec if isinstance(spec, dict) else {fields[0] if len(fields) == 1 else None: spec}
+        if None in specs:
+            sys.exit(f"cluster {cluster} has several failing fields {fields}; give {{field: transform}}")
+        plan[cluster] = [(field, compile_transform(s), s) for field, s in specs.items()]
+    return plan
+
+
+def apply(args):
+    with open(args.clusters, encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("mode") == "sketch":
+        print("Note: clusters.json came from --sketch; membership is recomputed exactly here")
+    clusters = {c["cluster"]: c for c in report["clusters"]}
+    plan = load_plan(args, clusters)
+    os.makedirs(args.out, exist_ok=True)
+
+    writers = {}
+    ids_path = os.path.join(args.out, "corrected.ids")
+    ids_file = open(ids_path, "w", encoding="utf-8")
+    samples = []
+    queue = None
+    if args.via == "correct":
+        queue = open(os.path.join(args.out, "correct-queue.ndjson"), "w", encoding="utf-8")
+    counts = Counter()
+    progress = Progress("scanned")
+    scanned = 0
+
+    for record in iter_input(args):
+        scanned += 1
+        if scanned % 1000 == 0:
+            progress.update(scanned, f"matched {sum(counts.values()):,}")
+        datasource_id = get_field(record, "dataSourceId")
+        key = cluster_key(datasource_id, error_signatures(record))
+        if key not in plan:
+            continue
+        corrected = get_field(record, "originalData") or {}
+        for field, fn, _ in plan[key]:
+            corrected = apply_fix(corrected, field, fn)
+        counts[key] += 1
+        record_id = get_field(record, "id")
+        if len(samples) < args.examples:
+            samples.append((key, record_id, get_field(record, "originalData"), corrected))
+        if queue:
+            queue.write(json.dumps({"id": record_id, "data": corrected}, ensure_ascii=False) + "\n")
+            continue
+        writer = writers.get(datasource_id)
+        if writer is None:
+            path = os.path.join(args.out, f"{datasource_id}-corrected-{time.strftime('%Y%m%d%H%M%S')}.json")
+            writer = writers[datasource_id] = [open(path, "w", encoding="utf-8"), 0]
+            writer[0].write("[")
+        writer[0].write(("," if writer[1] else "") + "\n  " + json.dumps(corrected, ensure_ascii=False))
+        writer[1] += 1
+        ids_file.write(record_id + "\n")
+    progress.finish(scanned)
+    ids_file.close()
+    for f, _ in writers.values():
+        f.write("\n]\n")
+        f.close()
+
+    for cluster, n in counts.most_common():
+        specs = ", ".join(f"{field}: {spec}" for field, _, spec in plan[cluster])
+        print(f"{cluster}: {n:,} records ({specs})")
+    for key, record_id, before, after in samples:
+        changes = [(field, lookup(before or {}, field), lookup(after, field)) for field, _, _ in plan[key]]
+        print(f"  {record_id}: " + ", ".join(f"{f} {a!r} -> {b!r}" for f, a, b in changes if a != b))
+
+    if queue:
+        queue.close()
+        return correct_records(queue.name, args)
+
+    for datasource_id, (f, n) in writers.items():
+        print(f"{f.name}: {n:,} corrected records for datasource {datasource_id}")
+    print(f"{ids_path}: original record IDs")
+    if not args.reprocess:
+        print("Drop the files into each datasource's input folder, then mark the originals with:\n"
+              f"  python invalid_records.py reprocess {ids_path}")
+        return 0
+    command = [sys.executable, os.path.join(HERE, "invalid_records.py"), "reprocess", ids_path,
+               "--requested-by", args.requested_by, "--workers", str(args.workers)]
+    return subprocess.call(command)
+
+
+def correct_records(queue_path, args):
+    """PUT {id}/correct for each queued record, resumable through a journal of done IDs"""
+    journal_path = os.path.join(args.out, "correct.done")
+    done = set()
+    if os.path.exists(journal_path):
+        with open(journal_path, encoding="utf-8") as f:
+            done = {line.strip() for line in f}
+    with open(queue_path, encoding="utf-8") as f:
+        total = sum(1 for _ in f) - len(done)
+    journal = open(journal_path, "a", encoding="utf-8")
+    lock = threading.Lock()
+    local = threading.local()
+    base = service_url("invalid-records") + API
+    failures = []
+    progress = Progress("corrected", total)
+    finished = [0]
+
+    def put(item):
+        record_id, data = item["id"], item["data"]
+        if not hasattr(local, "session"):
+            local.session = new_session("perf-error-clusters")
+        body = {"correctedData": data, "correctedBy": args.requested_by, "autoReprocess": True}
+        error = None
+        for attempt in range(args.retries + 1):
+            try:
+                response = local.session.put(f"{base}/{record_id}/correct", json=body, timeout=60)
+                if response.ok and get_field(response.json(), "isSuccess", True):
+                    error = None
+                    break
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code < 500:
+                    break
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = type(exc).__name__
+            time.sleep(min(2 ** attempt, 30))
+        with lock:
+            finished[0] += 1
+            if error:
+                failures.append((record_id, error))
+            else:
+                journal.write(record_id + "\n")
+                journal.flush()
+            progress.update(finished[0], f"failed {len(failures):,}")
+
+    def pending():
+        with open(queue_path, encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                if item["id"] not in done:
+                    yield item
+
+    # Bounded submission so the queue is never held in memory
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        in_flight = set()
+        for item in pending():
+            if len(in_flight) >= args.workers * 4:
+                finished_now, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished_now:
+                    future.result()
+            in_flight.add(pool.submit(put, item))
+        for future in in_flight:
+            future.result()
+    journal.close()
+    progress.finish(finished[0])
+    if done:
+        print(f"{len(done):,} records skipped from earlier runs")
+    for record_id, error in failures[:20]:
+        print(f"  {record_id}: {error}")
+    print(f"PUT correct: {finished[0] - len(failures):,} ok, {len(failures):,} failed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("analyze", "apply"):
+        p = sub.add_parser(name)
+        p.add_argument("input", nargs="?", help="invalid_records.py export (NDJSON or Parquet directory)")
+        p.add_argument("--from-api", action="store_true", help="Stream from the list endpoint instead")
+        p.add_argument("--datasource-id")
+        p.add_argument("--error-type", help="With --from-api: schema, format, required or range")
+        p.add_argument("--start-date")
+        p.add_argument("--end-date")
+        p.add_argument("--examples", type=int, default=5, help="Example IDs/values kept per cluster")
+    analyze_p, apply_p = sub.choices["analyze"], sub.choices["apply"]
+
+    analyze_p.add_argument("--sketch", action="store_true", help="Count-min sketch instead of exact counters")
+    analyze_p.add_argument("--capacity", type=int, default=2000, help="Heavy hitters tracked with --sketch")
+    analyze_p.add_argument("--top", type=int, default=0, help="Clusters kept in the report (0 = all)")
+    analyze_p.add_argument("--show", type=int, default=20, help="Clusters printed")
+    analyze_p.add_argument("--json", default="clusters.json")
+    analyze_p.set_defaults(func=analyze)
+
+    apply_p.add_argument("--clusters", default="clusters.json", help="Report from analyze")
+    apply_p.add_argument("--plan", help='JSON {"cluster": "transform"} or {"cluster": {"Field": "transform"}}')
+    apply_p.add_argument("--cluster")
+    apply_p.add_argument("--transform")
+    apply_p.add_argument("--via", choices=("file", "correct"), default="file")
+    apply_p.add_argument("--out", default="corrected")
+    apply_p.add_argument("--reprocess", action="store_true",
+                         help="After writing files, mark the originals through bulk/reprocess")
+    apply_p.add_argument("--requested-by", default=os.environ.get("USER", "perf-tools"))
+    apply_p.add_argument("--workers", type=int, default=8)
+    apply_p.add_argument("--retries", type=int, default=3)
+    apply_p.set_defaults(func=apply)
+
+    args = parser.parse_args()
+    if not args.input and not args.from_api:
+        parser.error("give an export file or --from-api")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Shared helpers for the EZ Platform performance tools.
+
+Service base URLs, response unwrapping and paging for the REST APIs.
+The services do not agree on one response shape:
+
+- DataSourceManagementService returns ApiResponse<T> with PascalCase keys
+  (Data, Error, Paging) and PagedResult<T> (Items, TotalPages).
+- SchemaController, InvalidRecordController and the metrics controllers
+  return anonymous objects (isSuccess, data, totalPages / totalCount).
+
+Everything here copes with all of them so individual tools don't have to.
+"""
+
+import os
+
+import requests
+
+# Local development ports from each service's launchSettings.json.
+# Override with EZ_<SERVICE>_URL, e.g. EZ_DATASOURCE_URL=http://ez.local:5001
+DEFAULT_URLS = {
+    "datasource": "http://localhost:5001",
+    "metrics": "http://localhost:5002",
+    "validation": "http://localhost:5003",
+    "scheduling": "http://localhost:5004",
+    "invalid-records": "http://localhost:5007",
+}
+
+
+def service_url(service):
+    """Base URL for a service, honouring EZ_<SERVICE>_URL overrides"""
+    env_name = "EZ_" + service.upper().replace("-", "_") + "_URL"
+    return os.environ.get(env_name, DEFAULT_URLS[service]).rstrip("/")
+
+
+def new_session(correlation_prefix="perf-tools"):
+    """requests.Session with JSON headers and a correlation ID prefix"""
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "X-Correlation-ID": correlation_prefix,
+    })
+    return session
+
+
+def get_field(obj, name, default=None):
+    """Read a key regardless of PascalCase/camelCase serialization"""
+    if not isinstance(obj, dict):
+        return default
+    if name in obj:
+        return obj[name]
+    alt = name[0].lower() + name[1:] if name[0].isupper() else name[0].upper() + name[1:]
+    return obj.get(alt, default)
+
+
+def unwrap(payload):
+    """Return the Data/data member of an API envelope, or the payload itself"""
+    if isinstance(payload, dict):
+        for key in ("Data", "data"):
+            if key in payload:
+                return payload[key]
+    return payload
+
+
+def page_items(payload):
+    """Split a list response into (items, total_pages)"""
+    data = unwrap(payload)
+    if isinstance(data, dict):
+        # ApiResponse<PagedResult<T>>
+        items = get_field(data, "Items", [])
+        total_pages = get_field(data, "TotalPages")
+    else:
+        items = data or []
+        total_pages = get_field(payload, "totalPages")
+        if total_pages is None:
+            paging = get_field(payload, "Paging") or {}
+            total_pages = get_field(paging, "TotalPages")
+    return items, total_pages
+
+
+def iter_pages(session, url, params=None, size=100, size_param="size", start_page=1, timeout=30):
+    """Yield every item of a paged list endpoint, one page at a time"""
+    page = start_page
+    while True:
+        query = dict(params or {})
+        query["page"] = page
+        query[size_param] = size
+        response = session.get(url, params=query, timeout=timeout)
+        response.raise_for_status()
+        items, total_pages = page_items(response.json())
+        yield from items
+        if not items or (total_pages is not None and page >= total_pages):
+            return
+        if total_pages is None and len(items) < size:
+            return
+        page += 1
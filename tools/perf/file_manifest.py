@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Parallel file-hash manifest that predicts FileDiscovery deduplication.
+
+Scans datasource drop directories in parallel with os.scandir, computes the
+exact hash FileDiscoveryService uses (Shared/Utilities/FileHashCalculator.cs:
+Base64(SHA256("normalizedPath|sizeBytes|lastModifiedUtc:O"))), and keeps the
+result in an incremental SQLite index so a rescan only re-hashes entries whose
+size or mtime changed.
+
+Each datasource has its own Hazelcast map (`file-hashes-{datasourceId}`) with a
+TTL (`FileDiscovery:DeduplicationTTLHours`, default 24h). The index mirrors
+that with a `processed` table, filled either by `mark` (what the service will
+do after its next poll) or by `sync-hazelcast` (what the cluster holds now).
+A file is predicted "new" when its hash is not in that set.
+
+Usage:
+    python file_manifest.py scan --from-api
+    python file_manifest.py scan --datasource ds1=/mnt/external-test-data/LoadTest-10000/batch-0:*.csv
+    python file_manifest.py scan --from-api --path-map /Volumes/share=/mnt/external-test-data --list new
+    python file_manifest.py mark --ttl-hours 24
+    python file_manifest.py sync-hazelcast --cluster 127.0.0.1:5701
+"""
+
+import argparse
+import base64
+import fnmatch
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+DEFAULT_INDEX = "file-manifest.sqlite"
+MAP_NAME_PREFIX = "file-hashes"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    datasource_id TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    hash          TEXT NOT NULL,
+    first_seen    REAL NOT NULL,
+    last_seen     REAL NOT NULL,
+    PRIMARY KEY (datasource_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_by_hash ON files (datasource_id, hash);
+CREATE TABLE IF NOT EXISTS processed (
+    datasource_id TEXT NOT NULL,
+    hash          TEXT NOT NULL,
+    expires_at    REAL,
+    source        TEXT NOT NULL,
+    PRIMARY KEY (datasource_id, hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dirs (
+    datasource_id TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    PRIMARY KEY (datasource_id, path)
+) WITHOUT ROWID;
+"""
+
+
+# ---------------------------------------------------------------------------
+# FileHashCalculator port
+# ---------------------------------------------------------------------------
+
+def format_roundtrip_utc(mtime_ns):
+    """.NET DateTime.ToString("O") for a UTC DateTime (100ns ticks, trailing Z)"""
+    seconds, remainder = divmod(mtime_ns, 1_000_000_000)
+    stamp = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    return f"{stamp:%Y-%m-%dT%H:%M:%S}.{remainder // 100:07d}Z"
+
+
+def calculate_hash(file_path, size_bytes, mtime_ns):
+    """Same value as FileHashCalculator.CalculateHash(path, size, lastModifiedUtc)"""
+    if not file_path or not file_path.strip():
+        raise ValueError("File path cannot be null or empty")
+    normalized = file_path.strip().replace("\\", "/").lower()
+    composite = f"{normalized}|{size_bytes}|{format_roundtrip_utc(mtime_ns)}"
+    return base64.b64encode(hashlib.sha256(composite.encode("utf-8")).digest()).decode("ascii")
+
+
+# ---------------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------------
+
+def parse_path_maps(values):
+    maps = []
+    for value in values or []:
+        local, _, remote = value.partition("=")
+        if not remote:
+            raise SystemExit(f"--path-map expects LOCAL=REMOTE, got '{value}'")
+        maps.append((os.path.abspath(local), remote.rstrip("/\\")))
+    return maps
+
+
+def service_path(local_path, path_maps):
+    """Path as FileDiscoveryService sees it (FileInfo.FullName on its mount)"""
+    for local, remote in path_maps:
+        if local_path == local or local_path.startswith(local + os.sep):
+            return remote + local_path[len(local):].replace(os.sep, "/")
+    return local_path
+
+
+def list_directory(directory, pattern, ignore_case, known_mtime, trust_dir_mtime):
+    """Entries of one directory matching the pattern (TopDirectoryOnly, like LocalFileConnector).
+
+    Returns (directory, dir_mtime_ns, entries or None, subdirectories). `None`
+    entries means the directory is unchanged and was skipped.
+    """
+    try:
+        dir_mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return directory, None, [], []
+    if trust_dir_mtime and known_mtime == dir_mtime:
+        return directory, dir_mtime, None, []
+    match = fnmatch.fnmatch if ignore_case else fnmatch.fnmatchcase
+    entries, subdirs = [], []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and match(entry.name, pattern):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+    return directory, dir_mtime, entries, subdirs
+
+
+class Manifest:
+    """SQLite-backed incremental index of file hashes per datasource"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def scan(self, datasource_id, root, pattern, workers, recursive=False, ignore_case=False,
+             trust_dir_mtime=False, path_maps=()):
+        now = time.time()
+        known = {row[0]: row[1:] for row in self.db.execute(
+            "SELECT path, size, mtime_ns, hash FROM files WHERE datasource_id = ?", (datasource_id,))}
+        dir_mtimes = dict(self.db.execute(
+            "SELECT path, mtime_ns FROM dirs WHERE datasource_id = ?", (datasource_id,)))
+
+        stats = {"datasource": datasource_id, "root": root, "pattern": pattern, "files": 0, "hashed": 0,
+                 "unchanged": 0, "skippedDirs": 0, "removed": 0}
+        children = {}
+        for known_dir in dir_mtimes:
+            children.setdefault(os.path.dirname(known_dir), []).append(known_dir)
+        seen, skipped_dirs = set(), []
+        upserts, touched, dir_rows = [], [], []
+        pending = [root]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending:
+                futures = [pool.submit(list_directory, d, pattern, ignore_case, dir_mtimes.get(d), trust_dir_mtime)
+                           for d in pending]
+                pending = []
+                for future in futures:
+                    directory, dir_mtime, entries, subdirs = future.result()
+                    if recursive:
+                        pending.extend(subdirs)
+                    if dir_mtime is not None:
+                        dir_rows.append((datasource_id, directory, dir_mtime))
+                    if entries is None:
+                        stats["skippedDirs"] += 1
+                        skipped_dirs.append(directory)
+                        if recursive:
+                            pending.extend(children.get(directory, ()))
+                        continue
+                    for local_path, size, mtime_ns in entries:
+                        path = service_path(local_path, path_maps)
+                        seen.add(path)
+                        previous = known.get(path)
+                        if previous and previous[0] == size and previous[1] == mtime_ns:
+                            touched.append((now, datasource_id, path))
+                            stats["unchanged"] += 1
+                        else:
+                            upserts.append((datasource_id, path, size, mtime_ns,
+                                            calculate_hash(path, size, mtime_ns), now, now))
+                            stats["hashed"] += 1
+        stats["files"] = stats["hashed"] + stats["unchanged"]
+
+        # Files directly inside skipped directories are still present; anything else not seen is gone
+        skipped = {service_path(d, path_maps) for d in skipped_dirs}
+        kept = [p for p in known if p not in seen and p.rsplit("/", 1)[0] in skipped]
+        removed = [(datasource_id, p) for p in known if p not in seen and p.rsplit("/", 1)[0] not in skipped]
+        stats["files"] += len(kept)
+        stats["removed"] = len(removed)
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(datasource_id, path) DO UPDATE SET "
+                "size = excluded.size, mtime_ns = excluded.mtime_ns, hash = excluded.hash, "
+                "last_seen = excluded.last_seen", upserts)
+            self.db.executemany("UPDATE files SET last_seen = ? WHERE datasource_id = ? AND path = ?", touched)
+            self.db.executemany("DELETE FROM files WHERE datasource_id = ? AND path = ?", removed)
+            self.db.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", dir_rows)
+        return stats
+
+    def classify(self, datasource_id, now=None):
+        """Split indexed files into new / duplicate as FileDiscovery would"""
+        now = now or time.time()
+        rows = self.db.execute(
+            "SELECT f.path, f.hash, p.hash IS NOT NULL AND (p.expires_at IS NULL OR p.expires_at > ?) "
+            "FROM files f LEFT JOIN processed p ON p.datasource_id = f.datasource_id AND p.hash = f.hash "
+            "WHERE f.datasource_id = ?", (now, datasource_id))
+        new, duplicate = [], []
+        for path, file_hash, is_duplicate in rows:
+            (duplicate if is_duplicate else new).append((path, file_hash))
+        return new, duplicate
+
+    def mark_processed(self, datasource_id, ttl_hours, now=None):
+        """Record every currently-new hash as processed, like the service's next poll"""
+        now = now or time.time()
+        new, _ = self.classify(datasource_id, now)
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, 'mark')",
+                [(datasource_id, h, now + ttl_hours * 3600) for _, h in new])
+        return len(new)
+
+    def replace_processed(self, datasource_id, hashes, source):
+        with self.db:
+            self.db.execute("DELETE FROM processed WHERE datasource_id = ?", (datasource_id,))
+            self.db.executemany("INSERT INTO processed VALUES (?, ?, NULL, ?)",
+                                [(datasource_id, h, source) for h in hashes])
+
+    def datasource_ids(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT datasource_id FROM files")]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def load_datasources(args):
+    """[(id, name, filePath, filePattern)] from --datasource and/or the API"""
+    result = []
+    for spec in args.datasource or []:
+        ds_id, _, rest = spec.partition("=")
+        path, pattern = rest, "*.*"
+        head, sep, tail = rest.rpartition(":")
+        if sep and head and "/" not in tail and "\\" not in tail:
+            path, pattern = head, tail
+        result.append((ds_id, ds_id, path, pattern))
+    if args.from_api:
+        from ezapi import get_field, iter_pages, new_session, service_url
+        session = new_session("file-manifest")
+        url = f"{args.api_url or service_url('datasource')}/api/v1/datasource"
+        for ds in iter_pages(session, url, params={"isActive": "true"}, size=100):
+            if get_field(ds, "FilePath"):
+                result.append((get_field(ds, "ID") or get_field(ds, "Id"), get_field(ds, "Name", ""),
+                               get_field(ds, "FilePath"), get_field(ds, "FilePattern") or "*.*"))
+    return result
+
+
+def local_root(service_root, path_maps):
+    """Reverse --path-map: where a service path lives on this machine"""
+    for local, remote in path_maps:
+        if service_root == remote or service_root.startswith(remote + "/"):
+            return local + service_root[len(remote):].replace("/", os.sep)
+    return service_root
+
+
+def cmd_scan(args):
+    manifest = Manifest(args.index)
+    path_maps = parse_path_maps(args.path_map)
+    datasources = load_datasources(args)
+    if not datasources:
+        print("No datasources (use --datasource ID=PATH[:PATTERN] or --from-api)")
+        return 1
+
+    report = []
+    started = time.perf_counter()
+    total_files = 0
+    for ds_id, name, path, pattern in datasources:
+        root = local_root(path, path_maps)
+        if not os.path.isdir(root):
+            print(f"✗ {name}: directory not found: {root}")
+            continue
+        stats = manifest.scan(ds_id, root, pattern, args.workers, args.recursive, args.ignore_case,
+                              args.trust_dir_mtime, path_maps)
+        new, duplicate = manifest.classify(ds_id)
+        stats.update(name=name, new=len(new), duplicate=len(duplicate))
+        total_files += stats["files"]
+        report.append(stats)
+        print(f"✓ {name}: {stats['files']:,} files ({stats['hashed']:,} hashed, {stats['unchanged']:,} unchanged, "
+              f"{stats['removed']:,} removed) → {len(new):,} new, {len(duplicate):,} duplicate")
+        if args.list in ("new", "all"):
+            for file_path, _ in sorted(new):
+                print(f"    NEW  {file_path}")
+        if args.list in ("duplicate", "all"):
+            for file_path, _ in sorted(duplicate):
+                print(f"    DUP  {file_path}")
+
+    elapsed = time.perf_counter() - started
+    rate = total_files / elapsed * 60 if elapsed else 0
+    print(f"\n=== {total_files:,} files in {elapsed:.2f}s ({rate:,.0f} files/min) ===")
+    print(f"New: {sum(r['new'] for r in report):,}  Duplicate: {sum(r['duplicate'] for r in report):,}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsedSeconds": elapsed, "datasources": report}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def cmd_mark(args):
+    manifest = Manifest(args.index)
+    for ds_id in args.datasource_id or manifest.datasource_ids():
+        marked = manifest.mark_processed(ds_id, args.ttl_hours)
+        print(f"✓ {ds_id}: {marked:,} hashes marked processed (TTL {args.ttl_hours:g}h)")
+    return 0
+
+
+def cmd_sync_hazelcast(args):
+    try:
+        import hazelcast
+    except ImportError:
+        print("✗ sync-hazelcast needs the Hazelcast client: pip install hazelcast-python-client")
+        return 1
+    manifest = Manifest(args.index)
+    client = hazelcast.HazelcastClient(cluster_members=args.cluster, cluster_name=args.cluster_name)
+    try:
+        for ds_id in args.datasource_id or manifest.datasource_ids():
+            hashes = client.get_map(f"{MAP_NAME_PREFIX}-{ds_id}").blocking().key_set()
+            manifest.replace_processed(ds_id, hashes, "hazelcast")
+            print(f"✓ {ds_id}: {len(hashes):,} hashes in {MAP_NAME_PREFIX}-{ds_id}")
+    finally:
+        client.shutdown()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="SQLite index file")
+    parser.add_argument("--api-url", default=None, help="DataSourceManagementService base URL")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="Scan drop directories and predict new vs duplicate files")
+    scan.add_argument("--datasource", action="append", metavar="ID=PATH[:PATTERN]")
+    scan.add_argument("--from-api", action="store_true", help="Scan every active datasource's FilePath")
+    scan.add_argument("--path-map", action="append", metavar="LOCAL=REMOTE",
+                      help="Local mount of a path as the service sees it (hashes include the path)")
+    scan.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 4) * 4))
+    scan.add_argument("--recursive", action="store_true",
+                      help="Also scan subdirectories (FileDiscovery itself is TopDirectoryOnly)")
+    scan.add_argument("--ignore-case", action="store_true", help="Case-insensitive FilePattern (Windows hosts)")
+    scan.add_argument("--trust-dir-mtime", action="store_true",
+                      help="Skip directories whose mtime is unchanged (append-only drops)")
+    scan.add_argument("--list", choices=["new", "duplicate", "all"])
+    scan.add_argument("--json", help="Write the per-datasource report here")
+    scan.set_defaults(func=cmd_scan)
+
+    mark = sub.add_parser("mark", help="Mark currently-new hashes as processed")
+    mark.add_argument("--datasource-id", action="append")
+    mark.add_argument("--ttl-hours", type=float, default=24, help="FileDiscovery:DeduplicationTTLHours")
+    mark.set_defaults(func=cmd_mark)
+
+    sync = sub.add_parser("sync-hazelcast", help="Load processed hashes from the Hazelcast maps")
+    sync.add_argument("--cluster", action="append", default=None, help="host:port (repeatable)")
+    sync.add_argument("--cluster-name", default="data-processing-cluster")
+    sync.add_argument("--datasource-id", action="append")
+    sync.set_defaults(func=cmd_sync_hazelcast)
+
+    args = parser.parse_args()
+    if getattr(args, "cluster", None) is None and args.command == "sync-hazelcast":
+        args.cluster = ["127.0.0.1:5701"]
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""Hazelcast file-hash map simulator: footprint, hit rate and reprocessing per config.
+
+FileDiscovery checks every listed file's FileHashCalculator key against the
+datasource's map (`file-hashes-{datasourceId}`, ContainsKey) and, on a miss,
+processes the file and SetAsync's the key with DeduplicationTTLHours as the
+entry TTL. Processed files are not moved, so a file stays in the listing
+until the partner removes it. If its entry expires or is evicted first, the
+next poll processes it again.
+
+This replays file arrivals against the poll schedule of each datasource and
+evaluates a grid of map configurations:
+
+    TTL        entry time-to-live (SetAsync ttl; the map's own TTL is overridden)
+    max-idle   map max-idle-seconds (every ContainsKey hit counts as an access)
+    max-size   per-map entry cap with LRU eviction
+
+Arrivals are synthetic (datasource count, files per day, match ratio,
+residence time in the drop directory), a file_manifest.py index, or an
+arrivals file whose keys are computed with file_manifest.calculate_hash.
+Poll times come from each datasource's cron expression (cron_load.py).
+
+Every file is followed as a chain of processings over the polls that can see
+it, vectorised over all files sharing a cron expression. Capped maps use an
+LRU approximation: a poll lists files in a stable order and touches all of
+them, so LRU evicts entries of files that are gone first, and thrashes
+(every listed file misses) once a map must hold more listed files than its
+cap. Memory counts serialized key and value, a per-entry record overhead,
+backups and per-partition record stores; the overheads are estimates to
+calibrate against Management Center.
+
+Two things in the current setup matter for the results. The `file-hashes`
+map config in k8s/infrastructure/hazelcast-statefulset.yaml does not match
+the per-datasource map names, so its max-idle and eviction settings never
+apply. Those maps use the defaults: no cap, and backup-count 1. Also,
+DeduplicationTTLHours is read with GetValue(..., 24), i.e. as an int, so
+fractional values like the ConfigMap's "0.25" fail to bind. The grid
+therefore uses whole hours.
+
+Usage:
+    python hash_cache_sim.py --datasources 10000 --files-per-day 24 --residence-hours 72
+    python hash_cache_sim.py --from-api --files-per-day 48 --residence-hours 168 --ttl 24,72,168,0 --max-idle 0,auto
+    python hash_cache_sim.py --manifest file-manifest.sqlite --from-api --hours 72
+    python hash_cache_sim.py --arrivals drops.csv --cron "0 */5 * * * *" --json hash-sim.json
+"""
+
+import argparse
+import csv
+import json
+import math
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cron_load import Cron, CronError, build_calendar, load_schedules
+from file_manifest import calculate_hash
+
+HOUR = 3600
+PARTITIONS = 271
+KEY_BYTES = 44            # Base64 of a SHA-256
+DATA_HEADER = 12          # Hazelcast Data: partition hash + type id + string length
+VALUE_TEMPLATE = ('{"FileName":"%s","FilePath":"%s","FileSizeBytes":%d,'
+                  '"LastModifiedUtc":"2026-01-01T00:00:00.0000000Z",'
+                  '"ProcessedAt":"2026-01-01T00:00:00.0000000Z",'
+                  '"CorrelationId":"00000000-0000-0000-0000-000000000000"}')
+
+
+def value_bytes(path, size):
+    """Length of the ProcessedFileHashInfo JSON HazelcastFileHashService stores"""
+    name = path.replace("\\", "/").rsplit("/", 1)[-1]
+    return len((VALUE_TEMPLATE % (name, path, size)).encode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Arrivals
+# ---------------------------------------------------------------------------
+
+class Fleet:
+    """Files as parallel arrays: datasource index, present from/to (seconds from start), entry bytes"""
+
+    def __init__(self, start, crons):
+        self.start = start
+        self.crons = crons          # per datasource index
+        self.ds, self.arrive, self.leave, self.bytes = [], [], [], []
+
+    def add(self, ds, arrive, leave, entry_bytes):
+        self.ds.append(np.asarray(ds, dtype=np.int32))
+        self.arrive.append(np.asarray(arrive, dtype=np.float64))
+        self.leave.append(np.asarray(leave, dtype=np.float64))
+        self.bytes.append(np.asarray(entry_bytes, dtype=np.float64))
+
+    def freeze(self):
+        for name in ("ds", "arrive", "leave", "bytes"):
+            parts = getattr(self, name)
+            setattr(self, name, np.concatenate(parts) if parts else np.zeros(0))
+        return self
+
+
+def schedule_crons(args):
+    """Cron expression per datasource: the real ones (cron_load loader) or --cron for synthetic ones"""
+    args.file = args.datasource_file
+    args.synthetic = 0 if (args.manifest or args.arrivals) else args.datasources
+    schedules = load_schedules(args) if (args.from_api or args.file or args.synthetic) else []
+    return {str(s["id"]): s["cron"] for s in schedules}
+
+
+def synthetic_fleet(args, crons, start, horizon, rng):
+    ids = list(crons)
+    fleet = Fleet(start, [crons[i] for i in ids])
+    residence = args.residence_hours * HOUR if args.residence_hours else math.inf
+    # Start in steady state: files that arrived one residence time before the horizon are still listed
+    lead = min(residence, horizon)
+    rate = args.files_per_day * args.match_ratio / 86400
+    path_bytes = len(args.path_template.format(datasource="x" * 24, n=0))
+    entry = KEY_BYTES + DATA_HEADER * 2 + value_bytes("/" * path_bytes, args.file_size)
+    for index in range(len(ids)):
+        count = rng.poisson(rate * (horizon + lead))
+        if args.drop_time:
+            hour, minute = (int(p) for p in args.drop_time.split(":"))
+            days = rng.integers(-int(math.ceil(lead / 86400)), int(math.ceil(horizon / 86400)), count)
+            arrive = days * 86400.0 + hour * HOUR + minute * 60 + rng.normal(0, args.drop_spread * 60, count)
+        else:
+            arrive = rng.uniform(-lead, horizon, count)
+        leave = np.concatenate([np.full(args.backlog, math.inf), arrive + residence])
+        arrive = np.concatenate([np.full(args.backlog, -lead), arrive])
+        fleet.add(np.full(arrive.size, index), arrive, leave, np.full(arrive.size, entry))
+    return fleet
+
+
+def manifest_fleet(path, crons, default_cron, args):
+    """Current files in a file_manifest.py index; files not seen by the last scan have left"""
+    db = sqlite3.connect(path)
+    rows = db.execute("SELECT datasource_id, path, size, hash, first_seen, last_seen FROM files").fetchall()
+    if not rows:
+        raise SystemExit(f"{path} has no files; run file_manifest.py scan first")
+    last_scan = max(r[5] for r in rows)
+    return keyed_fleet(((ds, p, size, key, first, last if last < last_scan else math.inf)
+                        for ds, p, size, key, first, last in rows), crons, default_cron)
+
+
+def arrivals_fleet(path, crons, default_cron):
+    """CSV / NDJSON rows: datasource, path, size, mtime, arrived (default mtime), removed (optional)"""
+    def stamp(value):
+        if value in (None, ""):
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+            return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+    with open(path, encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f)) if path.endswith(".csv") else [json.loads(l) for l in f if l.strip()]
+    records = []
+    for row in rows:
+        mtime = stamp(row.get("mtime"))
+        arrived = stamp(row.get("arrived")) or mtime
+        removed = stamp(row.get("removed"))
+        size = int(float(row.get("size") or 0))
+        # The same key as FileDiscovery: path, size and mtime to 100ns
+        key = calculate_hash(row["path"], size, int(round(mtime * 1e9)))
+        records.append((str(row["datasource"]), row["path"], size, key, arrived,
+                        removed if removed is not None else math.inf))
+    return keyed_fleet(records, crons, default_cron)
+
+
+def keyed_fleet(records, crons, default_cron):
+    """Merge records that share a (datasource, key): the map cannot tell them apart"""
+    files = {}
+    for ds, file_path, size, key, arrived, removed in records:
+        entry = KEY_BYTES + DATA_HEADER * 2 + value_bytes(file_path, size)
+        known = files.get((ds, key))
+        if known:
+            known[0], known[1] = min(known[0], arrived), max(known[1], removed)
+        else:
+            files[(ds, key)] = [arrived, removed, entry]
+    start = min(v[0] for v in files.values())
+    start = datetime.fromtimestamp(start - start % 86400, tz=timezone.utc)
+    ids = sorted({ds for ds, _ in files})
+    index = {ds: i for i, ds in enumerate(ids)}
+    fleet = Fleet(start, [crons.get(ds, default_cron) for ds in ids])
+    keys = list(files)
+    base = start.timestamp()
+    fleet.add([index[ds] for ds, _ in keys], [files[k][0] - base for k in keys],
+              [files[k][1] - base for k in keys], [files[k][2] for k in keys])
+    return fleet
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+def poll_times(expressions, start, horizon):
+    calendar = build_calendar(start, int(horizon))
+    polls = {}
+    for expression in expressions:
+        try:
+            polls[expression] = np.flatnonzero(Cron(expression).fire_mask(calendar)).astype(np.float64)
+        except (CronError, ValueError) as e:
+            print(f"✗ '{expression}': {e}", file=sys.stderr)
+            polls[expression] = np.zeros(0)
+    return polls
+
+
+def steps(up, down, size):
+    """+1 at every `up` index and -1 at every `down` index"""
+    return (np.bincount(up, minlength=size) - np.bincount(down, minlength=size)).astype(np.int32)
+
+
+class Group:
+    """Files of the datasources sharing one cron expression, with their poll indices"""
+
+    def __init__(self, polls, ds_local, n_ds, arrive, leave, entry_bytes):
+        self.polls, self.n_ds = polls, n_ds
+        self.ds, self.bytes = ds_local, entry_bytes
+        self.i0 = np.searchsorted(polls, arrive, "left")
+        self.i1 = np.searchsorted(polls, leave, "left")
+        self.seen = self.i1 > self.i0
+        # Files arriving after the last poll are outside the horizon, not missed
+        self.missed = int((~self.seen & (arrive <= polls[-1])).sum())
+        gaps = np.diff(polls)
+        self.max_gap = float(gaps.max()) if gaps.size else math.inf
+        # Listed files per datasource and poll, and how many are listed for the first time
+        k = polls.size
+        ds, i0, i1 = self.ds[self.seen], self.i0[self.seen], self.i1[self.seen]
+        present = steps(ds * (k + 1) + i0, ds * (k + 1) + i1, n_ds * (k + 1))
+        self.present = present.reshape(n_ds, k + 1)[:, :k].cumsum(axis=1, dtype=np.int32)
+        self.first = np.bincount(ds * k + i0, minlength=n_ds * k).astype(np.int32).reshape(n_ds, k)
+        self.entry_mean = np.bincount(self.ds, weights=entry_bytes, minlength=n_ds) / \
+            np.maximum(np.bincount(self.ds, minlength=n_ds), 1)
+
+
+def simulate_group(group, ttl, idle, cap):
+    """Processings, hits and live entries per poll for one config"""
+    polls, k = group.polls, group.polls.size
+    stats = {"checks": int((group.i1 - group.i0)[group.seen].sum()), "missed": group.missed,
+             "processed": 0, "reprocessed": 0, "hits": 0}
+    live = np.zeros(group.n_ds * (k + 1), dtype=np.int32)
+    if not k:
+        return stats, live.reshape(group.n_ds, 1)[:, :0]
+    ttl = ttl or math.inf
+    idle = idle or math.inf
+    ttl_next = np.searchsorted(polls, polls + ttl, "left") if math.isfinite(ttl) else np.full(k, k)
+    idle_next = np.searchsorted(polls, polls + idle, "left") if math.isfinite(idle) else np.full(k, k)
+    # Same boundary as idle_next: a gap of exactly max-idle evicts (expiry <= now)
+    breaks = np.flatnonzero(np.diff(polls) >= idle) + 1
+    after = np.searchsorted(breaks, np.arange(k), "right")
+    break_next = np.where(after < breaks.size, breaks[np.minimum(after, max(breaks.size - 1, 0))], k) \
+        if breaks.size else np.full(k, k)
+    chain_next = np.minimum(ttl_next, break_next)
+
+    ds, j, end = group.ds[group.seen], group.i0[group.seen], group.i1[group.seen]
+    first = True
+    while j.size:
+        nxt = chain_next[j]
+        last = np.minimum(nxt, end) - 1
+        # First poll that no longer finds the entry: TTL from the write, or max-idle from the last hit
+        gone = np.minimum(ttl_next[j], idle_next[last])
+        live += steps(ds * (k + 1) + j, ds * (k + 1) + gone, live.size)
+        stats["processed"] += j.size
+        if not first:
+            stats["reprocessed"] += j.size
+        stats["hits"] += int((last - j).sum())
+        first = False
+        keep = nxt < end
+        ds, j, end = ds[keep], nxt[keep], end[keep]
+    entries = live.reshape(group.n_ds, k + 1)[:, :k].cumsum(axis=1, dtype=np.int32)
+    if cap:
+        # LRU thrash: a poll listing more files than the cap misses on every file already seen
+        over = group.present > cap
+        thrash = int((group.present - group.first)[over].sum())
+        stats["reprocessed"] += thrash
+        stats["processed"] += thrash
+        stats["hits"] -= min(stats["hits"], thrash)
+        entries = np.minimum(entries, cap)
+    return stats, entries
+
+
+def footprint(entries, entry_mean, args):
+    """Bytes of a map holding `entries` records (primary plus backups, partition stores)"""
+    records = entries * (entry_mean[:, None] + args.entry_overhead)
+    partitions = PARTITIONS * (1 - np.exp(-entries / PARTITIONS))
+    return (records + partitions * args.partition_store_bytes) * (1 + args.backup_count)
+
+
+def evaluate(groups, config, grid_minutes, horizon, args):
+    ttl, idle, cap = config
+    totals = {"checks": 0, "missed": 0, "processed": 0, "reprocessed": 0, "hits": 0}
+    timeline_entries = np.zeros(grid_minutes.size)
+    timeline_bytes = np.zeros(grid_minutes.size)
+    peak_map = 0
+    for group in groups:
+        stats, entries = simulate_group(group, ttl * HOUR, idle * HOUR, cap)
+        for key in totals:
+            totals[key] += stats[key]
+        if not entries.size:
+            continue
+        peak_map = max(peak_map, int(entries.max()))
+        # Step function from poll instants onto a one-minute grid
+        index = np.searchsorted(group.polls, grid_minutes, "right") - 1
+        valid = index >= 0
+        per_poll_entries = entries.sum(axis=0)
+        per_poll_bytes = footprint(entries, group.entry_mean, args).sum(axis=0)
+        timeline_entries[valid] += per_poll_entries[index[valid]]
+        timeline_bytes[valid] += per_poll_bytes[index[valid]]
+    scale = args.scale
+    return {
+        "ttlHours": ttl, "maxIdleHours": idle, "maxSize": cap,
+        "processed": totals["processed"] * scale, "reprocessed": totals["reprocessed"] * scale,
+        "reprocessRate": totals["reprocessed"] / totals["processed"] if totals["processed"] else 0.0,
+        "hitRate": totals["hits"] / totals["checks"] if totals["checks"] else 0.0,
+        "missedFiles": totals["missed"] * scale,
+        "peakEntries": float(timeline_entries.max() * scale) if timeline_entries.size else 0.0,
+        "peakEntriesPerMap": peak_map,
+        "peakMB": float(timeline_bytes.max() * scale / 2 ** 20) if timeline_bytes.size else 0.0,
+        "meanMB": float(timeline_bytes.mean() * scale / 2 ** 20) if timeline_bytes.size else 0.0,
+    }
+
+
+def build_groups(fleet, polls, rng, sample):
+    n = len(fleet.crons)
+    chosen = np.arange(n) if not sample or sample >= n else np.sort(rng.choice(n, sample, replace=False))
+    keep = np.isin(fleet.ds, chosen)
+    by_cron = {}
+    for i in chosen:
+        by_cron.setdefault(fleet.crons[i], []).append(i)
+    groups = []
+    for expression, members in by_cron.items():
+        local = np.full(n, -1, dtype=np.int32)
+        local[members] = np.arange(len(members))
+        mask = keep & (local[fleet.ds] >= 0)
+        if polls[expression].size:
+            groups.append(Group(polls[expression], local[fleet.ds[mask]], len(members),
+                                fleet.arrive[mask], fleet.leave[mask], fleet.bytes[mask]))
+    return groups, n / max(len(chosen), 1)
+
+
+def limit(value):
+    return f"{value:g}" if value else "-"
+
+
+def per_node_size(cap, members):
+    """PER_NODE size that lets a map hold `cap` entries.
+
+    Hazelcast checks the limit per partition (size x members / 271), so a
+    small map is capped by its fullest partition, not its total entry count.
+    """
+    per_partition = cap / PARTITIONS
+    fullest = math.ceil(per_partition + 3 * math.sqrt(per_partition) + 1)
+    return max(cap, math.ceil(fullest * PARTITIONS / members))
+
+
+def parse_grid(text, auto):
+    values = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if part == "auto":
+            values.append(auto)
+        elif part:
+            values.append(float(part) if part not in ("0", "none") else 0)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_argument_group("datasources and schedules (as in cron_load.py)")
+    source.add_argument("--api-url", help="DataSourceManagementService base URL")
+    source.add_argument("--from-api", action="store_true", help="Active datasources and their cron expressions")
+    source.add_argument("--datasource-file", action="append", help="Datasource list JSON (API response or array)")
+    source.add_argument("--datasources", type=int, default=0, help="Synthetic datasources using --cron")
+    source.add_argument("--cron", default="0 */15 * * * *", help="Cron for synthetic datasources / unknown ids")
+    files = parser.add_argument_group("file arrivals")
+    files.add_argument("--manifest", help="file_manifest.py index to replay")
+    files.add_argument("--arrivals", help="CSV/NDJSON of datasource,path,size,mtime[,arrived,removed]")
+    files.add_argument("--files-per-day", type=float, default=24, help="Synthetic arrivals per datasource")
+    files.add_argument("--match-ratio", type=float, default=1.0, help="Share of dropped files matching FilePattern")
+    files.add_argument("--residence-hours", type=float, default=72,
+                       help="How long a file stays in the drop directory (0 = forever)")
+    files.add_argument("--backlog", type=int, default=0, help="Files already in each directory that never leave")
+    files.add_argument("--drop-time", help="HH:MM UTC daily batch drop instead of arrivals spread over the day")
+    files.add_argument("--drop-spread", type=float, default=20, help="Minutes of spread around --drop-time")
+    files.add_argument("--file-size", type=int, default=1_000_000)
+    files.add_argument("--path-template", default="/mnt/external-test-data/{datasource}/batch-{n:06d}.csv")
+    grid = parser.add_argument_group("configurations")
+    grid.add_argument("--ttl", default="1,4,24,72,168,0", help="Entry TTL hours to try (0 = none)")
+    grid.add_argument("--max-idle", default="0,auto", help="max-idle hours (0 = none, auto = 2x longest poll gap)")
+    grid.add_argument("--max-size", default="0,auto", help="Per-map caps (0 = none, auto = 1.5x peak listed files)")
+    grid.add_argument("--max-reprocess", type=float, default=0.0, help="Acceptable share of reprocessed files")
+    memory = parser.add_argument_group("memory model")
+    memory.add_argument("--entry-overhead", type=int, default=150, help="Record bytes besides key and value")
+    memory.add_argument("--partition-store-bytes", type=int, default=2048,
+                        help="Per-partition record store of a map that has entries there")
+    memory.add_argument("--backup-count", type=int, default=1)
+    memory.add_argument("--members", type=int, default=1, help="Hazelcast members (PER_NODE size conversion)")
+    parser.add_argument("--hours", type=float, default=168, help="Simulated horizon")
+    parser.add_argument("--sample", type=int, default=0, help="Simulate N datasources and scale up")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write every configuration's result as JSON")
+    args = parser.parse_args()
+    if args.api_url:
+        args.api_url = args.api_url.rstrip("/")
+
+    rng = np.random.default_rng(args.seed)
+    started = time.perf_counter()
+    horizon = args.hours * HOUR
+    crons = schedule_crons(args)
+    if args.manifest:
+        fleet = manifest_fleet(args.manifest, crons, args.cron, args)
+    elif args.arrivals:
+        fleet = arrivals_fleet(args.arrivals, crons, args.cron)
+    else:
+        if not crons:
+            raise SystemExit("No datasources: use --datasources N, --from-api or --datasource-file")
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        fleet = synthetic_fleet(args, crons, start, horizon, rng)
+    fleet.freeze()
+    polls = poll_times(set(fleet.crons), fleet.start, horizon)
+    groups, args.scale = build_groups(fleet, polls, rng, args.sample)
+    grid_minutes = np.arange(0, horizon, 60.0)
+
+    longest_gap = max((g.max_gap for g in groups if math.isfinite(g.max_gap)), default=HOUR)
+    auto_idle = math.ceil(2 * longest_gap / HOUR * 4) / 4
+    peak_listed = max((int(g.present.max()) for g in groups if g.present.size), default=0)
+    auto_cap = max(1, int(math.ceil(peak_listed * 1.5)))
+    configs = [(t, i, c) for t in parse_grid(args.ttl, None) for i in parse_grid(args.max_idle, auto_idle)
+               for c in map(int, parse_grid(args.max_size, auto_cap))]
+    print(f"{len(fleet.crons):,} datasources ({sum(g.n_ds for g in groups):,} simulated), "
+          f"{fleet.ds.size:,} files, {len(polls):,} cron expressions, {args.hours:g}h horizon")
+    print(f"longest poll gap {longest_gap / 60:.0f} min (auto max-idle {auto_idle:g}h), "
+          f"peak files listed per directory {peak_listed:,} (auto max-size {auto_cap:,})\n")
+
+    results = [evaluate(groups, c, grid_minutes, horizon, args) for c in sorted(set(configs))]
+    safe = [r for r in results if r["reprocessRate"] <= args.max_reprocess]
+    best = min(safe, key=lambda r: (r["peakMB"], r["meanMB"])) if safe else None
+    current = next((r for r in results if r["ttlHours"] == 24 and not r["maxIdleHours"] and not r["maxSize"]), None)
+
+    print(f"{'ttl h':>6} {'idle h':>7} {'max-size':>9} {'processed':>11} {'reprocessed':>12} {'rate':>7} "
+          f"{'hit rate':>9} {'peak entries':>13} {'peak MB':>9} {'mean MB':>9}")
+    for r in sorted(results, key=lambda r: (r["reprocessRate"] > args.max_reprocess, r["peakMB"])):
+        mark = "  ← cheapest" if r is best else "  ← current default" if r is current else ""
+        print(f"{limit(r['ttlHours']):>6} {limit(r['maxIdleHours']):>7} {r['maxSize'] or '-':>9} "
+              f"{r['processed']:>11,.0f} {r['reprocessed']:>12,.0f} {r['reprocessRate']:>7.2%} "
+              f"{r['hitRate']:>9.2%} {r['peakEntries']:>13,.0f} {r['peakMB']:>9,.1f} {r['meanMB']:>9,.1f}{mark}")
+    missed = results[0]["missedFiles"] if results else 0
+    if missed:
+        print(f"\n{missed:,.0f} files left their directory before any poll listed them")
+    if best:
+        print(f"\nCheapest configuration with at most {args.max_reprocess:.2%} reprocessing:")
+        print(f"  FileDiscovery__DeduplicationTTLHours: \"{int(best['ttlHours']) if best['ttlHours'] else 876000}\"")
+        print("  hazelcast.yaml:\n    map:\n      file-hashes-*:")
+        if best["maxIdleHours"]:
+            print(f"        max-idle-seconds: {int(best['maxIdleHours'] * HOUR)}")
+        if best["maxSize"]:
+            print(f"        eviction:\n          eviction-policy: LRU\n          max-size-policy: PER_NODE\n"
+                  f"          size: {per_node_size(best['maxSize'], args.members)}")
+        print(f"        backup-count: {args.backup_count}")
+    else:
+        print(f"\nNo configuration keeps reprocessing at or below {args.max_reprocess:.2%}")
+    print(f"\n{len(results)} configurations in {time.perf_counter() - started:.1f}s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"datasources": len(fleet.crons), "files": int(fleet.ds.size), "autoMaxIdleHours": auto_idle,
+                       "autoMaxSize": auto_cap, "results": results, "cheapest": best}, f, indent=2)
+        print(f"results written to {args.json}")
+    return 0 if best else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
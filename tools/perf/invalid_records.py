@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""Streaming export and bulk triage of InvalidRecordsService records.
+
+export   Streams every record matching the list filters of
+         GET /api/v1/invalid-records to NDJSON, or to a directory of Parquet
+         part files, one page at a time. Memory is bounded by one page (NDJSON)
+         or one row group (Parquet) whatever the volume.
+
+reprocess / ignore / delete
+         Reads an export (or a plain file of record IDs), selects a subset and
+         sends it to POST bulk/reprocess, bulk/ignore or bulk/delete in batches
+         sized to a target request time, with several requests in flight.
+
+Paging: InvalidRecordRepository.GetListAsync loads every matching record,
+sorts by CreatedAt descending and then applies Skip/Take, so page N costs as
+much as page 1 and records inserted during the export shift every later page.
+The export therefore pages by a CreatedAt cursor instead: it always asks for
+page 1 with EndDate set to the oldest CreatedAt seen so far and drops the IDs
+already written at that timestamp. Inserts during the export cannot cause gaps
+or duplicates, and the cursor is what the checkpoint stores.
+
+Both commands resume. export keeps <output>.checkpoint.json (cursor, tie IDs,
+NDJSON byte offset or Parquet part count); the bulk commands append each
+finished batch, as a range of positions in the selection, to a state file and
+skip those ranges when run again with the same input and selection.
+
+Usage:
+    python invalid_records.py export invalid.ndjson --datasource-id 6751d3... --error-type format
+    python invalid_records.py export invalid-parquet/ --format parquet --start-date 2025-01-01
+    python invalid_records.py reprocess invalid.ndjson --error-field Amount --workers 4
+    python invalid_records.py ignore invalid.ndjson --where fileName=partner-2025-01-05.csv
+    python invalid_records.py delete ids.txt --confirm
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from ezapi import get_field, new_session, service_url
+
+API = "/api/v1/invalid-records"
+OPERATIONS = ("reprocess", "ignore", "delete")
+
+# Flat Parquet columns in InvalidRecordDto order; Errors becomes a list of
+# structs and OriginalData a JSON string (its shape differs per datasource).
+PARQUET_COLUMNS = (
+    "id", "dataSourceId", "dataSourceName", "fileName", "lineNumber", "createdAt",
+    "errorType", "severity", "isReviewed", "reviewedBy", "reviewedAt", "reviewNotes",
+    "isIgnored",
+)
+ERROR_FIELDS = ("field", "message", "errorType", "expectedValue", "actualValue")
+
+
+class Progress:
+    """Throttled single-line progress on stderr"""
+
+    def __init__(self, label, total=None, interval=1.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.started = time.time()
+        self.last = 0.0
+
+    def update(self, done, extra="", force=False):
+        now = time.time()
+        if not force and now - self.last < self.interval:
+            return
+        self.last = now
+        elapsed = max(now - self.started, 1e-6)
+        rate = done / elapsed
+        line = f"\r{self.label}: {done:,}"
+        if self.total:
+            line += f"/{self.total:,} ({done / self.total:.1%})"
+            if rate > 0 and done < self.total:
+                line += f" eta {(self.total - done) / rate:,.0f}s"
+        line += f" {rate:,.0f}/s {extra}"
+        sys.stderr.write(line.ljust(100))
+        sys.stderr.flush()
+
+    def finish(self, done, extra=""):
+        self.update(done, extra, force=True)
+        sys.stderr.write("\n")
+
+
+def save_json(path, data):
+    """Write JSON atomically so an interrupted run never leaves half a checkpoint"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def fetch_page(session, url, params, timeout, retries=5):
+    """GET one list page, retrying transient failures with backoff"""
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+            if response.status_code < 500:
+                response.raise_for_status()
+                return response.json()
+            error = f"HTTP {response.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            error = str(exc)
+        if attempt == retries:
+            raise RuntimeError(f"list request failed after {retries + 1} attempts: {error}")
+        time.sleep(min(2 ** attempt, 30))
+
+
+def iter_keyset(session, filters, page_size, state, timeout=120):
+    """Yield (records, remaining) per page, newest first, paging by a CreatedAt cursor.
+
+    remaining is the totalCount of the first request of this run. state holds
+    the cursor (end_date), the IDs already yielded at exactly that timestamp
+    (tie_ids) and the offset within it (page). It is updated in place after
+    every page so the caller can checkpoint it.
+    """
+    url = service_url("invalid-records") + API
+    remaining = None
+    while True:
+        params = {k: v for k, v in filters.items() if v}
+        if state.get("end_date"):
+            params["EndDate"] = state["end_date"]
+        params["Page"] = state.get("page", 1)
+        params["PageSize"] = page_size
+        payload = fetch_page(session, url, params, timeout)
+        if remaining is None:
+            remaining = get_field(payload, "totalCount")
+        items = get_field(payload, "data") or []
+        if not items:
+            return
+
+        tie_ids = set(state.get("tie_ids", []))
+        fresh = [r for r in items if get_field(r, "id") not in tie_ids]
+        last_ts = get_field(items[-1], "createdAt")
+        if last_ts == state.get("end_date"):
+            # The whole page shares the cursor timestamp; step through it by offset
+            state["page"] = state.get("page", 1) + 1
+            tie_ids.update(get_field(r, "id") for r in fresh)
+        else:
+            state["end_date"] = last_ts
+            state["page"] = 1
+            tie_ids = {get_field(r, "id") for r in items if get_field(r, "createdAt") == last_ts}
+        state["tie_ids"] = sorted(tie_ids)
+
+        yield fresh, remaining
+        if len(items) < page_size:
+            return
+
+
+class NdjsonSink:
+    """Appends records to one NDJSON file; the checkpoint stores its byte offset"""
+
+    def __init__(self, path, checkpoint):
+        self.path = path
+        offset = checkpoint.get("offset")
+        if offset is not None and os.path.exists(path):
+            self.file = open(path, "r+b")
+            self.file.truncate(offset)
+            self.file.seek(offset)
+        else:
+            self.file = open(path, "wb")
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            self.file.write(b"\n")
+
+    def flush(self, checkpoint):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        checkpoint["offset"] = self.file.tell()
+
+    def close(self, checkpoint):
+        self.flush(checkpoint)
+        self.file.close()
+
+
+class ParquetSink:
+    """Writes part-NNNNN.parquet files of one row group each into a directory"""
+
+    def __init__(self, path, checkpoint, row_group):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.row_group = row_group
+        self.parts = checkpoint.get("parts", 0)
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        # Drop parts written after the last checkpoint
+        for name in os.listdir(path):
+            m = re.fullmatch(r"part-(\d+)\.parquet", name)
+            if m and int(m.group(1)) >= self.parts:
+                os.remove(os.path.join(path, name))
+        string = pa.string()
+        self.schema = pa.schema(
+            [(c, pa.int64() if c == "lineNumber" else pa.bool_() if c.startswith("is") else string)
+             for c in PARQUET_COLUMNS]
+            + [("errors", pa.list_(pa.struct([(f, string) for f in ERROR_FIELDS]))),
+               ("originalData", string)])
+
+    def write(self, records):
+        for record in records:
+            row = {c: get_field(record, c) for c in PARQUET_COLUMNS}
+            row["errors"] = [{f: get_field(e, f) for f in ERROR_FIELDS}
+                             for e in get_field(record, "errors") or []]
+            original = get_field(record, "originalData")
+            row["originalData"] = None if original is None else json.dumps(original, ensure_ascii=False)
+            self.rows.append(row)
+
+    def pending(self):
+        return len(self.rows) >= self.row_group
+
+    def flush(self, checkpoint):
+        if self.rows:
+            table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+            target = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            self.pq.write_table(table, target + ".tmp", compression="zstd")
+            os.replace(target + ".tmp", target)
+            self.parts += 1
+            self.rows = []
+        checkpoint["parts"] = self.parts
+
+    def close(self, checkpoint):
+        self.flush(checkpoint)
+
+
+def export(args):
+    filters = {
+        "DataSourceId": args.datasource_id, "ErrorType": args.error_type,
+        "StartDate": args.start_date, "EndDate": args.end_date,
+        "Search": args.search, "Status": args.status,
+    }
+    checkpoint_path = args.output.rstrip("/") + ".checkpoint.json"
+    checkpoint = {}
+    if os.path.exists(checkpoint_path):
+        if not args.resume:
+            sys.exit(f"{checkpoint_path} exists; pass --resume to continue it or delete it to start over")
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("filters") != filters or checkpoint.get("format") != args.format:
+            sys.exit(f"{checkpoint_path} was written with different filters or format")
+        if checkpoint.get("complete"):
+            print(f"Export already complete: {checkpoint['written']:,} records in {args.output}")
+            return 0
+    checkpoint.update(filters=filters, format=args.format)
+    checkpoint.setdefault("written", 0)
+    state = checkpoint.setdefault("state", {"end_date": args.end_date, "page": 1})
+
+    if args.format == "parquet":
+        sink = ParquetSink(args.output, checkpoint, args.row_group)
+    else:
+        sink = NdjsonSink(args.output, checkpoint)
+
+    session = new_session("perf-invalid-export")
+    progress = Progress("exported")
+    written_before = checkpoint["written"]
+    for records, remaining in iter_keyset(session, filters, args.page_size, state, timeout=args.timeout):
+        if progress.total is None and remaining:
+            progress.total = written_before + remaining
+        sink.write(records)
+        checkpoint["written"] += len(records)
+        if args.format == "ndjson" or sink.pending():
+            sink.flush(checkpoint)
+            save_json(checkpoint_path, checkpoint)
+        progress.update(checkpoint["written"])
+    sink.close(checkpoint)
+    checkpoint["complete"] = True
+    save_json(checkpoint_path, checkpoint)
+    progress.finish(checkpoint["written"])
+    print(f"Exported {checkpoint['written']:,} records to {args.output}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+def iter_source(path):
+    """Yield records from an export, or {"id": ...} from a plain ID list"""
+    if os.path.isdir(path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Reading a Parquet export needs pyarrow: pip install pyarrow")
+        for name in sorted(os.listdir(path)):
+            if re.fullmatch(r"part-\d+\.parquet", name):
+                for batch in pq.ParquetFile(os.path.join(path, name)).iter_batches(batch_size=10000):
+                    for record in batch.to_pylist():
+                        if record.get("originalData") is not None:
+                            record["originalData"] = json.loads(record["originalData"])
+                        yield record
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line) if line.startswith("{") else {"id": line}
+
+
+def build_selector(args):
+    """Predicate over exported records from the selection options"""
+    where = []
+    for spec in args.where:
+        key, sep, value = spec.partition("=")
+        if not sep:
+            sys.exit(f"--where expects field=value, got {spec!r}")
+        where.append((key, value))
+    message = re.compile(args.message) if args.message else None
+
+    def value_text(value):
+        return json.dumps(value) if isinstance(value, bool) or value is None else str(value)
+
+    def select(record):
+        if not args.include_ignored and get_field(record, "isIgnored"):
+            return False
+        for key, value in where:
+            if value_text(get_field(record, key)) != value:
+                return False
+        if args.error_field or args.error_rule or message:
+            errors = get_field(record, "errors") or []
+            return any(
+                (not args.error_field or get_field(e, "field") in args.error_field)
+                and (not args.error_rule or get_field(e, "errorType") in args.error_rule)
+                and (not message or message.search(get_field(e, "message") or ""))
+                for e in errors)
+        return True
+
+    return select
+
+
+def selection_fingerprint(args):
+    """Identifies input + selection so a state file is never applied to another run"""
+    stat = os.stat(args.input)
+    spec = [args.operation, os.path.abspath(args.input), stat.st_size, int(stat.st_mtime),
+            sorted(args.where), sorted(args.error_field), sorted(args.error_rule),
+            args.message, args.include_ignored]
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()[:16]
+
+
+def load_done(state_path, fingerprint):
+    """Merged [start, end) ranges of selection positions already sent"""
+    ranges = []
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("fingerprint") != fingerprint:
+                sys.exit(f"{state_path} belongs to a different input or selection; delete it to start over")
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line from an interrupted run
+                ranges.append((entry["start"], entry["end"]))
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def iter_pending(records, select, done):
+    """Yield (position, id) for selected records outside the done ranges"""
+    position = 0
+    r = 0
+    for record in records:
+        if not select(record):
+            continue
+        while r < len(done) and done[r][1] <= position:
+            r += 1
+        if not (r < len(done) and done[r][0] <= position):
+            yield position, get_field(record, "id")
+        position += 1
+
+
+# ---------------------------------------------------------------------------
+# Bulk operations
+# ---------------------------------------------------------------------------
+
+class BatchSizer:
+    """Sizes batches so one request takes about target_seconds.
+
+    The bulk endpoints update records one at a time inside the request, so
+    request time grows linearly with batch size; the per-record cost is tracked
+    as a moving average and halved batches are used after failures.
+    """
+
+    def __init__(self, initial, minimum, maximum, target_seconds):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target_seconds
+        self.per_record = None
+        self.lock = threading.Lock()
+
+    def observe(self, count, seconds):
+        with self.lock:
+            sample = seconds / max(count, 1)
+            self.per_record = sample if self.per_record is None else 0.7 * self.per_record + 0.3 * sample
+            ideal = self.target / max(self.per_record, 1e-6)
+            # Grow at most 2x per observation, shrink immediately
+            self.size = int(max(self.minimum, min(self.maximum, ideal, self.size * 2)))
+
+    def backoff(self):
+        with self.lock:
+            self.size = max(self.minimum, self.size // 2)
+
+    def next_size(self):
+        with self.lock:
+            return self.size
+
+
+_local = threading.local()
+
+
+def thread_session():
+    if not hasattr(_local, "session"):
+        _local.session = new_session("perf-invalid-bulk")
+    return _local.session
+
+
+def post_bulk(operation, ids, requested_by, sizer, timeout, retries):
+    """POST one batch, splitting it in half on server errors or timeouts.
+
+    Returns (successful, [(record_id, error), ...]).
+    """
+    url = f"{service_url('invalid-records')}{API}/bulk/{operation}"
+    body = {"recordIds": ids, "requestedBy": requested_by}
+    for attempt in range(retries + 1):
+        started = time.time()
+        try:
+            response = thread_session().post(url, json=body, timeout=timeout)
+            if response.ok:
+                sizer.observe(len(ids), time.time() - started)
+                data = get_field(response.json(), "data") or {}
+                errors = [(get_field(e, "recordId"), get_field(e, "error"))
+                          for e in get_field(data, "errors") or []]
+                return get_field(data, "successful", len(ids) - len(errors)), errors
+            if response.status_code < 500:
+                return 0, [(i, f"HTTP {response.status_code}: {response.text[:200]}") for i in ids]
+            error = f"HTTP {response.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            error = type(exc).__name__
+        sizer.backoff()
+        if len(ids) > 1:
+            # The whole batch failed: retry as two smaller requests
+            mid = len(ids) // 2
+            ok_a, err_a = post_bulk(operation, ids[:mid], requested_by, sizer, timeout, retries - attempt)
+            ok_b, err_b = post_bulk(operation, ids[mid:], requested_by, sizer, timeout, retries - attempt)
+            return ok_a + ok_b, err_a + err_b
+        time.sleep(min(2 ** attempt, 30))
+    return 0, [(i, error) for i in ids]
+
+
+def bulk(args):
+    if args.operation == "delete" and not args.confirm:
+        sys.exit("delete removes records permanently; pass --confirm")
+    select = build_selector(args)
+    fingerprint = selection_fingerprint(args)
+    state_path = args.state or f"{args.input.rstrip('/')}.{args.operation}.state.ndjson"
+    done = load_done(state_path, fingerprint)
+    already = sum(end - start for start, end in done)
+
+    if args.dry_run:
+        count = sum(1 for _ in iter_pending(iter_source(args.input), select, done))
+        print(f"{count:,} records would be sent to bulk/{args.operation}"
+              + (f" ({already:,} already done)" if already else ""))
+        return 0
+
+    new_state = not os.path.exists(state_path)
+    state = open(state_path, "a", encoding="utf-8")
+    if new_state:
+        state.write(json.dumps({"fingerprint": fingerprint, "operation": args.operation,
+                                "input": args.input}) + "\n")
+        state.flush()
+    errors_out = open(args.errors or f"{args.operation}-errors.ndjson", "a", encoding="utf-8")
+    sizer = BatchSizer(args.batch_size, args.min_batch, args.max_batch, args.target_seconds)
+    totals = {"sent": 0, "successful": 0, "failed": 0}
+    total = None
+    if args.count_first:
+        total = sum(1 for r in iter_source(args.input) if select(r))
+    progress = Progress(args.operation, total)
+
+    def finished(future, start, end):
+        successful, errors = future.result()
+        totals["successful"] += successful
+        totals["failed"] += len(errors)
+        for record_id, error in errors:
+            errors_out.write(json.dumps({"recordId": record_id, "error": error}, ensure_ascii=False) + "\n")
+        errors_out.flush()
+        state.write(json.dumps({"start": start, "end": end, "successful": successful,
+                                "failed": len(errors)}) + "\n")
+        state.flush()
+
+    in_flight = {}
+    batch, batch_start, last = [], None, None
+
+    def submit():
+        in_flight[pool.submit(post_bulk, args.operation, list(batch), args.requested_by,
+                              sizer, args.timeout, args.retries)] = (batch_start, last + 1)
+        totals["sent"] += len(batch)
+        batch.clear()
+
+    def drain(limit):
+        while len(in_flight) > limit:
+            completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                finished(future, *in_flight.pop(future))
+            progress.update(already + totals["successful"] + totals["failed"],
+                            f"batch {sizer.next_size()} failed {totals['failed']:,}")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for position, record_id in iter_pending(iter_source(args.input), select, done):
+            # Batches are contiguous position ranges so the state file stays small
+            if batch and (position != last + 1 or len(batch) >= sizer.next_size()):
+                drain(args.workers - 1)
+                submit()
+            if not batch:
+                batch_start = position
+            batch.append(record_id)
+            last = position
+        if batch:
+            drain(args.workers - 1)
+            submit()
+        drain(0)
+
+    state.close()
+    errors_out.close()
+    processed = already + totals["successful"] + totals["failed"]
+    progress.finish(processed)
+    print(f"bulk/{args.operation}: {totals['sent']:,} sent, {totals['successful']:,} successful, "
+          f"{totals['failed']:,} failed" + (f", {already:,} skipped from earlier runs" if already else ""))
+    if totals["failed"]:
+        print(f"Failures written to {errors_out.name}")
+    return 1 if totals["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="Stream matching records to NDJSON or Parquet")
+    p.add_argument("output", help="NDJSON file, or directory for --format parquet")
+    p.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    p.add_argument("--datasource-id")
+    p.add_argument("--error-type", help="schema, format, required or range")
+    p.add_argument("--start-date", help="ISO date/time, inclusive")
+    p.add_argument("--end-date", help="ISO date/time, inclusive")
+    p.add_argument("--search", help="Substring of FileName or DataSourceId")
+    p.add_argument("--status", help="reviewed, ignored or pending")
+    p.add_argument("--page-size", type=int, default=500)
+    p.add_argument("--row-group", type=int, default=50000, help="Rows per Parquet part file")
+    p.add_argument("--timeout", type=float, default=120)
+    p.add_argument("--resume", action="store_true", help="Continue from <output>.checkpoint.json")
+    p.set_defaults(func=export)
+
+    for operation in OPERATIONS:
+        p = sub.add_parser(operation, help=f"Send selected records to bulk/{operation}")
+        p.set_defaults(func=bulk, operation=operation)
+        p.add_argument("input", help="NDJSON export, Parquet export directory, or a file of record IDs")
+        p.add_argument("--where", action="append", default=[], metavar="FIELD=VALUE",
+                       help="Top-level field equality, e.g. dataSourceId=..., fileName=..., severity=Error")
+        p.add_argument("--error-field", action="append", default=[], help="Any error on this field")
+        p.add_argument("--error-rule", action="append", default=[],
+                       help="Any error of this type (schema, format, required, range)")
+        p.add_argument("--message", help="Regex over error messages")
+        p.add_argument("--include-ignored", action="store_true", help="Do not skip records already ignored")
+        p.add_argument("--requested-by", default=os.environ.get("USER", "perf-tools"))
+        p.add_argument("--workers", type=int, default=4, help="Concurrent bulk requests")
+        p.add_argument("--batch-size", type=int, default=100, help="Initial batch size")
+        p.add_argument("--min-batch", type=int, default=10)
+        p.add_argument("--max-batch", type=int, default=5000)
+        p.add_argument("--target-seconds", type=float, default=5.0, help="Target time per bulk request")
+        p.add_argument("--timeout", type=float, default=120)
+        p.add_argument("--retries", type=int, default=3)
+        p.add_argument("--state", help="State file (default <input>.<operation>.state.ndjson)")
+        p.add_argument("--errors", help="Per-record failures (default <operation>-errors.ndjson)")
+        p.add_argument("--count-first", action="store_true", help="Count the selection first for an ETA")
+        p.add_argument("--dry-run", action="store_true", help="Only count what would be sent")
+        if operation == "delete":
+            p.add_argument("--confirm", action="store_true", help="Required: deletes are permanent")
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""Kafka output payload analyzer with batching and compression simulation.
+
+Reads what KafkaOutputHandler actually published - the KafkaMessageExtractor
+dumps in tools/KafkaMessageExtractor/kafka-extracted-messages/ or any NDJSON
+capture - and answers three questions:
+
+1. How big are the messages and how much of each is envelope rather than data
+   (pretty-printing, JSON array framing, Kafka record overhead, the MassTransit
+   envelope when the same payload goes through the rider)?
+2. Replayed through a simulated librdkafka producer (per-partition batches that
+   close on batch.size or linger.ms), how full do batches get?
+3. What do gzip, snappy, lz4 and zstd buy on these batches, and at what CPU cost?
+
+It ends with recommended ProducerConfig values for KafkaOutputHandler
+(OutputService/Program.cs) and the matching MassTransit rider producer settings.
+
+Usage:
+    python kafka_payload.py ../KafkaMessageExtractor/kafka-extracted-messages/*-messages-*.txt
+    python kafka_payload.py capture.ndjson --ndjson --rate 200 --partitions 3 --max-latency-ms 50
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+import zlib
+
+from reconcile import iter_json
+
+try:
+    import cramjam
+except ImportError:
+    cramjam = None
+
+# Current OutputService/Program.cs ProducerConfig
+CURRENT = {"codec": "snappy", "linger_ms": 10, "batch_size": 16384}
+# Broker default message.max.bytes
+BROKER_MAX_MESSAGE_BYTES = 1048588
+# RecordBatch header (v2) and per-record framing (attributes, varint deltas, key/value lengths)
+BATCH_HEADER_BYTES = 61
+RECORD_OVERHEAD_BYTES = 12
+
+LINGERS_MS = [0, 5, 10, 25, 50, 100]
+BATCH_SIZES = [16384, 65536, 262144, 1048576]
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+class FormattedLines:
+    """Read-only text stream over a *-formatted-*.json dump.
+
+    The extractor stores the dump one line per JSON string in "messages";
+    this stitches the lines back together as they are read, so the dump
+    streams through iter_json like the *-messages-*.txt file.
+    """
+
+    def __init__(self, path):
+        self.name = path
+        self.file = open(path, encoding="utf-8-sig")
+        self.lines = self._lines()
+
+    def _lines(self):
+        for line in self.file:
+            if line.strip().startswith('"messages"'):
+                break
+        for line in self.file:
+            item = line.strip().rstrip(",")
+            if item.startswith("]"):
+                return
+            text = json.loads(item)
+            if not isinstance(text, str):
+                raise SystemExit(f"{self.name}: messages are not stored as lines; use the *-messages-*.txt dump")
+            yield text + "\n"
+
+    def read(self, size):
+        parts, length = [], 0
+        for line in self.lines:
+            parts.append(line)
+            length += len(line)
+            if length >= size:
+                break
+        return "".join(parts)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_messages(path, ndjson=False):
+    """Stream (key, raw_text, parsed) for one dump file"""
+    if ndjson:
+        with open(path, encoding="utf-8-sig") as f:
+            for line in f:
+                if line.strip():
+                    yield None, line.rstrip("\r\n"), safe_json(line)
+        return
+    with open(path, encoding="utf-8-sig") as f:
+        head = f.read(2000)
+    if head.lstrip().startswith("{") and '"messages"' in head:
+        with FormattedLines(path) as source:
+            for value, raw in iter_json(source, top_level=True):
+                yield None, raw, value
+    else:
+        for value, raw in iter_json(path, top_level=True):
+            yield None, raw, value
+
+
+def reservoir(items, size, rng):
+    """Uniform sample of `size` items from a stream (Algorithm R); returns (sample, seen)"""
+    sample = []
+    seen = 0
+    for item in items:
+        seen += 1
+        if len(sample) < size:
+            sample.append(item)
+        else:
+            slot = rng.randrange(seen)
+            if slot < size:
+                sample[slot] = item
+    return sample, seen
+
+
+def safe_json(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def synthetic_messages(count, records, seed=1):
+    """Stand-in payloads shaped like the e2e transaction dumps"""
+    rng = random.Random(seed)
+    messages = []
+    for m in range(count):
+        batch = [{"TransactionId": f"TXN-{m * records + i:08d}", "CustomerName": f"Customer {rng.randint(1, 5000)}",
+                  "Amount": round(rng.uniform(1, 5000), 2), "Date": "2025-12-14",
+                  "Status": rng.choice(["Approved", "Pending", "Rejected"]),
+                  "Category": rng.choice(["Retail", "Services", "Online"]),
+                  "PaymentMethod": rng.choice(["Credit Card", "Bank Transfer", "Cash"])} for i in range(records)]
+        raw = json.dumps(batch, indent=2, ensure_ascii=False)
+        messages.append((None, raw, batch))
+    return messages
+
+
+# ---------------------------------------------------------------------------
+# Size analysis
+# ---------------------------------------------------------------------------
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def masstransit_envelope(message):
+    """Approximate JSON envelope MassTransit wraps around a message on the rider"""
+    return {
+        "messageId": str(uuid.uuid4()), "requestId": None, "correlationId": str(uuid.uuid4()),
+        "conversationId": str(uuid.uuid4()), "initiatorId": None,
+        "sourceAddress": "loopback://localhost/output-service",
+        "destinationAddress": "loopback://localhost/dataprocessing.output",
+        "messageType": ["urn:message:DataProcessing.Shared.Messages:OutputEvent"],
+        "message": message, "sentTime": "2025-12-14T12:36:31.3179346Z", "headers": {},
+        "host": {"machineName": "output-service-7d9f", "processName": "DataProcessing.Output", "processId": 1,
+                 "assembly": "DataProcessing.Output", "assemblyVersion": "1.0.0.0",
+                 "frameworkVersion": "8.0.0", "massTransitVersion": "8.1.3.0",
+                 "operatingSystemVersion": "Unix 6.1.0"},
+    }
+
+
+def analyze_sizes(messages):
+    sizes, records, compact, payload = [], 0, 0, 0
+    envelope_extra = []
+    for key, raw, value in messages:
+        size = len(raw.encode())
+        sizes.append(size + len((key or "").encode()) + RECORD_OVERHEAD_BYTES)
+        if isinstance(value, (list, dict)):
+            items = value if isinstance(value, list) else [value]
+            records += len(items)
+            compact_text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+            compact += len(compact_text.encode())
+            payload += sum(len(json.dumps(i, separators=(",", ":"), ensure_ascii=False).encode()) for i in items)
+            enveloped = json.dumps(masstransit_envelope(value), separators=(",", ":"), ensure_ascii=False)
+            envelope_extra.append(len(enveloped.encode()) - len(compact_text.encode()))
+        else:
+            records += 1
+            compact += size
+            payload += size
+    total = sum(sizes)
+    return {
+        "messages": len(messages),
+        "records": records,
+        "bytes": total,
+        "p50": percentile(sizes, 0.5), "p90": percentile(sizes, 0.9), "p99": percentile(sizes, 0.99),
+        "max": max(sizes) if sizes else 0,
+        "whitespaceBytes": sum(len(raw.encode()) for _, raw, _ in messages) - compact,
+        "framingBytes": compact - payload,
+        "kafkaRecordBytes": RECORD_OVERHEAD_BYTES * len(messages),
+        "payloadBytes": payload,
+        "massTransitEnvelopeBytes": statistics.mean(envelope_extra) if envelope_extra else 0,
+        "oversized": sum(1 for s in sizes if s > BROKER_MAX_MESSAGE_BYTES),
+        "sizes": sizes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Producer simulation
+# ---------------------------------------------------------------------------
+
+def codecs():
+    available = {"none": lambda data: data,
+                 "gzip": lambda data: gzip.compress(data, 6, mtime=0)}
+    if cramjam is not None:
+        available["snappy"] = lambda data: bytes(cramjam.snappy.compress_raw(data))
+        available["lz4"] = lambda data: bytes(cramjam.lz4.compress(data))
+        available["zstd"] = lambda data: bytes(cramjam.zstd.compress(data, 3))
+    return available
+
+
+def arrival_times(count, rate, seed=7):
+    """Poisson arrivals at `rate` messages/s"""
+    rng = random.Random(seed)
+    t, times = 0.0, []
+    for _ in range(count):
+        t += rng.expovariate(rate)
+        times.append(t)
+    return times
+
+
+def simulate_batches(messages, times, partitions, linger_ms, batch_size):
+    """librdkafka-style accumulation: a partition's batch is sent when the next
+    message would overflow batch.size or linger.ms after its first message"""
+    linger = linger_ms / 1000
+    open_batches = {}
+    batches, waits = [], []
+
+    def send(partition, sent_at):
+        _, size, parts, arrivals = open_batches.pop(partition)
+        batches.append(b"".join(parts))
+        waits.extend(sent_at - arrived for arrived in arrivals)
+
+    for (key, raw, _), t in zip(messages, times):
+        for partition in [p for p, b in open_batches.items() if t >= b[0] + linger]:
+            send(partition, open_batches[partition][0] + linger)
+        data = raw.encode()
+        partition = zlib.crc32((key or raw[:64]).encode()) % partitions
+        batch = open_batches.get(partition)
+        if batch and batch[1] + len(data) > batch_size:
+            send(partition, t)
+            batch = None
+        if batch is None:
+            open_batches[partition] = [t, len(data), [data], [t]]
+        else:
+            batch[1] += len(data)
+            batch[2].append(data)
+            batch[3].append(t)
+        if linger == 0 or len(data) >= batch_size:
+            send(partition, t)
+    for partition in list(open_batches):
+        send(partition, open_batches[partition][0] + linger)
+    return batches, waits
+
+
+def measure_codecs(batches, available, repeat=1):
+    """Compressed bytes and CPU seconds per codec over a set of batches"""
+    results = {}
+    for name, compress in available.items():
+        cpu = time.process_time()
+        compressed = 0
+        for _ in range(repeat):
+            compressed = sum(len(compress(b)) for b in batches)
+        results[name] = {"bytes": compressed, "cpu": (time.process_time() - cpu) / repeat}
+    return results
+
+
+def run_grid(messages, args):
+    times = arrival_times(len(messages), args.rate)
+    duration = times[-1] if times else 1
+    available = codecs()
+    raw_bytes = sum(len(raw.encode()) for _, raw, _ in messages)
+    rows = []
+    for batch_size in BATCH_SIZES:
+        for linger_ms in LINGERS_MS:
+            batches, waits = simulate_batches(messages, times, args.partitions, linger_ms, batch_size)
+            fill = statistics.mean(min(1.0, len(b) / batch_size) for b in batches)
+            measured = measure_codecs(batches, available)
+            for codec, m in measured.items():
+                wire = m["bytes"] + BATCH_HEADER_BYTES * len(batches) + RECORD_OVERHEAD_BYTES * len(messages)
+                rows.append({
+                    "codec": codec, "lingerMs": linger_ms, "batchSize": batch_size,
+                    "batches": len(batches), "messagesPerBatch": len(messages) / len(batches),
+                    "fill": fill, "ratio": raw_bytes / max(1, m["bytes"]),
+                    "wireBytesPerSec": wire / duration, "requestsPerSec": len(batches) / duration,
+                    "cpuCores": m["cpu"] / duration, "cpuMsPerMb": m["cpu"] * 1000 / (raw_bytes / 1e6),
+                    "meanWaitMs": statistics.mean(waits) * 1000 if waits else 0,
+                })
+    return rows, duration
+
+
+def recommend(rows, args):
+    """Fewest wire bytes within the latency and CPU budgets; ties go to fewer requests"""
+    eligible = [r for r in rows if r["meanWaitMs"] <= args.max_latency_ms and r["cpuCores"] <= args.cpu_budget]
+    if not eligible:
+        eligible = [r for r in rows if r["lingerMs"] == 0]
+    least = min(r["wireBytesPerSec"] for r in eligible)
+    # Within 1% of the smallest wire volume, prefer fewer requests, then smaller batch buffers
+    return min(eligible, key=lambda r: (round(r["wireBytesPerSec"] / least, 2), round(r["requestsPerSec"], 1),
+                                        r["batchSize"], r["cpuCores"]))
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def fmt_bytes(value):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:,.0f}{unit}" if unit == "B" else f"{value:,.1f}{unit}"
+        value /= 1024
+
+
+CONFLUENT_CODECS = {"none": "None", "gzip": "Gzip", "snappy": "Snappy", "lz4": "Lz4", "zstd": "Zstd"}
+
+
+def print_report(sizes, rows, best, duration, args):
+    print("📦 Kafka payload analysis")
+    print(f"  {sizes['messages']:,} messages, {sizes['records']:,} records, {fmt_bytes(sizes['bytes'])} "
+          f"(replayed at {args.rate:g} msg/s over {args.partitions} partitions, {duration:.1f}s)")
+    print("\n=== Message size ===")
+    print(f"  p50 {fmt_bytes(sizes['p50'])}  p90 {fmt_bytes(sizes['p90'])}  p99 {fmt_bytes(sizes['p99'])}  "
+          f"max {fmt_bytes(sizes['max'])}")
+    records = max(1, sizes["records"])
+    print(f"  payload            {fmt_bytes(sizes['payloadBytes'] / records):>9}/record")
+    print(f"  pretty-print       {fmt_bytes(sizes['whitespaceBytes'] / records):>9}/record "
+          f"({sizes['whitespaceBytes'] / max(1, sizes['bytes']):.0%} of bytes)")
+    print(f"  array framing      {fmt_bytes(sizes['framingBytes'] / records):>9}/record")
+    print(f"  Kafka record       {fmt_bytes(sizes['kafkaRecordBytes'] / records):>9}/record")
+    print(f"  MassTransit wrap   {fmt_bytes(sizes['massTransitEnvelopeBytes']):>9}/message (if sent via the rider)")
+    if sizes["oversized"]:
+        print(f"  ⚠ {sizes['oversized']:,} message(s) exceed the broker's message.max.bytes "
+              f"({fmt_bytes(BROKER_MAX_MESSAGE_BYTES)})")
+
+    print("\n=== Codecs (batch.size / linger.ms of the recommendation) ===")
+    print(f"  {'codec':<7} {'ratio':>6} {'wire/s':>10} {'CPU ms/MB':>10} {'cores':>7}")
+    for r in rows:
+        if r["batchSize"] == best["batchSize"] and r["lingerMs"] == best["lingerMs"]:
+            print(f"  {r['codec']:<7} {r['ratio']:>5.1f}x {fmt_bytes(r['wireBytesPerSec']):>10} "
+                  f"{r['cpuMsPerMb']:>10.2f} {r['cpuCores']:>7.4f}")
+    if cramjam is None:
+        print("  (snappy/lz4/zstd need: pip install cramjam)")
+
+    print(f"\n=== Batching ({best['codec']}) ===")
+    print(f"  {'batch.size':>10} {'linger':>7} {'msgs/batch':>11} {'fill':>6} {'req/s':>8} {'wait':>8} {'wire/s':>10}")
+    for r in rows:
+        if r["codec"] == best["codec"]:
+            marker = " ←" if r is best else ""
+            print(f"  {r['batchSize']:>10,} {r['lingerMs']:>5}ms {r['messagesPerBatch']:>11.1f} {r['fill']:>6.0%} "
+                  f"{r['requestsPerSec']:>8.1f} {r['meanWaitMs']:>6.1f}ms {fmt_bytes(r['wireBytesPerSec']):>10}{marker}")
+
+    current = next((r for r in rows if r["codec"] == CURRENT["codec"] and r["lingerMs"] == CURRENT["linger_ms"]
+                    and r["batchSize"] == CURRENT["batch_size"]), None)
+    print("\n=== Recommendation ===")
+    print(f"  codec {best['codec']}, linger.ms {best['lingerMs']}, batch.size {best['batchSize']:,} "
+          f"(mean added latency {best['meanWaitMs']:.1f}ms, {best['cpuCores']:.4f} cores)")
+    if current:
+        saving = 1 - best["wireBytesPerSec"] / max(1, current["wireBytesPerSec"])
+        print(f"  vs current Snappy/10ms/16KB: {-saving:+.0%} wire bytes, "
+              f"{best['requestsPerSec'] - current['requestsPerSec']:+.1f} requests/s")
+    max_bytes = max(BROKER_MAX_MESSAGE_BYTES, int(sizes["max"] * 1.1))
+    print("\n  // OutputService/Program.cs - KafkaOutputHandler producer")
+    print("  var producerConfig = new ProducerConfig")
+    print("  {")
+    print(f"      CompressionType = CompressionType.{CONFLUENT_CODECS[best['codec']]},")
+    print(f"      LingerMs = {best['lingerMs']},")
+    print(f"      BatchSize = {best['batchSize']},")
+    if max_bytes > BROKER_MAX_MESSAGE_BYTES:
+        print(f"      MessageMaxBytes = {max_bytes},  // also raise the topic's max.message.bytes")
+    print("      ...")
+    print("  };")
+    print("\n  // MassTransit Kafka rider producer")
+    print("  rider.AddProducer<TMessage>(topic, (context, p) =>")
+    print("  {")
+    print(f"      p.CompressionType = CompressionType.{CONFLUENT_CODECS[best['codec']]};")
+    print(f"      p.Linger = TimeSpan.FromMilliseconds({best['lingerMs']});")
+    print(f"      p.BatchSize = {best['batchSize']};")
+    print("  });")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("paths", nargs="*", help="Extractor dumps (*-messages-*.txt / *-formatted-*.json) or NDJSON")
+    parser.add_argument("--ndjson", action="store_true", help="Treat every line as one message")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Use N synthetic messages instead of dumps")
+    parser.add_argument("--records-per-message", type=int, default=100, help="Records per synthetic message")
+    parser.add_argument("--rate", type=float, default=100, help="Replay rate in messages/s")
+    parser.add_argument("--partitions", type=int, default=3, help="Topic partitions (topics are created with 3)")
+    parser.add_argument("--max-messages", type=int, default=20000, help="Sample size for the simulation")
+    parser.add_argument("--min-messages", type=int, default=2000,
+                        help="Small dumps are replayed in a loop up to this many messages")
+    parser.add_argument("--max-latency-ms", type=float, default=50, help="Budget for mean batching delay")
+    parser.add_argument("--cpu-budget", type=float, default=0.25, help="Budget for compression CPU in cores")
+    parser.add_argument("--json", help="Write the full grid as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        messages = synthetic_messages(args.synthetic, args.records_per_message)
+    elif args.paths:
+        stream = (m for path in args.paths for m in iter_messages(path, args.ndjson))
+        messages, seen = reservoir(stream, args.max_messages, random.Random(3))
+        if seen > len(messages):
+            print(f"(sampled {len(messages):,} of {seen:,} messages)\n")
+    else:
+        parser.error("give dump files or --synthetic N")
+    if not messages:
+        print("No messages found")
+        return 1
+    if len(messages) > args.max_messages:
+        messages = random.Random(3).sample(messages, args.max_messages)  # --synthetic beyond the cap
+
+    sizes = analyze_sizes(messages)
+    if len(messages) < args.min_messages:
+        print(f"(only {len(messages)} distinct messages; replaying them in a loop, which flatters compression)\n")
+        messages = [messages[i % len(messages)] for i in range(args.min_messages)]
+    rows, duration = run_grid(messages, args)
+    best = recommend(rows, args)
+    print_report(sizes, rows, best, duration, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sizes": {k: v for k, v in sizes.items() if k != "sizes"}, "grid": rows,
+                       "recommendation": best}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
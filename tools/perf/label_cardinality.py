@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""Prometheus label-cardinality analyzer for the platform metrics.
+
+Streams the text exposition format from a scrape endpoint or a saved scrape
+file and counts active series per metric family and distinct values per label.
+Histogram _bucket/_sum/_count samples count toward their family. Repeated
+scrapes (--repeat) or a sequence of files (--timeline) give the growth rate and
+churn between scrapes. The tool then projects each family to --datasources N:
+a family carrying a datasource label (data_source, data_source_id, ...) scales
+with its series per datasource, and other families stay flat.
+
+Labels are flagged for dropping or bucketing when:
+  - their values look like identifiers, file names, paths or timestamps
+  - new values keep appearing between scrapes (churn)
+  - they have more than --max-values distinct values
+  - a family is projected past --family-budget series; the advice names the
+    labels that multiply it (le buckets x datasources for histograms)
+
+The services export through OTLP and prometheusremotewrite, so for the whole
+picture scrape Prometheus itself with --prometheus (/federate). Scraping a
+service's own /metrics endpoint (deploy/prometheus/prometheus.yml) shows what
+that one process emits. --seed adds the series the metrics in seed-metrics.json
+would create if their `labels` were exported as Prometheus labels.
+
+Usage:
+    python label_cardinality.py scrape.prom --datasources 10000
+    python label_cardinality.py http://localhost:5003/metrics --repeat 5 --interval 30
+    python label_cardinality.py --prometheus http://localhost:9091 --seed ../../seed-metrics.json
+    python label_cardinality.py --timeline day1.prom.gz day2.prom.gz --json cardinality.json
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+import requests
+
+DATASOURCE_LABELS = {"data_source", "data_source_id", "datasource", "datasource_id",
+                     "data_source_name", "datasource_name"}
+BUCKET_LABELS = {"le", "quantile"}
+SUFFIXES = ("_bucket", "_sum", "_count", "_created", "_total", "_info", "_gcount", "_gsum")
+
+SAMPLE_RE = re.compile(r"([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+\S+")
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+
+# Values that never repeat across files, jobs or pods
+ID_SHAPES = [
+    ("guid", re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")),
+    ("object id", re.compile(r"^[0-9a-fA-F]{24}$")),
+    ("hex id", re.compile(r"^[0-9a-fA-F]{12,}$")),
+    ("number", re.compile(r"^\d{5,}$")),
+    ("timestamp", re.compile(r"^\d{4}-\d{2}-\d{2}[T ]?\d{0,2}")),
+    ("path", re.compile(r"[/\\]")),
+    ("file name", re.compile(r".\.[A-Za-z][A-Za-z0-9]{0,4}$")),
+    ("pod name", re.compile(r"-[a-z0-9]{8,10}-[a-z0-9]{5}$")),
+]
+
+
+def value_shape(value):
+    for name, pattern in ID_SHAPES:
+        if pattern.search(value):
+            return name
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+class Family:
+    __slots__ = ("type", "series", "values", "examples")
+
+    def __init__(self, kind="untyped"):
+        self.type = kind
+        self.series = set()
+        self.values = {}     # label -> set of values
+        self.examples = {}   # label -> first few values, in order of appearance
+
+
+class Scrape:
+    """Series and label values of one scrape round (one or more sources)"""
+
+    def __init__(self, when):
+        self.when = when
+        self.families = {}
+        self.samples = 0
+        self.bytes = 0
+        self.sources = []
+
+    def family_of(self, name, types):
+        if name in types:
+            return name
+        for suffix in SUFFIXES:
+            if name.endswith(suffix) and name[:-len(suffix)] in types:
+                return name[:-len(suffix)]
+        return name
+
+    def read(self, lines, source, target=None, examples=5):
+        """Stream exposition lines into the family tables.
+
+        `target` identifies the scraped process (default: the source itself);
+        saved files of one target over time share it so their series line up.
+        """
+        target = source if target is None else target
+        types = {}
+        families = self.families
+        self.sources.append(source)
+        for line in lines:
+            self.bytes += len(line) + 1
+            if not line or line[0] == "#":
+                if line.startswith("# TYPE "):
+                    parts = line.split()
+                    if len(parts) >= 4:
+                        types[parts[2]] = parts[3]
+                continue
+            match = SAMPLE_RE.match(line)
+            if not match:
+                continue
+            name, body = match.groups()
+            self.samples += 1
+            fam_name = self.family_of(name, types)
+            family = families.get(fam_name)
+            if family is None:
+                family = families[fam_name] = Family(types.get(fam_name, "untyped"))
+            labels = tuple(sorted(LABEL_RE.findall(body))) if body else ()
+            # Series from different targets stay distinct, as Prometheus' instance label does
+            family.series.add(hash((target, name, labels)))
+            for key, value in labels:
+                seen = family.values.get(key)
+                if seen is None:
+                    seen = family.values[key] = set()
+                    family.examples[key] = []
+                if value not in seen:
+                    seen.add(value)
+                    if len(family.examples[key]) < examples:
+                        family.examples[key].append(value)
+
+    @property
+    def series(self):
+        return sum(len(f.series) for f in self.families.values())
+
+
+def open_source(source, timeout, save_dir=None):
+    """(lines, mtime) for a URL, a file (optionally gzip) or '-' for stdin"""
+    if source == "-":
+        return (line.rstrip("\n") for line in sys.stdin), time.time()
+    if source.startswith(("http://", "https://")):
+        response = requests.get(source, stream=True, timeout=timeout,
+                                headers={"Accept": "text/plain;version=0.0.4"})
+        response.raise_for_status()
+        response.encoding = response.encoding or "utf-8"
+        lines = response.iter_lines(decode_unicode=True)
+        if save_dir:
+            lines = tee_to_file(lines, source, save_dir)
+        return lines, time.time()
+    mtime = os.path.getmtime(source)
+    with open(source, "rb") as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    handle = gzip.open(source, "rt", encoding="utf-8") if gzipped else \
+        io.open(source, "r", encoding="utf-8")
+    return (line.rstrip("\n") for line in handle), mtime
+
+
+def tee_to_file(lines, source, save_dir):
+    """Write the scrape to save_dir/<host>-<time>.prom.gz while it is parsed"""
+    os.makedirs(save_dir, exist_ok=True)
+    host = urlsplit(source).netloc.replace(":", "_")
+    path = os.path.join(save_dir, f"{host}-{time.strftime('%Y%m%dT%H%M%S')}.prom.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for line in lines:
+            out.write(line + "\n")
+            yield line
+
+
+def scrape_round(sources, timeout, save_dir=None, when=None, target=None):
+    scrape = Scrape(when)
+    for source in sources:
+        lines, mtime = open_source(source, timeout, save_dir)
+        scrape.read(lines, source, target)
+        if scrape.when is None:
+            scrape.when = mtime
+    return scrape
+
+
+# ---------------------------------------------------------------------------
+# Analysis
+# ---------------------------------------------------------------------------
+
+def growth(scrapes):
+    """Per-family series added/removed between the first and last scrape"""
+    result = {}
+    if len(scrapes) < 2:
+        return result
+    first, last = scrapes[0], scrapes[-1]
+    hours = max(last.when - first.when, 1e-9) / 3600
+    names = set(first.families) | set(last.families)
+    for name in names:
+        before = first.families.get(name, Family()).series
+        after = last.families.get(name, Family()).series
+        added = len(after - before)
+        removed = len(before - after)
+        result[name] = {
+            "added": added,
+            "removed": removed,
+            "per_hour": (len(after) - len(before)) / hours,
+            "churn_per_hour": (added + removed) / hours,
+        }
+    return result
+
+
+def churning_labels(scrapes):
+    """(family, label) -> new values per interval, for labels that gain values in most intervals"""
+    result = {}
+    for prev, cur in zip(scrapes, scrapes[1:]):
+        for name, family in cur.families.items():
+            before = prev.families.get(name)
+            if before is None:
+                continue
+            for label, values in family.values.items():
+                if label in BUCKET_LABELS:
+                    continue
+                new = len(values - before.values.get(label, set()))
+                result.setdefault((name, label), []).append(new)
+    intervals = len(scrapes) - 1
+    return {key: counts for key, counts in result.items()
+            if sum(1 for c in counts if c) * 2 > intervals}
+
+
+def datasource_label(family):
+    for label in family.values:
+        if label in DATASOURCE_LABELS:
+            return label
+    return None
+
+
+def project(family, datasources):
+    """(series per datasource, projected series) for one family"""
+    label = datasource_label(family)
+    if label is None or not datasources:
+        return None, len(family.series)
+    observed = max(len(family.values[label]), 1)
+    per_ds = len(family.series) / observed
+    return per_ds, int(round(per_ds * max(datasources, observed)))
+
+
+def flag_labels(scrape, churn, args):
+    """[(family, label, action, reason)] for labels that should be dropped or bucketed"""
+    flags = []
+    for name, family in scrape.families.items():
+        ds_label = datasource_label(family)
+        _, projected = project(family, args.datasources)
+        for label, values in family.values.items():
+            if label in BUCKET_LABELS or label == ds_label:
+                continue
+            examples = family.examples[label]
+            shapes = [shape for shape in map(value_shape, examples) if shape]
+            if len(shapes) * 2 > len(examples):
+                flags.append((name, label, "drop",
+                              f"{len(values)} values shaped like {'/'.join(sorted(set(shapes)))}"))
+            elif (name, label) in churn:
+                flags.append((name, label, "drop",
+                              f"new values every scrape ({sum(churn[(name, label)])} added)"))
+            elif len(values) > args.max_values:
+                flags.append((name, label, "bucket", f"{len(values)} distinct values"))
+        if projected > args.family_budget:
+            if family.type in ("histogram", "summary"):
+                buckets = len(family.values.get("le", ())) or len(family.values.get("quantile", ()))
+                advice = (f"{buckets} buckets x {ds_label} -> drop {ds_label} from the histogram "
+                          "or cut buckets" if ds_label else f"{buckets} buckets -> cut buckets")
+            elif ds_label:
+                advice = f"aggregate away {ds_label} with a recording rule or keep it on one counter"
+            else:
+                advice = "reduce label combinations"
+            flags.append((name, ds_label or "*", "bucket" if ds_label else "reduce",
+                          f"{projected:,} series projected; {advice}"))
+    return flags
+
+
+def seed_projection(path, scrape, datasources, assume):
+    """Series each seed metric would create with its `labels` exported as Prometheus labels"""
+    with open(path, encoding="utf-8") as f:
+        metrics = json.load(f)
+    observed = {}
+    for family in scrape.families.values():
+        for label, values in family.values.items():
+            observed[label] = max(observed.get(label, 0), len(values))
+    rows = []
+    for metric in metrics:
+        labels = metric.get("labels") or metric.get("Labels") or []
+        series, parts = 1, []
+        for label in labels:
+            if label in DATASOURCE_LABELS:
+                count = datasources or observed.get(label, 1)
+            else:
+                count = assume.get(label) or observed.get(label) or assume.get("*", 10)
+            series *= count
+            parts.append(f"{label}={count:,}")
+        kind = (metric.get("prometheusType") or "gauge").lower()
+        if kind == "histogram":
+            series *= assume.get("le", 12)
+            parts.append(f"le={assume.get('le', 12)}")
+        rows.append((metric.get("name"), kind, series, " x ".join(parts) or "-"))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def build_report(scrapes, args):
+    last = scrapes[-1]
+    grow = growth(scrapes)
+    churn = churning_labels(scrapes)
+    families = []
+    for name, family in last.families.items():
+        per_ds, projected = project(family, args.datasources)
+        families.append({
+            "family": name,
+            "type": family.type,
+            "series": len(family.series),
+            "datasource_label": datasource_label(family),
+            "series_per_datasource": per_ds,
+            "projected": projected,
+            "labels": {label: len(values) for label, values in family.values.items()},
+            "examples": family.examples,
+            "growth": grow.get(name),
+        })
+    families.sort(key=lambda f: f["projected"], reverse=True)
+
+    label_totals = {}
+    for family in last.families.values():
+        for label, values in family.values.items():
+            entry = label_totals.setdefault(label, [0, set()])
+            entry[0] += len(family.series)
+            entry[1] |= values
+    labels = sorted(((label, series, len(values)) for label, (series, values) in label_totals.items()),
+                    key=lambda row: row[1], reverse=True)
+
+    report = {
+        "sources": last.sources,
+        "scrapes": len(scrapes),
+        "samples": last.samples,
+        "series": last.series,
+        "datasources": args.datasources,
+        "projected": sum(f["projected"] for f in families),
+        "families": families,
+        "labels": [{"label": l, "series": s, "values": v} for l, s, v in labels],
+        "flags": [{"family": f, "label": l, "action": a, "reason": r}
+                  for f, l, a, r in flag_labels(last, churn, args)],
+    }
+    if args.seed:
+        rows = seed_projection(args.seed, last, args.datasources, parse_assume(args.assume))
+        report["seed"] = [{"metric": m, "type": k, "series": s, "from": p} for m, k, s, p in rows]
+        report["projected"] += sum(s for _, _, s, _ in rows)
+    return report
+
+
+def print_report(report, args):
+    ds = report["datasources"]
+    print(f"{report['samples']:,} samples, {report['series']:,} active series in "
+          f"{len(report['families'])} families from {len(report['sources'])} source(s)")
+    head = f"{'family':<52} {'type':<9} {'series':>9} {'ds':>6} {'per ds':>8}"
+    if ds:
+        head += f" {'@' + format(ds, ','):>12}"
+    if report["scrapes"] > 1:
+        head += f" {'+/h':>9} {'churn/h':>9}"
+    print("\n" + head)
+    for f in report["families"][:args.show]:
+        ds_values = f["labels"].get(f["datasource_label"], "") if f["datasource_label"] else ""
+        per_ds = f"{f['series_per_datasource']:.1f}" if f["series_per_datasource"] else ""
+        row = f"{f['family'][:52]:<52} {f['type']:<9} {f['series']:>9,} {ds_values:>6} {per_ds:>8}"
+        if ds:
+            row += f" {f['projected']:>12,}"
+        if report["scrapes"] > 1:
+            g = f["growth"] or {"per_hour": 0, "churn_per_hour": 0}
+            row += f" {g['per_hour']:>9.0f} {g['churn_per_hour']:>9.0f}"
+        print(row)
+    if len(report["families"]) > args.show:
+        print(f"... {len(report['families']) - args.show} more")
+
+    print(f"\n{'label':<32} {'series':>10} {'values':>8}")
+    for row in report["labels"][:args.show]:
+        print(f"{row['label'][:32]:<32} {row['series']:>10,} {row['values']:>8,}")
+
+    if report.get("seed"):
+        print("\nseed-metrics.json labels exported as Prometheus labels:")
+        for row in report["seed"]:
+            print(f"  {row['metric']:<34} {row['type']:<9} {row['series']:>12,}  {row['from']}")
+
+    if report["flags"]:
+        print("\nflags:")
+        for flag in report["flags"]:
+            print(f"  {flag['action']:<7} {flag['family']}{{{flag['label']}}}: {flag['reason']}")
+
+    total = report["projected"]
+    memory = total * args.bytes_per_series / 2**30
+    where = f" at {ds:,} datasources" if ds else ""
+    print(f"\nprojected active series{where}: {total:,} (~{memory:.1f} GiB Prometheus head "
+          f"at {args.bytes_per_series} B/series)")
+    if total > args.budget:
+        print(f"over the {args.budget:,} series budget")
+        return 1
+    return 0
+
+
+def parse_assume(items):
+    assume = {}
+    for item in items:
+        label, _, count = item.partition("=")
+        assume[label.strip()] = int(count)
+    return assume
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help="Scrape URLs, saved scrape files (.gz ok) or -")
+    parser.add_argument("--prometheus", help="Prometheus base URL: scrape everything through /federate")
+    parser.add_argument("--timeline", action="store_true",
+                        help="Treat each source as a later scrape of the same targets")
+    parser.add_argument("--repeat", type=int, default=1, help="Scrape rounds for URL sources")
+    parser.add_argument("--interval", type=float, default=30, help="Seconds between rounds")
+    parser.add_argument("--save", help="Directory to keep the raw scrapes in (gzip)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--datasources", type=int, default=0, help="Project cardinality to N datasources")
+    parser.add_argument("--seed", help="seed-metrics.json: add its metrics with their labels")
+    parser.add_argument("--assume", action="append", default=[],
+                        help="label=COUNT for seed labels not seen in the scrape (* = default, 10)")
+    parser.add_argument("--max-values", type=int, default=200, help="Distinct values before a label is flagged")
+    parser.add_argument("--family-budget", type=int, default=100_000, help="Projected series per family")
+    parser.add_argument("--budget", type=int, default=2_000_000, help="Projected series in total")
+    parser.add_argument("--bytes-per-series", type=int, default=4096)
+    parser.add_argument("--show", type=int, default=25, help="Families and labels printed")
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    sources = list(args.sources)
+    if args.prometheus:
+        match = quote('{__name__=~".+"}')
+        sources.append(f"{args.prometheus.rstrip('/')}/federate?match[]={match}")
+    if not sources:
+        parser.error("give scrape URLs, files or --prometheus")
+
+    scrapes = []
+    try:
+        if args.timeline:
+            for source in sources:
+                scrapes.append(scrape_round([source], args.timeout, args.save, target="timeline"))
+        else:
+            for i in range(max(args.repeat, 1)):
+                if i:
+                    time.sleep(args.interval)
+                started = time.time()
+                scrape = scrape_round(sources, args.timeout, args.save,
+                                      when=started if args.repeat > 1 else None)
+                scrapes.append(scrape)
+                print(f"round {i + 1}: {scrape.series:,} series, {scrape.bytes / 2**20:.1f} MiB "
+                      f"in {time.time() - started:.1f}s", file=sys.stderr)
+    except (requests.RequestException, OSError) as e:
+        print(f"scrape failed: {e}", file=sys.stderr)
+        if not scrapes:
+            return 2
+    except KeyboardInterrupt:
+        if not scrapes:
+            return 130
+
+    for i in range(1, len(scrapes)):
+        # Files copied together share an mtime; fall back to --interval spacing
+        if scrapes[i].when <= scrapes[i - 1].when:
+            scrapes[i].when = scrapes[i - 1].when + args.interval
+    report = build_report(scrapes, args)
+    status = print_report(report, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"report written to {args.json}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
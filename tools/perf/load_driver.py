@@ -0,0 +1,737 @@
+#!/usr/bin/env python3
+"""Multi-process load driver with mergeable latency histograms and SLO stop.
+
+One Python process tops out at a few hundred requests per second, because
+requests and the GIL serialize on the client. This driver splits the virtual
+users over worker processes. A coordinator starts --workers of them locally,
+and `worker --connect` adds more from other machines. Every worker sends its
+results to the coordinator over a TCP socket once per --report interval:
+
+- a log-linear latency histogram per operation, in the style of HdrHistogram:
+  2 significant digits from 1 us to an hour, and merged exactly by adding
+  counts
+- ok/error counts and the error reasons
+- its own CPU use, to show when the driver rather than the service is the
+  limit
+
+The coordinator merges the reports into live throughput and p50/p95/p99
+figures. It checks the --slo objectives over a trailing window, and stops the
+run once one is breached for --breaches reports in a row.
+
+Scenarios follow the CRUD flow of tests/comprehensive-crud-test.py against
+the live APIs:
+
+    crud      create datasource, read, update cron, list page, delete
+    browse    list page, get one of the listed datasources, statistics
+    metrics   create global metric, read, update, list all, delete
+
+--scenario crud=1 --scenario browse=4 sets the mix. With --rate, iterations
+start on a fixed schedule spread over the users (open loop). Each iteration
+is then also timed from its scheduled start, so queueing in an overloaded
+service shows up in the percentiles. Without --rate, users loop as fast as
+the service answers, pausing --think seconds between iterations.
+
+Usage:
+    python load_driver.py run --workers 8 --users 64 --duration 5m
+    python load_driver.py run --workers 8 --users 200 --rate 400 --scenario crud=1 --scenario browse=4 \\
+        --slo p99<500ms --slo errors<1% --slo datasource.create:p95<300ms --json load.json
+    python load_driver.py run --listen 0.0.0.0:7700 --expect 16 --workers 8 --users 400 --rate 1500
+    python load_driver.py worker --connect coordinator-host:7700 --processes 16    # on each load machine
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from ezapi import get_field, page_items, service_url, unwrap
+from metric_cache import parse_duration
+
+DATASOURCE_API = "/api/v1/datasource"
+METRICS_API = "/api/v1/metrics"
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+# ---------------------------------------------------------------------------
+# Histogram
+# ---------------------------------------------------------------------------
+
+class Histogram:
+    """Log-linear histogram of microsecond latencies, mergeable by adding counts.
+
+    The layout is HdrHistogram's with 2 significant digits. Values below 256
+    us get exact buckets. Above that, each power of two is split into 128
+    buckets, so a recorded value is off by at most 0.8%. Every process uses
+    the same fixed layout, so merging histograms is an array sum.
+    """
+
+    SUB_BITS = 8
+    HALF = 1 << (SUB_BITS - 1)
+    MASK = (1 << SUB_BITS) - 1
+    MAX_US = 3600 * 10 ** 6
+    SIZE = ((MAX_US | MASK).bit_length() - SUB_BITS + 2) * HALF
+
+    def __init__(self):
+        self.counts = np.zeros(self.SIZE, dtype=np.int64)
+        self.max_us = 0
+
+    @classmethod
+    def index(cls, us):
+        us = min(max(int(us), 0), cls.MAX_US)
+        bucket = (us | cls.MASK).bit_length() - cls.SUB_BITS
+        return (bucket << (cls.SUB_BITS - 1)) + (us >> bucket)
+
+    @classmethod
+    def upper_values(cls):
+        """Highest value each bucket stands for, as HdrHistogram reports percentiles"""
+        index = np.arange(cls.SIZE)
+        bucket = np.maximum(index // cls.HALF - 1, 0)
+        sub = index - (bucket << (cls.SUB_BITS - 1))
+        return (sub << bucket) + (1 << bucket) - 1
+
+    def record(self, seconds):
+        us = int(seconds * 1e6)
+        self.counts[self.index(us)] += 1
+        if us > self.max_us:
+            self.max_us = us
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def percentiles(self, qs=PERCENTILES):
+        """{q: milliseconds}, each capped at the largest recorded value"""
+        total = self.total
+        if not total:
+            return {q: 0.0 for q in qs}
+        cumulative = np.cumsum(self.counts)
+        uppers = UPPER_VALUES
+        result = {}
+        for q in qs:
+            rank = max(1, math.ceil(q / 100 * total))
+            result[q] = min(int(uppers[np.searchsorted(cumulative, rank)]), self.max_us) / 1000
+        return result
+
+    def to_wire(self):
+        nonzero = np.flatnonzero(self.counts)
+        return {"i": nonzero.tolist(), "c": self.counts[nonzero].tolist(), "max": self.max_us}
+
+    @classmethod
+    def from_wire(cls, data):
+        hist = cls()
+        hist.counts[np.asarray(data["i"], dtype=np.int64)] = data["c"]
+        hist.max_us = data["max"]
+        return hist
+
+    def write_hgrm(self, path, scale=1000.0):
+        """HdrHistogram's percentile distribution text, readable by its plotter"""
+        total = self.total
+        cumulative = np.cumsum(self.counts)
+        uppers = UPPER_VALUES
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}\n\n")
+            for index in np.flatnonzero(self.counts):
+                fraction = cumulative[index] / total
+                inverse = f"{1 / (1 - fraction):14.2f}" if fraction < 1 else ""
+                value = min(int(uppers[index]), self.max_us) / scale
+                f.write(f"{value:12.3f} {fraction:14.12f} {cumulative[index]:10d} {inverse}\n")
+            f.write(f"#[Max = {self.max_us / scale:12.3f}, Total count = {total:12d}]\n")
+
+
+UPPER_VALUES = Histogram.upper_values()
+
+
+class Stats:
+    """Histogram and counts per operation"""
+
+    def __init__(self):
+        self.hist = defaultdict(Histogram)
+        self.ok = Counter()
+        self.errors = Counter()
+        self.reasons = Counter()
+
+    def record(self, op, seconds, error=None):
+        self.hist[op].record(seconds)
+        if error:
+            self.errors[op] += 1
+            self.reasons[error] += 1
+        else:
+            self.ok[op] += 1
+
+    def merge(self, other):
+        for op, hist in other.hist.items():
+            self.hist[op].merge(hist)
+        self.ok.update(other.ok)
+        self.errors.update(other.errors)
+        self.reasons.update(other.reasons)
+        return self
+
+    def requests(self, ops=None):
+        names = ops or [op for op in self.hist if not op.startswith("iteration.")]
+        return sum(self.ok[op] + self.errors[op] for op in names), sum(self.errors[op] for op in names)
+
+    def combined(self, ops=None):
+        """One histogram over the request operations (or the given ones)"""
+        hist = Histogram()
+        for op, h in self.hist.items():
+            if (op in ops) if ops else not op.startswith("iteration."):
+                hist.merge(h)
+        return hist
+
+    def to_wire(self):
+        return {"hist": {op: h.to_wire() for op, h in self.hist.items()}, "ok": dict(self.ok),
+                "errors": dict(self.errors), "reasons": dict(self.reasons)}
+
+    @classmethod
+    def from_wire(cls, data):
+        stats = cls()
+        for op, h in data["hist"].items():
+            stats.hist[op] = Histogram.from_wire(h)
+        stats.ok.update(data["ok"])
+        stats.errors.update(data["errors"])
+        stats.reasons.update(data["reasons"])
+        return stats
+
+
+# ---------------------------------------------------------------------------
+# Wire protocol: newline-delimited JSON over TCP
+# ---------------------------------------------------------------------------
+
+class Channel:
+    def __init__(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile("r", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        data = (json.dumps(message, separators=(",", ":")) + "\n").encode()
+        with self.lock:
+            self.sock.sendall(data)
+
+    def recv(self):
+        line = self.reader.readline()
+        return json.loads(line) if line else None
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+class StepFailed(Exception):
+    pass
+
+
+def datasource_body(name):
+    """The create payload of tests/comprehensive-crud-test.py"""
+    return {
+        "name": name,
+        "nameEn": name + " EN",
+        "description": "מקור נתונים לבדיקת עומס",
+        "descriptionEn": "Load test data source",
+        "type": "File",
+        "connectionString": "C:\\Test\\Data",
+        "supplierName": "Load Driver",
+        "category": "Test Category",
+        "cronExpression": "0 0 * * *",
+        "filePath": "C:\\Test\\Data",
+        "filePattern": "*.csv",
+        "isActive": False,
+        "jsonSchema": {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "type": "object",
+            "properties": {"id": {"type": "string"}, "name": {"type": "string"}},
+            "required": ["id"],
+        },
+    }
+
+
+def scenario_crud(user):
+    base = user.urls["datasource"] + DATASOURCE_API
+    created = unwrap(user.call("datasource.create", "POST", base, json=datasource_body(user.unique_name())))
+    ds_id = get_field(created, "ID") or get_field(created, "Id")
+    if not ds_id:
+        raise StepFailed("create returned no ID")
+    try:
+        current = unwrap(user.call("datasource.read", "GET", f"{base}/{ds_id}"))
+        update = {key[0].lower() + key[1:]: value for key, value in current.items()} if isinstance(current, dict) else {}
+        update.update({"id": ds_id, "cronExpression": "0 12 * * *"})
+        user.call("datasource.update", "PUT", f"{base}/{ds_id}", json=update)
+        user.call("datasource.list", "GET", base, params={"page": 1, "size": 20})
+    finally:
+        user.call("datasource.delete", "DELETE", f"{base}/{ds_id}", params={"deletedBy": "load_driver"})
+
+
+def scenario_browse(user):
+    base = user.urls["datasource"] + DATASOURCE_API
+    items, _ = page_items(user.call("datasource.list", "GET", base, params={"page": 1, "size": 20}))
+    # Datasources of concurrent crud iterations may be gone by the time they are read
+    ids = [get_field(item, "ID") or get_field(item, "Id") for item in items
+           if isinstance(item, dict) and not str(get_field(item, "Name", "")).startswith("load-")]
+    ids = [i for i in ids if i]
+    if ids:
+        user.call("datasource.read", "GET", f"{base}/{random.choice(ids)}")
+    user.call("datasource.statistics", "GET", base + "/statistics")
+
+
+def scenario_metrics(user):
+    base = user.urls["metrics"] + METRICS_API
+    name = re.sub(r"\W", "_", user.unique_name())
+    body = {"name": name, "displayName": name, "description": "Load test metric", "category": "load",
+            "scope": "global", "formula": "$.amount", "fieldPath": "$.amount", "prometheusType": "gauge",
+            "createdBy": "load_driver"}
+    created = unwrap(user.call("metrics.create", "POST", base, json=body))
+    metric_id = get_field(created, "ID") or get_field(created, "Id")
+    if not metric_id:
+        raise StepFailed("create returned no ID")
+    try:
+        user.call("metrics.read", "GET", f"{base}/{metric_id}")
+        update = dict(body, description="Load test metric (updated)", updatedBy="load_driver")
+        user.call("metrics.update", "PUT", f"{base}/{metric_id}", json=update)
+        user.call("metrics.list", "GET", base)
+    finally:
+        user.call("metrics.delete", "DELETE", f"{base}/{metric_id}")
+
+
+SCENARIOS = {"crud": scenario_crud, "browse": scenario_browse, "metrics": scenario_metrics}
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+class User(threading.Thread):
+    """One virtual user: runs scenario iterations until told to stop"""
+
+    def __init__(self, number, config, stats, lock, stop):
+        super().__init__(daemon=True)
+        self.number = number
+        self.config = config
+        self.urls = config["urls"]
+        self.stats, self.lock, self.stop = stats, lock, stop
+        self.session = requests.Session()
+        self.session.headers.update({"Accept": "application/json",
+                                     "X-Correlation-ID": f"load-driver-{config['tag']}-{number}"})
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        self.iteration = 0
+        names, weights = zip(*config["scenarios"].items())
+        self.names = names
+        self.weights = np.cumsum(weights) / sum(weights)
+
+    def unique_name(self):
+        return f"load-{self.config['tag']}-{self.number}-{self.iteration}"
+
+    def record(self, op, seconds, error=None):
+        with self.lock:
+            self.stats.record(op, seconds, error)
+
+    def call(self, op, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.config["timeout"], **kwargs)
+            error = None if response.status_code < 400 else f"{op}: HTTP {response.status_code}"
+        except requests.RequestException as exc:
+            response, error = None, f"{op}: {type(exc).__name__}"
+        self.record(op, time.perf_counter() - started, error)
+        if error:
+            raise StepFailed(error)
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def run(self):
+        config = self.config
+        rate = config["user_rate"]
+        # Stagger users over the ramp, and spread their schedules across one period
+        start = config["start_at"] + config["ramp"] * self.number / max(1, config["users"])
+        if rate:
+            start += random.random() / rate
+        if self.stop.wait(max(0.0, start - time.time())):
+            return
+        scheduled = time.perf_counter()
+        while not self.stop.is_set():
+            if rate:
+                delay = scheduled - time.perf_counter()
+                if delay > 0 and self.stop.wait(delay):
+                    break
+            began = time.perf_counter()
+            since = scheduled if rate else began
+            name = self.names[int(np.searchsorted(self.weights, random.random(), side="right"))]
+            try:
+                SCENARIOS[name](self)
+                error = None
+            except StepFailed as exc:
+                error = str(exc)
+            self.record("iteration." + name, time.perf_counter() - since, error and f"iteration.{name} failed")
+            self.iteration += 1
+            if rate:
+                scheduled += 1.0 / rate
+            elif config["think"] and self.stop.wait(config["think"]):
+                break
+
+
+def worker_main(address):
+    """A worker process: connect, take a share of the users, report until stopped"""
+    try:
+        channel = Channel(socket.create_connection(address, timeout=30))
+    except OSError as exc:
+        print(f"✗ cannot reach coordinator {address[0]}:{address[1]}: {exc}")
+        return 1
+    channel.sock.settimeout(None)
+    channel.send({"type": "hello", "host": socket.gethostname(), "pid": os.getpid()})
+    message = channel.recv()
+    if not message or message["type"] != "start":
+        return 1
+    config = message["config"]
+    config["tag"] = f"{socket.gethostname()}-{os.getpid()}"
+
+    stats, lock, stop = Stats(), threading.Lock(), threading.Event()
+
+    def listen():
+        while True:
+            try:
+                message = channel.recv()
+            except (OSError, ValueError):
+                message = None
+            if message is None or message["type"] == "stop":
+                stop.set()
+                return
+
+    threading.Thread(target=listen, daemon=True).start()
+    users = [User(n, config, stats, lock, stop) for n in config["user_numbers"]]
+    for user in users:
+        user.start()
+
+    marks = [time.process_time(), time.perf_counter()]
+
+    def report(final=False):
+        nonlocal stats
+        with lock:
+            snapshot, stats = stats, Stats()
+            for user in users:
+                user.stats = stats
+        cpu, wall = time.process_time(), time.perf_counter()
+        busy = (cpu - marks[0]) / max(1e-9, wall - marks[1])
+        marks[:] = [cpu, wall]
+        channel.send({"type": "done" if final else "report", "stats": snapshot.to_wire(), "cpu": busy})
+
+    try:
+        while not stop.wait(config["report"]):
+            report()
+        # Let running iterations finish, so crud/metrics clean up what they created
+        for user in users:
+            user.join(config["timeout"] * 5)
+        report(final=True)
+    except OSError:
+        stop.set()
+    channel.close()
+    return 0
+
+
+def cmd_worker(args):
+    address = parse_address(args.connect)
+    processes = [multiprocessing.Process(target=worker_main, args=(address,)) for _ in range(args.processes)]
+    for proc in processes:
+        proc.start()
+    print(f"Started {len(processes)} worker processes for {args.connect}")
+    for proc in processes:
+        proc.join()
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+SLO_RE = re.compile(r"^(?:(?P<op>[\w.]+):)?(?P<stat>p\d+(?:\.\d+)?|errors)\s*<\s*(?P<limit>[\d.]+)\s*(?P<unit>ms|s|%)?$")
+
+
+class Objective:
+    """An --slo such as p99<500ms, errors<1% or datasource.create:p95<300ms"""
+
+    def __init__(self, text):
+        match = SLO_RE.match(text.strip())
+        if not match:
+            raise argparse.ArgumentTypeError(f"bad objective {text!r}: use [op:]pNN<limit(ms|s) or [op:]errors<N%")
+        self.text = text
+        self.op = match["op"]
+        self.stat = match["stat"]
+        limit = float(match["limit"])
+        self.limit = limit * 1000 if match["unit"] == "s" else limit
+
+    def measure(self, stats):
+        ops = [self.op] if self.op else None
+        if self.stat == "errors":
+            total, errors = stats.requests(ops)
+            return 100.0 * errors / total if total else 0.0
+        return stats.combined(ops).percentiles((float(self.stat[1:]),))[float(self.stat[1:])]
+
+    def unit(self):
+        return "%" if self.stat == "errors" else "ms"
+
+
+class Coordinator:
+    def __init__(self, args):
+        self.args = args
+        self.messages = queue.Queue()
+        self.channels = []
+        self.server = socket.create_server(parse_address(args.listen), backlog=256)
+        self.address = self.server.getsockname()[:2]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                return
+            channel = Channel(sock)
+            threading.Thread(target=self.read, args=(channel,), daemon=True).start()
+
+    def read(self, channel):
+        while True:
+            try:
+                message = channel.recv()
+            except (OSError, ValueError):
+                message = None
+            if message is None:
+                self.messages.put((channel, {"type": "lost"}))
+                return
+            self.messages.put((channel, message))
+
+    def broadcast(self, message):
+        for channel in self.channels:
+            try:
+                channel.send(message)
+            except OSError:
+                pass
+
+    def gather(self, expected, timeout):
+        """Wait for the hello of every expected worker"""
+        deadline = time.time() + timeout
+        while len(self.channels) < expected:
+            try:
+                channel, message = self.messages.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                break
+            if message["type"] == "hello":
+                self.channels.append(channel)
+        return len(self.channels)
+
+
+def share(total, parts, index):
+    """index-th of `parts` near-equal integer shares of total"""
+    return total // parts + (1 if index < total % parts else 0)
+
+
+def live_line(elapsed, stats, seconds, cpu):
+    total, errors = stats.requests()
+    p = stats.combined().percentiles((50, 95, 99))
+    error_pct = 100.0 * errors / total if total else 0.0
+    return (f"  {elapsed:6.0f}s {total / seconds:9,.0f} req/s  err {error_pct:5.2f}%  "
+            f"p50 {p[50]:7.1f}  p95 {p[95]:7.1f}  p99 {p[99]:7.1f} ms  driver cpu {cpu:4.0%}")
+
+
+def print_summary(stats, seconds):
+    print(f"\n{'operation':<24} {'count':>9} {'req/s':>8} {'err %':>6} "
+          + " ".join(f"{'p' + format(q, 'g'):>8}" for q in PERCENTILES) + f" {'max':>8}")
+    ops = sorted(stats.hist, key=lambda op: (op.startswith("iteration."), op))
+    for op in ops + ["all requests"]:
+        hist = stats.combined() if op == "all requests" else stats.hist[op]
+        total, errors = stats.requests() if op == "all requests" else stats.requests([op])
+        p = hist.percentiles()
+        print(f"{op:<24} {total:9,d} {total / seconds:8,.1f} {100.0 * errors / max(1, total):6.2f} "
+              + " ".join(f"{p[q]:8.1f}" for q in PERCENTILES) + f" {hist.max_us / 1000:8.1f}")
+    if stats.reasons:
+        print("\nErrors:")
+        for reason, count in stats.reasons.most_common(10):
+            print(f"  {count:8,d}  {reason}")
+
+
+def cmd_run(args):
+    local = args.workers
+    expected = local + args.expect
+    if expected < 1:
+        print("✗ no workers: use --workers and/or --expect")
+        return 1
+    coordinator = Coordinator(args)
+    host, port = coordinator.address
+    processes = [multiprocessing.Process(target=worker_main, args=((host, port),), daemon=True)
+                 for _ in range(local)]
+    for proc in processes:
+        proc.start()
+    if args.expect:
+        print(f"Waiting for {args.expect} remote workers on {host}:{port} "
+              f"(python load_driver.py worker --connect <this-host>:{port})")
+    connected = coordinator.gather(expected, args.connect_timeout)
+    if connected < expected:
+        print(f"⚠ only {connected} of {expected} workers connected; running with those")
+    if not connected:
+        return 1
+
+    users = max(args.users, connected)
+    start_at = time.time() + 1.0
+    config = {"urls": {"datasource": service_url("datasource"), "metrics": service_url("metrics")},
+              "scenarios": dict(args.scenario or [("crud", 1.0)]), "timeout": args.timeout,
+              "think": args.think, "ramp": args.ramp, "report": args.report, "users": users,
+              "user_rate": args.rate / users if args.rate else 0.0, "start_at": start_at}
+    first = 0
+    for index, channel in enumerate(coordinator.channels):
+        count = share(users, connected, index)
+        channel.send({"type": "start", "config": dict(config, user_numbers=list(range(first, first + count)))})
+        first += count
+    mix = ", ".join(f"{name}={weight:g}" for name, weight in config["scenarios"].items())
+    pace = f"{args.rate:g} iterations/s" if args.rate else "closed loop"
+    print(f"{connected} workers, {users} users, {mix}, {pace}, {args.duration:g}s")
+    for objective in args.slo:
+        print(f"  SLO {objective.text} over the last {args.slo_window:g}s")
+
+    total = Stats()
+    window = deque()
+    interval = Stats()
+    cpu = {}
+    live = set(coordinator.channels)
+    breaches = Counter()
+    stopped = None
+    give_up = math.inf
+    next_tick = start_at + args.report
+    deadline = start_at + args.ramp + args.duration
+    while live and time.time() < give_up:
+        try:
+            wait = min(next_tick, deadline, give_up) - time.time()
+            channel, message = coordinator.messages.get(timeout=min(1.0, max(0.0, wait)))
+            if message["type"] in ("report", "done"):
+                stats = Stats.from_wire(message["stats"])
+                interval.merge(stats)
+                total.merge(stats)
+                cpu[channel] = message["cpu"]
+            if message["type"] in ("done", "lost"):
+                live.discard(channel)
+                if message["type"] == "lost" and not stopped:
+                    print("⚠ a worker disconnected")
+            continue
+        except queue.Empty:
+            pass
+        now = time.time()
+        if now >= next_tick and not stopped:
+            window.append((now, interval))
+            while window and window[0][0] <= now - args.slo_window:
+                window.popleft()
+            recent = Stats()
+            for _, stats in window:
+                recent.merge(stats)
+            print(live_line(now - start_at, interval, args.report, max(cpu.values(), default=0.0)))
+            if max(cpu.values(), default=0.0) > 0.9:
+                print("    ⚠ a worker process is CPU-bound: the driver, not the service, may be the limit; "
+                      "add --workers")
+            if now >= start_at + args.ramp:
+                for objective in args.slo:
+                    value = objective.measure(recent)
+                    breaches[objective.text] = breaches[objective.text] + 1 if value >= objective.limit else 0
+                    if breaches[objective.text] >= args.breaches:
+                        stopped = f"SLO {objective.text} breached: {value:.1f}{objective.unit()}"
+            interval = Stats()
+            next_tick += args.report
+        if not stopped and now >= deadline:
+            stopped = "duration reached"
+        if stopped and give_up == math.inf:
+            # Workers let running iterations finish before their final report
+            give_up = time.time() + args.timeout * 5 + 10
+            print(f"{'✗' if stopped.startswith('SLO') else '✓'} stopping: {stopped}")
+            coordinator.broadcast({"type": "stop", "reason": stopped})
+            next_tick = deadline = math.inf
+    for proc in processes:
+        proc.join(5)
+
+    seconds = max(1e-9, min(time.time(), start_at + args.ramp + args.duration) - start_at)
+    print_summary(total, seconds)
+    if args.json:
+        report = {"workers": connected, "users": users, "scenarios": config["scenarios"], "rate": args.rate,
+                  "seconds": seconds, "stopped": stopped,
+                  "operations": {op: {"count": int(total.ok[op] + total.errors[op]), "errors": int(total.errors[op]),
+                                      "percentilesMs": {f"p{q:g}": v for q, v in h.percentiles().items()},
+                                      "maxMs": h.max_us / 1000}
+                                 for op, h in sorted(total.hist.items())},
+                  "errors": dict(total.reasons.most_common())}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.hgrm:
+        total.combined().write_hgrm(args.hgrm)
+        print(f"Percentile distribution written to {args.hgrm}")
+    return 2 if stopped and stopped.startswith("SLO") else 0
+
+
+def scenario_weight(text):
+    name, _, weight = text.partition("=")
+    if name not in SCENARIOS:
+        raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+    return name, float(weight or 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Coordinate a run, with local and/or remote workers")
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Local worker processes")
+    run.add_argument("--expect", type=int, default=0, help="Remote worker processes to wait for")
+    run.add_argument("--listen", default="127.0.0.1:0", help="Coordinator address (0.0.0.0:7700 for remote workers)")
+    run.add_argument("--connect-timeout", type=float, default=60)
+    run.add_argument("--users", type=int, default=32, help="Virtual users over all workers")
+    run.add_argument("--scenario", type=scenario_weight, action="append", metavar="NAME=WEIGHT",
+                     help=f"Scenario mix ({', '.join(SCENARIOS)}); default crud")
+    run.add_argument("--rate", type=float, default=0, help="Iterations per second over all users (open loop)")
+    run.add_argument("--think", type=float, default=0, help="Pause between iterations without --rate")
+    run.add_argument("--duration", type=parse_duration, default=parse_duration("5m"))
+    run.add_argument("--ramp", type=parse_duration, default=parse_duration("10s"), help="Stagger user starts")
+    run.add_argument("--timeout", type=float, default=30)
+    run.add_argument("--report", type=float, default=2, help="Seconds between worker reports")
+    run.add_argument("--slo", type=Objective, action="append", default=[], help="e.g. p99<500ms, errors<1%%")
+    run.add_argument("--slo-window", type=float, default=10, help="Seconds of results each SLO check covers")
+    run.add_argument("--breaches", type=int, default=3, help="Consecutive failed checks that stop the run")
+    run.add_argument("--json", help="Write the per-operation summary as JSON")
+    run.add_argument("--hgrm", help="Write the merged percentile distribution (HdrHistogram .hgrm format)")
+    run.set_defaults(func=cmd_run)
+
+    worker = sub.add_parser("worker", help="Start worker processes for a remote coordinator")
+    worker.add_argument("--connect", required=True, metavar="HOST:PORT")
+    worker.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    worker.set_defaults(func=cmd_worker)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""Time-range chunk cache client for MetricDataController.
+
+GET /api/v1/metrics/{metricId}/data proxies a Prometheus query_range for the
+metric's PromQL over [start, end] at `step`. Dashboards and scripts ask for the
+same long window on every refresh, so every refresh re-scans the whole range.
+
+This client splits a range into chunks aligned to multiples of the chunk
+length (and therefore to the step grid Prometheus evaluates on) and keeps
+them on disk in an LRU bounded by total bytes. Each chunk records how far its
+points are final: points older than --settle can no longer change (late
+samples and recording rules land before that), so the open tail chunk is
+cached up to that point too. A refresh of a 30-day view then requests only
+the points after the last settled timestamp plus any chunk missing from the
+cache; adjacent missing ranges are merged into one request up to Prometheus'
+11,000-point limit. Metrics are fetched in parallel.
+
+Each cached chunk stores the PromQL the service built for the metric; when a
+response shows a different query (the metric's formula changed) the metric's
+chunks are dropped and refetched.
+
+Metrics are chosen by ID, by name (resolved through GET /api/v1/metrics), or by
+the names in seed-metrics.json.
+
+Usage:
+    python metric_cache.py fetch --seed ../../seed-metrics.json --days 30 --step 5m
+    python metric_cache.py fetch --metric-id 6751d3... --start 2025-01-01 --end 2025-01-31 --out series.json
+    python metric_cache.py watch --seed ../../seed-metrics.json --days 30 --step 5m --interval 60
+    python metric_cache.py current --seed ../../seed-metrics.json
+    python metric_cache.py stats
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from ezapi import get_field, new_session, service_url, unwrap
+
+MAX_POINTS = 11000  # Prometheus rejects query_range above this many points per series
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ez-metric-chunks")
+
+
+def parse_duration(text):
+    """Seconds in a Prometheus-style duration: 30s, 5m, 1h, 1d"""
+    text = text.strip()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def format_step(seconds):
+    for unit in ("w", "d", "h", "m"):
+        if seconds % UNITS[unit] == 0:
+            return f"{seconds // UNITS[unit]}{unit}"
+    return f"{seconds}s"
+
+
+def parse_time(text):
+    """Unix seconds from ISO date/time (UTC unless an offset is given) or epoch"""
+    if text.replace(".", "", 1).isdigit():
+        return int(float(text))
+    value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def default_chunk(step):
+    """About 1,000 points per chunk, rounded to a length that divides a day or week"""
+    target = step * 1000
+    for length in (3600, 6 * 3600, 86400, 7 * 86400, 28 * 86400):
+        if length >= target and length % step == 0:
+            return length
+    return (target // step) * step
+
+
+class ChunkCache:
+    """Chunks as gzip JSON files, evicted least recently used by size.
+
+    The in-memory index (key -> size, in LRU order) is rebuilt from file mtimes
+    on start; reads touch the file so the order survives restarts. Up to
+    `memory_points` points of decoded chunks are also kept in memory for repeated
+    refreshes in one process.
+    """
+
+    def __init__(self, directory, max_bytes, memory_points=2_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_points = memory_points
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.index = OrderedDict()
+        self.total = 0
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json.gz"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.name[:-8], st.st_size))
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json.gz")
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.index:
+                self.misses += 1
+                return None
+            self.index.move_to_end(key)
+            self.hits += 1
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                chunk = json.load(f)
+            os.utime(self._path(key))
+            self._remember(key, chunk)
+            return chunk
+        except (OSError, ValueError):
+            with self.lock:
+                self.total -= self.index.pop(key, 0)
+            return None
+
+    def _remember(self, key, chunk):
+        with self.lock:
+            self._forget(key)
+            self.memory[key] = chunk
+            self.memory_size += len(chunk["points"])
+            while self.memory_size > self.memory_points and len(self.memory) > 1:
+                self.memory_size -= len(self.memory.popitem(last=False)[1]["points"])
+
+    def _forget(self, key):
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_size -= len(old["points"])
+
+    def put(self, key, chunk):
+        self._remember(key, chunk)
+        data = gzip.compress(json.dumps(chunk, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+        tmp = self._path(key) + f".{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        with self.lock:
+            self.total += len(data) - self.index.pop(key, 0)
+            self.index[key] = len(data)
+            while self.total > self.max_bytes and len(self.index) > 1:
+                old, size = self.index.popitem(last=False)
+                self._forget(old)
+                self.total -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+    def drop(self, keys):
+        with self.lock:
+            for key in keys:
+                self._forget(key)
+                if key in self.index:
+                    self.total -= self.index.pop(key)
+                    try:
+                        os.remove(self._path(key))
+                    except OSError:
+                        pass
+
+
+class MetricClient:
+    """Chunked, cached reads of /api/v1/metrics/{id}/data"""
+
+    def __init__(self, cache, step, chunk, settle, workers, timeout=60):
+        self.cache = cache
+        self.step = step
+        self.chunk = chunk
+        self.settle = settle
+        self.workers = workers
+        self.timeout = timeout
+        self.base = service_url("metrics")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.points_fetched = 0
+        self.points_cached = 0
+        self.bytes_fetched = 0
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = new_session("perf-metric-cache")
+        return self.local.session
+
+    def chunk_key(self, metric_id, chunk_start):
+        spec = f"{self.base}|{metric_id}|{self.step}|{self.chunk}|{chunk_start}"
+        return hashlib.blake2b(spec.encode(), digest_size=12).hexdigest()
+
+    def query(self, metric_id, start, end):
+        """One request for [start, end) on the step grid; returns (query, points)"""
+        params = {"start": iso(start), "end": iso(end - self.step), "step": format_step(self.step)}
+        response = self.session().get(f"{self.base}/api/v1/metrics/{metric_id}/data",
+                                      params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = unwrap(response.json()) or {}
+        points = []
+        for p in get_field(data, "timeSeries") or []:
+            ts = parse_time(get_field(p, "timestamp"))
+            points.append([ts, get_field(p, "value")])
+        with self.lock:
+            self.requests += 1
+            self.points_fetched += len(points)
+            self.bytes_fetched += len(response.content)
+        return get_field(data, "query"), points
+
+    def series(self, metric_id, start, end, now=None, _retry=True):
+        """Points for [start, end], using cached chunks where possible"""
+        now = int(now or time.time())
+        grid_start = start - start % self.step
+        stop = end - end % self.step + self.step  # exclusive end on the step grid
+        settled = now - self.settle
+        settled -= settled % self.step
+
+        # Per chunk: cached points and how far they are final ("until")
+        chunks = {}
+        wanted = []  # (from, to) ranges still to fetch, in order
+        promql = None
+        for c in range(grid_start - grid_start % self.chunk, stop, self.chunk):
+            entry = self.cache.get(self.chunk_key(metric_id, c))
+            if entry is None:
+                entry = {"query": None, "points": [], "until": c}
+            else:
+                promql = promql or entry.get("query")
+                with self.lock:
+                    self.points_cached += len(entry["points"])
+            chunks[c] = entry
+            # From the chunk's own "until", so the cached prefix never has a gap
+            need_from = entry["until"]
+            need_to = min(c + self.chunk, stop)
+            if need_from < need_to:
+                if wanted and wanted[-1][1] == need_from:
+                    wanted[-1] = (wanted[-1][0], need_to)
+                else:
+                    wanted.append((need_from, need_to))
+
+        # Split merged ranges at the Prometheus per-request point limit
+        requests = []
+        for lo, hi in wanted:
+            span = MAX_POINTS * self.step
+            requests += [(a, min(a + span, hi)) for a in range(lo, hi, span)]
+
+        fresh = []
+        for lo, hi in requests:
+            q, points = self.query(metric_id, lo, hi)
+            if promql is not None and q is not None and q != promql and _retry:
+                # The metric's formula changed: everything cached for it is stale
+                self.cache.drop(self.chunk_key(metric_id, c) for c in chunks)
+                return self.series(metric_id, start, end, now, _retry=False)
+            promql = q or promql
+            fresh.extend(points)
+
+        out = []
+        for c, entry in chunks.items():
+            chunk_end = c + self.chunk
+            new = [p for p in fresh if c <= p[0] < chunk_end and p[0] >= entry["until"]]
+            points = entry["points"] + new
+            # Only the settled prefix is cached (empty fetches too, so they are not
+            # re-queried); a chunk is complete once fully settled
+            until = min(chunk_end, settled, max([entry["until"]] + [hi for lo, hi in requests if lo < chunk_end and hi > c]))
+            if until > entry["until"]:
+                self.cache.put(self.chunk_key(metric_id, c), {
+                    "query": promql, "until": until,
+                    "points": [p for p in points if p[0] < until]})
+            out.extend(p for p in points if start <= p[0] <= end)
+        return out
+
+    def fetch_all(self, metrics, start, end):
+        """{metric_id: points} for every metric, in parallel"""
+        results, errors = {}, {}
+
+        def one(metric_id):
+            try:
+                results[metric_id] = self.series(metric_id, start, end)
+            except Exception as exc:  # keep going; report per metric
+                errors[metric_id] = str(exc)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(one, metrics))
+        return results, errors
+
+    def reset_stats(self):
+        self.requests = self.points_fetched = self.points_cached = self.bytes_fetched = 0
+        self.cache.hits = self.cache.misses = self.cache.evictions = 0
+
+
+def resolve_metrics(args):
+    """{metric_id: name} from --metric-id, --name and --seed"""
+    metrics = {m: m for m in args.metric_id}
+    names = list(args.name)
+    if args.seed:
+        with open(args.seed, encoding="utf-8") as f:
+            names += [m["name"] for m in json.load(f)]
+    if names:
+        session = new_session("perf-metric-cache")
+        response = session.get(service_url("metrics") + "/api/v1/metrics", timeout=30)
+        response.raise_for_status()
+        by_name = {get_field(m, "name"): get_field(m, "id") for m in unwrap(response.json()) or []}
+        unknown = [n for n in names if n not in by_name]
+        if unknown:
+            print(f"Not configured in MetricsConfigurationService, skipped: {', '.join(unknown)}", file=sys.stderr)
+        metrics.update({by_name[n]: n for n in names if n in by_name})
+    if not metrics:
+        sys.exit("No metrics: give --metric-id, --name or --seed")
+    return metrics
+
+
+def time_window(args):
+    end = parse_time(args.end) if args.end else int(time.time())
+    start = parse_time(args.start) if args.start else end - int(args.days * 86400)
+    return start, end
+
+
+def make_client(args):
+    step = parse_duration(args.step)
+    chunk = parse_duration(args.chunk) if args.chunk else default_chunk(step)
+    if chunk % step:
+        sys.exit(f"--chunk ({chunk}s) must be a multiple of --step ({step}s)")
+    cache = ChunkCache(args.cache_dir, int(args.cache_mb * 1024 * 1024))
+    return MetricClient(cache, step, chunk, parse_duration(args.settle), args.workers)
+
+
+def report(client, metrics, results, errors, elapsed):
+    points = sum(len(p) for p in results.values())
+    print(f"{len(results)}/{len(metrics)} metrics, {points:,} points in {elapsed:.2f}s: "
+          f"{client.requests} requests, {client.points_fetched:,} points fetched "
+          f"({client.bytes_fetched / 1024:,.0f} KiB), {client.points_cached:,} from cache "
+          f"[chunk {format_step(client.chunk)}, hits {client.cache.hits}, misses {client.cache.misses}, "
+          f"evicted {client.cache.evictions}, cache {client.cache.total / 1024 / 1024:,.1f} MiB]")
+    for metric_id, error in errors.items():
+        print(f"  {metrics[metric_id]}: {error}", file=sys.stderr)
+
+
+def fetch(args):
+    client = make_client(args)
+    metrics = resolve_metrics(args)
+    start, end = time_window(args)
+    started = time.time()
+    results, errors = client.fetch_all(list(metrics), start, end)
+    report(client, metrics, results, errors, time.time() - started)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({metrics[m]: {"metricId": m, "points": p} for m, p in results.items()},
+                      f, ensure_ascii=False)
+        print(f"Series written to {args.out}")
+    return 1 if errors else 0
+
+
+def watch(args):
+    """Refresh a rolling window repeatedly, the way a dashboard does"""
+    client = make_client(args)
+    metrics = resolve_metrics(args)
+    for i in range(args.count or 10 ** 9):
+        if i:
+            time.sleep(args.interval)
+        start, end = time_window(args)
+        client.reset_stats()
+        started = time.time()
+        results, errors = client.fetch_all(list(metrics), start, end)
+        print(f"[refresh {i + 1}] ", end="")
+        report(client, metrics, results, errors, time.time() - started)
+    return 0
+
+
+def current(args):
+    metrics = resolve_metrics(args)
+    base = service_url("metrics")
+    local = threading.local()
+
+    def one(metric_id):
+        if not hasattr(local, "session"):
+            local.session = new_session("perf-metric-cache")
+        response = local.session.get(f"{base}/api/v1/metrics/{metric_id}/current", timeout=30)
+        response.raise_for_status()
+        return metric_id, unwrap(response.json()) or {}
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for metric_id, data in pool.map(one, metrics):
+            print(f"{metrics[metric_id]:<40} {get_field(data, 'value')!s:>16}  {get_field(data, 'timestamp')}")
+    return 0
+
+
+def stats(args):
+    cache = ChunkCache(args.cache_dir, float("inf"))
+    print(f"{args.cache_dir}: {len(cache.index):,} chunks, {cache.total / 1024 / 1024:,.1f} MiB")
+    if args.clear:
+        cache.drop(list(cache.index))
+        print("Cleared")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func in (("fetch", fetch), ("watch", watch), ("current", current)):
+        p = sub.add_parser(name)
+        p.set_defaults(func=func)
+        p.add_argument("--metric-id", action="append", default=[])
+        p.add_argument("--name", action="append", default=[], help="Metric name, resolved to its ID")
+        p.add_argument("--seed", help="seed-metrics.json: use every metric name in it")
+        p.add_argument("--workers", type=int, default=16, help="Metrics fetched in parallel")
+        if name == "current":
+            continue
+        p.add_argument("--start", help="ISO time or epoch (default: end - --days)")
+        p.add_argument("--end", help="ISO time or epoch (default: now)")
+        p.add_argument("--days", type=float, default=1.0)
+        p.add_argument("--step", default="1m")
+        p.add_argument("--chunk", help="Chunk length, a multiple of --step (default ~1000 points)")
+        p.add_argument("--settle", default="10m", help="Age after which a chunk is cached")
+        p.add_argument("--cache-mb", type=float, default=512, help="Cache size before LRU eviction")
+        if name == "fetch":
+            p.add_argument("--out", help="Write the series as JSON")
+        else:
+            p.add_argument("--interval", type=float, default=60, help="Seconds between refreshes")
+            p.add_argument("--count", type=int, default=0, help="Refreshes (0 = until interrupted)")
+
+    p = sub.add_parser("stats", help="Cache size; --clear empties it")
+    p.add_argument("--clear", action="store_true")
+    p.set_defaults(func=stats)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
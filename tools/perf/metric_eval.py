@@ -0,0 +1,893 @@
+#!/usr/bin/env python3
+"""Vectorized offline evaluator for metric formulas.
+
+Parses the formula language of MetricConfiguration.Formula (seed-metrics.json):
+
+    COUNT(*) WHERE status="processed"
+    AVG(processing_time_seconds)
+    SUM(amount) WHERE status="completed"
+    (COUNT(*) WHERE has_errors=true / COUNT(*)) * 100
+
+Aggregates are COUNT, SUM, AVG, MIN, MAX and COUNT(DISTINCT field), each with an
+optional WHERE clause (=, !=, <>, <, <=, >, >=, IN (...), AND, OR, NOT and
+parentheses) that ends at the next arithmetic operator. Aggregates combine with
++ - * / and numbers.
+
+Every formula is compiled once into mask and value expressions over pandas
+columns, and records are read in chunks. Each chunk is reduced per label
+group (the metric's labels) into mergeable partial states using bincount and
+groupby: count, sum, min, max and distinct (group, value) pairs. Memory is
+therefore bounded by the number of series, not records. On one core, 100M
+generated records take tens of seconds; with files, parsing dominates.
+
+Each metric is also evaluated the way ValidationService computes it today.
+DataMetricsCalculator ignores Formula and labels and aggregates FieldPath
+with sum or avg, chosen from PrometheusType. The two values are printed side
+by side.
+
+Usage:
+    python metric_eval.py eval ../../seed-metrics.json records.csv more/*.ndjson --json values.json
+    python metric_eval.py eval ../../seed-metrics.json --generate 100000000 --chunk 2000000
+    python metric_eval.py eval seed-metrics.json data.parquet --map data_source=DataSourceId --expect prom.json
+    python metric_eval.py bench --rows 5000000
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+AGGREGATES = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+      (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<op><=|>=|!=|<>|[=<>+\-*/(),])
+    | (?P<name>\$?[A-Za-z_֐-׿][\w.֐-׿]*)
+    )""", re.VERBOSE)
+KEYWORDS = {"WHERE", "AND", "OR", "NOT", "IN", "TRUE", "FALSE", "NULL", "DISTINCT"} | set(AGGREGATES)
+
+
+class FormulaError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise FormulaError(f"unexpected {text[pos:pos + 10]!r} at {pos}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "name" and value.upper() in KEYWORDS:
+            kind, value = "kw", value.upper()
+        elif kind == "string":
+            value = value[1:-1].encode().decode("unicode_escape") if "\\" in value else value[1:-1]
+        elif kind == "number":
+            value = float(value)
+        tokens.append((kind, value))
+    return tokens
+
+
+class Parser:
+    """Recursive descent over the token list; nodes are plain tuples:
+
+    ("num", v) ("agg", func, field|None, distinct, cond|None) ("bin", op, l, r)
+    ("neg", x) and conditions ("cmp", op, field, literal) ("in", field, values)
+    ("and", a, b) ("or", a, b) ("not", a)
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        tok = self.peek()
+        if (kind and tok[0] != kind) or (value is not None and tok[1] != value):
+            want = value or kind
+            raise FormulaError(f"expected {want!r} but found {tok[1]!r} in {self.text!r}")
+        self.pos += 1
+        return tok
+
+    def accept(self, kind, value=None):
+        tok = self.peek()
+        if tok[0] == kind and (value is None or tok[1] == value):
+            self.pos += 1
+            return tok
+        return None
+
+    def parse(self):
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"unexpected {self.peek()[1]!r} in {self.text!r}")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            node = ("bin", op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            op = self.take()[1]
+            node = ("bin", op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.accept("op", "-"):
+            return ("neg", self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.peek()
+        if kind == "number":
+            self.pos += 1
+            return ("num", value)
+        if kind == "op" and value == "(":
+            self.pos += 1
+            node = self.expr()
+            self.take("op", ")")
+            return node
+        if kind == "kw" and value in AGGREGATES:
+            return self.aggregate()
+        raise FormulaError(f"expected an aggregate, number or '(' but found {value!r} in {self.text!r}")
+
+    def aggregate(self):
+        func = self.take("kw")[1]
+        self.take("op", "(")
+        distinct = bool(self.accept("kw", "DISTINCT"))
+        kind, value = self.take()
+        if (kind, value) == ("op", "*"):
+            kind = "name"
+        if kind != "name" or (value == "*" and func != "COUNT"):
+            raise FormulaError(f"{func}() needs a field name in {self.text!r}")
+        self.take("op", ")")
+        field = None if value == "*" else value
+        if distinct and field is None:
+            raise FormulaError("COUNT(DISTINCT *) is not supported")
+        cond = self.condition() if self.accept("kw", "WHERE") else None
+        return ("agg", func, field, distinct, cond)
+
+    def condition(self):
+        node = self.conjunction()
+        while self.accept("kw", "OR"):
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.accept("kw", "AND"):
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.accept("kw", "NOT"):
+            return ("not", self.negation())
+        if self.peek() == ("op", "("):
+            self.pos += 1
+            node = self.condition()
+            self.take("op", ")")
+            return node
+        field = self.take("name")[1]
+        if self.accept("kw", "IN"):
+            self.take("op", "(")
+            values = [self.literal()]
+            while self.accept("op", ","):
+                values.append(self.literal())
+            self.take("op", ")")
+            return ("in", field, tuple(values))
+        op = self.take("op")[1]
+        if op not in ("=", "!=", "<>", "<", "<=", ">", ">="):
+            raise FormulaError(f"expected a comparison after {field!r}, found {op!r}")
+        return ("cmp", "!=" if op == "<>" else op, field, self.literal())
+
+    def literal(self):
+        kind, value = self.take()
+        if kind in ("string", "number"):
+            return value
+        if kind == "kw" and value in ("TRUE", "FALSE"):
+            return value == "TRUE"
+        if kind == "kw" and value == "NULL":
+            return None
+        if kind == "op" and value == "-" and self.peek()[0] == "number":
+            return -self.take()[1]
+        raise FormulaError(f"expected a literal, found {value!r} in {self.text!r}")
+
+
+def aggregates_of(node, out=None):
+    """Distinct aggregate nodes in a formula, in first-use order"""
+    out = [] if out is None else out
+    if node[0] == "agg":
+        if node not in out:
+            out.append(node)
+    elif node[0] == "bin":
+        aggregates_of(node[2], out)
+        aggregates_of(node[3], out)
+    elif node[0] == "neg":
+        aggregates_of(node[1], out)
+    return out
+
+
+def fields_of(node, out=None):
+    out = set() if out is None else out
+    if node is None:
+        return out
+    tag = node[0]
+    if tag == "agg":
+        if node[2]:
+            out.add(node[2])
+        fields_of(node[4], out)
+    elif tag in ("cmp", "in"):
+        out.add(node[2] if tag == "cmp" else node[1])
+    elif tag in ("and", "or", "bin"):
+        fields_of(node[-2], out)
+        fields_of(node[-1], out)
+    elif tag in ("not", "neg"):
+        fields_of(node[1], out)
+    return out
+
+
+def complexity(node):
+    """Rough cost drivers: (aggregates, predicates)"""
+    aggs = aggregates_of(node)
+
+    def predicates(c):
+        if c is None:
+            return 0
+        if c[0] in ("and", "or"):
+            return predicates(c[1]) + predicates(c[2])
+        if c[0] == "not":
+            return predicates(c[1])
+        return 1
+    return len(aggs), sum(predicates(a[4]) for a in aggs)
+
+
+# ---------------------------------------------------------------------------
+# Columns
+# ---------------------------------------------------------------------------
+
+def norm(name):
+    return re.sub(r"[\s_.$\-]", "", name).lower()
+
+
+class Columns:
+    """Resolves formula fields and labels to DataFrame columns.
+
+    "amount", "$.amount", "Amount" and "AMOUNT" are the same field, as are
+    "data_source", "dataSource" and "DataSource"; --map overrides.
+    Converted columns are memoized per chunk.
+    """
+
+    def __init__(self, df, mapping, service_numbers):
+        self.df = df
+        self.mapping = mapping
+        self.service_numbers = service_numbers
+        self.by_norm = {}
+        for column in df.columns:
+            self.by_norm.setdefault(norm(str(column)), column)
+        self.memo = {}
+
+    def raw(self, field):
+        name = self.mapping.get(field, field)
+        if name.startswith("$."):
+            name = name[2:]
+        if "[" in name:
+            raise FormulaError(f"array paths such as {field!r} are not supported")
+        column = name if name in self.df.columns else self.by_norm.get(norm(name))
+        if column is None:
+            return None
+        return self.df[column]
+
+    def numeric(self, field):
+        key = ("num", field)
+        if key not in self.memo:
+            col = self.raw(field)
+            if col is None:
+                values = np.full(len(self.df), np.nan)
+            elif col.dtype.kind in "iuf":
+                values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+            elif col.dtype.kind == "b":
+                values = col.to_numpy(dtype=np.float64)
+            else:
+                text = col.astype("string")
+                if self.service_numbers:
+                    # DataMetricsCalculator.TryConvertToDouble: drop everything but digits . , -
+                    text = text.str.replace(r"[^\d.,\-]", "", regex=True).str.replace(",", "", regex=False)
+                values = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            self.memo[key] = values
+        return self.memo[key]
+
+    def text(self, field):
+        """The column for string comparison; booleans become "true"/"false" """
+        key = ("str", field)
+        if key not in self.memo:
+            col = self.raw(field)
+            if col is None:
+                values = pd.Series(pd.NA, index=self.df.index, dtype="string")
+            elif col.dtype.kind == "b":
+                values = pd.Categorical.from_codes(col.to_numpy().astype(np.int8), ["false", "true"])
+                values = pd.Series(values, index=self.df.index)
+            else:
+                values = col
+            self.memo[key] = values
+        return self.memo[key]
+
+    def equals(self, field, literal):
+        """Boolean mask of field == literal; booleans match true/True/1 like JToken and CSV text"""
+        key = ("eq", field, literal)
+        if key in self.memo:
+            return self.memo[key]
+        col = self.raw(field)
+        if col is None:
+            mask = np.zeros(len(self.df), dtype=bool)
+        elif isinstance(literal, bool) and col.dtype.kind == "b":
+            mask = col.to_numpy() == literal
+        else:
+            wanted = {literal_text(literal)}
+            if isinstance(literal, bool):
+                wanted = {"true", "1"} if literal else {"false", "0"}
+            codes, uniques = self.factorize(field)
+            hits = np.array([(u.lower() if isinstance(literal, bool) else u) in wanted for u in uniques])
+            mask = hits[codes] if len(hits) else np.zeros(len(self.df), dtype=bool)
+            if "" in wanted:
+                mask &= col.notna().to_numpy(dtype=bool)
+        self.memo[key] = mask
+        return mask
+
+    def factorize(self, field):
+        """(codes, uniques as strings) for a label column; missing values become "" """
+        key = ("codes", field)
+        if key not in self.memo:
+            col = self.text(field)
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                codes = col.cat.codes.to_numpy().astype(np.int64)
+                uniques = np.append(np.asarray(col.cat.categories).astype(str).astype(object), "")
+                codes[codes < 0] = len(uniques) - 1
+            else:
+                codes, uniques = pd.factorize(col)
+                uniques = np.append(np.asarray(uniques).astype(str).astype(object), "")
+                codes[codes < 0] = len(uniques) - 1
+            self.memo[key] = (codes, uniques)
+        return self.memo[key]
+
+
+def compile_condition(cond, cols):
+    """Boolean numpy mask for a WHERE clause"""
+    tag = cond[0]
+    if tag == "and":
+        return compile_condition(cond[1], cols) & compile_condition(cond[2], cols)
+    if tag == "or":
+        return compile_condition(cond[1], cols) | compile_condition(cond[2], cols)
+    if tag == "not":
+        return ~compile_condition(cond[1], cols)
+    if tag == "in":
+        field, values = cond[1], cond[2]
+        if all(isinstance(v, float) for v in values):
+            return np.isin(cols.numeric(field), values)
+        mask = np.zeros(len(cols.df), dtype=bool)
+        for value in values:
+            mask |= cols.equals(field, value)
+        return mask
+    _, op, field, literal = cond
+    if literal is None:
+        missing = cols.text(field).isna().to_numpy(dtype=bool)
+        return missing if op == "=" else ~missing
+    if isinstance(literal, float) and not isinstance(literal, bool):
+        values = cols.numeric(field)
+        with np.errstate(invalid="ignore"):
+            return {"=": values == literal, "!=": values != literal, "<": values < literal,
+                    "<=": values <= literal, ">": values > literal, ">=": values >= literal}[op]
+    if op in ("=", "!="):
+        mask = cols.equals(field, literal)
+        return mask if op == "=" else ~mask
+    text = cols.text(field)
+    literal = literal_text(literal)
+    text = text.astype("string")
+    result = {"<": text < literal, "<=": text <= literal, ">": text > literal, ">=": text >= literal}[op]
+    return result.fillna(False).to_numpy(dtype=bool)
+
+
+def literal_text(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Grouping and partial states
+# ---------------------------------------------------------------------------
+
+class Groups:
+    """Stable global IDs for label-value tuples across chunks.
+
+    Each chunk's label columns are factorized and combined into one code per
+    row; only the chunk's distinct tuples are looked up in the global index.
+    """
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.index = None
+
+    def codes(self, cols, n):
+        if not self.labels:
+            return np.zeros(n, dtype=np.int64)
+        parts = [cols.factorize(label) for label in self.labels]
+        if len(parts) == 1:
+            local, size = parts[0][0], len(parts[0][1])
+        else:
+            combined = np.zeros(n, dtype=np.int64)
+            for codes, uniq in parts:
+                combined = pd.factorize(combined * len(uniq) + codes)[0]
+            local, size = combined, int(combined.max()) + 1 if n else 0
+        # First row of every local code, by an O(n) scatter instead of a sort
+        first = np.full(size, -1, dtype=np.int64)
+        first[local[::-1]] = np.arange(n - 1, -1, -1)
+        present = first >= 0
+        first = first[present]
+        remap = np.cumsum(present) - 1
+        local = remap[local]
+        arrays = [uniq[codes[first]] for codes, uniq in parts]
+        keys = pd.Index(arrays[0]) if len(arrays) == 1 else pd.MultiIndex.from_arrays(arrays)
+        if self.index is None:
+            self.index = keys
+            return local.astype(np.int64)
+        mapping = self.index.get_indexer(keys)
+        new = mapping == -1
+        if new.any():
+            mapping[new] = np.arange(len(self.index), len(self.index) + int(new.sum()))
+            self.index = self.index.append(keys[new])
+        return mapping[local]
+
+    @property
+    def keys(self):
+        if not self.labels:
+            return [()]
+        if self.index is None:
+            return []
+        return [(k,) for k in self.index] if len(self.labels) == 1 else list(self.index)
+
+    def __len__(self):
+        if not self.labels:
+            return 1
+        return 0 if self.index is None else len(self.index)
+
+
+class AggState:
+    """Mergeable per-group state for one aggregate node"""
+
+    def __init__(self, node):
+        _, self.func, self.field, self.distinct, self.cond = node
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sum = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        # COUNT(DISTINCT): sorted unique (group << 32 | value id) pairs
+        self.values = Groups([self.field]) if self.distinct else None
+        self.pairs = np.zeros(0, dtype=np.int64)
+
+    def grow(self, n):
+        extra = n - len(self.count)
+        if extra > 0:
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+            self.sum = np.concatenate([self.sum, np.zeros(extra)])
+            self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+            self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+
+    def update(self, codes, cols, n_groups):
+        self.grow(n_groups)
+        mask = compile_condition(self.cond, cols) if self.cond is not None else None
+        if self.field is None:
+            selected = codes if mask is None else codes[mask]
+            self.count += np.bincount(selected, minlength=n_groups)
+            return
+        if self.distinct:
+            keep = cols.text(self.field).notna().to_numpy(dtype=bool)
+            if mask is not None:
+                keep = keep & mask
+            value_ids = self.values.codes(cols, len(codes))
+            pairs = (codes[keep] << 32) | value_ids[keep]
+            self.pairs = np.union1d(self.pairs, pairs)
+            return
+        values = cols.numeric(self.field)
+        keep = ~np.isnan(values)
+        if mask is not None:
+            keep = keep & mask
+        g, v = codes[keep], values[keep]
+        self.count += np.bincount(g, minlength=n_groups)
+        if self.func in ("SUM", "AVG"):
+            self.sum += np.bincount(g, weights=v, minlength=n_groups)
+        elif self.func in ("MIN", "MAX") and len(g):
+            series = pd.Series(v).groupby(g)
+            if self.func == "MIN":
+                part = series.min()
+                idx = part.index.to_numpy()
+                self.min[idx] = np.minimum(self.min[idx], part.to_numpy())
+            else:
+                part = series.max()
+                idx = part.index.to_numpy()
+                self.max[idx] = np.maximum(self.max[idx], part.to_numpy())
+
+    def result(self, total=False):
+        """Per-group values, or one value over all groups when total=True"""
+        if self.distinct:
+            if total:
+                return np.array([float(len(np.unique(self.pairs & 0xFFFFFFFF)))])
+            return np.bincount(self.pairs >> 32, minlength=len(self.count)).astype(np.float64)
+        count = self.count.sum(keepdims=True) if total else self.count
+        if self.func == "COUNT":
+            return count.astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.func == "SUM":
+                return self.sum.sum(keepdims=True) if total else self.sum.copy()
+            if self.func == "AVG":
+                return (self.sum.sum(keepdims=True) if total else self.sum) / count
+            values = (self.min.min(keepdims=True) if self.func == "MIN" else self.max.max(keepdims=True)) \
+                if total else (self.min if self.func == "MIN" else self.max).copy()
+            values[count == 0] = np.nan
+            return values
+
+
+def evaluate(node, states, total=False):
+    tag = node[0]
+    if tag == "num":
+        return node[1]
+    if tag == "agg":
+        return states[node].result(total)
+    if tag == "neg":
+        return -evaluate(node[1], states, total)
+    left, right = evaluate(node[2], states, total), evaluate(node[3], states, total)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if node[1] == "+":
+            return left + right
+        if node[1] == "-":
+            return left - right
+        if node[1] == "*":
+            return left * right
+        return np.divide(left, right) if isinstance(right, np.ndarray) or isinstance(left, np.ndarray) \
+            else (left / right if right else math.nan)
+
+
+class CompiledMetric:
+    def __init__(self, config, mapping):
+        self.name = config["name"]
+        self.formula = config.get("formula") or ""
+        self.labels = list(config.get("labels") or [])
+        self.field_path = config.get("fieldPath")
+        # MetricConfiguration.PrometheusType defaults to gauge; DetermineAggregationType
+        # maps gauge and summary to avg and everything else, unknown types included, to sum
+        ptype = (config.get("prometheusType") or "gauge").lower()
+        self.service_agg = "avg" if ptype in ("gauge", "summary") else "sum"
+        self.ast = Parser(self.formula).parse()
+        self.groups = Groups(self.labels)
+        self.states = {node: AggState(node) for node in aggregates_of(self.ast)}
+        self.service = AggState(("agg", self.service_agg.upper(), self.field_path, False, None)) \
+            if self.field_path else None
+        self.service_groups = Groups([])
+        self.seconds = 0.0
+
+    def update(self, cols, n):
+        started = time.perf_counter()
+        codes = self.groups.codes(cols, n)
+        for state in self.states.values():
+            state.update(codes, cols, len(self.groups))
+        if self.service:
+            self.service.update(self.service_groups.codes(cols, n), cols, 1)
+        self.seconds += time.perf_counter() - started
+
+    def results(self):
+        values = evaluate(self.ast, self.states)
+        if not isinstance(values, np.ndarray):
+            values = np.full(len(self.groups), values)
+        total = evaluate(self.ast, self.states, total=True)
+        total = float(total[0] if isinstance(total, np.ndarray) else total)
+        series = [{"labels": dict(zip(self.labels, key)), "value": clean(v)}
+                  for key, v in zip(self.groups.keys, values)]
+        service = clean(self.service.result(total=True)[0]) if self.service else None
+        return {"formula": self.formula, "labels": self.labels, "series": len(series),
+                "total": clean(total), "service": service, "serviceAggregation": self.service_agg,
+                "fieldPath": self.field_path, "seconds": round(self.seconds, 3), "values": series}
+
+
+def clean(value):
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+def iter_frames(paths, chunk):
+    """DataFrames of at most `chunk` rows from CSV, NDJSON, JSON, Parquet or Excel files"""
+    for path in paths:
+        lower = path.lower()
+        if lower.endswith(".csv"):
+            yield from pd.read_csv(path, chunksize=chunk, low_memory=False)
+        elif lower.endswith((".ndjson", ".jsonl")):
+            yield from pd.read_json(path, lines=True, chunksize=chunk, dtype=False)
+        elif lower.endswith(".parquet") or os.path.isdir(path):
+            import pyarrow.parquet as pq
+            files = sorted(glob.glob(os.path.join(path, "*.parquet"))) if os.path.isdir(path) else [path]
+            for name in files:
+                for batch in pq.ParquetFile(name).iter_batches(batch_size=chunk):
+                    yield batch.to_pandas()
+        else:
+            # JSON arrays, concatenated Kafka dumps, XML and Excel through reconcile's streaming readers
+            from reconcile import iter_records
+            batch = []
+            for _, record in iter_records([path]):
+                batch.append(record)
+                if len(batch) >= chunk:
+                    yield pd.json_normalize(batch)
+                    batch = []
+            if batch:
+                yield pd.json_normalize(batch)
+
+
+def generate_frames(rows, chunk, seed=0, cardinality=None):
+    """Synthetic records with the fields the seed metrics use"""
+    rng = np.random.default_rng(seed)
+    cardinality = cardinality or {}
+    sources = np.array([f"ds-{i:04d}" for i in range(cardinality.get("data_source", 20))])
+    statuses = np.array(["processed", "completed", "failed", "pending"])
+    methods = np.array(["card", "wire", "cash", "paypal", "bit"])
+    error_types = np.array(["", "schema", "format", "required", "range"])
+    done = 0
+    while done < rows:
+        n = min(chunk, rows - done)
+        has_errors = rng.random(n) < 0.05
+        # Categoricals, as a Parquet export or pandas.read_csv(dtype="category") yields them
+        frame = pd.DataFrame({
+            "data_source": pd.Categorical.from_codes(rng.integers(0, len(sources), n), sources),
+            "status": pd.Categorical.from_codes(rng.choice(4, n, p=[0.5, 0.3, 0.15, 0.05]), statuses),
+            "processing_time_seconds": rng.gamma(2.0, 0.4, n),
+            "amount": np.round(rng.lognormal(5, 1.2, n), 2),
+            "payment_method": pd.Categorical.from_codes(rng.integers(0, len(methods), n), methods),
+            "has_errors": has_errors,
+            "error_type": pd.Categorical.from_codes(
+                np.where(has_errors, rng.integers(1, 5, n), 0), error_types),
+            "customer_id": rng.integers(0, cardinality.get("customer_id", 1_000_000), n),
+        })
+        done += n
+        yield frame
+
+
+def expand(specs):
+    paths = []
+    for spec in specs:
+        matches = sorted(glob.glob(spec)) if any(c in spec for c in "*?[") else [spec]
+        for path in matches:
+            if os.path.isdir(path) and not glob.glob(os.path.join(path, "*.parquet")):
+                paths.extend(sorted(os.path.join(path, n) for n in os.listdir(path)))
+            else:
+                paths.append(path)
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def run(metrics, frames, mapping, service_numbers, progress=True):
+    rows = 0
+    started = time.perf_counter()
+    for df in frames:
+        cols = Columns(df, mapping, service_numbers)
+        for metric in metrics:
+            metric.update(cols, len(df))
+        rows += len(df)
+        if progress:
+            elapsed = time.perf_counter() - started
+            sys.stderr.write(f"\r{rows:,} records, {rows / max(elapsed, 1e-9):,.0f}/s".ljust(60))
+            sys.stderr.flush()
+    if progress:
+        sys.stderr.write("\n")
+    return rows, time.perf_counter() - started
+
+
+def load_metrics(path, names, mapping):
+    with open(path, encoding="utf-8") as f:
+        configs = json.load(f)
+    configs = configs if isinstance(configs, list) else [configs]
+    out = []
+    for config in configs:
+        if names and config["name"] not in names:
+            continue
+        try:
+            out.append(CompiledMetric(config, mapping))
+        except FormulaError as exc:
+            print(f"{config['name']}: {exc}", file=sys.stderr)
+    return out
+
+
+def parse_map(specs):
+    mapping = {}
+    for spec in specs:
+        key, sep, value = spec.partition("=")
+        if not sep:
+            sys.exit(f"--map expects label=column, got {spec!r}")
+        mapping[key] = value
+    return mapping
+
+
+def cmd_eval(args):
+    mapping = parse_map(args.map)
+    metrics = load_metrics(args.metrics, args.metric, mapping)
+    if not metrics:
+        sys.exit("No metric formulas to evaluate")
+    if args.generate:
+        frames = generate_frames(args.generate, args.chunk, args.seed)
+    else:
+        paths = expand(args.inputs)
+        if not paths:
+            sys.exit("No input files (or use --generate N)")
+        frames = iter_frames(paths, args.chunk)
+    rows, elapsed = run(metrics, frames, mapping, args.service_numbers)
+
+    results = {m.name: m.results() for m in metrics}
+    print(f"\n{rows:,} records in {elapsed:.1f}s ({rows / max(elapsed, 1e-9) / 1e6:,.2f}M records/s)\n")
+    print(f"{'metric':<28} {'series':>7} {'formula total':>16} {'service today':>16} {'eval s':>7}")
+    for name, r in results.items():
+        service = "no FieldPath" if r["fieldPath"] is None else fmt(r["service"])
+        print(f"{name:<28} {r['series']:>7,} {fmt(r['total']):>16} {service:>16} {r['seconds']:>7.2f}")
+        for s in sorted(r["values"], key=lambda s: -(s["value"] or 0))[:args.show]:
+            labels = ", ".join(f"{k}={v}" for k, v in s["labels"].items())
+            print(f"{'':<4}{labels:<50} {fmt(s['value']):>16}")
+    print("\n'service today' is what ValidationService's DataMetricsCalculator records: "
+          "FieldPath aggregated by PrometheusType (gauge -> avg, counter -> sum), no WHERE, no labels.")
+
+    status = 0
+    if args.expect:
+        status = check(results, args.expect, args.tolerance)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"records": rows, "seconds": round(elapsed, 3), "metrics": results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"Values written to {args.json}")
+    return status
+
+
+def fmt(value):
+    if value is None:
+        return "-"
+    return f"{value:,.4f}" if abs(value) < 1e6 and value != int(value) else f"{value:,.0f}"
+
+
+def check(results, expect_path, tolerance):
+    """Compare against {metric: {"k=v,k=v": value}} or an earlier --json output"""
+    with open(expect_path, encoding="utf-8") as f:
+        expected = json.load(f)
+    expected = expected.get("metrics", expected)
+    mismatches = 0
+    for name, want in expected.items():
+        got = results.get(name)
+        if got is None:
+            print(f"MISSING {name}")
+            mismatches += 1
+            continue
+        if isinstance(want, dict) and "values" in want:
+            want = {series_key(s["labels"]): s["value"] for s in want["values"]}
+        have = {series_key(s["labels"]): s["value"] for s in got["values"]}
+        for key, value in (want.items() if isinstance(want, dict) else [("", want)]):
+            actual = have.get(key) if key else got["total"]
+            if value is None and actual is None:
+                continue
+            if actual is None or value is None or abs(actual - value) > tolerance * max(1.0, abs(value)):
+                print(f"MISMATCH {name} {{{key}}}: expected {value}, got {actual}")
+                mismatches += 1
+    print(f"Cross-check: {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+def series_key(labels):
+    return ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+
+
+BENCH_FORMULAS = (
+    ("1 agg", 'COUNT(*)'),
+    ("1 agg, 1 pred", 'SUM(amount) WHERE status="completed"'),
+    ("2 agg, 1 pred", '(COUNT(*) WHERE has_errors=true / COUNT(*)) * 100'),
+    ("1 agg, 3 pred", 'AVG(amount) WHERE status="completed" AND payment_method IN ("card", "wire") AND amount > 100'),
+    ("3 agg, 2 pred", '(SUM(amount) WHERE status="completed" - SUM(amount) WHERE status="failed") / COUNT(*)'),
+    ("min/max", 'MAX(processing_time_seconds) - MIN(processing_time_seconds)'),
+    ("distinct", 'COUNT(DISTINCT customer_id) WHERE status="completed"'),
+)
+
+
+def cmd_bench(args):
+    """Evaluation cost by formula complexity and label cardinality"""
+    cardinalities = [int(c) for c in args.cardinalities.split(",")]
+    frames = list(generate_frames(args.rows, args.chunk, args.seed, {"customer_id": 1_000_000}))
+    print(f"{args.rows:,} synthetic records, chunks of {args.chunk:,}; "
+          f"label 'tenant' = customer_id mod N\n")
+    header = f"{'formula':<16}" + "".join(f"{'card ' + format(c, ','):>16}" for c in [0] + cardinalities)
+    print(header + "   (M records/s | series)")
+    # Label columns are built before timing, as categoricals like a Parquet export
+    variants = {0: frames}
+    for card in cardinalities:
+        variants[card] = [df.assign(tenant=pd.Categorical(df["customer_id"].to_numpy() % card))
+                          for df in frames]
+    rows = []
+    for label, formula in BENCH_FORMULAS:
+        line = f"{label:<16}"
+        for card, chunks in variants.items():
+            metric = CompiledMetric({"name": label, "formula": formula,
+                                     "labels": ["tenant"] if card else []}, {})
+            started = time.perf_counter()
+            for df in chunks:
+                metric.update(Columns(df, {}, False), len(df))
+            evaluate(metric.ast, metric.states)
+            elapsed = time.perf_counter() - started
+            series = len(metric.groups)
+            line += f"{args.rows / elapsed / 1e6:>9.1f} | {series:<5,}"
+            rows.append({"formula": formula, "complexity": complexity(metric.ast), "cardinality": card,
+                         "seconds": elapsed, "records_per_s": args.rows / elapsed, "series": series})
+        print(line)
+    print("\nSeries is what Prometheus stores per scrape once the metric is enabled; "
+          "label cardinality multiplies it, formula complexity only adds CPU.")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("eval", help="Evaluate metric formulas over record files")
+    p.add_argument("metrics", help="seed-metrics.json or an exported metric list")
+    p.add_argument("inputs", nargs="*", help="CSV, NDJSON, JSON, XML, Excel or Parquet files, dirs or globs")
+    p.add_argument("--metric", action="append", default=[], help="Only these metric names")
+    p.add_argument("--generate", type=int, help="Use N synthetic records instead of files")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--chunk", type=int, default=1_000_000, help="Records per vectorized chunk")
+    p.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                   help="Map a formula field or label to a record column, e.g. data_source=DataSourceId")
+    p.add_argument("--service-numbers", action="store_true",
+                   help="Parse numeric strings like DataMetricsCalculator (strip currency symbols)")
+    p.add_argument("--show", type=int, default=5, help="Largest series printed per metric")
+    p.add_argument("--expect", help="Expected values to cross-check against")
+    p.add_argument("--tolerance", type=float, default=1e-9, help="Relative tolerance for --expect")
+    p.add_argument("--json")
+    p.set_defaults(func=cmd_eval)
+
+    p = sub.add_parser("bench", help="Cost by formula complexity and label cardinality")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--chunk", type=int, default=1_000_000)
+    p.add_argument("--cardinalities", default="10,1000,100000")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json")
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,928 @@
+#!/usr/bin/env python3
+"""High-speed synthetic seeding of MongoDB with platform-shaped documents.
+
+Fills a database with categories, datasources, schemas and metrics and with
+tens of millions of DataProcessingInvalidRecord documents, plus the
+DataProcessingValidationResult that each file's records point to. Queries,
+indexes and the InvalidRecords API can then be measured at production volume
+without running files through the pipeline.
+
+Documents follow the Shared/Entities classes as the C# driver stores them:
+PascalCase element names, string references to ObjectIds, the base-entity
+audit fields, enums as integers, TimeSpan as "hh:mm:ss" and decimal as
+Decimal128. Invalid records are stored the way ValidationService stores them
+(ErrorType "SchemaValidation", FieldName/ExpectedValue/ActualValue left null)
+and carry Corvus-style ValidationErrors such as "#/Amount Invalid Validation
+minimum - 0.5 is less than 1." that InvalidRecordService's field, expected and
+actual extraction understands. The errors match each datasource's own record
+shape and JSON schema.
+
+Speed comes from three things:
+
+- Pre-serialized BSON. Each (datasource, error, review state) combination is
+  encoded once as a template. The per-document values (_id, dates, line
+  number, file name, IDs, record key) are fixed-width and are written into a
+  numpy array of template copies, so a batch needs no dict and no encode per
+  document.
+- Parallel workers, each with its own MongoClient, sending unordered
+  insert_many batches of RawBSONDocument.
+- No index maintenance during the load. With --drop the collections start
+  empty. Afterwards every index the services define is built with one
+  createIndexes per collection, under the names MongoDB.Entities gives them
+  ("FileName(Asc) | CreatedAt(Dsc)"), so the services' startup index creation
+  finds them already there.
+
+Files arrive over --days with a lognormal number of invalid records each. They
+are spread over the datasources with a Zipf skew, so a few noisy datasources
+own most of the collection, as in production.
+
+Usage:
+    python mongo_seed.py --invalid-records 20000000 --datasources 500 --drop
+    python mongo_seed.py --mongo mongodb://mongodb:27017 --invalid-records 5000000 --workers 16
+    python mongo_seed.py --invalid-records 1000000 --dump seed-dump
+    python mongo_seed.py --invalid-records 2000000 --dry-run
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import uuid
+
+import numpy as np
+
+try:
+    import bson
+    from bson import Decimal128, Int64, ObjectId
+    from bson.datetime_ms import DatetimeMS
+    from bson.raw_bson import RawBSONDocument
+    from pymongo import IndexModel, MongoClient
+    from pymongo.errors import BulkWriteError, PyMongoError
+except ImportError:
+    bson = None
+
+DAY = 86400
+
+CATEGORIES = "DataSourceCategories"
+DATASOURCES = "DataProcessingDataSource"
+SCHEMAS = "DataProcessingSchema"
+METRICS = "MetricConfiguration"
+RESULTS = "DataProcessingValidationResult"
+INVALID = "DataProcessingInvalidRecord"
+
+# Shared/Configuration/DatabaseConfiguration.cs, DataSourceManagementService/Program.cs
+COMMON_INDEXES = [[("CorrelationId", 1)], [("IsDeleted", 1)], [("CreatedAt", -1)],
+                  [("UpdatedAt", -1)], [("CreatedBy", 1)]]
+INDEXES = {
+    CATEGORIES: [[("SortOrder", 1)], [("IsActive", 1)], [("Name", 1)]],
+    DATASOURCES: [[("Name", 1)], [("SupplierName", 1), ("Category", 1)], [("IsActive", 1), ("IsDeleted", 1)],
+                  [("LastProcessedAt", -1)], [("SupplierName", 1)], [("IsActive", 1)]] + COMMON_INDEXES,
+    RESULTS: [[("DataSourceId", 1), ("CreatedAt", -1)], [("FileName", 1), ("ProcessingStartedAt", -1)],
+              [("Status", 1), ("IsDeleted", 1)]] + COMMON_INDEXES,
+    INVALID: [[("DataSourceId", 1), ("ValidationResultId", 1)], [("ErrorType", 1), ("Severity", 1)],
+              [("IsReviewed", 1), ("IsIgnored", 1), ("IsDeleted", 1)],
+              [("FileName", 1), ("CreatedAt", -1)]] + COMMON_INDEXES,
+}
+UNIQUE_INDEXES = {(DATASOURCES, "Name(Asc)")}
+
+# DataSourceManagementService/Data/CategorySeeder.cs defaults
+CATEGORY_NAMES = [("מכירות", "Sales"), ("כספים", "Finance"), ("משאבי אנוש", "HR"), ("מלאי", "Inventory"),
+                  ("שירות לקוחות", "Customer Service"), ("שיווק", "Marketing"), ("לוגיסטיקה", "Logistics"),
+                  ("תפעול", "Operations"), ("מחקר ופיתוח", "R&D"), ("רכש", "Procurement")]
+SUPPLIERS = ["בנק הפועלים בע״מ", "רמי לוי שיווק השקמה בע״מ", "שירותי בריאות כללית", "אוטופלוס סוכנות לביטוח בע״מ",
+             "משרד החינוך", "פיצה האט ישראל בע\"מ", "חברת דואר ישראל בע\"מ", "שופרסל בע\"מ", "אל על נתיבי אויר לישראל",
+             "בזק החברה הישראלית לתקשורת"]
+CRONS = [("0 */5 * * * *", "Every5Minutes"), ("0 */15 * * * *", "Every15Minutes"), ("0 0 * * * *", "Hourly"),
+         ("0 30 2 * * *", "Daily"), ("0 0 */6 * * *", "Custom")]
+REVIEWERS = ["dana.levi", "yossi.cohen", "noa.mizrahi", "avi.peretz"]
+REVIEW_NOTES = ["תוקן ידנית בקובץ המקור", "שגיאה ידועה מהספק", "Supplier notified", None]
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+KEY = "{key}"
+
+# (field, Hebrew display name, JSON schema, valid example, [(broken rule, bad value)])
+SHAPES = {
+    "sales_transaction": ("עסקאות מכירה", "מכירות", [
+        ("TransactionId", "מזהה עסקה", {"type": "string", "pattern": "^TXN-[0-9]{8}$"}, "TXN-" + KEY,
+         [("pattern", "TXN-ABCD1234"), ("required", None)]),
+        ("Amount", "סכום", {"type": "number", "minimum": 1, "maximum": 1000000}, 249.9,
+         [("minimum", 0.5), ("maximum", 2500000), ("type", "N/A")]),
+        ("Currency", "מטבע", {"type": "string", "enum": ["ILS", "USD", "EUR"]}, "ILS", [("enum", "NIS")]),
+        ("TransactionDate", "תאריך עסקה", {"type": "string", "format": "date"}, "2025-03-14",
+         [("format", "14/03/2025"), ("required", None)]),
+        ("StoreCode", "קוד סניף", {"type": "integer", "minimum": 1, "maximum": 999}, 118, [("maximum", 1200)]),
+    ]),
+    "customer": ("לקוחות", "שירות לקוחות", [
+        ("CustomerId", "מזהה לקוח", {"type": "string", "pattern": "^C[0-9]{8}$"}, "C" + KEY,
+         [("pattern", "C-0042"), ("required", None)]),
+        ("FullName", "שם מלא", {"type": "string", "maxLength": 40}, "ישראל ישראלי",
+         [("maxLength", "ישראל ישראלי בן אברהם יצחק יעקב משה אהרון")]),
+        ("Email", "דוא\"ל", {"type": "string", "format": "email"}, "israel@example.co.il",
+         [("format", "israel.example.co.il")]),
+        ("Phone", "טלפון", {"type": "string", "pattern": "^0[2-9][0-9]{7,8}$"}, "0521234567",
+         [("pattern", "+972-52-123")]),
+        ("Status", "סטטוס", {"type": "string", "enum": ["Active", "Suspended", "Closed"]}, "Active",
+         [("enum", "פעיל")]),
+        ("CreditLimit", "מסגרת אשראי", {"type": "number", "minimum": 0, "maximum": 100000}, 15000,
+         [("maximum", 250000)]),
+    ]),
+    "inventory_item": ("פריטי מלאי", "מלאי", [
+        ("Sku", "מק\"ט", {"type": "string", "pattern": "^SKU[0-9]{8}$"}, "SKU" + KEY, [("pattern", "SKU-12-A")]),
+        ("Quantity", "כמות", {"type": "integer", "minimum": 0, "maximum": 100000}, 42,
+         [("maximum", 250000), ("type", "many")]),
+        ("UnitPrice", "מחיר יחידה", {"type": "number", "minimum": 0.01}, 19.9, [("minimum", 0.001)]),
+        ("Warehouse", "מחסן", {"type": "string", "enum": ["TLV", "HFA", "BSH", "JLM"]}, "TLV", [("enum", "EILAT")]),
+        ("LastCountDate", "תאריך ספירה", {"type": "string", "format": "date"}, "2025-02-01",
+         [("format", "2025-13-01"), ("required", None)]),
+    ]),
+    "employee_record": ("נתוני עובדים", "משאבי אנוש", [
+        ("EmployeeId", "מספר עובד", {"type": "string", "pattern": "^E[0-9]{8}$"}, "E" + KEY,
+         [("pattern", "E12"), ("required", None)]),
+        ("Department", "מחלקה", {"type": "string", "maxLength": 30}, "הנהלת חשבונות",
+         [("maxLength", "המחלקה לתכנון אסטרטגי ופיתוח עסקי ארוך טווח")]),
+        ("Salary", "שכר", {"type": "number", "minimum": 5300, "maximum": 200000}, 14250,
+         [("minimum", 4000), ("maximum", 350000)]),
+        ("StartDate", "תאריך תחילת עבודה", {"type": "string", "format": "date"}, "2019-09-01",
+         [("format", "01.09.2019")]),
+    ]),
+    "shipment": ("משלוחים", "לוגיסטיקה", [
+        ("TrackingNumber", "מספר מעקב", {"type": "string", "pattern": "^RR[0-9]{8}IL$"}, "RR" + KEY + "IL",
+         [("pattern", "RR123IL"), ("required", None)]),
+        ("WeightKg", "משקל", {"type": "number", "minimum": 0.1, "maximum": 30}, 2.4,
+         [("maximum", 45.5), ("minimum", 0.05)]),
+        ("Status", "סטטוס", {"type": "string", "enum": ["Created", "InTransit", "Delivered", "Returned"]},
+         "InTransit", [("enum", "Lost")]),
+        ("DeliveredAt", "מועד מסירה", {"type": "string", "format": "date-time"}, "2025-03-14T10:22:00Z",
+         [("format", "14/03/2025 10:22")]),
+    ]),
+}
+
+
+# ---------------------------------------------------------------------------
+# Corvus-style validation errors (the formats InvalidRecordService parses)
+# ---------------------------------------------------------------------------
+
+def corvus_message(field, rule, schema, bad):
+    if rule == "required":
+        return f"# Invalid Validation properties - the required property '{field}' was not present."
+    if rule == "pattern":
+        return f"#/{field} Invalid Validation pattern - {bad} did not match '{schema['pattern']}'."
+    if rule == "enum":
+        return f"#/{field} Invalid Validation enum - '{bad}' did not validate against the enumeration."
+    if rule == "format":
+        return f"#/{field} Invalid Validation format - should have been'{schema['format']}' but was '{bad}'."
+    if rule == "minimum":
+        return f"#/{field} Invalid Validation minimum - {bad} is less than {schema['minimum']}."
+    if rule == "maximum":
+        return f"#/{field} Invalid Validation maximum - {bad} is greater than {schema['maximum']}."
+    if rule == "maxLength":
+        return f"#/{field} Invalid Validation maxLength - {bad} of {len(bad)} is greater than {schema['maxLength']}."
+    if rule == "type":
+        return f"#/{field} Invalid Validation type - should have been '{schema['type']}' but was 'string'."
+    raise ValueError(f"unknown rule {rule}")
+
+
+# ---------------------------------------------------------------------------
+# BSON templates
+# ---------------------------------------------------------------------------
+
+class Slot:
+    """A fixed-width per-document value inside a template.
+
+    kind is "oid" (12 bytes), "date" (int64 ms), "int32" or "text" (width
+    ASCII bytes, optionally between a constant prefix and suffix).
+    """
+
+    def __init__(self, name, kind, width=0, prefix="", suffix=""):
+        self.name, self.kind, self.width = name, kind, width
+        self.prefix, self.suffix = prefix, suffix
+
+    def placeholder(self, k):
+        if self.kind == "oid":
+            return ObjectId(self.marker(k))
+        if self.kind == "date":
+            return DatetimeMS(0x1EEED00000 + k)
+        if self.kind == "int32":
+            return 0x2EED0000 + k
+        return self.prefix + self.marker(k).decode() + self.suffix
+
+    def marker(self, k):
+        if self.kind == "oid":
+            return b"\xee\xd0" + bytes([k]) + b"\xee" * 9
+        if self.kind == "date":
+            return struct.pack("<q", 0x1EEED00000 + k)
+        if self.kind == "int32":
+            return struct.pack("<i", 0x2EED0000 + k)
+        return f"~{k:02d}".ljust(self.width, "~").encode()
+
+
+class Template:
+    """A document encoded once, with the offsets of its Slots."""
+
+    def __init__(self, doc):
+        found = []
+
+        def place(value):
+            if isinstance(value, Slot):
+                found.append(value)
+                return value.placeholder(len(found) - 1)
+            if isinstance(value, dict):
+                return {key: place(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [place(item) for item in value]
+            return value
+
+        raw = bson.encode(place(doc))
+        self.array = np.frombuffer(raw, dtype=np.uint8)
+        self.slots = {}
+        for k, slot in enumerate(found):
+            marker = slot.marker(k)
+            at = raw.find(marker)
+            if at < 0 or raw.find(marker, at + 1) >= 0:
+                raise ValueError(f"slot {slot.name} is not unique in its template")
+            self.slots[slot.name] = (at, len(marker))
+
+    def fill(self, values, rows):
+        """One copy per index in rows, each slot set from values[name][rows] ((n, width) uint8)."""
+        out = np.empty((len(rows), len(self.array)), dtype=np.uint8)
+        out[:] = self.array
+        for name, (at, width) in self.slots.items():
+            out[:, at:at + width] = values[name][rows]
+        return out
+
+
+HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+def object_ids(seconds, salt, start):
+    """ObjectId bytes: 4-byte timestamp, 5-byte salt, 3-byte counter."""
+    n = len(seconds)
+    out = np.empty((n, 12), dtype=np.uint8)
+    out[:, :4] = seconds.astype(">u4").view(np.uint8).reshape(n, 4)
+    out[:, 4:9] = np.frombuffer(salt, dtype=np.uint8)
+    out[:, 9:] = (start + np.arange(n)).astype(">u4").view(np.uint8).reshape(n, 4)[:, 1:]
+    return out
+
+
+def hex_ascii(raw):
+    out = np.empty((raw.shape[0], raw.shape[1] * 2), dtype=np.uint8)
+    out[:, 0::2] = HEX[raw >> 4]
+    out[:, 1::2] = HEX[raw & 15]
+    return out
+
+
+def digits(values, width):
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return ((values[:, None] // powers) % 10 + 48).astype(np.uint8)
+
+
+def little_endian(values, dtype, width):
+    return np.ascontiguousarray(values, dtype=dtype).view(np.uint8).reshape(-1, width)
+
+
+def ascii_bytes(text):
+    return np.frombuffer(text.encode(), dtype=np.uint8)
+
+
+# ---------------------------------------------------------------------------
+# Fleet: categories, datasources, schemas, metrics
+# ---------------------------------------------------------------------------
+
+def make_oid(seconds, rng):
+    return ObjectId(int(seconds).to_bytes(4, "big") + rng.bytes(8))
+
+
+def ms(seconds):
+    return DatetimeMS(int(seconds * 1000))
+
+
+def guid(rng):
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+def json_schema(ds_id, title, fields):
+    return {
+        "$schema": JSON_SCHEMA_DIALECT,
+        "$id": f"urn:datasource:{ds_id}:schema",
+        "title": title,
+        "type": "object",
+        "properties": {name: schema for name, _, schema, _, _ in fields},
+        "required": [name for name, _, _, _, broken in fields if any(rule == "required" for rule, _ in broken)],
+    }
+
+
+def build_fleet(args, rng, now):
+    """Datasource specs shared with the workers."""
+    shapes = sorted(SHAPES)
+    fleet = []
+    for i in range(args.datasources):
+        shape = shapes[i % len(shapes)]
+        title, category, fields = SHAPES[shape]
+        supplier = SUPPLIERS[int(rng.integers(len(SUPPLIERS)))]
+        created = now - args.days * DAY - float(rng.uniform(30, 365)) * DAY
+        ds_id = str(make_oid(created, rng))
+        record = {name: example for name, _, _, example, _ in fields}
+        variants = [(name, rule, schema, bad) for name, _, schema, _, broken in fields for rule, bad in broken]
+        weights = 1.0 / np.arange(1, len(variants) + 1) ** 1.5
+        fleet.append({
+            "index": i, "id": ds_id, "shape": shape, "created": created, "supplier": supplier,
+            "name": f"{title} - {supplier} {i:04d}", "slug": f"ds{i:04d}_{shape}", "category": category,
+            "record": record, "variants": variants, "weights": (weights / weights.sum())[rng.permutation(len(variants))],
+            "valid_ratio": float(rng.lognormal(math.log(30), 1.0)),
+            "reviewer": REVIEWERS[i % len(REVIEWERS)],
+        })
+    return fleet
+
+
+def category_docs(rng, now):
+    docs = []
+    for order, (name, name_en) in enumerate(CATEGORY_NAMES, 1):
+        created = now - 400 * DAY
+        docs.append({"_id": make_oid(created, rng), "Name": name, "NameEn": name_en,
+                     "Description": f"קטגוריית {name}", "SortOrder": order, "IsActive": True,
+                     "CreatedAt": ms(created), "UpdatedAt": ms(created), "CreatedBy": "System", "ModifiedBy": None})
+    return docs
+
+
+def base_fields(oid, created, updated, correlation, version=1, by="System", updated_by=None):
+    return {"_id": oid, "CreatedAt": ms(created), "UpdatedAt": ms(updated), "IsDeleted": False,
+            "CorrelationId": correlation, "Version": Int64(version), "CreatedBy": by,
+            "UpdatedBy": updated_by or by}
+
+
+def datasource_doc(spec, stats, rng):
+    title, _, fields = SHAPES[spec["shape"]]
+    cron, frequency = CRONS[spec["index"] % len(CRONS)]
+    files, errors, last = stats
+    doc = base_fields(ObjectId(spec["id"]), spec["created"], last or spec["created"], guid(rng), 3, "admin")
+    doc.update({
+        "Name": spec["name"],
+        "SupplierName": spec["supplier"],
+        "FilePath": f"/mnt/external-test-data/{spec['slug']}",
+        "PollingRate": "00:05:00",
+        "CronExpression": cron,
+        "ScheduleFrequency": frequency,
+        "ScheduleEnabled": True,
+        "JsonSchema": json_schema(spec["id"], title, fields),
+        "Category": spec["category"],
+        "SchemaVersion": 1,
+        "IsActive": spec["index"] % 20 != 19,
+        "FilePattern": "*.csv",
+        "LastProcessedAt": ms(last) if last else None,
+        "TotalFilesProcessed": Int64(files),
+        "TotalErrorRecords": Int64(errors),
+        "AdditionalConfiguration": {"FormatMetadata": {"Delimiter": ",", "HasHeader": True, "Encoding": "utf-8"}},
+        "Description": f"{title} מ{spec['supplier']}",
+        "Output": {
+            "Destinations": [{
+                "Id": guid(rng), "Name": "Kafka", "Description": None, "Type": "kafka", "Enabled": True,
+                "OutputFormat": None, "IncludeInvalidRecords": None,
+                "KafkaConfig": {"BrokerServer": None, "Topic": f"{spec['slug']}-output", "MessageKey": None,
+                                "Headers": None, "PartitionKey": None, "SecurityProtocol": None,
+                                "SaslMechanism": None, "Username": None, "Password": None},
+                "FolderConfig": None, "SftpConfig": None, "HttpConfig": None,
+            }],
+            "IncludeInvalidRecords": False,
+            "DefaultOutputFormat": "original",
+        },
+        "IsCurrentlyProcessing": False,
+        "ProcessingStartedAt": ms(last) if last else None,
+        "ProcessingCorrelationId": None,
+        "ProcessingPodId": None,
+        "ProcessingHostname": None,
+        "ProcessingCompletedAt": ms(last + 2) if last else None,
+        "ProcessedFileHashes": [],
+    })
+    return doc
+
+
+def field_validation(schema):
+    def decimal(key):
+        return Decimal128(str(schema[key])) if key in schema else None
+
+    return {"MinLength": schema.get("minLength"), "MaxLength": schema.get("maxLength"),
+            "Pattern": schema.get("pattern"), "Format": schema.get("format"),
+            "Minimum": decimal("minimum"), "Maximum": decimal("maximum"), "MultipleOf": decimal("multipleOf"),
+            "ExclusiveMinimum": False, "ExclusiveMaximum": False, "MinItems": None, "MaxItems": None,
+            "UniqueItems": False, "Enum": list(schema.get("enum", [])), "If": None, "Then": None, "Else": None}
+
+
+def schema_doc(spec, rng):
+    title, _, fields = SHAPES[spec["shape"]]
+    content = json_schema(spec["id"], title, fields)
+    created = spec["created"] - 3600
+    doc = base_fields(make_oid(created, rng), created, spec["created"], guid(rng), 2, "admin")
+    doc.update({
+        "Name": f"{spec['shape']}_{spec['index']:04d}",
+        "DisplayName": title,
+        "Description": f"סכמת {title} עבור {spec['supplier']}",
+        "DataSourceId": spec["id"],
+        "SchemaVersionNumber": 1,
+        "Status": 1,  # SchemaStatus.Active
+        "JsonSchemaContent": json.dumps(content, ensure_ascii=False),
+        "Fields": [{"Name": name, "DisplayName": display, "Type": schema["type"], "Required": name in content["required"],
+                    "Description": display, "Validation": field_validation(schema), "DefaultValue": None,
+                    "Examples": [str(example).replace(KEY, "00000001")], "Metadata": {}}
+                   for name, display, schema, example, _ in fields],
+        "Tags": [spec["shape"], spec["category"]],
+        "PublishedAt": ms(spec["created"]),
+        "DeprecatedAt": None,
+        "DeprecationReason": None,
+        "UsageCount": 1,
+        "Metadata": {"Author": "admin", "Category": spec["category"], "RelatedSchemas": [],
+                     "DocumentationUrl": None, "CustomProperties": {}},
+    })
+    return doc
+
+
+def metric_doc(rng, now, name, display, category, field, scope, spec=None):
+    created = (spec["created"] if spec else now - 300 * DAY) + 7200
+    prometheus_type = "counter" if field is None else "gauge"
+    return {
+        "_id": make_oid(created, rng), "Name": name, "DisplayName": display, "Description": display,
+        "Category": category, "Scope": scope,
+        "DataSourceId": spec["id"] if spec else None, "DataSourceName": spec["name"] if spec else None,
+        "Formula": f"sum({field})" if field else "count(*)", "FormulaType": 0,  # FormulaType.Simple
+        "FieldPath": f"$.{field}" if field else "$", "PrometheusType": prometheus_type,
+        "LabelNames": "status" if field else None, "LabelsExpression": '{status="$status"}' if field else None,
+        "Labels": None, "Retention": "30d", "AlertRules": None, "Status": 1,
+        "LastValue": float(rng.uniform(0, 10000)), "LastCalculated": ms(now - float(rng.uniform(0, 600))),
+        "CreatedAt": ms(created), "UpdatedAt": ms(created), "CreatedBy": "admin", "UpdatedBy": "admin",
+    }
+
+
+def metric_docs(args, fleet, rng, now):
+    docs = [metric_doc(rng, now, f"global_metric_{i:03d}", f"מדד גלובלי {i}", "System", None, "global")
+            for i in range(args.global_metrics)]
+    for spec in fleet:
+        _, _, fields = SHAPES[spec["shape"]]
+        numeric = [name for name, _, schema, _, _ in fields if schema["type"] in ("number", "integer")]
+        for j in range(args.metrics_per_datasource):
+            field = numeric[j % len(numeric)]
+            docs.append(metric_doc(rng, now, f"{spec['slug']}_{field.lower()}_{j}", f"{field} - {spec['name']}",
+                                   spec["category"], field, "datasource-specific", spec))
+    return docs
+
+
+# ---------------------------------------------------------------------------
+# Files and tasks
+# ---------------------------------------------------------------------------
+
+def plan_files(args, fleet, rng, now):
+    """(datasource, arrival second, invalid records, total records) per file, in arrival order."""
+    sigma = args.per_file_sigma
+    mu = math.log(args.per_file) - sigma * sigma / 2
+    sizes, total = [], 0
+    while total < args.invalid_records:
+        draw = np.clip(np.rint(rng.lognormal(mu, sigma, 100_000)), 1, args.max_per_file).astype(np.int64)
+        sizes.append(draw)
+        total += int(draw.sum())
+    sizes = np.concatenate(sizes)
+    count = int(np.searchsorted(np.cumsum(sizes), args.invalid_records)) + 1
+    sizes = sizes[:count]
+    sizes[-1] -= int(sizes.sum()) - args.invalid_records
+    weights = 1.0 / np.arange(1, len(fleet) + 1) ** args.skew
+    weights = (weights / weights.sum())[rng.permutation(len(fleet))]
+    ds = rng.choice(len(fleet), size=count, p=weights)
+    when = np.sort(now - rng.uniform(0, args.days * DAY, count)).astype(np.int64)
+    ratios = np.array([spec["valid_ratio"] for spec in fleet])
+    totals = np.minimum(sizes + np.rint(sizes * ratios[ds]).astype(np.int64), 2**31 - 1)
+    return ds, when, sizes, totals
+
+
+def plan_tasks(files, batch):
+    """Pack files (split when larger than a batch) into tasks of about batch records."""
+    ds, when, sizes, totals = files
+    tasks, segments, filled = [], [], 0
+    for file_no in range(len(sizes)):
+        size = int(sizes[file_no])
+        for start in range(0, size, batch):
+            count = min(batch, size - start)
+            segments.append((file_no, int(ds[file_no]), int(when[file_no]), int(totals[file_no]), size, start, count))
+            filled += count
+            if filled >= batch:
+                tasks.append((len(tasks), segments))
+                segments, filled = [], 0
+    if segments:
+        tasks.append((len(tasks), segments))
+    return tasks
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+WORKER = {}
+
+
+def init_worker(config):
+    WORKER.update(config)
+    WORKER["templates"] = {}
+    if config["mode"] == "mongo":
+        client = MongoClient(config["mongo"], w=config["w"])
+        WORKER["db"] = client[config["database"]]
+
+
+def invalid_template(spec, variant, state):
+    key = (spec["index"], variant, state)
+    template = WORKER["templates"].get(key)
+    if template is not None:
+        return template
+    field, rule, schema, bad = spec["variants"][variant]
+    record = {}
+    for name, value in spec["record"].items():
+        if name == field:
+            if rule != "required":
+                record[name] = bad
+        elif isinstance(value, str) and KEY in value:
+            prefix, suffix = value.split(KEY)
+            record[name] = Slot("Key", "text", 8, prefix, suffix)
+        else:
+            record[name] = value
+    reviewer = spec["reviewer"] if state else None
+    doc = {
+        "_id": Slot("_id", "oid"),
+        "CreatedAt": Slot("CreatedAt", "date"),
+        "UpdatedAt": Slot("UpdatedAt", "date"),
+        "IsDeleted": False,
+        "CorrelationId": Slot("CorrelationId", "text", 36),
+        "Version": Int64(2 if state else 1),
+        "CreatedBy": "ValidationService",
+        "UpdatedBy": reviewer or "System",
+        "DataSourceId": spec["id"],
+        "FileName": Slot("FileName", "text", 23, spec["slug"] + "_", ".csv"),
+        "ValidationResultId": Slot("ValidationResultId", "text", 24),
+        "OriginalRecord": record,
+        "ValidationErrors": [corvus_message(field, rule, schema, bad)],
+        "ErrorType": "SchemaValidation",
+        "Severity": "Error",
+        "LineNumber": Slot("LineNumber", "int32"),
+        "FieldName": None,
+        "ExpectedValue": None,
+        "ActualValue": None,
+        "IsReviewed": state > 0,
+        "ReviewedBy": reviewer,
+        "ReviewedAt": Slot("ReviewedAt", "date") if state else None,
+        "ReviewNotes": REVIEW_NOTES[variant % len(REVIEW_NOTES)] if state else None,
+        "IsIgnored": state == 2,
+    }
+    template = WORKER["templates"][key] = Template(doc)
+    return template
+
+
+def result_doc(spec, oid, file_name, correlation, when, total, invalid):
+    doc = base_fields(oid, when, when, correlation, 1, "ValidationService", "System")
+    doc.update({
+        "DataSourceId": spec["id"], "FileName": file_name,
+        "FilePath": f"/mnt/external-test-data/{spec['slug']}/{file_name}",
+        "FileSizeBytes": Int64(total * 120), "TotalRecords": total, "ValidRecords": total - invalid,
+        "InvalidRecords": invalid, "ProcessingDuration": "00:00:00", "Status": "PartialFailure",
+        "ErrorMessage": None, "SchemaVersion": 1, "ProcessingStartedAt": ms(when),
+        "ProcessingCompletedAt": None, "IsProcessingComplete": False, "ProcessingNotes": None,
+    })
+    return doc
+
+
+def build_task(task):
+    """Encoded results and (rows, document width) arrays of invalid records for one task.
+
+    Per-document values are computed for the whole task at once; rows are then
+    grouped by template so each (datasource, error, review state) is filled
+    with one numpy copy.
+    """
+    index, segments = task
+    fleet, run = WORKER["fleet"], WORKER["run"]
+    results, columns, files = [], [], []
+    for file_no, ds, when, total, size, start, count in segments:
+        spec = fleet[ds]
+        rng = np.random.default_rng((WORKER["seed"], file_no))
+        result_id = ObjectId(when.to_bytes(4, "big") + b"\xff" + bytes([run]) + file_no.to_bytes(6, "big"))
+        correlation = guid(rng)
+        stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.gmtime(when))}_{file_no:07d}"
+        lines = np.sort(rng.choice(total, size=size, replace=False, shuffle=False))
+        variants = rng.choice(len(spec["variants"]), size=size, p=spec["weights"])
+        keys = rng.integers(0, 10**8, size)
+        states = np.zeros(size, dtype=np.int64)
+        if when < WORKER["now"] - WORKER["review_after"]:
+            reviewed = rng.random(size) < WORKER["reviewed"]
+            states[reviewed] = np.where(rng.random(int(reviewed.sum())) < 0.3, 2, 1)
+        reviewed_at = when * 1000 + rng.integers(3600_000, 5 * DAY * 1000, size)
+        if start == 0:
+            file_name = f"{spec['slug']}_{stamp}.csv"
+            results.append(bson.encode(result_doc(spec, result_id, file_name, correlation, when, total, size)))
+        window = slice(start, start + count)
+        columns.append((np.full(count, len(files)), np.full(count, ds), variants[window], states[window],
+                        lines[window], keys[window], reviewed_at[window]))
+        files.append((when, correlation + stamp + str(result_id)))
+    file_index, ds, variants, states, lines, keys, reviewed_at = (np.concatenate(c) for c in zip(*columns))
+    seconds = np.array([when for when, _ in files], dtype=np.int64)[file_index]
+    text = np.frombuffer("".join(strings for _, strings in files).encode(), dtype=np.uint8).reshape(len(files), -1)
+    created = seconds * 1000
+    values = {
+        "_id": object_ids(seconds, bytes([run]) + index.to_bytes(4, "big"), 0),
+        "CreatedAt": little_endian(created, "<i8", 8),
+        "UpdatedAt": little_endian(np.where(states > 0, reviewed_at, created), "<i8", 8),
+        "ReviewedAt": little_endian(reviewed_at, "<i8", 8),
+        "LineNumber": little_endian(lines, "<i4", 4),
+        "Key": digits(keys, 8),
+        "CorrelationId": text[:, :36][file_index],
+        "FileName": text[:, 36:59][file_index],
+        "ValidationResultId": text[:, 59:83][file_index],
+    }
+    group = (ds * 64 + variants) * 3 + states
+    order = np.argsort(group, kind="stable")
+    bounds = np.flatnonzero(np.diff(group[order])) + 1
+    parts = []
+    for rows in np.split(order, bounds):
+        first = rows[0]
+        template = invalid_template(fleet[int(ds[first])], int(variants[first]), int(states[first]))
+        parts.append(template.fill(values, rows))
+    return results, parts, len(order)
+
+
+def raw_documents(parts):
+    """RawBSONDocuments from template rows; every row of a part has the same width."""
+    docs = []
+    for part in parts:
+        blob, width = part.tobytes(), part.shape[1]
+        docs.extend(RawBSONDocument(blob[at:at + width]) for at in range(0, len(blob), width))
+    return docs
+
+
+def insert(db, collection, docs):
+    """Unordered insert_many; returns (inserted, errors, first error message)."""
+    if not docs:
+        return 0, 0, None
+    try:
+        db[collection].insert_many(docs, ordered=False, bypass_document_validation=True)
+        return len(docs), 0, None
+    except BulkWriteError as error:
+        write_errors = error.details.get("writeErrors", [])
+        first = write_errors[0]["errmsg"] if write_errors else str(error)
+        return error.details.get("nInserted", 0), len(write_errors), first
+
+
+def run_task(task):
+    started = time.perf_counter()
+    results, parts, invalid = build_task(task)
+    if WORKER["mode"] != "dump":
+        docs = raw_documents(parts)
+    built = time.perf_counter()
+    size = sum(len(doc) for doc in results) + sum(part.nbytes for part in parts)
+    errors, first_error = 0, None
+    result_blob = invalid_blob = b""
+    if WORKER["mode"] == "mongo":
+        db = WORKER["db"]
+        for collection, batch in ((RESULTS, [RawBSONDocument(doc) for doc in results]), (INVALID, docs)):
+            _, failed, message = insert(db, collection, batch)
+            errors += failed
+            first_error = first_error or message
+    elif WORKER["mode"] == "dump":
+        result_blob = b"".join(results)
+        invalid_blob = b"".join(part.tobytes() for part in parts)
+    return {
+        "results": len(results), "invalid": invalid, "bytes": size,
+        "build": built - started, "insert": time.perf_counter() - built,
+        "errors": errors, "first_error": first_error,
+        "result_blob": result_blob, "invalid_blob": invalid_blob,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Targets: a server, a mongorestore dump, or nothing (--dry-run)
+# ---------------------------------------------------------------------------
+
+def index_name(keys):
+    """MongoDB.Entities' default name, e.g. "FileName(Asc) | CreatedAt(Dsc)"."""
+    return " | ".join(f"{field}({'Asc' if order == 1 else 'Dsc'})" for field, order in keys)
+
+
+def index_specs(collection):
+    specs, seen = [], set()
+    for keys in INDEXES.get(collection, []):
+        name = index_name(keys)
+        if name not in seen:
+            seen.add(name)
+            specs.append((keys, name, (collection, name) in UNIQUE_INDEXES))
+    return specs
+
+
+class MongoTarget:
+    def __init__(self, args):
+        self.client = MongoClient(args.mongo, w=args.w, serverSelectionTimeoutMS=5000)
+        self.client.admin.command("ping")
+        self.db = self.client[args.database]
+
+    def prepare(self, collections, drop):
+        for collection in collections:
+            if drop:
+                self.db.drop_collection(collection)
+                continue
+            existing = [index["name"] for index in self.db[collection].list_indexes() if index["name"] != "_id_"]
+            if existing:
+                print(f"⚠ {collection} already has {len(existing)} secondary indexes; the load maintains them "
+                      f"(--drop for an index-free load)")
+
+    def write(self, collection, docs):
+        return insert(self.db, collection, [RawBSONDocument(doc) for doc in docs])[1:]
+
+    def build_indexes(self, collection, specs):
+        models = [IndexModel(keys, name=name, unique=unique) for keys, name, unique in specs]
+        self.db[collection].create_indexes(models)
+
+    def close(self):
+        self.client.close()
+
+
+class DumpTarget:
+    """mongorestore layout: <dir>/<database>/<collection>.bson + .metadata.json.
+
+    mongorestore builds the indexes in the metadata after restoring the data.
+    """
+
+    def __init__(self, args):
+        self.path = os.path.join(args.dump, args.database)
+        os.makedirs(self.path, exist_ok=True)
+        self.files = {}
+
+    def prepare(self, collections, drop):
+        for collection in collections:
+            self.files[collection] = open(os.path.join(self.path, f"{collection}.bson"), "wb")
+            self.build_indexes(collection, [])
+
+    def write(self, collection, docs):
+        self.files[collection].write(b"".join(docs))
+        return 0, None
+
+    def build_indexes(self, collection, specs):
+        indexes = [{"v": 2, "key": {"_id": 1}, "name": "_id_"}]
+        for keys, name, unique in specs:
+            index = {"v": 2, "key": dict(keys), "name": name}
+            if unique:
+                index["unique"] = True
+            indexes.append(index)
+        metadata = {"options": {}, "indexes": indexes, "uuid": "", "collectionName": collection, "type": "collection"}
+        with open(os.path.join(self.path, f"{collection}.metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+class DryRunTarget:
+    def prepare(self, collections, drop):
+        pass
+
+    def write(self, collection, docs):
+        return 0, None
+
+    def build_indexes(self, collection, specs):
+        pass
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_argument_group("target")
+    target.add_argument("--mongo", default=os.environ.get("EZ_MONGODB_URL", "mongodb://localhost:27017"),
+                        help="Connection string (default $EZ_MONGODB_URL or localhost)")
+    target.add_argument("--database", default="ezplatform",
+                        help="Database (InvalidRecordsService's local appsettings.json uses DataProcessingPlatform)")
+    target.add_argument("--drop", action="store_true", help="Drop the seeded collections first (index-free load)")
+    target.add_argument("--no-indexes", action="store_true", help="Leave the index builds to the services")
+    target.add_argument("--w", default="1", help="Write concern for the load (0, 1, majority)")
+    target.add_argument("--dump", metavar="DIR", help="Write a mongorestore dump instead of inserting")
+    target.add_argument("--dry-run", action="store_true", help="Only build the documents (generation throughput)")
+    volume = parser.add_argument_group("volume and distributions")
+    volume.add_argument("--invalid-records", type=int, default=1_000_000)
+    volume.add_argument("--datasources", type=int, default=200)
+    volume.add_argument("--metrics-per-datasource", type=int, default=3)
+    volume.add_argument("--global-metrics", type=int, default=10)
+    volume.add_argument("--days", type=float, default=90, help="Files arrive over the last N days")
+    volume.add_argument("--per-file", type=float, default=200, help="Mean invalid records per file")
+    volume.add_argument("--per-file-sigma", type=float, default=1.2, help="Lognormal sigma of records per file")
+    volume.add_argument("--max-per-file", type=int, default=50_000)
+    volume.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of files over datasources")
+    volume.add_argument("--reviewed", type=float, default=0.05,
+                        help="Share of records older than --review-after-days that were reviewed (30%% ignored)")
+    volume.add_argument("--review-after-days", type=float, default=7)
+    speed = parser.add_argument_group("speed")
+    speed.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    speed.add_argument("--batch", type=int, default=5000, help="Documents per insert_many")
+    speed.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if bson is None:
+        print("✗ mongo_seed.py needs pymongo: pip install pymongo")
+        return 1
+    if args.dump and args.dry_run:
+        parser.error("--dump and --dry-run are exclusive")
+    if args.datasources < 1 or args.invalid_records < 1:
+        parser.error("--datasources and --invalid-records must be positive")
+    if not 1 <= args.batch < 2**24:
+        parser.error("--batch must be between 1 and 16777215")
+    args.w = int(args.w) if args.w.isdigit() else args.w
+
+    rng = np.random.default_rng(args.seed)
+    now = int(time.time())
+    fleet = build_fleet(args, rng, now)
+    files = plan_files(args, fleet, rng, now)
+    ds, when, sizes, _ = files
+    last = np.zeros(len(fleet), dtype=np.int64)
+    np.maximum.at(last, ds, when)
+    file_counts = np.bincount(ds, minlength=len(fleet))
+    error_counts = np.bincount(ds, weights=sizes, minlength=len(fleet)).astype(np.int64)
+    tasks = plan_tasks(files, args.batch)
+    print(f"{args.invalid_records:,} invalid records in {len(sizes):,} files from {len(fleet)} datasources, "
+          f"{len(tasks):,} batches on {args.workers} workers")
+    top = np.sort(error_counts)[::-1]
+    print(f"  busiest datasource {top[0] / args.invalid_records:.1%} of records, "
+          f"top 10% {top[:max(1, len(fleet) // 10)].sum() / args.invalid_records:.1%}; "
+          f"largest file {int(sizes.max()):,}")
+
+    small = {
+        CATEGORIES: category_docs(rng, now),
+        DATASOURCES: [datasource_doc(spec, (int(file_counts[i]), int(error_counts[i]), int(last[i])), rng)
+                      for i, spec in enumerate(fleet)],
+        SCHEMAS: [schema_doc(spec, rng) for spec in fleet],
+        METRICS: metric_docs(args, fleet, rng, now),
+    }
+    mode = "dump" if args.dump else "dry-run" if args.dry_run else "mongo"
+    try:
+        sink = DumpTarget(args) if args.dump else DryRunTarget() if args.dry_run else MongoTarget(args)
+    except PyMongoError as error:
+        print(f"✗ cannot reach {args.mongo}: {error}")
+        return 1
+    collections = list(small) + [RESULTS, INVALID]
+    sink.prepare(collections, args.drop)
+    for collection, docs in small.items():
+        sink.write(collection, [bson.encode(doc) for doc in docs])
+    print("  " + ", ".join(f"{collection} {len(docs):,}" for collection, docs in small.items()))
+
+    config = {"mode": mode, "mongo": args.mongo, "database": args.database, "w": args.w, "fleet": fleet,
+              "seed": args.seed, "run": os.urandom(1)[0] % 255, "now": now, "reviewed": args.reviewed,
+              "review_after": args.review_after_days * DAY}
+    totals = {"results": 0, "invalid": 0, "bytes": 0, "build": 0.0, "insert": 0.0, "errors": 0}
+    first_error = None
+    started = time.perf_counter()
+    reported = started
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(config,)) as pool:
+        for done in pool.imap_unordered(run_task, tasks):
+            if mode == "dump":
+                sink.write(RESULTS, [done["result_blob"]])
+                sink.write(INVALID, [done["invalid_blob"]])
+            for key in totals:
+                totals[key] += done[key]
+            first_error = first_error or done["first_error"]
+            moment = time.perf_counter()
+            if moment - reported >= 5:
+                reported = moment
+                elapsed = moment - started
+                print(f"  {totals['invalid']:>12,} / {args.invalid_records:,}  "
+                      f"{totals['invalid'] / elapsed:,.0f} docs/s  {totals['bytes'] / elapsed / 1e6:,.0f} MB/s")
+    elapsed = time.perf_counter() - started
+    documents = totals["invalid"] + totals["results"]
+    verb = {"mongo": "inserted", "dump": "dumped", "dry-run": "built"}[mode]
+    print(f"✓ {verb} {totals['invalid']:,} invalid records and {totals['results']:,} validation results "
+          f"in {elapsed:.1f}s: {documents / elapsed:,.0f} docs/s, {totals['bytes'] / elapsed / 1e6:,.0f} MB/s, "
+          f"{totals['bytes'] / max(1, documents):,.0f} B/doc")
+    worker_time = totals["build"] + totals["insert"]
+    if mode == "mongo" and worker_time:
+        print(f"  worker time {totals['build'] / worker_time:.0%} building BSON, "
+              f"{totals['insert'] / worker_time:.0%} in insert_many")
+    if totals["errors"]:
+        print(f"⚠ {totals['errors']:,} documents failed to insert, first: {first_error}")
+
+    if not args.no_indexes:
+        for collection in collections:
+            specs = index_specs(collection)
+            if not specs:
+                continue
+            index_started = time.perf_counter()
+            try:
+                sink.build_indexes(collection, specs)
+            except Exception as error:
+                print(f"⚠ {collection}: index build failed: {error}")
+                continue
+            if mode == "mongo":
+                print(f"  indexes on {collection}: {len(specs)} in {time.perf_counter() - index_started:.1f}s")
+    sink.close()
+    if mode == "dump":
+        print(f"  restore: mongorestore --uri {args.mongo} --numInsertionWorkersPerCollection {args.workers} "
+              f"--dir {args.dump}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""Discrete-event simulator of the file pipeline: throughput, queue depth and latency.
+
+Models the message flow from schedule to output:
+
+    SchedulingService    DataSourcePollingJob per datasource (Quartz threads)
+      -> FilePollingEvent        -> FileDiscoveryService   (lists the directory)
+      -> FileDiscoveredEvent     -> FileProcessorService   (one per file)
+      -> ValidationRequestEvent  -> ValidationService
+      -> ValidationCompletedEvent -> OutputService
+
+Each stage has replicas, a consumer concurrency limit per pod and a transport.
+With a RabbitMQ queue (today), any pod with a free slot takes the next message.
+A Kafka topic has partitions spread over the pods; a partition is consumed by
+one pod, with at most --set STAGE.partition_concurrency messages in flight.
+The job holds the datasource's processing lock from publish until discovery
+releases it, and a fire that finds the lock held is skipped (unless the lock
+is older than five minutes), as in DataSourcePollingJob. Files that arrive
+meanwhile are listed by the next successful poll.
+
+Service time per message is lognormal:
+
+    (median_ms + ms_per_unit * units) * exp(spread * Z) * (1 + sigma(n-1) + kappa n(n-1))
+
+units are the stage's unit in the message (files listed, MB or records), and n
+is the pod's work in flight when the message starts. The defaults are
+placeholders. Calibrate them from:
+
+    --traces   trace_stages.py --json output: per-stage p50/p90 set median and spread
+    --results  capacity_plan.py load-test rows: the USL fit sets the time per unit
+               (1/lambda) and the contention terms (sigma, kappa)
+    --set      STAGE.KEY=VALUE for anything else
+
+--vary STAGE.KEY=V1,V2,... runs every combination against the same arrivals
+(common random numbers), so concurrency or partitioning changes can be compared
+on the model before they are made in production.
+
+Usage:
+    python pipeline_sim.py --synthetic 10000 --cron "0 */15 * * * *" --files-per-poll 2 --hours 2
+    python pipeline_sim.py --from-api --traces stages.json --results results.csv --hours 4
+    python pipeline_sim.py --synthetic 5000 --vary fileprocessor.concurrency=10,20,40 --vary validation.replicas=3,6
+    python pipeline_sim.py --synthetic 5000 --kafka --vary validation.partitions=3,12,24 --timeline depth.csv
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from capacity_plan import DEFAULT_VALUES, fit_usl, load_results, read_values
+from cron_load import Cron, CronError, build_calendar, load_schedules
+
+Z90 = 1.2816
+LOCK_TIMEOUT = 300        # DataProcessingDataSource.TryAcquireProcessingLock
+
+# Stage -> message it consumes, Kafka topic (MassTransitConfiguration.ConfigureKafkaTopics) and default parameters.
+# Concurrency is from each Program.cs (Validation/Output use the MassTransit default prefetch); service times are
+# placeholders until calibrated.
+STAGES = {
+    "scheduling": {
+        "message": "DataSourcePollingJob", "topic": None,
+        "params": {"replicas": 1, "concurrency": 10, "unit": "polls", "median_ms": 5, "spread": 0.6, "ms_per_unit": 0},
+    },
+    "filediscovery": {
+        "message": "FilePollingEvent", "topic": "dataprocessing.scheduling.filepolling",
+        "params": {"replicas": 2, "concurrency": 5, "unit": "files", "median_ms": 200, "spread": 0.8, "ms_per_unit": 5},
+    },
+    "fileprocessor": {
+        "message": "FileDiscoveredEvent", "topic": None,
+        "params": {"replicas": 5, "concurrency": 10, "unit": "mb", "median_ms": 300, "spread": 0.7, "ms_per_unit": 40},
+    },
+    "validation": {
+        "message": "ValidationRequestEvent", "topic": "dataprocessing.filesreceiver.validationrequest",
+        "params": {"replicas": 3, "concurrency": 16, "unit": "records", "median_ms": 150, "spread": 0.7,
+                   "ms_per_unit": 0.02},
+    },
+    "output": {
+        "message": "ValidationCompletedEvent", "topic": "dataprocessing.validation.completed",
+        "params": {"replicas": 3, "concurrency": 16, "unit": "records", "median_ms": 100, "spread": 0.6,
+                   "ms_per_unit": 0.01},
+    },
+}
+COMMON_PARAMS = {"partitions": 0, "partition_concurrency": 1, "sigma": 0.0, "kappa": 0.0}
+TRACE_STAGES = {"discovery": "filediscovery", "processing": "fileprocessor", "validation": "validation",
+                "output": "output"}
+UNITS = {"polls": "poll", "files": "file", "mb": "MB", "records": "record"}
+
+
+# ---------------------------------------------------------------------------
+# Parameters and calibration
+# ---------------------------------------------------------------------------
+
+def base_params(args):
+    params = {name: {**COMMON_PARAMS, **stage["params"]} for name, stage in STAGES.items()}
+    services = read_values(args.values).get("services") or {}
+    for name in params:
+        replicas = (services.get(name) or {}).get("replicas")
+        if replicas:
+            params[name]["replicas"] = int(replicas)
+    if args.kafka:
+        # ConfigureKafkaTopics creates every topic with 3 partitions; FileDiscoveredEvent has no topic
+        for name, stage in STAGES.items():
+            if stage["topic"]:
+                params[name]["partitions"] = 3
+    return params
+
+
+def apply_traces(params, path):
+    """Median and spread per stage from trace_stages.py --json; sizes are already in the measured times"""
+    with open(path, encoding="utf-8") as f:
+        stages = json.load(f).get("stages") or {}
+    for trace_stage, p in stages.items():
+        name = TRACE_STAGES.get(trace_stage, trace_stage)
+        if name not in params or not p or p.get("p50", 0) <= 0:
+            continue
+        params[name]["median_ms"] = p["p50"]
+        params[name]["spread"] = max(math.log(max(p["p90"], p["p50"]) / p["p50"]) / Z90, 0.05)
+        params[name]["ms_per_unit"] = 0
+        print(f"  {name}: traces p50 {p['p50']:.0f} ms, p90 {p['p90']:.0f} ms ({p['count']:,} traces)")
+
+
+def apply_results(params, paths):
+    """Time per unit and contention from capacity_plan.py result rows (USL fit per pod)"""
+    for service, rows in load_results(paths).items():
+        if service not in params:
+            continue
+        fit = fit_usl([r["n"] for r in rows], [r["x"] for r in rows])
+        stage = params[service]
+        # lambda is units/s at n=1; the lognormal factor is scaled so its mean is 1
+        stage.update(unit=rows[0]["unit"], median_ms=0.0, sigma=fit["sigma"], kappa=fit["kappa"],
+                     ms_per_unit=1000 / fit["lambda"] / math.exp(stage["spread"] ** 2 / 2))
+        print(f"  {service}: {fit['model']} fit, {1000 / fit['lambda']:.3g} ms/{UNITS[rows[0]['unit']]}, "
+              f"sigma {fit['sigma']:.3f}, kappa {fit['kappa']:.4f} (R² {fit['r2']:.2f})")
+
+
+def parse_value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_setting(text):
+    """STAGE.KEY=V1[,V2...] -> (stage, key, [values])"""
+    target, _, values = text.partition("=")
+    stage, _, key = target.partition(".")
+    if stage not in STAGES or not key or not values:
+        raise SystemExit(f"expected STAGE.KEY=VALUE with STAGE in {', '.join(STAGES)}, got '{text}'")
+    if key not in STAGES[stage]["params"] and key not in COMMON_PARAMS:
+        known = sorted(set(STAGES[stage]["params"]) | set(COMMON_PARAMS))
+        raise SystemExit(f"unknown parameter '{key}' (one of {', '.join(known)})")
+    if key == "unit" and values not in UNITS:
+        raise SystemExit(f"unit must be one of {', '.join(UNITS)}")
+    return stage, key, [parse_value(v) for v in values.split(",")]
+
+
+# ---------------------------------------------------------------------------
+# Arrivals
+# ---------------------------------------------------------------------------
+
+def build_fires(args):
+    """Sorted (second, datasource index) fires over the horizon"""
+    schedules = load_schedules(args)
+    if not schedules:
+        raise SystemExit("No datasources: use --from-api, --file or --synthetic")
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    calendar = build_calendar(start, int(args.hours * 3600))
+    groups = {}
+    for index, schedule in enumerate(schedules):
+        groups.setdefault(schedule["cron"], []).append(index)
+    seconds, members = [], []
+    for expression, indices in groups.items():
+        try:
+            fire = np.flatnonzero(Cron(expression).fire_mask(calendar))
+        except (CronError, ValueError) as e:
+            print(f"✗ '{expression}': {e} ({len(indices)} datasources skipped)", file=sys.stderr)
+            continue
+        seconds.append(np.repeat(fire, len(indices)))
+        members.append(np.tile(np.asarray(indices), fire.size))
+    if not seconds:
+        raise SystemExit("No valid cron expressions")
+    seconds, members = np.concatenate(seconds), np.concatenate(members)
+    order = np.argsort(seconds, kind="stable")
+    return len(schedules), len(groups), seconds[order].astype(float), members[order]
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+class Message:
+    __slots__ = ("ds", "fired", "discovered", "files", "mb", "records", "enqueued", "partition")
+
+    def __init__(self, ds, fired, files=1, mb=0.0, records=0.0):
+        self.ds, self.fired, self.files, self.mb, self.records = ds, fired, files, mb, records
+        self.discovered = self.enqueued = 0.0
+        self.partition = 0
+
+    def units(self, unit):
+        return {"polls": 1, "files": self.files, "mb": self.mb, "records": self.records}[unit]
+
+
+class Stage:
+    """Consumers of one message type: pods with concurrency limits behind a queue or partitions"""
+
+    def __init__(self, name, params, sim):
+        self.name, self.sim = name, sim
+        self.replicas, self.limit = int(params["replicas"]), int(params["concurrency"])
+        self.partitions = int(params["partitions"])
+        self.per_partition = int(params["partition_concurrency"])
+        self.unit, self.median, self.spread = params["unit"], params["median_ms"], params["spread"]
+        self.per_unit, self.sigma, self.kappa = params["ms_per_unit"], params["sigma"], params["kappa"]
+        self.busy = [0] * self.replicas
+        if self.partitions:
+            self.queues = [deque() for _ in range(self.partitions)]
+            self.partition_busy = [0] * self.partitions
+            self.owner = [p % self.replicas for p in range(self.partitions)]
+            self.owned = [[p for p in range(self.partitions) if p % self.replicas == pod]
+                          for pod in range(self.replicas)]
+            self.next_partition = 0
+        else:
+            self.queue = deque()
+        self.arrived = self.done = self.depth = self.max_depth = self.in_flight = 0
+        self.depth_area = self.busy_area = self.last = 0.0
+        self.waits, self.services = [], []
+
+    def _account(self, now):
+        elapsed = now - self.last
+        self.depth_area += self.depth * elapsed
+        self.busy_area += self.in_flight * elapsed
+        self.last = now
+
+    def offer(self, now, message, key):
+        self._account(now)
+        self.arrived += 1
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        message.enqueued = now
+        if not self.partitions:
+            self.queue.append(message)
+            pod = min(range(self.replicas), key=self.busy.__getitem__)
+            if self.busy[pod] < self.limit:
+                self._start(now, pod, self.queue.popleft())
+            return
+        if key is None:
+            partition = self.next_partition
+            self.next_partition = (partition + 1) % self.partitions
+        else:
+            partition = key % self.partitions
+        message.partition = partition
+        self.queues[partition].append(message)
+        pod = self.owner[partition]
+        if self.busy[pod] < self.limit and self.partition_busy[partition] < self.per_partition:
+            self._start(now, pod, self.queues[partition].popleft())
+
+    def _start(self, now, pod, message):
+        self.depth -= 1
+        self.in_flight += 1
+        self.busy[pod] += 1
+        if self.partitions:
+            self.partition_busy[message.partition] += 1
+        n = self.busy[pod]
+        ms = (self.median + self.per_unit * message.units(self.unit)) * \
+            self.sim.rnd.lognormvariate(0.0, self.spread) * (1 + self.sigma * (n - 1) + self.kappa * n * (n - 1))
+        self.waits.append(now - message.enqueued)
+        self.services.append(ms / 1000)
+        self.sim.push(now + ms / 1000, self, pod, message)
+
+    def finish(self, now, pod, message):
+        self._account(now)
+        self.done += 1
+        self.in_flight -= 1
+        self.busy[pod] -= 1
+        if not self.partitions:
+            if self.queue:
+                self._start(now, pod, self.queue.popleft())
+            return
+        self.partition_busy[message.partition] -= 1
+        # The freed slot goes to the same partition first, then the pod's other partitions in turn
+        owned = self.owned[pod]
+        first = owned.index(message.partition)
+        for partition in owned[first:] + owned[:first]:
+            queue = self.queues[partition]
+            while queue and self.busy[pod] < self.limit and self.partition_busy[partition] < self.per_partition:
+                self._start(now, pod, queue.popleft())
+            if self.busy[pod] >= self.limit:
+                break
+
+    def backlog(self):
+        return self.depth + self.in_flight
+
+
+class Simulation:
+    def __init__(self, params, fires, datasources, args, seed):
+        self.args = args
+        self.rnd = random.Random(seed)
+        self.arrivals = np.random.default_rng(seed)
+        self.heap, self.sequence = [], itertools.count()
+        self.stages = [Stage(name, params[name], self) for name in STAGES]
+        self.seconds, self.members = fires
+        self.locked = [None] * datasources            # lock acquired at, or None
+        self.pending = [0] * datasources              # polls since the last listing
+        self.skipped = self.lock_timeouts = 0
+        self.latency, self.after_discovery = [], []
+        self.timeline = []
+        # File size: lognormal with the requested mean
+        self.mb_sigma = args.file_mb_spread
+        self.mb_mu = math.log(args.file_mb) - self.mb_sigma ** 2 / 2 if args.file_mb > 0 else 0.0
+
+    def push(self, when, stage, pod, message):
+        heapq.heappush(self.heap, (when, next(self.sequence), stage, pod, message))
+
+    def key(self, message):
+        return message.ds if self.args.key == "datasource" else None
+
+    def run(self):
+        scheduling, discovery, processor, validation, output = self.stages
+        horizon = self.args.hours * 3600
+        interval = self.args.interval
+        next_sample = 0.0
+        index, total = 0, len(self.seconds)
+        while True:
+            fire_at = self.seconds[index] if index < total else math.inf
+            event_at = self.heap[0][0] if self.heap else math.inf
+            now = min(fire_at, event_at)
+            # Sampled once every event at the sample time has been handled
+            while next_sample < now and next_sample <= horizon:
+                self.timeline.append([next_sample] + [s.depth for s in self.stages] + [s.in_flight for s in self.stages])
+                next_sample += interval
+            if now >= horizon:
+                break
+            if fire_at <= event_at:
+                ds = int(self.members[index])
+                index += 1
+                self.pending[ds] += 1
+                scheduling.offer(now, Message(ds, now), None)
+                continue
+            _, _, stage, pod, message = heapq.heappop(self.heap)
+            stage.finish(now, pod, message)
+            if stage is scheduling:
+                held = self.locked[message.ds]
+                if held is not None and now - held < LOCK_TIMEOUT:
+                    self.skipped += 1
+                    continue
+                if held is not None:
+                    self.lock_timeouts += 1
+                self.locked[message.ds] = now
+                # Files listed: everything that arrived since the last successful listing
+                message.files = int(self.arrivals.poisson(self.args.files_per_poll * self.pending[message.ds]))
+                self.pending[message.ds] = 0
+                discovery.offer(now, message, self.key(message))
+            elif stage is discovery:
+                self.locked[message.ds] = None
+                if message.files:
+                    sizes = self.arrivals.lognormal(self.mb_mu, self.mb_sigma, message.files) \
+                        if self.args.file_mb > 0 else np.zeros(message.files)
+                    for mb in sizes:
+                        records = self.args.records_per_file * (mb / self.args.file_mb if self.args.file_mb else 1)
+                        file_message = Message(message.ds, message.fired, 1, float(mb), records)
+                        file_message.discovered = now
+                        processor.offer(now, file_message, None)
+            elif stage is processor:
+                validation.offer(now, message, self.key(message))
+            elif stage is validation:
+                output.offer(now, message, self.key(message))
+            else:
+                self.latency.append(now - message.fired)
+                self.after_discovery.append(now - message.discovered)
+        for stage in self.stages:
+            stage._account(horizon)
+        return self
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def quantiles(values):
+    if not values:
+        return {"count": 0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    data = np.asarray(values)
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {"count": int(data.size), "p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(data.max())}
+
+
+def summarize(sim, horizon):
+    stages = {}
+    for stage in sim.stages:
+        slots = stage.replicas * stage.limit
+        if stage.partitions:
+            # Pods beyond the partition count get no partition; each partition caps its own in-flight work
+            slots = sum(min(stage.limit, len(owned) * stage.per_partition) for owned in stage.owned)
+        depth_series = np.asarray([row[1 + sim.stages.index(stage)] for row in sim.timeline]) \
+            if sim.timeline else np.zeros(1)
+        half = max(1, depth_series.size // 2)
+        stages[stage.name] = {
+            "replicas": stage.replicas, "concurrency": stage.limit, "partitions": stage.partitions,
+            "slots": slots, "arrived": stage.arrived, "done": stage.done,
+            "throughput": stage.done / horizon,
+            "utilization": stage.busy_area / horizon / slots if slots else 0.0,
+            "meanDepth": stage.depth_area / horizon, "maxDepth": stage.max_depth,
+            "p99Depth": float(np.percentile(depth_series, 99)),
+            "backlog": stage.backlog(),
+            # Work left over at the end that is still piling up: the stage cannot keep up on average
+            "growing": bool(stage.backlog() > 0.05 * stage.arrived and depth_series[-1] >= depth_series[half]),
+            "wait": quantiles(stage.waits), "service": quantiles(stage.services),
+        }
+    # Fires arrive in bursts, so mean utilization hides the queue; rank by how long messages wait
+    bottleneck = max(stages.values(), key=lambda s: (s["growing"], s["wait"]["p99"], s["utilization"]))
+    return {
+        "polls": sim.stages[0].arrived, "skippedPolls": sim.skipped, "lockTimeouts": sim.lock_timeouts,
+        "filesDone": sim.stages[-1].done, "filesInSystem": sum(s.backlog() for s in sim.stages[2:]),
+        "endToEnd": quantiles(sim.latency), "afterDiscovery": quantiles(sim.after_discovery), "stages": stages,
+        "bottleneck": next(name for name, s in stages.items() if s is bottleneck),
+    }
+
+
+def seconds_text(value):
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s" if value < 120 else f"{value / 60:.1f}m"
+
+
+def print_result(result, horizon):
+    e2e = result["endToEnd"]
+    print(f"{result['polls']:,} fires, {result['skippedPolls']:,} skipped (lock held), "
+          f"{result['lockTimeouts']:,} lock timeouts; {result['filesDone']:,} files output "
+          f"({result['filesDone'] / horizon:.2f}/s), {result['filesInSystem']:,} still in the pipeline")
+    print(f"end to end (fire -> output): p50 {seconds_text(e2e['p50'])}  p90 {seconds_text(e2e['p90'])}  "
+          f"p99 {seconds_text(e2e['p99'])}  max {seconds_text(e2e['max'])}")
+    after = result["afterDiscovery"]
+    print(f"discovery -> output:         p50 {seconds_text(after['p50'])}  p90 {seconds_text(after['p90'])}  "
+          f"p99 {seconds_text(after['p99'])}  max {seconds_text(after['max'])}")
+    print(f"\n{'stage':<14} {'pods×conc':>10} {'parts':>6} {'arrived':>10} {'done/s':>8} {'util':>6} "
+          f"{'wait p50':>9} {'wait p99':>9} {'svc p50':>8} {'depth avg':>10} {'p99':>7} {'max':>7} {'end':>7}")
+    for name, s in result["stages"].items():
+        flag = "  ← growing" if s["growing"] else "  ← bottleneck" if name == result["bottleneck"] else ""
+        print(f"{name:<14} {s['replicas']:>5}×{s['concurrency']:<4} {s['partitions'] or '-':>6} {s['arrived']:>10,} "
+              f"{s['throughput']:>8.2f} {s['utilization']:>6.0%} {seconds_text(s['wait']['p50']):>9} "
+              f"{seconds_text(s['wait']['p99']):>9} {seconds_text(s['service']['p50']):>8} "
+              f"{s['meanDepth']:>10.1f} {s['p99Depth']:>7.0f} {s['maxDepth']:>7,} {s['backlog']:>7,}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    traffic = parser.add_argument_group("traffic (datasources as in cron_load.py)")
+    traffic.add_argument("--api-url", help="DataSourceManagementService base URL")
+    traffic.add_argument("--from-api", action="store_true", help="Current active datasources from the API")
+    traffic.add_argument("--file", action="append", help="Datasource list JSON (API response or array)")
+    traffic.add_argument("--synthetic", type=int, default=0, help="Add N datasources using --cron")
+    traffic.add_argument("--cron", default="0 */15 * * * *", help="Cron for synthetic datasources")
+    traffic.add_argument("--hours", type=float, default=2, help="Simulated time")
+    traffic.add_argument("--files-per-poll", type=float, default=1.0, help="Mean new files per datasource per fire")
+    traffic.add_argument("--file-mb", type=float, default=1.0, help="Mean file size")
+    traffic.add_argument("--file-mb-spread", type=float, default=0.8, help="Lognormal sigma of file sizes")
+    traffic.add_argument("--records-per-file", type=float, default=10000, help="Records in a file of --file-mb")
+    model = parser.add_argument_group("model")
+    model.add_argument("--values", default=DEFAULT_VALUES, help="values.yaml for current replica counts")
+    model.add_argument("--kafka", action="store_true",
+                       help="Consume the ConfigureKafkaTopics topics from Kafka (3 partitions) instead of RabbitMQ")
+    model.add_argument("--key", choices=("none", "datasource"), default="none",
+                       help="Kafka message key: none spreads round-robin, datasource keeps a source on one partition")
+    model.add_argument("--traces", help="trace_stages.py --json output to calibrate service times")
+    model.add_argument("--results", nargs="+", help="capacity_plan.py result files to calibrate time per unit")
+    model.add_argument("--set", action="append", default=[], metavar="STAGE.KEY=VALUE", help="Override a parameter")
+    model.add_argument("--vary", action="append", default=[], metavar="STAGE.KEY=V1,V2",
+                       help="Run every combination of these values")
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between queue-depth samples")
+    parser.add_argument("--timeline", help="Write queue depth and in-flight per stage over time (CSV)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write every scenario's result as JSON")
+    args = parser.parse_args()
+    if args.api_url:
+        args.api_url = args.api_url.rstrip("/")
+
+    params = base_params(args)
+    if args.traces or args.results:
+        print("calibration:")
+    if args.traces:
+        apply_traces(params, args.traces)
+    if args.results:
+        apply_results(params, args.results)
+    for stage, key, values in map(parse_setting, args.set):
+        params[stage][key] = values[-1]
+    varied = [parse_setting(v) for v in args.vary]
+
+    datasources, expressions, *fires = build_fires(args)
+    horizon = args.hours * 3600
+    print(f"{datasources:,} datasources, {expressions:,} cron expressions, {len(fires[0]):,} fires "
+          f"in {args.hours:g}h, {args.files_per_poll:g} files/poll of {args.file_mb:g} MB"
+          f"{', Kafka topics' if args.kafka else ', RabbitMQ queues'}")
+
+    scenarios = []
+    for combination in itertools.product(*(values for _, _, values in varied)):
+        scenario = {name: dict(p) for name, p in params.items()}
+        label = []
+        for (stage, key, _), value in zip(varied, combination):
+            scenario[stage][key] = value
+            label.append(f"{stage}.{key}={value}")
+        scenarios.append((" ".join(label) or "baseline", scenario))
+
+    results = []
+    for label, scenario in scenarios:
+        started = time.perf_counter()
+        sim = Simulation(scenario, fires, datasources, args, args.seed).run()
+        result = {"scenario": label, **summarize(sim, horizon)}
+        results.append(result)
+        print(f"\n=== {label} ({time.perf_counter() - started:.1f}s)")
+        print_result(result, horizon)
+        if args.timeline:
+            path = args.timeline if len(scenarios) == 1 else args.timeline.replace(".csv", f"-{len(results)}.csv")
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["second"] + [f"{s}_depth" for s in STAGES] + [f"{s}_in_flight" for s in STAGES])
+                writer.writerows(sim.timeline)
+            print(f"timeline written to {path}")
+
+    if len(results) > 1:
+        width = max(len(r["scenario"]) for r in results)
+        print(f"\n{'scenario':<{width}} {'files/s':>8} {'e2e p50':>8} {'e2e p99':>8} {'skipped':>8} {'left':>8} bottleneck")
+        for r in sorted(results, key=lambda r: (r["endToEnd"]["p99"] if r["endToEnd"]["count"] else math.inf)):
+            growing = " (growing)" if r["stages"][r["bottleneck"]]["growing"] else ""
+            print(f"{r['scenario']:<{width}} {r['filesDone'] / horizon:>8.2f} "
+                  f"{seconds_text(r['endToEnd']['p50']):>8} {seconds_text(r['endToEnd']['p99']):>8} "
+                  f"{r['skippedPolls']:>8,} {r['filesInSystem']:>8,} {r['bottleneck']}{growing}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"datasources": datasources, "hours": args.hours, "parameters": params,
+                       "scenarios": results}, f, indent=2)
+        print(f"\nresults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""Input/output record reconciliation in bounded memory.
+
+Proves that every valid input record reached the OutputService destination
+(FolderOutputHandler files or KafkaOutputHandler messages) and every invalid one
+reached InvalidRecordsService, for runs far larger than RAM.
+
+Records are streamed from JSON (arrays, NDJSON, concatenated Kafka message
+dumps), CSV, XML and Excel files, keyed by an identity field (TransactionId by
+default) and reduced to a digest of their normalized values. The digests are
+hash-partitioned into spill files on disk; each partition is then reconciled on
+its own, so memory is bounded by one partition rather than the whole run.
+
+Values are normalized the way the Shared/Converters round-trip them: CSV/XML
+strings that look like numbers or booleans compare equal to the typed JSON
+values ("275.0" == 275, "True" == true), nested objects are flattened to
+dotted keys, and field order is ignored.
+
+Usage:
+    python reconcile.py --input /data/in --output /data/out --key TransactionId
+    python reconcile.py --input in/*.csv --output kafka-extracted-messages/*-messages-*.txt \\
+        --invalid-from-api --datasource-id 6751d3... --memory-mb 256
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+from ezapi import get_field, iter_pages, new_session, service_url
+
+SIDES = ("input", "output", "invalid")
+# Rough in-memory cost of one reconciled key (dict slot, key string, digests)
+BYTES_PER_KEY = 240
+# Conservative serialized size of a record, used to size partitions up front
+MIN_RECORD_BYTES = 48
+
+
+# ---------------------------------------------------------------------------
+# Streaming readers
+# ---------------------------------------------------------------------------
+
+def iter_json(path, chunk_size=1 << 20, decoder=None, top_level=False):
+    """Yield objects from a JSON array, NDJSON, a single object or concatenated
+    arrays (the KafkaMessageExtractor *-messages-*.txt dump) without loading the file.
+
+    `path` may also be an open text stream. With top_level=True every top-level
+    value is yielded whole as (value, raw_text) instead, one per Kafka message
+    in a dump; lines that are not JSON come back as (line, line).
+    """
+    decoder = decoder or json.JSONDecoder()
+    separators = " \t\r\n," if top_level else " \t\r\n,[]"
+    source = open(path, encoding="utf-8-sig") if isinstance(path, str) else contextlib.nullcontext(path)
+    with source as f:
+        name = getattr(f, "name", "<stream>")
+        buffer, pos, eof = "", 0, False
+        while True:
+            if pos >= len(buffer):
+                if eof:
+                    return
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+            char = buffer[pos]
+            if char in separators:
+                # Separators and array brackets; objects inside any array are records
+                pos += 1
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                line_end = buffer.find("\n", pos)
+                if top_level and e.pos == pos and (line_end >= 0 or eof):
+                    # Fails on its first character with the whole line read: not JSON
+                    end = len(buffer) if line_end < 0 else line_end
+                    yield buffer[pos:end].rstrip("\r"), buffer[pos:end].rstrip("\r")
+                    pos = end
+                    continue
+                if eof:
+                    raise ValueError(f"{name}: invalid JSON near offset {pos}")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            if end == len(buffer) and not eof and not isinstance(value, (dict, list)):
+                # A scalar may have been cut at the chunk boundary
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            if top_level:
+                yield value, buffer[pos:end]
+            elif isinstance(value, dict):
+                yield value
+            pos = end
+
+
+def iter_csv(path, delimiter=","):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def xml_to_value(element):
+    """Mirror XmlToJsonConverter.XmlToJsonObject: repeated children become lists"""
+    children = list(element)
+    if not children:
+        return element.text or ""
+    result = {}
+    for child in children:
+        key = child.tag.rsplit("}", 1)[-1]
+        value = xml_to_value(child)
+        if key in result:
+            if not isinstance(result[key], list):
+                result[key] = [result[key]]
+            result[key].append(value)
+        else:
+            result[key] = value
+    return result
+
+
+def iter_xml(path):
+    """Each child of the root element is one record (<Root><Item>…</Item></Root>)"""
+    depth = 0
+    root = None
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = element
+            continue
+        depth -= 1
+        if depth == 1:
+            value = xml_to_value(element)
+            if isinstance(value, dict):
+                yield value
+            root.clear()
+
+
+def iter_excel(path):
+    """First worksheet, header row then one record per row (ExcelToJsonConverter)"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise SystemExit("Excel files need openpyxl: pip install openpyxl")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    names = [str(h) if h is not None else f"Column{i + 1}" for i, h in enumerate(header)]
+    for row in rows:
+        yield {name: ("" if value is None else value) for name, value in zip(names, row)}
+    workbook.close()
+
+
+READERS = {".json": iter_json, ".ndjson": iter_json, ".jsonl": iter_json, ".txt": iter_json,
+           ".csv": iter_csv, ".xml": iter_xml, ".xlsx": iter_excel}
+
+
+def expand_paths(specs):
+    """Files, directories (recursive) and globs, in a stable order"""
+    paths = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            for dirpath, _, names in os.walk(spec):
+                paths.extend(os.path.join(dirpath, n) for n in names
+                             if os.path.splitext(n)[1].lower() in READERS)
+        else:
+            paths.extend(glob.glob(spec) or [spec])
+    return sorted(set(paths))
+
+
+def iter_records(paths):
+    """Yield (reference, record) for every record in every file"""
+    for path in paths:
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            print(f"  ⚠ skipping {path}: unsupported format", file=sys.stderr)
+            continue
+        for ordinal, record in enumerate(reader(path), 1):
+            yield f"{path}#{ordinal}", record
+
+
+def iter_invalid_api(datasource_id=None):
+    """OriginalData of every invalid record from InvalidRecordsService"""
+    session = new_session("perf-reconcile")
+    params = {"DataSourceId": datasource_id} if datasource_id else {}
+    url = f"{service_url('invalid-records')}/api/v1/invalid-records"
+    for item in iter_pages(session, url, params, size=500, size_param="pageSize"):
+        yield f"invalid-record:{get_field(item, 'Id', '?')}", item
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+
+def normalize_scalar(value):
+    """Canonical string so converter round-trips compare equal"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return format_number(value)
+    text = str(value).strip()
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered
+    try:
+        return format_number(float(text))
+    except ValueError:
+        return text
+
+
+def format_number(number):
+    if isinstance(number, float) and (math.isnan(number) or math.isinf(number)):
+        return str(number)
+    if float(number).is_integer():
+        return str(int(number))
+    return repr(float(number))
+
+
+def flatten(record, prefix="", out=None):
+    out = {} if out is None else out
+    if isinstance(record, dict):
+        for key, value in record.items():
+            flatten(value, f"{prefix}{key}.", out)
+    elif isinstance(record, list):
+        for i, value in enumerate(record):
+            flatten(value, f"{prefix}{i}.", out)
+    else:
+        out[prefix[:-1]] = normalize_scalar(record)
+    return out
+
+
+def canonical(record, ignore):
+    fields = flatten(record)
+    for name in ignore:
+        fields.pop(name, None)
+    return json.dumps(fields, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def record_digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Partitioned spill
+# ---------------------------------------------------------------------------
+
+class Spill:
+    """Hash-partitions (key, digest, ref[, canonical]) lines into per-side files,
+    buffering in memory and appending in batches so only one file is open at a time"""
+
+    def __init__(self, workdir, partitions, flush_bytes=8 << 20):
+        self.workdir = workdir
+        self.partitions = partitions
+        self.flush_bytes = flush_bytes
+        self.buffers = {}
+        self.buffered = 0
+        self.counts = Counter()
+
+    def path(self, side, partition):
+        return os.path.join(self.workdir, f"{side}-{partition:05d}.tsv")
+
+    def add(self, side, key, digest, ref, values=None):
+        partition = int(hashlib.blake2b(key.encode(), digest_size=8).hexdigest(), 16) % self.partitions
+        line = f"{key}\t{digest}\t{ref}\t{values or ''}\n"
+        self.buffers.setdefault((side, partition), []).append(line)
+        self.buffered += len(line)
+        self.counts[side] += 1
+        if self.buffered >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        for (side, partition), lines in self.buffers.items():
+            with open(self.path(side, partition), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        self.buffers.clear()
+        self.buffered = 0
+
+    def read(self, side, partition):
+        path = self.path(side, partition)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                key, digest, ref, values = line.rstrip("\n").split("\t", 3)
+                yield key, digest, ref, values
+
+
+def spill_side(spill, side, records, key_field, ignore, keep_values, problems):
+    missing_key = 0
+    for ref, record in records:
+        if side == "invalid":
+            record = get_field(record, "OriginalData") or get_field(record, "OriginalRecord") or record
+        key = get_field(record, key_field)
+        if key is None or key == "":
+            missing_key += 1
+            if missing_key <= 5:
+                problems.append({"kind": "no-key", "side": side, "ref": ref})
+            continue
+        text = canonical(record, ignore)
+        spill.add(side, normalize_scalar(key), record_digest(text), ref, text if keep_values else None)
+    return missing_key
+
+
+# ---------------------------------------------------------------------------
+# Reconciliation
+# ---------------------------------------------------------------------------
+
+def field_diff(expected, actual):
+    if not expected or not actual:
+        return None
+    a, b = json.loads(expected), json.loads(actual)
+    return {name: [a.get(name), b.get(name)] for name in sorted(set(a) | set(b)) if a.get(name) != b.get(name)}
+
+
+def reconcile_partition(spill, partition):
+    """Compare the three sides of one partition; yields discrepancy dicts"""
+    table = {}
+    for side_index, side in enumerate(SIDES):
+        for key, digest, ref, values in spill.read(side, partition):
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = ([], [], [])
+            entry[side_index].append((digest, ref, values))
+
+    for key, (inputs, outputs, invalids) in table.items():
+        if len(inputs) > 1:
+            yield {"kind": "duplicated-input", "key": key, "refs": [r for _, r, _ in inputs]}
+        if not inputs:
+            for digest, ref, _ in outputs:
+                yield {"kind": "unexpected-output", "key": key, "ref": ref}
+            for digest, ref, _ in invalids:
+                yield {"kind": "unexpected-invalid", "key": key, "ref": ref}
+            continue
+        if not outputs and not invalids:
+            yield {"kind": "missing", "key": key, "ref": inputs[0][1]}
+            continue
+        if len(outputs) > 1:
+            yield {"kind": "duplicated-output", "key": key, "refs": [r for _, r, _ in outputs]}
+        if outputs and invalids:
+            yield {"kind": "output-and-invalid", "key": key,
+                   "refs": [r for _, r, _ in outputs] + [r for _, r, _ in invalids]}
+        expected = {d: v for d, _, v in inputs}
+        for side, rows in (("output", outputs), ("invalid", invalids)):
+            for digest, ref, values in rows:
+                if digest not in expected:
+                    issue = {"kind": f"altered-{side}", "key": key, "ref": ref, "inputRef": inputs[0][1]}
+                    diff = field_diff(inputs[0][2], values)
+                    if diff is not None:
+                        issue["fields"] = diff
+                    yield issue
+
+
+def choose_partitions(paths, memory_mb):
+    total_bytes = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    estimated_keys = max(1, total_bytes // MIN_RECORD_BYTES)
+    return max(1, math.ceil(estimated_keys * BYTES_PER_KEY / (memory_mb * 1024 * 1024))), total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--input", nargs="+", required=True, help="Input files, directories or globs")
+    parser.add_argument("--output", nargs="+", required=True,
+                        help="Output files (FolderOutputHandler folder, Kafka message dumps)")
+    parser.add_argument("--invalid", nargs="+", default=[],
+                        help="Invalid-record exports (records or objects with originalData)")
+    parser.add_argument("--invalid-from-api", action="store_true", help="Read invalid records from InvalidRecordsService")
+    parser.add_argument("--datasource-id", help="Restrict --invalid-from-api to one datasource")
+    parser.add_argument("--key", default="TransactionId", help="Identity field (default TransactionId)")
+    parser.add_argument("--ignore-field", action="append", default=[],
+                        help="Field excluded from the comparison (repeatable, dotted for nested)")
+    parser.add_argument("--memory-mb", type=int, default=512, help="Memory budget per partition")
+    parser.add_argument("--partitions", type=int, help="Override the computed partition count")
+    parser.add_argument("--workdir", help="Spill directory (default: a temp dir, removed afterwards)")
+    parser.add_argument("--field-diff", action="store_true",
+                        help="Keep normalized values so altered records show which fields changed")
+    parser.add_argument("--report", default="reconcile-report.ndjson", help="Discrepancy details (NDJSON)")
+    parser.add_argument("--examples", type=int, default=5, help="Examples printed per discrepancy kind")
+    args = parser.parse_args()
+
+    sources = {"input": expand_paths(args.input), "output": expand_paths(args.output),
+               "invalid": expand_paths(args.invalid)}
+    partitions, total_bytes = choose_partitions(sources["input"] + sources["output"], args.memory_mb)
+    partitions = args.partitions or partitions
+    workdir = args.workdir or tempfile.mkdtemp(prefix="reconcile-")
+    os.makedirs(workdir, exist_ok=True)
+
+    print("🧮 Record reconciliation")
+    print(f"  files: {len(sources['input'])} input, {len(sources['output'])} output, "
+          f"{len(sources['invalid'])} invalid ({total_bytes / 1e6:,.1f} MB)")
+    print(f"  key: {args.key}, {partitions} partition(s) for a {args.memory_mb} MB budget, spill: {workdir}")
+
+    started = time.perf_counter()
+    spill = Spill(workdir, partitions)
+    problems = []
+    no_key = Counter()
+    try:
+        for side in SIDES:
+            records = iter_records(sources[side])
+            if side == "invalid" and args.invalid_from_api:
+                records = iter_invalid_api(args.datasource_id)
+            no_key[side] = spill_side(spill, side, records, args.key, args.ignore_field, args.field_diff, problems)
+            spill.flush()
+            print(f"  ✓ {side}: {spill.counts[side]:,} records spilled "
+                  f"({time.perf_counter() - started:.1f}s)")
+
+        kinds = Counter()
+        examples = {}
+        with open(args.report, "w", encoding="utf-8") as report:
+            for issue in problems:
+                kinds[issue["kind"]] += 1
+                report.write(json.dumps(issue) + "\n")
+            for partition in range(partitions):
+                for issue in reconcile_partition(spill, partition):
+                    kinds[issue["kind"]] += 1
+                    report.write(json.dumps(issue, ensure_ascii=False) + "\n")
+                    examples.setdefault(issue["kind"], [])
+                    if len(examples[issue["kind"]]) < args.examples:
+                        examples[issue["kind"]].append(issue)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n=== Result ({elapsed:.1f}s, {sum(spill.counts.values()) / max(elapsed, 1e-9):,.0f} records/s) ===")
+    for side in SIDES:
+        suffix = f", {no_key[side]:,} without {args.key}" if no_key[side] else ""
+        print(f"  {side:<8} {spill.counts[side]:>12,} records{suffix}")
+    if not kinds:
+        print("  ✅ Every input record is accounted for exactly once and unaltered")
+        return 0
+    for kind, count in kinds.most_common():
+        print(f"  ✗ {kind:<20} {count:>12,}")
+        for issue in examples.get(kind, []):
+            detail = issue.get("fields") or issue.get("refs") or issue.get("ref")
+            print(f"      {issue.get('key', '')}: {detail}")
+    print(f"\nDetails: {args.report}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
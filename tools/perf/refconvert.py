@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""Reference implementations of the Shared/Converters conversions.
+
+Each function reproduces what the C# class emits, byte for byte where the
+format allows, so service output can be checked against an independent
+implementation:
+
+    CsvToJsonConverter        csv_to_json      streaming
+    XmlToJsonConverter        xml_to_json      streaming (root children spilled per tag)
+    ExcelToJsonConverter      excel_to_json    streaming (openpyxl read-only)
+    JsonToJsonConverter       json_to_json     validates and passes through
+    JsonToCsvReconstructor    json_to_csv      streaming
+    JsonToXmlReconstructor    json_to_xml      streaming
+    JsonToExcelReconstructor  json_to_excel    streaming (openpyxl write-only)
+
+Converters serialize like System.Text.Json's defaults: compact, non-ASCII and
+HTML-sensitive characters escaped as \\uXXXX, doubles in shortest round-trip
+form (1E+15, 1E-05), decimals keeping their scale (1.50).
+
+Usage:
+    python refconvert.py csv_to_json input.csv output.json
+    python refconvert.py json_to_xml records.json output.xml --root-element Transactions
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from json.encoder import encode_basestring
+
+from reconcile import iter_json
+
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+# Characters System.Text.Json's default JavaScriptEncoder escapes besides non-ASCII
+STJ_ESCAPE = {'\\"': "\\u0022", "&": "\\u0026", "'": "\\u0027", "+": "\\u002B", "<": "\\u003C",
+              ">": "\\u003E", "`": "\\u0060"}
+STJ_HTML = re.compile("[\"&'+<>`]")
+STJ_HTML_ESCAPED = re.compile(r'\\"|[&' + "'" + r'+<>`]')
+NON_ASCII = re.compile(r"[^\x00-\x7e]")
+UNICODE_ESCAPE = re.compile(r"\\u[0-9a-f]{4}")
+OLE_EPOCH = datetime(1899, 12, 30)
+XML_NAME = re.compile(r"^[A-Za-z_À-￿][\w.\-·À-￿]*$")
+
+
+class ConversionError(ValueError):
+    """Input the C# implementation rejects (it throws and the file fails)"""
+
+
+class RawNumber(str):
+    """JSON number kept as its source text, like JsonElement.GetRawText()"""
+
+
+# ---------------------------------------------------------------------------
+# System.Text.Json-compatible serialization
+# ---------------------------------------------------------------------------
+
+def stj_string(text):
+    """JSON string as JavaScriptEncoder.Default writes it; the C encoder does the bulk"""
+    encoded = encode_basestring(text)
+    if "\\u" in encoded:
+        encoded = UNICODE_ESCAPE.sub(lambda m: m.group(0).upper().replace("\\U", "\\u"), encoded)
+    if not text.isascii() or "\x7f" in text:
+        encoded = NON_ASCII.sub(_escape_char, encoded)
+    if STJ_HTML.search(text):
+        encoded = '"' + STJ_HTML_ESCAPED.sub(lambda m: STJ_ESCAPE[m.group(0)], encoded[1:-1]) + '"'
+    return encoded
+
+
+def _escape_char(match, cache={}):
+    char = match.group(0)
+    escaped = cache.get(char)
+    if escaped is None:
+        units = char.encode("utf-16-be")
+        escaped = cache[char] = "".join("\\u" + units[i:i + 2].hex().upper() for i in range(0, len(units), 2))
+    return escaped
+
+
+def stj_double(value):
+    """double.ToString("R") as System.Text.Json writes it"""
+    if math.isnan(value) or math.isinf(value):
+        raise ConversionError(".NET JSON serialization does not support NaN/Infinity")
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    digits, exponent = Decimal(repr(value)).normalize().as_tuple()[1:]
+    sign = "-" if value < 0 else ""
+    mantissa = "".join(map(str, digits))
+    point = len(mantissa) + exponent  # decimal exponent of the leading digit + 1
+    if point > 15 or point < -3:
+        scientific = mantissa[0] + ("." + mantissa[1:] if len(mantissa) > 1 else "")
+        power = point - 1
+        return f"{sign}{scientific}E{'+' if power >= 0 else '-'}{abs(power):02d}"
+    if point <= 0:
+        return f"{sign}0.{'0' * -point}{mantissa}"
+    if point >= len(mantissa):
+        return sign + mantissa + "0" * (point - len(mantissa))
+    return f"{sign}{mantissa[:point]}.{mantissa[point:]}"
+
+
+def stj_dumps(value):
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, RawNumber):
+        return str(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return stj_double(value)
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    if isinstance(value, str):
+        return stj_string(value)
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{stj_string(str(k))}:{stj_dumps(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(stj_dumps(v) for v in value) + "]"
+    return stj_string(str(value))
+
+
+class JsonArrayWriter:
+    """Writes `[a,b,...]` one element at a time"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = True
+        stream.write("[")
+
+    def write(self, value):
+        if not self.first:
+            self.stream.write(",")
+        self.first = False
+        self.stream.write(stj_dumps(value))
+
+    def close(self):
+        self.stream.write("]")
+
+
+# ---------------------------------------------------------------------------
+# .NET parsing rules
+# ---------------------------------------------------------------------------
+
+NUMBER_ANY = re.compile(r"^\s*(\()?\s*([+-])?\s*(\d[\d,]*\.?\d*|\.\d+)(?:[eE]([+-]?\d+))?\s*([+-])?\s*(\))?\s*$")
+INTEGER = re.compile(r"^\s*[+-]?\d+\s*$")
+NUMBER_START = frozenset("0123456789+-.(NI∞")
+
+
+def parse_number_any(text):
+    """double/decimal.TryParse(text, NumberStyles.Any, InvariantCulture) -> Decimal or None"""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in NUMBER_START:
+        return None
+    if stripped in ("NaN", "Infinity", "-Infinity", "∞", "-∞"):
+        return float(stripped.replace("∞", "inf"))
+    match = NUMBER_ANY.match(text)
+    if not match:
+        return None
+    open_paren, lead_sign, digits, exponent, trail_sign, close_paren = match.groups()
+    if bool(open_paren) != bool(close_paren) or (lead_sign and trail_sign) or (open_paren and (lead_sign or trail_sign)):
+        return None
+    integral = digits.split(".")[0]
+    if "," in integral and integral.startswith(","):
+        return None
+    try:
+        number = Decimal(digits.replace(",", "") + (f"e{exponent}" if exponent else ""))
+    except InvalidOperation:
+        return None
+    if open_paren or "-" in (lead_sign or "", trail_sign or ""):
+        number = -number
+    return number
+
+
+def parse_bool(text):
+    lowered = text.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    return None
+
+
+def csv_value(value):
+    """CsvToJsonConverter.ConvertTypes for one field"""
+    number = parse_number_any(value)
+    if number is not None:
+        if isinstance(number, float):
+            return number  # NaN/Infinity; serialization will reject it as the service does
+        if "." in value or "," in value:
+            return float(number)
+        if INTEGER.match(value) and INT32_MIN <= int(number) <= INT32_MAX:
+            return int(number)
+        return float(number)
+    boolean = parse_bool(value)
+    if boolean is not None:
+        return boolean
+    return value
+
+
+def xml_value(text):
+    """XmlToJsonConverter.ParseValue"""
+    if not text:
+        return text
+    number = parse_number_any(text)
+    if number is not None and not isinstance(number, float):
+        if number == number.to_integral_value() and INT32_MIN <= number <= INT32_MAX:
+            return int(number)
+        return number
+    boolean = parse_bool(text)
+    if boolean is not None:
+        return boolean
+    return text
+
+
+def element_text(element):
+    """XElement.Value: concatenated descendant text"""
+    return "".join(element.itertext())
+
+
+def xml_object(element):
+    """XmlToJsonConverter.XmlToJsonObject"""
+    children = list(element)
+    if not children:
+        return xml_value(element_text(element))
+    result = {}
+    for child in children:
+        key = local_name(child.tag)
+        value = xml_object(child)
+        if key in result:
+            if not isinstance(result[key], list):
+                result[key] = [result[key]]
+            result[key].append(value)
+        else:
+            result[key] = value
+    return result
+
+
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else str(tag)
+
+
+# ---------------------------------------------------------------------------
+# Converters (source format -> JSON)
+# ---------------------------------------------------------------------------
+
+def csv_to_json(source, target, delimiter=","):
+    """CsvHelper with HasHeaderRecord, MissingFieldFound=null, BadDataFound=null"""
+    count = 0
+    with open(source, newline="", encoding="utf-8-sig") as f, open(target, "w", encoding="utf-8") as out:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        writer = JsonArrayWriter(out)
+        if header is not None:
+            for row in reader:
+                if not row:
+                    continue
+                record = {}
+                for i, name in enumerate(header):
+                    record[name] = csv_value(row[i] if i < len(row) else "")
+                writer.write(record)
+                count += 1
+        writer.close()
+    return count
+
+
+def xml_to_json(source, target):
+    """Streams root children; each distinct child tag is spilled to its own temp
+    file so repeated elements can become arrays without holding the document"""
+    spills, order, counts = {}, [], {}
+    depth = 0
+    root = None
+    leaf_text = None
+    with tempfile.TemporaryDirectory(prefix="refconvert-") as workdir:
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = element
+                continue
+            depth -= 1
+            if depth == 1:
+                tag = local_name(element.tag)
+                if tag not in spills:
+                    order.append(tag)
+                    spills[tag] = open(os.path.join(workdir, f"{len(order)}.ndjson"), "w+", encoding="utf-8")
+                    counts[tag] = 0
+                spills[tag].write(stj_dumps(xml_object(element)) + "\n")
+                counts[tag] += 1
+                root.clear()
+            elif depth == 0:
+                leaf_text = element_text(element) if not order else None
+        with open(target, "w", encoding="utf-8") as out:
+            if not order:
+                out.write(stj_dumps(xml_value(leaf_text or "")))
+                return 0
+            out.write("{")
+            for index, tag in enumerate(order):
+                spill = spills[tag]
+                spill.seek(0)
+                out.write(("," if index else "") + stj_string(tag) + ":")
+                if counts[tag] == 1:
+                    out.write(spill.readline().rstrip("\n"))
+                else:
+                    out.write("[" + ",".join(line.rstrip("\n") for line in spill) + "]")
+                spill.close()
+            out.write("}")
+    return sum(counts.values())
+
+
+def excel_to_json(source, target):
+    """First worksheet; header row 1 (blank header -> ColumnN); empty cells -> \"\""""
+    openpyxl = require_openpyxl()
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    sheet = workbook.worksheets[0]
+    rows = sheet.iter_rows(values_only=True)
+    count = 0
+    with open(target, "w", encoding="utf-8") as out:
+        writer = JsonArrayWriter(out)
+        header = next(rows, None)
+        if header is not None:
+            names = [str(h) if h is not None else f"Column{i + 1}" for i, h in enumerate(header)]
+            for row in rows:
+                record = {}
+                for i, name in enumerate(names):
+                    value = row[i] if i < len(row) else None
+                    record[name] = excel_cell(value)
+                writer.write(record)
+                count += 1
+        writer.close()
+    workbook.close()
+    return count
+
+
+def excel_cell(value):
+    """EPPlus cell.Value: numbers are double, dates are OLE automation dates"""
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        moment = value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+        return (moment - OLE_EPOCH).total_seconds() / 86400
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
+
+
+def json_to_json(source, target):
+    """Validates and passes the content through unchanged"""
+    with open(source, encoding="utf-8-sig") as f:
+        content = f.read()
+    value = json.loads(content)
+    with open(target, "w", encoding="utf-8") as out:
+        out.write(content)
+    return len(value) if isinstance(value, list) else 1
+
+
+# ---------------------------------------------------------------------------
+# Reconstructors (JSON -> target format)
+# ---------------------------------------------------------------------------
+
+RAW_DECODER = json.JSONDecoder(parse_float=RawNumber, parse_int=RawNumber)
+
+
+def load_raw(text):
+    return RAW_DECODER.decode(text)
+
+
+def iter_raw_records(source):
+    """Top-level array elements, streamed, with numbers kept as raw text"""
+    return iter_json(source, decoder=RAW_DECODER)
+
+
+def json_element_string(value):
+    """JsonElement.ToString()"""
+    if value is None:
+        return ""
+    if value is True:
+        return "True"
+    if value is False:
+        return "False"
+    if isinstance(value, str):
+        return str(value)
+    return raw_dumps(value)
+
+
+def raw_dumps(value):
+    """Compact JSON text of a nested value as Newtonsoft's JArray.ToString(Formatting.None)
+    hands it to the reconstructor: numbers verbatim, non-ASCII unescaped"""
+    if isinstance(value, RawNumber):
+        return str(value)
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(k, ensure_ascii=False)}:{raw_dumps(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ",".join(raw_dumps(v) for v in value) + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def csv_field(text, delimiter):
+    """CsvHelper's default ShouldQuote"""
+    if text and (delimiter in text or '"' in text or "\r" in text or "\n" in text
+                 or text[0] in " \t" or text[-1] in " \t"):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def json_to_csv(source, target, delimiter=","):
+    """Headers come from the first record only; missing fields are written empty"""
+    count = 0
+    with open(target, "w", encoding="utf-8", newline="") as out:
+        header = None
+        for record in iter_raw_records(source):
+            if header is None:
+                header = list(record.keys())
+                out.write(delimiter.join(csv_field(h, delimiter) for h in header) + "\r\n")
+            out.write(delimiter.join(csv_field(json_element_string(record.get(h, "")), delimiter)
+                                     for h in header) + "\r\n")
+            count += 1
+    return count
+
+
+def xml_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def xml_element(name, value, indent, out):
+    """JsonToXmlReconstructor.JsonToXElement, written as XmlWriter indents it"""
+    if not XML_NAME.match(name):
+        raise ConversionError(f"'{name}' is not a valid XML element name")
+    pad = "  " * indent
+    if isinstance(value, dict):
+        if not value:
+            out.write(f"{pad}<{name} />\n")
+            return
+        out.write(f"{pad}<{name}>\n")
+        for key, child in value.items():
+            xml_element(key, child, indent + 1, out)
+        out.write(f"{pad}</{name}>\n")
+    elif isinstance(value, list):
+        if not value:
+            out.write(f"{pad}<{name} />\n")
+            return
+        out.write(f"{pad}<{name}>\n")
+        for child in value:
+            xml_element("Item", child, indent + 1, out)
+        out.write(f"{pad}</{name}>\n")
+    else:
+        if value is True or value is False:
+            text = "true" if value else "false"
+        elif value is None:
+            text = ""
+        else:
+            text = str(value)
+        out.write(f"{pad}<{name}>{xml_escape(text)}</{name}>\n")
+
+
+def json_to_xml(source, target, root_element="Root"):
+    """XDocument.Save(stream): UTF-8 BOM, declaration, two-space indent"""
+    count = 0
+    with open(target, "w", encoding="utf-8-sig", newline="\n") as out:
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        with open(source, encoding="utf-8-sig") as f:
+            head = f.read(4096).lstrip()
+        if head.startswith("["):
+            records = iter_raw_records(source)
+            first = next(records, None)
+            if first is None:
+                out.write(f"<{root_element} />")
+                return 0
+            out.write(f"<{root_element}>\n")
+            buffer = io.StringIO()
+            for record in itertools.chain([first], records):
+                xml_element("Item", record, 1, buffer)
+                count += 1
+                if buffer.tell() > 1 << 20:
+                    out.write(buffer.getvalue())
+                    buffer = io.StringIO()
+            out.write(buffer.getvalue())
+            out.write(f"</{root_element}>")
+        else:
+            buffer = io.StringIO()
+            with open(source, encoding="utf-8-sig") as f:
+                xml_element(root_element, load_raw(f.read()), 0, buffer)
+            out.write(buffer.getvalue().rstrip("\n"))
+            count = 1
+    return count
+
+
+def json_to_excel(source, target, sheet_name="Sheet1"):
+    """Every cell written as value?.ToString() - numbers and booleans become text"""
+    openpyxl = require_openpyxl()
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    header = None
+    count = 0
+    for record in iter_raw_records(source):
+        if header is None:
+            header = list(record.keys())
+            sheet.append(header)
+        sheet.append([json_element_string(record[h]) if h in record else None for h in header])
+        count += 1
+    workbook.save(target)
+    return count
+
+
+def require_openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise SystemExit("Excel conversions need openpyxl: pip install openpyxl")
+    return openpyxl
+
+
+CONVERSIONS = {
+    "csv_to_json": csv_to_json,
+    "xml_to_json": xml_to_json,
+    "excel_to_json": excel_to_json,
+    "json_to_json": json_to_json,
+    "json_to_csv": json_to_csv,
+    "json_to_xml": json_to_xml,
+    "json_to_excel": json_to_excel,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("conversion", choices=sorted(CONVERSIONS))
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--delimiter", default=",", help="CSV delimiter (metadata Delimiter)")
+    parser.add_argument("--root-element", default="Root", help="XML root (metadata RootElement)")
+    parser.add_argument("--sheet-name", default="Sheet1", help="Excel sheet (metadata SheetName)")
+    args = parser.parse_args()
+
+    function = CONVERSIONS[args.conversion]
+    options = {}
+    if args.conversion in ("csv_to_json", "json_to_csv"):
+        options["delimiter"] = args.delimiter
+    elif args.conversion == "json_to_xml":
+        options["root_element"] = args.root_element
+    elif args.conversion == "json_to_excel":
+        options["sheet_name"] = args.sheet_name
+    try:
+        count = function(args.source, args.target, **options)
+    except ConversionError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    print(f"✓ {args.conversion}: {args.source} -> {args.target}" + (f" ({count:,} records)" if count else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""ReDoS and regex-cost analyzer for schema `pattern` rules.
+
+Collects every `pattern` (and `patternProperties` key) from the Schema API or
+from JSON files on disk, flags constructs that make a backtracking engine go
+super-linear, and then measures each pattern against generated adversarial
+inputs of increasing length to report the growth curve and the cost of one
+field check per record.
+
+.NET's default Regex engine backtracks just like Python's `re`, so growth
+classes (linear / polynomial / exponential) carry over even though absolute
+timings differ. JSON Schema `pattern` is an unanchored search, so patterns are
+benchmarked with `search()` semantics.
+
+Usage:
+    python regex_cost.py scan --from-api
+    python regex_cost.py scan --path sample-data/ --json regex-report.json
+    python regex_cost.py scan --pattern "^(\\w+\\s?)+$"
+    python regex_cost.py gate <schemaId> --publish
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import re
+import string
+import sys
+import time
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+# Representative characters used to reason about character-class overlap
+ALPHABET = frozenset(string.ascii_letters + string.digits + string.punctuation + " \t\n\x00" + "אבגת")
+UNBOUNDED = 32           # repeats with a larger upper bound are treated as unbounded
+NOISE_FLOOR = 2e-6       # seconds; below this timings are dominated by call overhead
+LENGTHS = [8, 12, 16, 20, 24, 28, 32, 48, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
+KILLERS = ["!", "\x00", " ", "\n", "א", "_", "0", "a"]
+
+
+def op_name(op):
+    return getattr(op, "name", str(op))
+
+
+# ---------------------------------------------------------------------------
+# Pattern collection
+# ---------------------------------------------------------------------------
+
+def collect_patterns(node, source, path="", found=None):
+    """Walk any JSON value and record (source, pointer, pattern, maxLength)"""
+    if found is None:
+        found = []
+    if isinstance(node, dict):
+        max_length = node.get("maxLength", node.get("MaxLength"))
+        for key, value in node.items():
+            pointer = f"{path}/{key}"
+            if key in ("pattern", "Pattern") and isinstance(value, str) and value:
+                found.append({"source": source, "pointer": pointer, "pattern": value, "maxLength": max_length})
+            elif key == "patternProperties" and isinstance(value, dict):
+                for regex in value:
+                    found.append({"source": source, "pointer": pointer, "pattern": regex, "maxLength": None})
+                collect_patterns(value, source, pointer, found)
+            elif key in ("JsonSchemaContent", "jsonSchemaContent") and isinstance(value, str) and value.strip():
+                try:
+                    collect_patterns(json.loads(value), source, pointer, found)
+                except ValueError:
+                    pass
+            else:
+                collect_patterns(value, source, pointer, found)
+    elif isinstance(node, list):
+        for index, item in enumerate(node):
+            collect_patterns(item, source, f"{path}/{index}", found)
+    return found
+
+
+def patterns_from_api(base_url):
+    from ezapi import get_field, iter_pages, new_session
+
+    session = new_session("regex-cost")
+    found = []
+    for schema in iter_pages(session, f"{base_url}/api/v1/schema", size=100):
+        source = f"schema:{get_field(schema, 'ID') or get_field(schema, 'Id')} ({get_field(schema, 'Name', '')})"
+        collect_patterns(schema, source, found=found)
+    return found
+
+
+def patterns_from_paths(paths):
+    found = []
+    for root in paths:
+        files = []
+        if os.path.isdir(root):
+            for dirpath, _, names in os.walk(root):
+                files.extend(os.path.join(dirpath, n) for n in names if n.lower().endswith(".json"))
+        else:
+            files.append(root)
+        for file_path in sorted(files):
+            try:
+                with open(file_path, encoding="utf-8-sig") as f:
+                    document = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"✗ Skipping {file_path}: {e}", file=sys.stderr)
+                continue
+            collect_patterns(document, file_path, found=found)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Static analysis
+# ---------------------------------------------------------------------------
+
+_DOTNET_CLASSES = {
+    r"\p{L}": r"[^\W\d_]", r"\p{Lu}": "[A-Z]", r"\p{Ll}": "[a-z]",
+    r"\p{N}": r"\d", r"\p{Nd}": r"\d", r"\p{IsHebrew}": "[֐-׿]",
+    r"\P{L}": r"[\W\d_]", r"\P{N}": r"\D",
+}
+
+
+def to_python_regex(pattern):
+    """Translate the .NET-only bits of a pattern into Python syntax"""
+    converted = re.sub(r"\(\?<(?![=!])([A-Za-z_]\w*)>", r"(?P<\1>", pattern)
+    for dotnet, python in _DOTNET_CLASSES.items():
+        converted = converted.replace(dotnet, python)
+    return converted.replace(r"\z", r"\Z")
+
+
+def class_chars(items):
+    chars = set()
+    negate = False
+    for op, av in items:
+        name = op_name(op)
+        if name == "NEGATE":
+            negate = True
+        elif name == "LITERAL":
+            chars.add(chr(av))
+        elif name == "RANGE":
+            chars.update(c for c in ALPHABET if av[0] <= ord(c) <= av[1])
+        elif name == "CATEGORY":
+            chars.update(category_chars(op_name(av)))
+    return frozenset(ALPHABET - chars) if negate else frozenset(chars)
+
+
+def category_chars(name):
+    probes = {"DIGIT": r"\d", "WORD": r"\w", "SPACE": r"\s", "LINEBREAK": r"\n"}
+    for key, probe in probes.items():
+        if name.endswith(key):
+            matched = frozenset(c for c in ALPHABET if re.fullmatch(probe, c))
+            return ALPHABET - matched if "NOT_" in name else matched
+    return ALPHABET
+
+
+def is_unbounded(node):
+    op, av = node
+    return op_name(op) in ("MAX_REPEAT", "MIN_REPEAT") and av[1] >= UNBOUNDED
+
+
+def nullable(seq):
+    return all(node_nullable(node) for node in seq)
+
+
+def node_nullable(node):
+    op, av = node
+    name = op_name(op)
+    if name in ("AT", "ASSERT", "ASSERT_NOT"):
+        return True
+    if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        return av[0] == 0 or nullable(av[2])
+    if name == "SUBPATTERN":
+        return nullable(av[3])
+    if name == "ATOMIC_GROUP":
+        return nullable(av)
+    if name == "BRANCH":
+        return any(nullable(alt) for alt in av[1])
+    return False
+
+
+def node_chars(node):
+    """Every character that can appear anywhere in a match of the node"""
+    op, av = node
+    name = op_name(op)
+    if name == "LITERAL":
+        return frozenset([chr(av)])
+    if name == "NOT_LITERAL":
+        return ALPHABET - {chr(av)}
+    if name == "ANY":
+        return ALPHABET - {"\n"}
+    if name == "IN":
+        return class_chars(av)
+    if name == "CATEGORY":
+        return category_chars(op_name(av))
+    if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        return seq_chars(av[2])
+    if name == "SUBPATTERN":
+        return seq_chars(av[3])
+    if name == "ATOMIC_GROUP":
+        return seq_chars(av)
+    if name == "BRANCH":
+        return frozenset().union(*(seq_chars(alt) for alt in av[1]))
+    return frozenset()
+
+
+def seq_chars(seq):
+    return frozenset().union(*(node_chars(node) for node in seq)) if seq else frozenset()
+
+
+def first_chars(seq):
+    result = set()
+    for node in seq:
+        op, av = node
+        name = op_name(op)
+        if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            result |= first_chars(av[2])
+        elif name == "SUBPATTERN":
+            result |= first_chars(av[3])
+        elif name == "ATOMIC_GROUP":
+            result |= first_chars(av)
+        elif name == "BRANCH":
+            for alt in av[1]:
+                result |= first_chars(alt)
+        else:
+            result |= node_chars(node)
+        if not node_nullable(node):
+            break
+    return frozenset(result)
+
+
+def sample(seq):
+    """Shortest-effort string that matches the sequence"""
+    out = []
+    for op, av in seq:
+        name = op_name(op)
+        if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            out.append(sample(av[2]) * av[0])
+        elif name == "SUBPATTERN":
+            out.append(sample(av[3]))
+        elif name == "ATOMIC_GROUP":
+            out.append(sample(av))
+        elif name == "BRANCH":
+            out.append(sample(av[1][0]))
+        elif name in ("LITERAL", "NOT_LITERAL", "ANY", "IN", "CATEGORY"):
+            chars = node_chars((op, av))
+            out.append(min(chars, key=lambda c: (not c.isalnum(), c)) if chars else "")
+    return "".join(out)
+
+
+def dominant_repeats(seq):
+    """Unbounded repeats that can make up a whole iteration of `seq` on their own"""
+    found = []
+    seq = list(seq)
+    for index, node in enumerate(seq):
+        others = seq[:index] + seq[index + 1:]
+        if not nullable(others):
+            continue
+        op, av = node
+        name = op_name(op)
+        if is_unbounded(node):
+            found.append(node)
+        elif name == "SUBPATTERN":
+            found.extend(dominant_repeats(av[3]))
+        elif name == "BRANCH":
+            for alt in av[1]:
+                found.extend(dominant_repeats(alt))
+    return found
+
+
+def dominant_branches(seq):
+    found = []
+    seq = list(seq)
+    for index, node in enumerate(seq):
+        others = seq[:index] + seq[index + 1:]
+        if not nullable(others):
+            continue
+        op, av = node
+        if op_name(op) == "BRANCH":
+            found.append(av[1])
+        elif op_name(op) == "SUBPATTERN":
+            found.extend(dominant_branches(av[3]))
+    return found
+
+
+def analyze_static(parsed):
+    """Return findings: dicts with kind, severity, detail, prefix, pump"""
+    findings = []
+
+    def visit(seq, prefix, atomic):
+        seq = list(seq)
+        for index, node in enumerate(seq):
+            op, av = node
+            name = op_name(op)
+            here = prefix + sample(seq[:index])
+            if is_unbounded(node) and not atomic:
+                body = av[2]
+                for inner in dominant_repeats(body):
+                    overlap = seq_chars(inner[1][2])
+                    if overlap:
+                        findings.append({
+                            "kind": "nested-quantifier", "severity": "high",
+                            "detail": "unbounded repeat directly inside another unbounded repeat",
+                            "prefix": here, "pump": sample(inner[1][2]) or min(overlap),
+                        })
+                for alternatives in dominant_branches(body):
+                    firsts = [first_chars(alt) for alt in alternatives]
+                    for i in range(len(firsts)):
+                        for j in range(i + 1, len(firsts)):
+                            common = firsts[i] & firsts[j]
+                            if common:
+                                findings.append({
+                                    "kind": "overlapping-alternation", "severity": "high",
+                                    "detail": f"alternatives {i + 1} and {j + 1} of a repeated group can start with the same character",
+                                    "prefix": here, "pump": min(common, key=lambda c: (not c.isalnum(), c)),
+                                })
+            if is_unbounded(node) and not atomic:
+                chain = [node]
+                for later in seq[index + 1:]:
+                    if is_unbounded(later) and (seq_chars(later[1][2]) & seq_chars(chain[0][1][2])):
+                        chain.append(later)
+                    elif not node_nullable(later):
+                        break
+                if len(chain) > 1:
+                    common = frozenset.intersection(*(seq_chars(n[1][2]) for n in chain))
+                    if common:
+                        findings.append({
+                            "kind": "adjacent-quantifiers",
+                            "severity": "medium" if len(chain) > 2 else "low",
+                            "detail": f"{len(chain)} overlapping unbounded repeats in sequence (O(n^{len(chain)}))",
+                            "prefix": here, "pump": min(common, key=lambda c: (not c.isalnum(), c)),
+                        })
+            # Recurse
+            if name in ("MAX_REPEAT", "MIN_REPEAT"):
+                visit(av[2], here, atomic)
+            elif name == "POSSESSIVE_REPEAT":
+                visit(av[2], here, True)
+            elif name == "SUBPATTERN":
+                visit(av[3], here, atomic)
+            elif name == "ATOMIC_GROUP":
+                visit(av, here, True)
+            elif name == "BRANCH":
+                for alt in av[1]:
+                    visit(alt, here, atomic)
+            elif name in ("ASSERT", "ASSERT_NOT"):
+                visit(av[1], here, atomic)
+
+    seq = list(parsed)
+    visit(seq, "", False)
+
+    # JSON Schema `pattern` is a search: without ^, every start offset is retried
+    anchored = seq and op_name(seq[0][0]) == "AT"
+    if not anchored:
+        for node in seq:
+            if is_unbounded(node) and not nullable(seq):
+                findings.append({
+                    "kind": "unanchored-search", "severity": "low",
+                    "detail": "pattern is not anchored with ^ and starts with an unbounded repeat (O(n^2) on failure)",
+                    "prefix": "", "pump": sample(node[1][2]) or "a",
+                })
+            if not node_nullable(node):
+                break
+
+    unique = {}
+    for finding in findings:
+        unique.setdefault((finding["kind"], finding["prefix"], finding["pump"]), finding)
+    return list(unique.values())
+
+
+# ---------------------------------------------------------------------------
+# Empirical benchmark
+# ---------------------------------------------------------------------------
+
+def _time_search(compiled, text, min_total=0.002):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        compiled.search(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_total or runs >= 1000:
+            return elapsed / runs
+
+
+def _bench_worker(pattern, prefix, pump, killer, lengths, step_limit, conn):
+    compiled = re.compile(pattern)
+    for n in lengths:
+        text = prefix + pump * n + killer
+        seconds = _time_search(compiled, text)
+        conn.send((n, seconds))
+        if seconds > step_limit:
+            break
+    conn.send(None)
+
+
+def measure(pattern, prefix, pump, killer, budget, step_limit=0.25, lengths=LENGTHS):
+    """Time search() at increasing pump lengths in a child process.
+
+    Returns (points, timed_out). The child is killed once the budget is spent,
+    which is the only way to stop a catastrophic match.
+    """
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(
+        target=_bench_worker, args=(pattern, prefix, pump, killer, lengths, step_limit, child), daemon=True)
+    proc.start()
+    child.close()
+    points = []
+    deadline = time.monotonic() + budget
+    timed_out = False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not parent.poll(remaining):
+            timed_out = True
+            break
+        try:
+            item = parent.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        points.append(item)
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+    return points, timed_out
+
+
+def _linear_fit(xs, ys):
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0, mean_y, 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    intercept = mean_y - slope * mean_x
+    ss_tot = sum((y - mean_y) ** 2 for y in ys)
+    ss_res = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(xs, ys))
+    r2 = 1 - ss_res / ss_tot if ss_tot else 1.0
+    return slope, intercept, r2
+
+
+def classify_growth(points, timed_out):
+    """Fit the timings against exponential and power-law models"""
+    usable = [(n, t) for n, t in points if t > NOISE_FLOOR]
+    if timed_out and len(points) <= 2:
+        return {"growth": "exponential", "detail": "timed out at the smallest input lengths"}
+    if len(usable) < 3:
+        return {"growth": "linear", "detail": "below measurement noise", "model": ("power", 1.0, None)}
+    ns = [n for n, _ in usable]
+    logs = [math.log(t) for _, t in usable]
+    exp_slope, exp_icpt, exp_r2 = _linear_fit(ns, logs)
+    pow_slope, pow_icpt, pow_r2 = _linear_fit([math.log(n) for n in ns], logs)
+    ratio = usable[-1][1] / usable[0][1]
+    if exp_r2 > pow_r2 and pow_slope > 3 and ratio > 50:
+        return {"growth": "exponential", "detail": f"x{math.exp(exp_slope):.2f} per extra character",
+                "model": ("exp", exp_slope, exp_icpt)}
+    degree = round(pow_slope, 1)
+    growth = "linear" if degree < 1.5 else "polynomial"
+    return {"growth": growth, "detail": f"~O(n^{degree})", "degree": degree,
+            "model": ("power", pow_slope, pow_icpt)}
+
+
+def predict(model, n):
+    kind, slope, intercept = model
+    if intercept is None:
+        return None
+    log_t = slope * n + intercept if kind == "exp" else slope * math.log(n) + intercept
+    return math.exp(min(log_t, 700))
+
+
+def analyze_pattern(pattern, field_length=256, budget=3.0, reject_seconds=1e-3):
+    """Static + empirical analysis of one pattern"""
+    result = {"pattern": pattern, "findings": [], "verdict": "ok"}
+    try:
+        python_pattern = to_python_regex(pattern)
+        parsed = sre_parse.parse(python_pattern)
+    except re.error as e:
+        result.update(verdict="error", error=f"cannot parse pattern: {e}")
+        return result
+
+    findings = analyze_static(parsed)
+    result["findings"] = [{k: v for k, v in f.items() if k not in ("prefix",)} for f in findings]
+    candidates = findings or [{"prefix": sample(parsed)[:16], "pump": "a", "kind": "baseline"}]
+
+    worst = None
+    per_finding_budget = budget / len(candidates)
+    for finding in candidates:
+        killer = _pick_killer(python_pattern, finding, per_finding_budget)
+        points, timed_out = measure(python_pattern, finding["prefix"], finding["pump"], killer, per_finding_budget * 0.8)
+        growth = classify_growth(points, timed_out)
+        cost = predict(growth["model"], field_length) if "model" in growth else None
+        score = (growth["growth"] == "exponential", cost or 0)
+        if worst is None or score > worst[0]:
+            worst = (score, {"kind": finding["kind"], "input": repr(finding["prefix"] + finding["pump"] * 4 + "…" + killer),
+                             "points": points, "timed_out": timed_out, "cost_per_record_s": cost, **growth})
+    benchmark = worst[1]
+    benchmark.pop("model", None)
+    result["benchmark"] = benchmark
+
+    severities = {f["severity"] for f in findings}
+    cost = benchmark.get("cost_per_record_s")
+    if benchmark["growth"] == "exponential" or (cost is not None and cost > reject_seconds):
+        result["verdict"] = "reject"
+    elif benchmark["growth"] == "polynomial" or severities & {"high", "medium"}:
+        result["verdict"] = "warn"
+    return result
+
+
+def _probe_worker(pattern, texts, conn):
+    compiled = re.compile(pattern)
+    for text in texts:
+        start = time.perf_counter()
+        compiled.search(text)
+        conn.send(time.perf_counter() - start)
+    conn.send(None)
+
+
+def _pick_killer(pattern, finding, budget):
+    """Choose the suffix character that makes the match fail slowest.
+
+    The probes run in a child process like measure(): a probe still running
+    when the budget is spent is the slowest killer, and the child is killed.
+    """
+    probe_n = 14 if finding["kind"] in ("nested-quantifier", "overlapping-alternation") else 256
+    killers = [k for k in KILLERS if k not in finding["pump"]] or KILLERS[:1]
+    texts = [finding["prefix"] + finding["pump"] * probe_n + killer for killer in killers]
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_probe_worker, args=(pattern, texts, child), daemon=True)
+    proc.start()
+    child.close()
+    best, best_time = killers[0], -1.0
+    deadline = time.monotonic() + budget * 0.2
+    for killer in killers:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not parent.poll(remaining):
+            best = killer  # still backtracking: nothing that finished can be slower
+            break
+        try:
+            elapsed = parent.recv()
+        except EOFError:
+            break
+        if elapsed is None:
+            break
+        if elapsed > best_time:
+            best, best_time = killer, elapsed
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+    return best
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def run_analysis(entries, args):
+    by_pattern = {}
+    for entry in entries:
+        by_pattern.setdefault(entry["pattern"], []).append(entry)
+
+    results = []
+    for pattern, locations in by_pattern.items():
+        lengths = [loc["maxLength"] for loc in locations if isinstance(loc.get("maxLength"), int)]
+        field_length = max(lengths) if lengths else args.field_length
+        result = analyze_pattern(pattern, field_length, args.budget, args.reject_ms / 1000.0)
+        result["fieldLength"] = field_length
+        result["locations"] = [{"source": loc["source"], "pointer": loc["pointer"]} for loc in locations]
+        results.append(result)
+    return results
+
+
+def print_report(results):
+    order = {"reject": 0, "error": 1, "warn": 2, "ok": 3}
+    results = sorted(results, key=lambda r: order[r["verdict"]])
+    icon = {"reject": "✗", "error": "✗", "warn": "!", "ok": "✓"}
+    for r in results:
+        bench = r.get("benchmark", {})
+        cost = bench.get("cost_per_record_s")
+        cost_text = "n/a" if cost is None else (">1h" if cost > 3600 else f"{cost * 1e6:,.1f} µs")
+        print(f"{icon[r['verdict']]} [{r['verdict'].upper():6}] {r['pattern']}")
+        if r.get("error"):
+            print(f"    {r['error']}")
+            continue
+        print(f"    growth: {bench.get('growth')} ({bench.get('detail')}); "
+              f"cost/record @ {r['fieldLength']} chars: {cost_text}")
+        for f in r["findings"]:
+            print(f"    - {f['kind']} [{f['severity']}]: {f['detail']}")
+        if bench.get("points"):
+            curve = ", ".join(f"{n}:{t * 1e6:.1f}µs" for n, t in bench["points"])
+            print(f"    curve (n:time): {curve}{' … timed out' if bench.get('timed_out') else ''}")
+        for loc in r["locations"][:5]:
+            print(f"    at {loc['source']} {loc['pointer']}")
+        if len(r["locations"]) > 5:
+            print(f"    … and {len(r['locations']) - 5} more locations")
+    counts = {v: sum(1 for r in results if r["verdict"] == v) for v in order}
+    print(f"\n=== {len(results)} distinct patterns: {counts['reject']} reject, "
+          f"{counts['warn']} warn, {counts['ok']} ok, {counts['error']} unparsable ===")
+
+
+def exit_code(results, fail_on):
+    levels = {"reject": {"reject", "error"}, "warn": {"reject", "error", "warn"}, "never": set()}
+    return 1 if any(r["verdict"] in levels[fail_on] for r in results) else 0
+
+
+def cmd_scan(args):
+    entries = []
+    if args.from_api:
+        entries += patterns_from_api(args.api_url)
+    if args.path:
+        entries += patterns_from_paths(args.path)
+    entries += [{"source": "cli", "pointer": "", "pattern": p, "maxLength": None} for p in args.pattern or []]
+    if not entries:
+        print("No patterns found (use --from-api, --path or --pattern)")
+        return 0
+    results = run_analysis(entries, args)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.json}")
+    return exit_code(results, args.fail_on)
+
+
+def cmd_gate(args):
+    """Analyze one schema and only publish it when no pattern is rejected"""
+    from ezapi import new_session, unwrap
+
+    session = new_session("regex-cost-gate")
+    response = session.get(f"{args.api_url}/api/v1/schema/{args.schema_id}", timeout=30)
+    response.raise_for_status()
+    schema = unwrap(response.json())
+    entries = collect_patterns(schema, f"schema:{args.schema_id}")
+    results = run_analysis(entries, args) if entries else []
+    print_report(results)
+
+    if exit_code(results, args.fail_on):
+        print(f"✗ Schema {args.schema_id} NOT published: dangerous patterns found")
+        return 1
+    if args.publish:
+        publish = session.post(f"{args.api_url}/api/v1/schema/{args.schema_id}/publish", timeout=30)
+        if publish.status_code != 200:
+            print(f"✗ Publish failed ({publish.status_code}): {publish.text}")
+            return 1
+        print(f"✓ Schema {args.schema_id} published")
+    else:
+        print(f"✓ Schema {args.schema_id} passed regex-cost gate")
+    return 0
+
+
+def main():
+    from ezapi import service_url
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--api-url", default=None, help="DataSourceManagementService base URL")
+    parser.add_argument("--field-length", type=int, default=256,
+                        help="Input length used for cost/record when the schema has no maxLength")
+    parser.add_argument("--budget", type=float, default=3.0, help="Benchmark seconds per pattern")
+    parser.add_argument("--reject-ms", type=float, default=1.0, help="Reject when one check costs more than this")
+    parser.add_argument("--fail-on", choices=["reject", "warn", "never"], default="reject")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="Analyze patterns from the API, files or the command line")
+    scan.add_argument("--from-api", action="store_true", help="Pull all schemas from the Schema API")
+    scan.add_argument("--path", action="append", help="JSON file or directory (repeatable)")
+    scan.add_argument("--pattern", action="append", help="Ad-hoc pattern (repeatable)")
+    scan.add_argument("--json", help="Write the full report to this file")
+    scan.set_defaults(func=cmd_scan)
+
+    gate = sub.add_parser("gate", help="Check a draft schema before POST /{id}/publish")
+    gate.add_argument("schema_id")
+    gate.add_argument("--publish", action="store_true", help="Publish the schema if it passes")
+    gate.set_defaults(func=cmd_gate)
+
+    args = parser.parse_args()
+    args.api_url = (args.api_url or service_url("datasource")).rstrip("/")
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""Local impact index of schema / datasource / metric / category relationships.
+
+Answering "what breaks if this schema changes" through the APIs means one
+GET /api/v1/schema/{id}/usage per schema (and that endpoint only scales
+UsageCount by constants, it does not list anything) plus one
+GET /api/v1/metrics/datasource/{dataSourceId} per datasource. This tool reads
+the four list endpoints instead and keeps the relationships in a small SQLite
+file as edges indexed in both directions:
+
+    schema      -> datasource      DataProcessingSchema.DataSourceId
+    schema      -> field           Fields[].Name, or JsonSchemaContent properties
+    datasource  -> field           the datasource's embedded JsonSchema
+    datasource  -> category        DataSource.Category matched to Name / NameEn / ID
+    metric      -> datasource      DataSourceId, or every datasource for global metrics
+    metric      -> field           Formula, FieldPath, LabelNames, Labels, LabelsExpression
+    metric      -> metric-category MetricConfiguration.Category
+
+Field names are compared the way metric_eval.py compares columns, so
+"$.customer.id", "customer_id" and "CustomerId" are the same field. Formula
+fields come from metric_eval's parser; PromQL formulas fall back to their
+label matchers.
+
+refresh is incremental. Datasources are paged newest-first by updatedAt and
+paging stops at the last watermark; a TotalItems mismatch afterwards means
+something was deleted and triggers one full id pass. Schemas, metrics and
+categories come back whole in one request each, and only rows whose
+UpdatedAt changed are rewritten. Every edge belongs to its source entity, so
+an update replaces that entity's edges and nothing else.
+
+An impact query is a handful of indexed statements over whole id sets, so a
+schema with its datasource, categories and metrics comes back in a few
+hundred microseconds; the time is printed with each answer.
+
+Usage:
+    python schema_index.py refresh
+    python schema_index.py impact schema sales_transaction
+    python schema_index.py impact schema 6650f0c2a1 --field amount
+    python schema_index.py impact field customer_id
+    python schema_index.py impact category "Finance" --json impact.json
+    python schema_index.py impact datasource ds-payments
+    python schema_index.py stats
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+from ezapi import get_field, iter_pages, new_session, service_url, unwrap
+
+DEFAULT_INDEX = "schema-index.sqlite"
+KINDS = ("schema", "datasource", "metric", "category")
+ALL_DATASOURCES = "*"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    kind       TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    updated_at REAL,
+    doc        TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_by_name ON nodes (kind, name);
+CREATE TABLE IF NOT EXISTS edges (
+    src_kind TEXT NOT NULL,
+    src_id   TEXT NOT NULL,
+    dst_kind TEXT NOT NULL,
+    dst_id   TEXT NOT NULL,
+    via      TEXT NOT NULL,
+    PRIMARY KEY (src_kind, src_id, dst_kind, dst_id, via)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_reverse ON edges (dst_kind, dst_id, src_kind, src_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+# ---------------------------------------------------------------------------
+# Field references
+# ---------------------------------------------------------------------------
+
+def field_key(name):
+    """Same normalisation as metric_eval.norm, after stripping JSON path syntax"""
+    name = re.sub(r"^\$\.?|\[[^\]]*\]", "", str(name).strip())
+    return re.sub(r"[\s_.$\-]", "", name).lower()
+
+
+def json_schema_fields(doc, prefix=""):
+    """Property paths of a JSON Schema document (nested objects and array items)"""
+    if isinstance(doc, str):
+        try:
+            doc = json.loads(doc) if doc.strip() else {}
+        except ValueError:
+            return set()
+    out = set()
+    if not isinstance(doc, dict):
+        return out
+    for name, prop in (doc.get("properties") or {}).items():
+        path = f"{prefix}{name}"
+        out.add(path)
+        if isinstance(prop, dict):
+            out |= json_schema_fields(prop, path + ".")
+            if isinstance(prop.get("items"), dict):
+                out |= json_schema_fields(prop["items"], path + ".")
+    return out
+
+
+PROMQL_LABEL_RE = re.compile(r"([A-Za-z_]\w*)\s*(?:=~|!~|!=|=)\s*\"")
+PROMQL_GROUP_RE = re.compile(r"\b(?:by|without)\s*\(([^)]*)\)", re.IGNORECASE)
+LABEL_VALUE_RE = re.compile(r"\$([A-Za-z_][\w.]*)")
+
+
+def formula_fields(formula):
+    """Fields a formula reads, as (field, via) pairs"""
+    if not formula or not formula.strip():
+        return set()
+    # metric_eval pulls in numpy/pandas, so it is only imported when indexing
+    from metric_eval import FormulaError, Parser, fields_of
+    try:
+        return {(f, "formula") for f in fields_of(Parser(formula).parse())}
+    except FormulaError:
+        labels = set(PROMQL_LABEL_RE.findall(formula))
+        for group in PROMQL_GROUP_RE.findall(formula):
+            labels.update(part.strip() for part in group.split(",") if part.strip())
+        return {(f, "promql") for f in labels}
+
+
+def metric_fields(metric):
+    refs = formula_fields(get_field(metric, "Formula") or "")
+    field_path = get_field(metric, "FieldPath")
+    if field_path:
+        refs.add((field_path, "fieldPath"))
+    for name in (get_field(metric, "LabelNames") or "").split(","):
+        if name.strip():
+            refs.add((name.strip(), "label"))
+    for label in get_field(metric, "Labels") or []:
+        name = str(label).split("=", 1)[0].strip()
+        if name:
+            refs.add((name, "label"))
+    for name in LABEL_VALUE_RE.findall(get_field(metric, "LabelsExpression") or ""):
+        refs.add((name, "label"))
+    return {(field_key(f), via) for f, via in refs if field_key(f) and field_key(f) != "*"}
+
+
+# ---------------------------------------------------------------------------
+# Entities -> nodes and edges
+# ---------------------------------------------------------------------------
+
+def parse_time(value):
+    """Epoch seconds from a .NET ISO timestamp (7 fractional digits, Z or offset, or none)"""
+    if not value:
+        return None
+    text = str(value).strip().replace("Z", "+00:00")
+    match = re.match(r"^(.*?\.\d{1,6})\d*(.*)$", text)
+    if match:
+        text = match.group(1) + match.group(2)
+    try:
+        stamp = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+def category_key(text):
+    return " ".join(str(text).split()).casefold()
+
+
+def schema_entity(item):
+    schema_id = str(get_field(item, "ID") or get_field(item, "Id"))
+    fields = {get_field(f, "Name") for f in get_field(item, "Fields") or [] if get_field(f, "Name")}
+    if not fields:
+        fields = json_schema_fields(get_field(item, "JsonSchemaContent") or "")
+    metadata = get_field(item, "Metadata") or {}
+    doc = {"displayName": get_field(item, "DisplayName"), "status": get_field(item, "Status"),
+           "version": get_field(item, "SchemaVersionNumber"), "category": get_field(metadata, "Category"),
+           "fields": len(fields)}
+    edges = [("field", field_key(f), "field") for f in fields if field_key(f)]
+    if get_field(item, "DataSourceId"):
+        edges.append(("datasource", str(get_field(item, "DataSourceId")), "dataSourceId"))
+    return schema_id, get_field(item, "Name") or schema_id, doc, edges
+
+
+def datasource_entity(item):
+    ds_id = str(get_field(item, "ID") or get_field(item, "Id"))
+    category = get_field(item, "Category") or ""
+    doc = {"supplier": get_field(item, "SupplierName"), "category": category,
+           "active": get_field(item, "IsActive"), "schemaVersion": get_field(item, "SchemaVersion")}
+    edges = [("field", field_key(f), "jsonSchema") for f in json_schema_fields(get_field(item, "JsonSchema") or {})
+             if field_key(f)]
+    if category.strip():
+        edges.append(("category-name", category_key(category), "category"))
+    return ds_id, get_field(item, "Name") or ds_id, doc, edges
+
+
+def metric_entity(item):
+    metric_id = str(get_field(item, "ID") or get_field(item, "Id"))
+    scope = (get_field(item, "Scope") or "").lower()
+    ds_id = get_field(item, "DataSourceId")
+    doc = {"displayName": get_field(item, "DisplayName"), "scope": scope, "status": get_field(item, "Status"),
+           "formula": get_field(item, "Formula"), "fieldPath": get_field(item, "FieldPath"),
+           "prometheusType": get_field(item, "PrometheusType")}
+    edges = [("field", key, via) for key, via in metric_fields(item)]
+    if ds_id:
+        edges.append(("datasource", str(ds_id), "dataSourceId"))
+    elif scope != "datasource":
+        edges.append(("datasource", ALL_DATASOURCES, "global"))
+    if get_field(item, "Category"):
+        edges.append(("metric-category", category_key(get_field(item, "Category")), "category"))
+    return metric_id, get_field(item, "Name") or metric_id, doc, edges
+
+
+def category_entity(item):
+    cat_id = str(get_field(item, "ID") or get_field(item, "Id"))
+    doc = {"nameEn": get_field(item, "NameEn"), "active": get_field(item, "IsActive"),
+           "sortOrder": get_field(item, "SortOrder")}
+    aliases = {cat_id, get_field(item, "Name") or "", get_field(item, "NameEn") or ""}
+    edges = [("category-name", category_key(a), "alias") for a in aliases if a.strip()]
+    return cat_id, get_field(item, "Name") or cat_id, doc, edges
+
+
+ENTITY = {"schema": schema_entity, "datasource": datasource_entity,
+          "metric": metric_entity, "category": category_entity}
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class Index:
+    """SQLite-backed node/edge store with incremental upserts"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def stamps(self, kind):
+        return dict(self.db.execute("SELECT id, updated_at FROM nodes WHERE kind = ?", (kind,)))
+
+    def upsert(self, kind, items):
+        """Replace the given entities and their outgoing edges; returns how many changed"""
+        known = self.stamps(kind)
+        changed = 0
+        for item in items:
+            updated = parse_time(get_field(item, "UpdatedAt") or get_field(item, "CreatedAt"))
+            node_id, name, doc, edges = ENTITY[kind](item)
+            if node_id in known and updated is not None and known[node_id] == updated:
+                continue
+            self.db.execute("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?)",
+                            (kind, node_id, name, updated, json.dumps(doc, ensure_ascii=False)))
+            self.db.execute("DELETE FROM edges WHERE src_kind = ? AND src_id = ?", (kind, node_id))
+            self.db.executemany("INSERT OR IGNORE INTO edges VALUES (?, ?, ?, ?, ?)",
+                                [(kind, node_id, dk, di, via) for dk, di, via in edges])
+            changed += 1
+        return changed
+
+    def remove_missing(self, kind, present):
+        gone = [(kind, i) for i in self.stamps(kind) if i not in present]
+        self.db.executemany("DELETE FROM nodes WHERE kind = ? AND id = ?", gone)
+        self.db.executemany("DELETE FROM edges WHERE src_kind = ? AND src_id = ?", gone)
+        return len(gone)
+
+    def count(self, kind):
+        return self.db.execute("SELECT COUNT(*) FROM nodes WHERE kind = ?", (kind,)).fetchone()[0]
+
+
+# ---------------------------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------------------------
+
+def is_live(item):
+    return not get_field(item, "IsDeleted", False)
+
+
+def refresh_datasources(index, session, base, full, page_size):
+    """Newest-first paging down to the watermark; a full id pass only when counts disagree"""
+    watermark = None if full else index.meta("datasource.watermark")
+    known = set(index.stamps("datasource"))
+    url = base + "/api/v1/datasource"
+    params = {"sortBy": "updatedAt", "sortDirection": "desc"}
+    fetched, requests_made, total, pages, newest = [], 0, None, None, watermark
+    page = 1
+    while True:
+        response = session.get(url, params={**params, "page": page, "size": page_size}, timeout=60)
+        response.raise_for_status()
+        requests_made += 1
+        data = unwrap(response.json())
+        items = get_field(data, "Items", []) if isinstance(data, dict) else data or []
+        if total is None and isinstance(data, dict):
+            total, pages = get_field(data, "TotalItems"), get_field(data, "TotalPages")
+        reached = False
+        for item in items:
+            stamp = parse_time(get_field(item, "UpdatedAt"))
+            if watermark is not None and stamp is not None and stamp < watermark:
+                reached = True
+                break
+            fetched.append(item)
+            if stamp is not None and (newest is None or stamp > newest):
+                newest = stamp
+        if reached or len(items) < page_size or (pages is not None and page >= pages):
+            break
+        page += 1
+    live = [i for i in fetched if is_live(i)]
+    changed = index.upsert("datasource", live)
+    ids = {str(get_field(i, "ID") or get_field(i, "Id")) for i in live}
+    if watermark is None:
+        removed = index.remove_missing("datasource", ids)
+    else:
+        deleted = {str(get_field(i, "ID") or get_field(i, "Id")) for i in fetched if not is_live(i)}
+        removed = index.remove_missing("datasource", (known | ids) - deleted)
+        if total is not None and index.count("datasource") != total:
+            # Deletions don't move updatedAt: list every id once and drop the rest
+            present = {str(get_field(i, "ID") or get_field(i, "Id"))
+                       for i in iter_pages(session, url, {"sortBy": "name"}, size=page_size, timeout=60)}
+            requests_made += max(1, -(-total // page_size))
+            removed += index.remove_missing("datasource", present)
+    if newest is not None:
+        index.set_meta("datasource.watermark", newest)
+    return {"fetched": len(fetched), "changed": changed, "removed": removed, "requests": requests_made}
+
+
+def refresh_whole(index, kind, items):
+    """Endpoints that return everything at once: rewrite only rows whose UpdatedAt moved"""
+    live = [i for i in items if is_live(i)]
+    changed = index.upsert(kind, live)
+    removed = index.remove_missing(kind, {str(get_field(i, "ID") or get_field(i, "Id")) for i in live})
+    return {"fetched": len(items), "changed": changed, "removed": removed, "requests": 1}
+
+
+def refresh(index, args):
+    session = new_session("schema-index")
+    base = (args.api_url or service_url("datasource")).rstrip("/")
+    metrics_base = (args.metrics_url or service_url("metrics")).rstrip("/")
+    report = {}
+    with index.db:
+        report["datasource"] = refresh_datasources(index, session, base, args.full, args.page_size)
+
+        # SchemaController pages an in-memory list and has no size cap
+        schemas = list(iter_pages(session, base + "/api/v1/schema", size=args.schema_page_size, timeout=60))
+        report["schema"] = refresh_whole(index, "schema", schemas)
+        report["schema"]["requests"] = max(1, -(-len(schemas) // args.schema_page_size))
+
+        response = session.get(base + "/api/v1/categories", params={"includeInactive": "true"}, timeout=60)
+        response.raise_for_status()
+        report["category"] = refresh_whole(index, "category", unwrap(response.json()) or [])
+
+        response = session.get(metrics_base + "/api/v1/metrics", timeout=60)
+        response.raise_for_status()
+        report["metric"] = refresh_whole(index, "metric", unwrap(response.json()) or [])
+        index.set_meta("refreshedAt", time.time())
+    return report
+
+
+def cmd_refresh(args):
+    index = Index(args.index)
+    started = time.perf_counter()
+    report = refresh(index, args)
+    elapsed = time.perf_counter() - started
+    print(f"{'kind':<11} {'fetched':>8} {'changed':>8} {'removed':>8} {'requests':>9}")
+    for kind in ("datasource", "schema", "category", "metric"):
+        r = report[kind]
+        print(f"{kind:<11} {r['fetched']:>8,} {r['changed']:>8,} {r['removed']:>8,} {r['requests']:>9,}")
+    edges = index.db.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+    print(f"\n{edges:,} edges in {args.index}, refreshed in {elapsed:.2f}s")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+class Query:
+    """Impact queries; every step is one indexed statement over a whole id set"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def ids(self, sql, *params):
+        return {r[0] for r in self.db.execute(sql, params)}
+
+    def out(self, kind, ids, dst_kind):
+        return self.ids("SELECT dst_id FROM edges WHERE src_kind = ? AND src_id IN (SELECT value FROM json_each(?)) "
+                        "AND dst_kind = ?", kind, json.dumps(sorted(ids)), dst_kind)
+
+    def into(self, kind, ids, src_kind):
+        return self.ids("SELECT src_id FROM edges WHERE dst_kind = ? AND dst_id IN (SELECT value FROM json_each(?)) "
+                        "AND src_kind = ?", kind, json.dumps(sorted(ids)), src_kind)
+
+    def resolve(self, kind, ref):
+        """Node ids for an id or a name (names need not be unique)"""
+        found = self.ids("SELECT id FROM nodes WHERE kind = ? AND id = ?", kind, ref)
+        found = found or self.ids("SELECT id FROM nodes WHERE kind = ? AND name = ?", kind, ref)
+        if not found and kind == "category":
+            found = self.into("category-name", {category_key(ref)}, "category")
+        return found
+
+    def nodes(self, kind, ids):
+        rows = {r[0]: {"id": r[0], "name": r[1], **json.loads(r[2])} for r in self.db.execute(
+            "SELECT id, name, doc FROM nodes WHERE kind = ? AND id IN (SELECT value FROM json_each(?))",
+            (kind, json.dumps(sorted(ids))))}
+        return [rows.get(i) or {"id": i, "name": None, "missing": True} for i in sorted(ids)]
+
+    def categories(self, ds_ids):
+        keys = self.out("datasource", ds_ids, "category-name")
+        matched = {}
+        for cat_id, key in self.db.execute(
+                "SELECT src_id, dst_id FROM edges WHERE dst_kind = 'category-name' "
+                "AND dst_id IN (SELECT value FROM json_each(?)) AND src_kind = 'category'", (json.dumps(sorted(keys)),)):
+            matched.setdefault(key, set()).add(cat_id)
+        found = set().union(*matched.values()) if matched else set()
+        unresolved = [{"id": None, "name": k, "unresolved": True} for k in sorted(keys - matched.keys())]
+        return self.nodes("category", found) + unresolved
+
+    def metrics(self, ds_ids, fields):
+        """Metrics scoped to the datasources plus global ones, with the given fields they read.
+
+        fields=None keeps every metric; otherwise metrics reading none of them are dropped.
+        """
+        scope = {}
+        for metric_id, ds_id in self.db.execute(
+                "SELECT src_id, dst_id FROM edges WHERE dst_kind = 'datasource' "
+                "AND dst_id IN (SELECT value FROM json_each(?)) AND src_kind = 'metric'",
+                (json.dumps(sorted(ds_ids | {ALL_DATASOURCES})),)):
+            if ds_id != ALL_DATASOURCES or metric_id not in scope:
+                scope[metric_id] = "global" if ds_id == ALL_DATASOURCES else "datasource"
+        reads = {}
+        for metric_id, field, via in self.db.execute(
+                "SELECT src_id, dst_id, via FROM edges WHERE src_kind = 'metric' "
+                "AND src_id IN (SELECT value FROM json_each(?)) AND dst_kind = 'field'", (json.dumps(sorted(scope)),)):
+            if fields is None or field in fields:
+                reads.setdefault(metric_id, set()).add(f"{via}:{field}")
+        keep = scope if fields is None else reads
+        return [{**node, "via": scope[node["id"]], "reads": sorted(reads.get(node["id"], ()))}
+                for node in self.nodes("metric", keep)]
+
+    def impact_datasources(self, ds_ids, fields):
+        """Shared tail of the impact queries: datasources -> schemas, categories, metrics"""
+        return {"schemas": self.nodes("schema", self.into("datasource", ds_ids, "schema")),
+                "datasources": self.nodes("datasource", ds_ids),
+                "categories": self.categories(ds_ids),
+                "metrics": self.metrics(ds_ids, fields)}
+
+    def impact(self, kind, ref, field=None):
+        fields = {field_key(field)} if field else None
+        if kind == "field":
+            key = field_key(ref)
+            schema_ids = self.into("field", {key}, "schema")
+            ds_ids = self.into("field", {key}, "datasource") | self.out("schema", schema_ids, "datasource")
+            result = self.impact_datasources(ds_ids, {key})
+            result["schemas"] = self.nodes("schema", schema_ids)
+            # Metrics that read the field although their datasource doesn't carry it
+            listed = {m["id"] for m in result["metrics"]}
+            for node in self.nodes("metric", self.into("field", {key}, "metric") - listed):
+                result["metrics"].append({**node, "via": "field only", "reads": [key]})
+            return result
+        ids = self.resolve(kind, ref)
+        if not ids:
+            raise LookupError(f"no {kind} '{ref}' in the index")
+        if kind == "schema":
+            result = self.impact_datasources(self.out("schema", ids, "datasource"),
+                                             fields or self.out("schema", ids, "field"))
+            result["schemas"] = self.nodes("schema", ids)
+            return result
+        if kind == "datasource":
+            return self.impact_datasources(ids, fields)
+        if kind == "category":
+            keys = self.out("category", ids, "category-name")
+            result = self.impact_datasources(self.into("category-name", keys, "datasource"), fields)
+            result["categories"] = self.nodes("category", ids)
+            return result
+        if kind == "metric":
+            reads = self.out("metric", ids, "field")
+            ds_ids = self.out("metric", ids, "datasource")
+            datasources = self.nodes("datasource", ds_ids - {ALL_DATASOURCES})
+            if ALL_DATASOURCES in ds_ids:
+                datasources.append({"id": ALL_DATASOURCES, "name": "(global: every datasource)"})
+            schemas = []
+            for node in self.nodes("schema", self.into("datasource", ds_ids, "schema")):
+                missing = reads - self.out("schema", {node["id"]}, "field")
+                schemas.append({**node, "fieldsNotInSchema": sorted(missing)})
+            metrics = [{**node, "reads": sorted(self.out("metric", {node["id"]}, "field"))}
+                       for node in self.nodes("metric", ids)]
+            return {"schemas": schemas, "datasources": datasources, "metrics": metrics}
+        raise ValueError(kind)
+
+
+def print_impact(kind, ref, result, elapsed_us, limit):
+    print(f"impact of {kind} '{ref}'  ({elapsed_us:,.0f} µs)")
+    for section, label in (("schemas", "schemas"), ("datasources", "datasources"),
+                           ("categories", "categories"), ("metrics", "metrics")):
+        rows = result.get(section) or []
+        if not rows:
+            continue
+        print(f"\n  {label} ({len(rows):,})")
+        for row in rows[:limit]:
+            extra = ""
+            if section == "metrics" and "via" in row:
+                extra = f"  [{row['via']}]" + (f"  reads {', '.join(row['reads'])}" if row.get("reads") else "")
+            elif section == "schemas" and row.get("fieldsNotInSchema"):
+                extra = f"  fields not in schema: {', '.join(row['fieldsNotInSchema'])}"
+            elif row.get("unresolved") or row.get("missing"):
+                extra = "  (not in index)"
+            print(f"    {str(row.get('id')):<26} {str(row.get('name') or ''):<32}{extra}")
+        if len(rows) > limit:
+            print(f"    ... {len(rows) - limit:,} more")
+
+
+def cmd_impact(args):
+    index = Index(args.index)
+    if not index.meta("refreshedAt"):
+        print(f"{args.index} is empty, run 'refresh' first", file=sys.stderr)
+        return 2
+    query = Query(index.db)
+    refs = args.ref or [line.strip() for line in sys.stdin if line.strip()]
+    results = []
+    for ref in refs:
+        started = time.perf_counter()
+        try:
+            result = query.impact(args.kind, ref, args.field)
+        except LookupError as e:
+            print(e, file=sys.stderr)
+            continue
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        results.append({"kind": args.kind, "ref": ref, "field": args.field, "elapsedUs": elapsed_us, **result})
+        print_impact(args.kind, ref, result, elapsed_us, args.limit)
+        print()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"report written to {args.json}")
+    return 0 if len(results) == len(refs) else 1
+
+
+def cmd_stats(args):
+    index = Index(args.index)
+    db = index.db
+    refreshed = index.meta("refreshedAt")
+    print(f"{args.index}: refreshed {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(refreshed)) if refreshed else 'never'}")
+    for kind in KINDS:
+        print(f"  {kind:<11} {index.count(kind):>8,}")
+    print("\n  edges")
+    for src, dst, n in db.execute("SELECT src_kind, dst_kind, COUNT(*) FROM edges GROUP BY 1, 2 ORDER BY 1, 2"):
+        print(f"    {src:>10} -> {dst:<16} {n:>9,}")
+    orphans = db.execute("""SELECT COUNT(*) FROM nodes n WHERE kind = 'datasource' AND NOT EXISTS
+                            (SELECT 1 FROM edges e WHERE e.dst_kind = 'datasource' AND e.dst_id = n.id
+                             AND e.src_kind = 'schema')""").fetchone()[0]
+    dangling = db.execute("""SELECT COUNT(*) FROM edges e WHERE dst_kind = 'datasource' AND dst_id != ?
+                             AND NOT EXISTS (SELECT 1 FROM nodes n WHERE n.kind = 'datasource' AND n.id = e.dst_id)""",
+                          (ALL_DATASOURCES,)).fetchone()[0]
+    unresolved = db.execute("""SELECT COUNT(DISTINCT dst_id) FROM edges e WHERE src_kind = 'datasource'
+                               AND dst_kind = 'category-name' AND NOT EXISTS (SELECT 1 FROM edges c
+                               WHERE c.src_kind = 'category' AND c.dst_kind = 'category-name' AND c.dst_id = e.dst_id)"""
+                            ).fetchone()[0]
+    print(f"\n  datasources without a schema document: {orphans:,}")
+    print(f"  references to datasources not in the index: {dangling:,}")
+    print(f"  datasource category names matching no category: {unresolved:,}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="SQLite index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ref = sub.add_parser("refresh", help="Build or incrementally update the index from the list endpoints")
+    ref.add_argument("--api-url", help="DataSourceManagementService base URL")
+    ref.add_argument("--metrics-url", help="MetricsConfigurationService base URL")
+    ref.add_argument("--full", action="store_true", help="Ignore the datasource watermark")
+    ref.add_argument("--page-size", type=int, default=100, help="Datasource page size (the API caps it at 100)")
+    ref.add_argument("--schema-page-size", type=int, default=1000)
+    ref.set_defaults(func=cmd_refresh)
+
+    imp = sub.add_parser("impact", help="What depends on a schema, field, datasource, category or metric")
+    imp.add_argument("kind", choices=["schema", "field", "datasource", "category", "metric"])
+    imp.add_argument("ref", nargs="*", help="IDs or names (read from stdin when omitted)")
+    imp.add_argument("--field", help="Only metrics reading this field")
+    imp.add_argument("--limit", type=int, default=25, help="Rows shown per section")
+    imp.add_argument("--json", help="Write the answers as JSON")
+    imp.set_defaults(func=cmd_impact)
+
+    stats = sub.add_parser("stats", help="Counts and consistency checks")
+    stats.set_defaults(func=cmd_stats)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""Soak-test harness with per-process resource sampling for the local stack.
+
+start-all-services.ps1 and tools/ServiceOrchestrator start every service with
+`dotnet run`. This tool drives a steady mixed workload against them for hours.
+At a fixed interval it samples each service process, plus mongod, with
+psutil:
+
+- RSS and CPU
+- threads
+- open handles (file descriptors outside Windows)
+- TCP connections
+
+Services that map prometheus-net's /metrics (Validation, Scheduling,
+FileDiscovery, FileProcessor) also report their .NET runtime counters: GC
+collections per generation, the managed heap, and the System.Runtime event
+counters. The heap separates a managed leak from a native one.
+
+The workload is an open-loop request mix over the DataSource, Schema, Metrics
+and InvalidRecords APIs, at --rps. {datasource} in a path is a real
+datasource ID. --drop-dir also copies a file into a watched folder every
+--drop-every seconds, so FileDiscovery, FileProcessor and Validation keep
+working too. Per-endpoint latency is kept as p50/p95 per --window.
+
+When the run ends (at --duration, on Ctrl-C, or with --analyze on a saved
+run), each series is cut after --warmup and reduced to bucket medians. The
+medians are tested for a monotonic trend with Mann-Kendall and a Theil-Sen
+slope:
+
+- RSS, private memory, the managed heap, handles, threads and connections are
+  "growing" when the trend is significant and the slope projects past
+  --leak-mb (or --leak-count) per day
+- an endpoint's p95 is "drifting" when it trends up by more than --drift
+  percent over the run
+
+Samples are appended to a long CSV (time, source, metric, value). It stays
+compact for multi-day runs at 10 s and is easy to plot. The report prints one
+line per series with a sparkline.
+
+Usage:
+    python soak.py --duration 4h --rps 20
+    python soak.py --duration 12h --rps 50 --drop-dir /mnt/external-test-data/soak \\
+        --drop-file sample-data/orders.csv --drop-every 30
+    python soak.py --duration 30m --no-load --interval 5      # sample only, e.g. during traffic_replay.py
+    python soak.py --analyze soak-20250314-0900.csv --warmup 30m
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from cron_load import sparkline
+from ezapi import get_field, new_session, page_items, service_url
+from label_cardinality import LABEL_RE, SAMPLE_RE
+from metric_cache import parse_duration
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+WINDOWS = sys.platform == "win32"
+
+# Processes as `dotnet run` starts them: the apphost is named after the
+# project, or dotnet runs <Project>.dll
+SERVICES = ["DataSourceManagementService", "MetricsConfigurationService", "ValidationService",
+            "InvalidRecordsService", "SchedulingService", "FileDiscoveryService", "FileProcessorService",
+            "OutputService", "DataSourceChatService"]
+# Services that MapMetrics() and have an ezapi base URL; others need --metrics-url
+METRICS_SERVICES = {"ValidationService": "validation", "SchedulingService": "scheduling"}
+
+# prometheus-net runtime series kept from /metrics, with their unit scaling
+RUNTIME_METRICS = {
+    "dotnet_total_memory_bytes": ("heap_mb", 1 / MB),
+    "process_private_memory_bytes": ("private_mb", 1 / MB),
+    "dotnet_collection_count_total": ("gc_gen{generation}", 1),
+}
+RUNTIME_PREFIX = "system_runtime_"  # EventCounter adapter: gen_2_gc_count, time_in_gc, alloc_rate, ...
+
+# (weight, service, path); {datasource} is replaced by a known datasource ID
+DEFAULT_MIX = [
+    (20, "datasource", "/api/v1/datasource?page=1&size=20"),
+    (10, "datasource", "/api/v1/datasource/{datasource}"),
+    (10, "datasource", "/api/v1/DataSource/statistics"),
+    (10, "datasource", "/api/v1/Dashboard/overview"),
+    (10, "datasource", "/api/v1/schema"),
+    (5, "datasource", "/api/v1/categories"),
+    (15, "metrics", "/api/v1/metrics"),
+    (15, "invalid-records", "/api/v1/invalid-records?Page=1&PageSize=25"),
+    (5, "invalid-records", "/api/v1/invalid-records/statistics"),
+]
+
+# Series tested for growth, and the threshold that applies to each
+MEMORY_METRICS = ("rss_mb", "private_mb", "heap_mb")
+COUNT_METRICS = ("handles", "threads", "tcp")
+
+
+# ---------------------------------------------------------------------------
+# Series store
+# ---------------------------------------------------------------------------
+
+class Series:
+    """(time, value) points per (source, metric), mirrored to a long CSV"""
+
+    def __init__(self, path=None):
+        self.points = defaultdict(list)
+        self.events = []
+        self.lock = threading.Lock()
+        self.file = self.writer = None
+        if path:
+            self.file = open(path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["time", "source", "metric", "value"])
+
+    def add(self, when, source, values):
+        with self.lock:
+            for metric, value in values.items():
+                self.points[(source, metric)].append((when, value))
+                if self.writer:
+                    self.writer.writerow([f"{when:.1f}", source, metric, f"{value:.6g}"])
+
+    def event(self, when, source, text):
+        with self.lock:
+            self.events.append((when, source, text))
+            if self.writer:
+                self.writer.writerow([f"{when:.1f}", source, "event", text])
+
+    def flush(self):
+        if self.file:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+    @classmethod
+    def load(cls, path):
+        series = cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                when = float(row["time"])
+                if row["metric"] == "event":
+                    series.events.append((when, row["source"], row["value"]))
+                else:
+                    series.points[(row["source"], row["metric"])].append((when, float(row["value"])))
+        return series
+
+    @property
+    def span(self):
+        times = [t for points in self.points.values() for t, _ in (points[0], points[-1])]
+        return (min(times), max(times)) if times else (0.0, 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Process sampling
+# ---------------------------------------------------------------------------
+
+def process_matchers(extra):
+    """{name: predicate(info)} for the services, mongod and --process NAME=REGEX"""
+    def service(name):
+        dll = name.lower() + ".dll"
+
+        def match(info):
+            stem = os.path.splitext(info["name"] or "")[0]
+            return stem == name or any(arg.lower().endswith(dll) for arg in info["cmdline"] or [])
+        return match
+
+    matchers = {name: service(name) for name in SERVICES}
+    matchers["mongod"] = lambda info: os.path.splitext(info["name"] or "")[0] == "mongod"
+    for item in extra:
+        name, _, pattern = item.partition("=")
+        regex = re.compile(pattern)
+        matchers[name] = lambda info, regex=regex: bool(regex.search(" ".join(info["cmdline"] or [])))
+    return matchers
+
+
+class Sampler:
+    """psutil sampling of the matched processes, following restarts"""
+
+    def __init__(self, matchers, series, metrics_urls, timeout):
+        self.matchers = matchers
+        self.series = series
+        self.metrics_urls = metrics_urls
+        self.timeout = timeout
+        self.processes = {}  # name -> psutil.Process
+        self.http = requests.Session()
+        # Never match this harness or whatever launched it (its command line holds the --process regexes)
+        me = psutil.Process()
+        self.skip = {me.pid} | {parent.pid for parent in me.parents()}
+
+    def discover(self, when):
+        found = {}
+        for proc in psutil.process_iter(["pid", "name", "cmdline", "create_time"]):
+            try:
+                info = proc.info
+                if info["pid"] in self.skip:
+                    continue
+                for name, match in self.matchers.items():
+                    if match(info) and (name not in found or info["create_time"] > found[name].info["create_time"]):
+                        found[name] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        for name, proc in found.items():
+            current = self.processes.get(name)
+            if current is None or current.pid != proc.pid:
+                text = f"pid {proc.pid}" if current is None else f"restarted: pid {current.pid} -> {proc.pid}"
+                self.series.event(when, name, text)
+                print(f"  {name}: {text}")
+                proc.cpu_percent(None)  # prime; the first real reading comes next interval
+                self.processes[name] = proc
+        for name in list(self.processes):
+            if name not in found:
+                self.series.event(when, name, f"gone: pid {self.processes.pop(name).pid}")
+                print(f"⚠ {name} is no longer running")
+
+    def sample(self, when):
+        self.discover(when)
+        for name, proc in self.processes.items():
+            values = {}
+            try:
+                with proc.oneshot():
+                    values["rss_mb"] = proc.memory_info().rss / MB
+                    values["cpu_pct"] = proc.cpu_percent(None)
+                    values["threads"] = proc.num_threads()
+                    values["handles"] = proc.num_handles() if WINDOWS else proc.num_fds()
+                connections = getattr(proc, "net_connections", None) or proc.connections
+                values["tcp"] = len(connections(kind="tcp"))
+            except psutil.AccessDenied:
+                pass  # e.g. mongod in a container: keep what was readable
+            except psutil.NoSuchProcess:
+                continue
+            self.series.add(when, name, values)
+        for name, url in self.metrics_urls.items():
+            if name in self.processes:
+                values = self.scrape(url)
+                if values:
+                    self.series.add(when, name, values)
+
+    def scrape(self, url):
+        """Runtime counters from a prometheus-net /metrics page"""
+        try:
+            response = self.http.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            return {}
+        values = {}
+        for line in response.text.splitlines():
+            if not line or line[0] == "#":
+                continue
+            match = SAMPLE_RE.match(line)
+            if not match:
+                continue
+            name, body = match.groups()
+            labels = dict(LABEL_RE.findall(body)) if body else {}
+            try:
+                value = float(line.rsplit(None, 1)[-1])
+            except ValueError:
+                continue
+            if name in RUNTIME_METRICS:
+                key, scale = RUNTIME_METRICS[name]
+                values[key.format(**labels) if "{" in key else key] = value * scale
+            elif name.startswith(RUNTIME_PREFIX) and not labels:
+                values[name[len(RUNTIME_PREFIX):]] = value
+        return values
+
+
+# ---------------------------------------------------------------------------
+# Workload
+# ---------------------------------------------------------------------------
+
+def load_mix(path):
+    if not path:
+        return DEFAULT_MIX
+    with open(path, encoding="utf-8") as f:
+        return [(float(e.get("weight", 1)), e["service"], e["path"]) for e in json.load(f)]
+
+
+def known_datasources(session, timeout):
+    try:
+        response = session.get(service_url("datasource") + "/api/v1/datasource",
+                               params={"page": 1, "size": 100}, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        print(f"⚠ could not list datasources ({exc}); {{datasource}} requests are skipped")
+        return []
+    items, _ = page_items(response.json())
+    return [str(get_field(item, "Id") or get_field(item, "ID")) for item in items if isinstance(item, dict)]
+
+
+class Load:
+    """Open-loop request mix on a thread pool; latencies per window and endpoint"""
+
+    def __init__(self, args, mix, series):
+        self.args = args
+        self.series = series
+        self.session = new_session("soak")
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=args.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        ids = known_datasources(self.session, args.timeout)
+        self.mix = [(w, service, path) for w, service, path in mix if "{datasource}" not in path or ids]
+        self.datasources = ids
+        self.weights = np.cumsum([w for w, _, _ in self.mix]) / sum(w for w, _, _ in self.mix)
+        self.results = defaultdict(list)  # endpoint -> [(latency_ms, ok)]
+        self.lock = threading.Lock()
+        self.sent = self.failed = self.behind = 0
+        self.stop = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=args.workers)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def request(self, service, path):
+        url = service_url(service) + path.replace("{datasource}", random.choice(self.datasources or [""]))
+        started = time.perf_counter()
+        try:
+            ok = self.session.get(url, timeout=self.args.timeout).status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.results[path.split("?")[0]].append((elapsed, ok))
+            self.failed += not ok
+
+    def run(self):
+        interval = 1.0 / self.args.rps
+        due = time.perf_counter()
+        while not self.stop.is_set():
+            now = time.perf_counter()
+            if now < due:
+                self.stop.wait(due - now)
+                continue
+            if now - due > 1.0:
+                self.behind += 1  # more than a second late: the pool cannot keep up
+            _, service, path = self.mix[int(np.searchsorted(self.weights, random.random(), side="right"))]
+            self.pool.submit(self.request, service, path)
+            self.sent += 1
+            due += interval
+
+    def flush(self, when):
+        """Close a latency window: p50/p95/error share per endpoint"""
+        with self.lock:
+            results, self.results = self.results, defaultdict(list)
+        for endpoint, items in results.items():
+            latencies = np.array([ms for ms, _ in items])
+            errors = sum(not ok for _, ok in items)
+            self.series.add(when, "load " + endpoint, {
+                "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95)),
+                "rps": len(items) / self.args.window, "error_pct": 100.0 * errors / len(items)})
+
+    def start(self):
+        self.thread.start()
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+        self.pool.shutdown(wait=True)
+
+
+class Dropper:
+    """Copies --drop-file into --drop-dir under a new name, atomically"""
+
+    def __init__(self, args):
+        self.source, self.directory = args.drop_file, args.drop_dir
+        self.stem, self.ext = os.path.splitext(os.path.basename(args.drop_file))
+        self.count = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def drop(self):
+        name = f"{self.stem}-soak-{int(time.time())}-{self.count:06d}{self.ext}"
+        tmp = os.path.join(self.directory, "." + name + ".tmp")
+        shutil.copyfile(self.source, tmp)
+        os.replace(tmp, os.path.join(self.directory, name))
+        self.count += 1
+
+
+# ---------------------------------------------------------------------------
+# Trend tests
+# ---------------------------------------------------------------------------
+
+def mann_kendall(values):
+    """(tau, two-sided p) of the Mann-Kendall trend test, with the tie correction"""
+    x = np.asarray(values, dtype=float)
+    n = x.size
+    if n < 4:
+        return 0.0, 1.0
+    s = float(np.triu(np.sign(x[None, :] - x[:, None]), 1).sum())
+    _, ties = np.unique(x, return_counts=True)
+    variance = (n * (n - 1) * (2 * n + 5) - float((ties * (ties - 1) * (2 * ties + 5)).sum())) / 18
+    if variance <= 0 or s == 0:
+        return 0.0, 1.0
+    z = (s - math.copysign(1, s)) / math.sqrt(variance)
+    return s / (n * (n - 1) / 2), math.erfc(abs(z) / math.sqrt(2))
+
+
+def theil_sen(times, values):
+    """Median pairwise slope (value units per second)"""
+    t, v = np.asarray(times, dtype=float), np.asarray(values, dtype=float)
+    i, j = np.triu_indices(t.size, 1)
+    dt = t[j] - t[i]
+    keep = dt > 0
+    return float(np.median((v[j] - v[i])[keep] / dt[keep])) if keep.any() else 0.0
+
+
+def bucket_medians(points, start, buckets):
+    """Median per equal-time bucket of the points after start (drops empty buckets).
+
+    Medians smooth out GC sawtooth and the autocorrelation of raw samples,
+    which would make every wiggle look significant to Mann-Kendall.
+    """
+    pts = [(t, v) for t, v in points if t >= start]
+    if len(pts) < 2:
+        return np.array([]), np.array([])
+    t = np.array([p[0] for p in pts])
+    v = np.array([p[1] for p in pts])
+    edges = np.linspace(t[0], t[-1], min(buckets, len(pts)) + 1)
+    which = np.clip(np.searchsorted(edges, t, side="right") - 1, 0, len(edges) - 2)
+    centers, medians = [], []
+    for b in range(len(edges) - 1):
+        sel = which == b
+        if sel.any():
+            centers.append(float(np.median(t[sel])))
+            medians.append(float(np.median(v[sel])))
+    return np.array(centers), np.array(medians)
+
+
+def analyze(series, args):
+    """One row per tested series, with its trend and verdict"""
+    first, last = series.span
+    start = first + args.warmup
+    rows = []
+    for (source, metric), points in sorted(series.points.items()):
+        is_latency = source.startswith("load ") and metric == "p95_ms"
+        if not (is_latency or metric in MEMORY_METRICS or metric in COUNT_METRICS or metric == "cpu_pct"):
+            continue
+        times, medians = bucket_medians(points, start, args.buckets)
+        if medians.size < 4:
+            continue
+        tau, p = mann_kendall(medians)
+        slope = theil_sen(times, medians)
+        row = {"source": source, "metric": metric, "first": float(medians[0]), "last": float(medians[-1]),
+               "mean": float(np.mean([v for t, v in points if t >= start])),
+               "perDay": slope * 86400, "tau": tau, "p": p, "spark": sparkline(medians - medians.min(), 24),
+               "verdict": ""}
+        significant = p < args.alpha and tau > 0
+        if is_latency:
+            base = float(np.median(medians[: max(1, medians.size // 4)]))
+            row["driftPct"] = 100.0 * slope * (times[-1] - times[0]) / base if base > 0 else 0.0
+            if significant and row["driftPct"] > args.drift:
+                row["verdict"] = "drifting"
+        elif metric in MEMORY_METRICS and significant and row["perDay"] > args.leak_mb:
+            row["verdict"] = "growing"
+        elif metric in COUNT_METRICS and significant and row["perDay"] > args.leak_count:
+            row["verdict"] = "growing"
+        rows.append(row)
+    return {"start": first, "end": last, "warmup": args.warmup, "rows": rows,
+            "events": [{"time": t, "source": s, "text": text} for t, s, text in series.events]}
+
+
+def gc_rates(series):
+    """Collections per hour for each generation counter over the whole run"""
+    rates = {}
+    for (source, metric), points in series.points.items():
+        if metric.startswith("gc_gen") and len(points) > 1 and points[-1][0] > points[0][0]:
+            hours = (points[-1][0] - points[0][0]) / 3600
+            rates.setdefault(source, {})[metric] = max(0.0, points[-1][1] - points[0][1]) / hours
+    return rates
+
+
+def print_report(report, series, args):
+    hours = (report["end"] - report["start"]) / 3600
+    print(f"\nSoak of {hours:.2f} h, trends after a {args.warmup / 60:.0f} min warm-up "
+          f"({args.buckets} buckets, α={args.alpha})")
+    if hours < 1:
+        print("⚠ under an hour of data: only fast leaks can reach significance")
+    rows = [r for r in report["rows"] if not r["source"].startswith("load ")]
+    if rows:
+        width = max(len(r["source"]) for r in rows)
+        print(f"\n{'process':<{width}} {'metric':<10} {'first':>9} {'last':>9} {'per day':>10} {'p':>8}  trend")
+        for r in rows:
+            per_day = f"{r['perDay']:+10.1f}" if r["metric"] != "cpu_pct" else f"{'mean ' + format(r['mean'], '.1f'):>10}"
+            flag = f"  ⚠ {r['verdict']}" if r["verdict"] else ""
+            print(f"{r['source']:<{width}} {r['metric']:<10} {r['first']:>9.1f} {r['last']:>9.1f} {per_day} "
+                  f"{r['p']:>8.1e}  {r['spark']}{flag}")
+    for source, rates in sorted(gc_rates(series).items()):
+        print(f"  {source}: " + ", ".join(f"{k} {v:,.0f}/h" for k, v in sorted(rates.items())))
+    latency = [r for r in report["rows"] if r["source"].startswith("load ")]
+    if latency:
+        width = max(len(r["source"]) - 5 for r in latency)
+        print(f"\n{'endpoint':<{width}} {'p95 first':>10} {'last':>9} {'drift':>8} {'p':>8}  trend")
+        for r in latency:
+            flag = f"  ⚠ {r['verdict']}" if r["verdict"] else ""
+            print(f"{r['source'][5:]:<{width}} {r['first']:>8.1f}ms {r['last']:>7.1f}ms {r['driftPct']:>+7.0f}% "
+                  f"{r['p']:>8.1e}  {r['spark']}{flag}")
+    restarts = [e for e in report["events"] if "restarted" in e["text"] or "gone" in e["text"]]
+    for e in restarts:
+        print(f"⚠ {time.strftime('%H:%M:%S', time.localtime(e['time']))} {e['source']} {e['text']}")
+    flagged = [r for r in report["rows"] if r["verdict"]]
+    growing = {r["source"] for r in flagged if r["metric"] == "rss_mb"}
+    heap = {r["source"] for r in flagged if r["metric"] == "heap_mb"}
+    for source in sorted(growing - heap):
+        if (source, "heap_mb") in series.points:
+            print(f"  {source}: RSS grows while the managed heap does not - look at native memory "
+                  f"(HttpClient/handlers, Kafka/RabbitMQ clients, pinned buffers)")
+    print(f"\n{'✓ no growth or drift found' if not flagged else f'⚠ {len(flagged)} series growing or drifting'}")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def run(args):
+    matchers = process_matchers(args.process)
+    metrics_urls = {name: service_url(key) + "/metrics" for name, key in METRICS_SERVICES.items()}
+    for item in args.metrics_url:
+        name, _, url = item.partition("=")
+        metrics_urls[name] = url
+    out = args.out or time.strftime("soak-%Y%m%d-%H%M.csv")
+    series = Series(out)
+    sampler = Sampler(matchers, series, metrics_urls, args.timeout)
+    load = None if args.no_load else Load(args, load_mix(args.mix), series)
+    dropper = Dropper(args) if args.drop_dir else None
+
+    started = time.time()
+    sampler.sample(started)
+    if not sampler.processes:
+        print("⚠ no service processes found yet; they are picked up as they start")
+    if load:
+        load.start()
+    print(f"Soaking for {args.duration / 3600:.2f} h: sampling every {args.interval:g}s"
+          + (f", {args.rps:g} req/s" if load else "") + f", writing {out}")
+    next_sample = started + args.interval
+    next_window = started + args.window
+    next_drop = started if dropper else math.inf
+    next_status = started + 300
+    try:
+        while True:
+            now = time.time()
+            if now - started >= args.duration:
+                break
+            if now >= next_sample:
+                sampler.sample(now)
+                next_sample += args.interval
+            if load and now >= next_window:
+                load.flush(now)
+                next_window += args.window
+                series.flush()
+            if now >= next_drop:
+                dropper.drop()
+                next_drop += args.drop_every
+            if now >= next_status:
+                next_status += 300
+                rss = sum(points[-1][1] for (s, m), points in series.points.items() if m == "rss_mb")
+                sent = f", {load.sent:,} requests ({load.failed:,} failed)" if load else ""
+                print(f"  {(now - started) / 3600:5.2f} h: {len(sampler.processes)} processes, "
+                      f"{rss:,.0f} MB RSS{sent}")
+            time.sleep(max(0.0, min(next_sample, next_window if load else math.inf, next_drop) - time.time()))
+    except KeyboardInterrupt:
+        print("\nstopped early")
+    if load:
+        load.close()
+        load.flush(time.time())
+        if load.behind:
+            print(f"⚠ the load fell more than 1 s behind {load.behind:,} times; raise --workers")
+    series.close()
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyze", metavar="CSV", help="Report on a saved run instead of running one")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("4h"), help="e.g. 90m, 12h")
+    parser.add_argument("--out", help="Samples CSV (default soak-YYYYmmdd-HHMM.csv)")
+    parser.add_argument("--json", help="Write the trend report as JSON")
+    sampling = parser.add_argument_group("sampling")
+    sampling.add_argument("--interval", type=float, default=10, help="Seconds between process samples")
+    sampling.add_argument("--process", action="append", default=[], metavar="NAME=REGEX",
+                          help="Also sample processes whose command line matches")
+    sampling.add_argument("--metrics-url", action="append", default=[], metavar="NAME=URL",
+                          help="prometheus-net /metrics of a process (e.g. FileProcessorService=...)")
+    load = parser.add_argument_group("workload")
+    load.add_argument("--no-load", action="store_true", help="Only sample; the load comes from elsewhere")
+    load.add_argument("--rps", type=float, default=20)
+    load.add_argument("--workers", type=int, default=32)
+    load.add_argument("--mix", help="JSON list of {weight, service, path} replacing the default mix")
+    load.add_argument("--window", type=float, default=60, help="Seconds per latency window")
+    load.add_argument("--timeout", type=float, default=30)
+    load.add_argument("--drop-dir", help="Folder a datasource watches; --drop-file is copied into it")
+    load.add_argument("--drop-file", help="File to copy into --drop-dir")
+    load.add_argument("--drop-every", type=float, default=60, help="Seconds between dropped files")
+    trend = parser.add_argument_group("trend tests")
+    trend.add_argument("--warmup", type=parse_duration, default=parse_duration("15m"),
+                       help="Ignore the start (JIT, caches, pools filling)")
+    trend.add_argument("--buckets", type=int, default=48, help="Bucket medians per series for the tests")
+    trend.add_argument("--alpha", type=float, default=0.01, help="Mann-Kendall significance level")
+    trend.add_argument("--leak-mb", type=float, default=50, help="MB per day that counts as growth")
+    trend.add_argument("--leak-count", type=float, default=100,
+                       help="Handles/threads/connections per day that count as growth")
+    trend.add_argument("--drift", type=float, default=25, help="p95 increase over the run, in percent")
+    args = parser.parse_args()
+
+    if args.analyze:
+        series = Series.load(args.analyze)
+    else:
+        if psutil is None:
+            print("✗ soak.py needs psutil: pip install psutil")
+            return 1
+        if bool(args.drop_dir) != bool(args.drop_file):
+            parser.error("--drop-dir and --drop-file go together")
+        series = run(args)
+    report = analyze(series, args)
+    print_report(report, series, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
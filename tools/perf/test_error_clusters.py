@@ -0,0 +1,32 @@
+"""Checks for the SketchCounter heavy-hitter table.
+
+Usage:
+    python -m pytest tools/perf/test_error_clusters.py
+"""
+
+from error_clusters import SketchCounter
+
+
+def make_info():
+    return {"record_ids": [], "values": {}, "signatures": set()}
+
+
+def test_rare_keys_do_not_evict_frequent_ones():
+    counter = SketchCounter(examples=0, capacity=3)
+    for key in ("A", "B", "C"):
+        for i in range(100):
+            counter.add(key, make_info, {"id": i})
+    for key in ("x", "y", "z"):
+        counter.add(key, make_info, {"id": 0})
+    assert sorted(counter.info) == ["A", "B", "C"]
+    assert [estimate for _, estimate, _ in counter.top(3)] == [100, 100, 100]
+
+
+def test_frequent_newcomer_replaces_smallest():
+    counter = SketchCounter(examples=0, capacity=2)
+    for key, count in (("A", 100), ("B", 5)):
+        for i in range(count):
+            counter.add(key, make_info, {"id": i})
+    for i in range(10):
+        counter.add("C", make_info, {"id": i})
+    assert sorted(counter.info) == ["A", "C"]
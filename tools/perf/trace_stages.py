@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""Offline trace analyzer for per-stage file-pipeline latency.
+
+Reads trace dumps exported from Jaeger (the query API / UI "Download JSON"
+shape, {"data": [trace, ...]}) or OTLP JSON ({"resourceSpans": [...]}, one
+document or one per line as the collector's file exporter writes them).
+It rebuilds each span tree and computes the following per trace:
+
+- the critical path: the chain of spans that determines the end-to-end time,
+  with the time each service spends on it
+- self time per service: span time not covered by child spans
+- stage timings for the file lifecycle, discovery -> processing ->
+  validation -> output, with the hand-off gap between consecutive stages
+- hops: spans whose parent is in another service, with the wait between the
+  parent (e.g. a publish) and the child (the consume)
+
+Percentiles are reported per stage, per datasource (the data-source-id tag
+anywhere in the trace) and per hop, followed by the slowest traces.
+
+Dumps are decoded as a stream, one trace or resource batch at a time. When the
+input is larger than --memory-mb, spans are first spilled to --partitions temp
+files by trace ID. Each partition then holds whole traces and is analyzed on
+its own, so memory is bounded by the largest partition rather than the dump.
+
+Usage:
+    python trace_stages.py traces.json
+    python trace_stages.py otlp-*.json --by-datasource --top 20 --json stages.json
+    python trace_stages.py huge.json --memory-mb 512 --partitions 64
+    python trace_stages.py generate --traces 200000 --format otlp > synthetic.ndjson
+"""
+
+import argparse
+import glob
+import json
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+# Service name -> lifecycle stage; anything else is reported under its own name
+STAGES = {
+    "DataProcessing.FileDiscovery": "discovery",
+    "DataProcessing.FileProcessor": "processing",
+    "DataProcessing.Validation": "validation",
+    "DataProcessing.Output": "output",
+}
+STAGE_ORDER = ["discovery", "processing", "validation", "output"]
+DATASOURCE_TAGS = ("data-source-id", "validation.data_source_id", "data_source_id", "datasource.id")
+CORRELATION_TAGS = ("correlation-id", "http.request.correlation_id")
+OTLP_KINDS = {1: "internal", 2: "server", 3: "client", 4: "producer", 5: "consumer"}
+
+# Compact span tuple used everywhere after parsing
+TRACE, SPAN, PARENT, SERVICE, NAME, KIND, START, END, DATASOURCE, CORRELATION, ERROR = range(11)
+
+
+# ---------------------------------------------------------------------------
+# Streaming decode
+# ---------------------------------------------------------------------------
+
+def iter_documents(path, chunk=1 << 22):
+    """Yield top-level JSON values of a file holding one or more documents.
+
+    A document shaped {"data": [...]} or {"resourceSpans": [...]} is not
+    decoded whole: the items of that array are yielded one by one, wrapped as
+    {"data": [item]} / {"resourceSpans": [item]}, so a multi-GB single-document
+    export is never fully in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk)
+        pos = 0
+        eof = not buffer
+        array_key = None
+
+        def fill(need_more):
+            nonlocal buffer, pos, eof
+            if eof:
+                return False
+            data = f.read(chunk if not need_more else max(chunk, len(buffer)))
+            if not data:
+                eof = True
+                return False
+            buffer = buffer[pos:] + data
+            pos = 0
+            return True
+
+        while True:
+            while True:
+                # Skip whitespace and the separators of the array being streamed
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or not fill(False):
+                    break
+            if pos >= len(buffer):
+                return
+            if array_key is None:
+                head = buffer[pos:pos + 64]
+                for key in ("data", "resourceSpans"):
+                    prefix = '{"' + key + '"'
+                    if head.replace(" ", "").replace("\n", "").startswith(prefix + ":["):
+                        bracket = buffer.index("[", pos)
+                        array_key, pos = key, bracket + 1
+                        break
+                if array_key is not None:
+                    continue
+            elif buffer[pos] == "]":
+                # End of the streamed array: skip the rest of the envelope
+                depth, pos = 1, pos + 1
+                while depth:
+                    if pos >= len(buffer) and not fill(False):
+                        return
+                    c = buffer[pos]
+                    if c == '"':
+                        end = buffer.find('"', pos + 1)
+                        while end != -1 and (end - len(buffer[:end].rstrip("\\"))) % 2:
+                            end = buffer.find('"', end + 1)
+                        if end == -1:
+                            if not fill(True):
+                                return
+                            continue
+                        pos = end
+                    elif c in "[{":
+                        depth += 1
+                    elif c in "]}":
+                        depth -= 1
+                    pos += 1
+                array_key = None
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if fill(True):
+                    continue
+                raise
+            if end == len(buffer) and not eof:
+                # A number or literal may continue in the next read
+                if fill(True):
+                    continue
+            pos = end
+            yield {array_key: [value]} if array_key else value
+            if pos > chunk:
+                buffer, pos = buffer[pos:], 0
+
+
+def attr_value(value):
+    if not isinstance(value, dict):
+        return value
+    for key in ("stringValue", "intValue", "doubleValue", "boolValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def from_jaeger(trace):
+    processes = {pid: p.get("serviceName", pid) for pid, p in (trace.get("processes") or {}).items()}
+    for span in trace.get("spans") or ():
+        tags = {t.get("key"): t.get("value") for t in span.get("tags") or ()}
+        parent = None
+        for ref in span.get("references") or ():
+            if ref.get("refType") in ("CHILD_OF", None) or parent is None:
+                parent = ref.get("spanID")
+        start = int(span.get("startTime", 0)) * 1000
+        error = tags.get("error") in (True, "true") or tags.get("otel.status_code") == "ERROR"
+        yield (span.get("traceID"), span.get("spanID"), parent,
+               processes.get(span.get("processID"), span.get("processID") or "?"),
+               span.get("operationName", ""), tags.get("span.kind", "internal"),
+               start, start + int(span.get("duration", 0)) * 1000,
+               first_tag(tags, DATASOURCE_TAGS), first_tag(tags, CORRELATION_TAGS), bool(error))
+
+
+def from_otlp(resource_spans):
+    resource = {a.get("key"): attr_value(a.get("value"))
+                for a in (resource_spans.get("resource") or {}).get("attributes") or ()}
+    service = resource.get("service.name", "?")
+    for scope in resource_spans.get("scopeSpans") or resource_spans.get("instrumentationLibrarySpans") or ():
+        for span in scope.get("spans") or ():
+            tags = {a.get("key"): attr_value(a.get("value")) for a in span.get("attributes") or ()}
+            kind = span.get("kind", 1)
+            kind = OTLP_KINDS.get(kind, str(kind).replace("SPAN_KIND_", "").lower())
+            status = (span.get("status") or {}).get("code")
+            yield (span.get("traceId"), span.get("spanId"), span.get("parentSpanId") or None,
+                   service, span.get("name", ""), kind,
+                   int(span.get("startTimeUnixNano", 0)), int(span.get("endTimeUnixNano", 0)),
+                   first_tag(tags, DATASOURCE_TAGS), first_tag(tags, CORRELATION_TAGS),
+                   status in (2, "STATUS_CODE_ERROR"))
+
+
+def first_tag(tags, names):
+    for name in names:
+        value = tags.get(name)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+def iter_spans(paths):
+    for path in paths:
+        for doc in iter_documents(path):
+            if "data" in doc:
+                for trace in doc["data"] or ():
+                    yield from from_jaeger(trace)
+            elif "resourceSpans" in doc:
+                for rs in doc["resourceSpans"] or ():
+                    yield from from_otlp(rs)
+            elif "spans" in doc:
+                yield from from_jaeger(doc)
+
+
+# ---------------------------------------------------------------------------
+# Partitioning by trace
+# ---------------------------------------------------------------------------
+
+def iter_traces(paths, partitions, tmpdir, progress):
+    """Yield (trace_id, spans) with every span of a trace together"""
+    if partitions <= 1:
+        traces = defaultdict(list)
+        for n, span in enumerate(iter_spans(paths), 1):
+            traces[span[TRACE]].append(span)
+            if n % 1_000_000 == 0:
+                progress(f"{n:,} spans read")
+        yield from traces.items()
+        return
+
+    directory = tempfile.mkdtemp(prefix="trace-parts-", dir=tmpdir)
+    try:
+        files = [open(os.path.join(directory, f"part-{i:04d}.pkl"), "wb") for i in range(partitions)]
+        batches = [[] for _ in range(partitions)]
+        for n, span in enumerate(iter_spans(paths), 1):
+            index = zlib.crc32(str(span[TRACE]).encode()) % partitions
+            batch = batches[index]
+            batch.append(span)
+            if len(batch) >= 5000:
+                pickle.dump(batch, files[index], protocol=pickle.HIGHEST_PROTOCOL)
+                batch.clear()
+            if n % 1_000_000 == 0:
+                progress(f"{n:,} spans partitioned")
+        for index, batch in enumerate(batches):
+            if batch:
+                pickle.dump(batch, files[index], protocol=pickle.HIGHEST_PROTOCOL)
+            files[index].close()
+        for index in range(partitions):
+            traces = defaultdict(list)
+            with open(os.path.join(directory, f"part-{index:04d}.pkl"), "rb") as f:
+                while True:
+                    try:
+                        for span in pickle.load(f):
+                            traces[span[TRACE]].append(span)
+                    except EOFError:
+                        break
+            progress(f"partition {index + 1}/{partitions}: {len(traces):,} traces")
+            yield from traces.items()
+            del traces
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Per-trace analysis
+# ---------------------------------------------------------------------------
+
+def covered(intervals, lo, hi):
+    """Length of [lo, hi] covered by the union of intervals"""
+    total, cursor = 0, lo
+    for start, end in sorted(intervals):
+        start, end = max(start, cursor), min(end, hi)
+        if end > start:
+            total += end - start
+            cursor = end
+    return total
+
+
+def subtree_ends(spans, children):
+    """span id -> latest end of the span and all its descendants"""
+    ends = {}
+    for s in sorted(spans, key=lambda s: s[START], reverse=True):
+        ends[s[SPAN]] = max([s[END]] + [ends.get(c[SPAN], c[END]) for c in children.get(s[SPAN], ())])
+    return ends
+
+
+def critical_path(span, children, ends, until, out):
+    """Append (service, ms) segments of the critical path below span.
+
+    Asynchronous children (a consume after a publish span has ended) are
+    followed too; the time between a span's end and its child's start is
+    recorded as a wait after that span's service.
+    """
+    cursor = until
+    for child in sorted(children.get(span[SPAN], ()), key=lambda c: ends[c[SPAN]], reverse=True):
+        if child[START] >= cursor:
+            continue
+        child_end = min(ends[child[SPAN]], cursor)
+        if child_end < cursor:
+            segment(span, child_end, cursor, out)
+        critical_path(child, children, ends, child_end, out)
+        cursor = child[START]
+        if cursor <= span[START]:
+            return
+    if cursor > span[START]:
+        segment(span, span[START], cursor, out)
+
+
+def segment(span, start, end, out):
+    work = min(end, span[END]) - start
+    if work > 0:
+        out.append((span[SERVICE], work))
+    wait = end - max(start, span[END])
+    if wait > 0:
+        out.append((f"wait after {span[SERVICE]}", wait))
+
+
+def stage_of(service):
+    return STAGES.get(service, service)
+
+
+class Stats:
+    """Accumulated per-trace measurements; values in milliseconds"""
+
+    def __init__(self, top):
+        self.top = top
+        self.traces = self.spans = self.orphans = self.errors = 0
+        self.total = array("d")
+        self.stage = defaultdict(lambda: array("d"))
+        self.gap = defaultdict(lambda: array("d"))
+        self.critical = defaultdict(float)
+        self.self_time = defaultdict(float)
+        self.self_per_trace = defaultdict(lambda: array("d"))
+        self.hops = defaultdict(lambda: array("d"))
+        self.datasource = defaultdict(lambda: array("d"))
+        self.slowest = []
+
+    def add(self, trace_id, spans, by_datasource):
+        by_id = {s[SPAN]: s for s in spans}
+        children = defaultdict(list)
+        roots = []
+        for s in spans:
+            if s[PARENT] and s[PARENT] in by_id:
+                children[s[PARENT]].append(s)
+            else:
+                roots.append(s)
+        self.traces += 1
+        self.spans += len(spans)
+        self.orphans += sum(1 for s in roots if s[PARENT])
+        self.errors += any(s[ERROR] for s in spans)
+        start = min(s[START] for s in spans)
+        end = max(s[END] for s in spans)
+        total = (end - start) / 1e6
+        self.total.append(total)
+
+        # Self time per service
+        per_service = defaultdict(float)
+        for s in spans:
+            kids = [(c[START], c[END]) for c in children.get(s[SPAN], ())]
+            own = (s[END] - s[START]) - covered(kids, s[START], s[END])
+            per_service[s[SERVICE]] += own / 1e6
+        for service, ms in per_service.items():
+            self.self_time[service] += ms
+            self.self_per_trace[service].append(ms)
+
+        # Critical path from the latest-ending root
+        segments = []
+        ends = subtree_ends(spans, children)
+        root = max(roots, key=lambda s: ends[s[SPAN]])
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), len(spans) + 100))
+        critical_path(root, children, ends, ends[root[SPAN]], segments)
+        path = defaultdict(float)
+        for name, ns in segments:
+            path[name] += ns / 1e6
+        for service, ms in path.items():
+            self.critical[service] += ms
+
+        # Lifecycle stages
+        stages = {}
+        for s in spans:
+            stage = stage_of(s[SERVICE])
+            first, last = stages.get(stage, (s[START], s[END]))
+            stages[stage] = (min(first, s[START]), max(last, s[END]))
+        for stage, (first, last) in stages.items():
+            self.stage[stage].append((last - first) / 1e6)
+        present = [st for st in STAGE_ORDER if st in stages]
+        for a, b in zip(present, present[1:]):
+            self.gap[f"{a} -> {b}"].append((stages[b][0] - stages[a][1]) / 1e6)
+
+        # Cross-service hops
+        for s in spans:
+            parent = by_id.get(s[PARENT]) if s[PARENT] else None
+            if parent is None or parent[SERVICE] == s[SERVICE]:
+                continue
+            # Async hand-off (publish ended before consume began) waits from the
+            # parent's end; a synchronous call waits from the parent's start
+            ref = parent[END] if s[START] >= parent[END] else parent[START]
+            key = f"{parent[SERVICE]} -> {s[SERVICE]} ({s[NAME]})"
+            self.hops[key].append((s[START] - ref) / 1e6)
+
+        if by_datasource:
+            ds = next((s[DATASOURCE] for s in spans if s[DATASOURCE]), None) or "(none)"
+            self.datasource[ds].append(total)
+
+        if len(self.slowest) < self.top or total > self.slowest[0][0]:
+            corr = next((s[CORRELATION] for s in spans if s[CORRELATION]), None)
+            entry = (total, trace_id, corr, dict(path), len(spans))
+            self.slowest.append(entry)
+            self.slowest.sort(key=lambda e: e[0])
+            if len(self.slowest) > self.top:
+                self.slowest.pop(0)
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def percentiles(values):
+    if not len(values):
+        return None
+    data = np.frombuffer(values, dtype=np.float64)
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {"count": int(data.size), "p50": float(p50), "p90": float(p90), "p99": float(p99),
+            "max": float(data.max()), "mean": float(data.mean())}
+
+
+def table(title, rows, width=48):
+    print(f"\n{title:<{width}} {'count':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, p in rows:
+        print(f"{name[:width]:<{width}} {p['count']:>8,} {p['p50']:>10.1f} {p['p90']:>10.1f} "
+              f"{p['p99']:>10.1f} {p['max']:>10.1f}")
+
+
+def report(stats, args):
+    def ranked(groups, key="p90"):
+        rows = [(k, percentiles(v)) for k, v in groups.items()]
+        return sorted((r for r in rows if r[1]), key=lambda r: r[1][key], reverse=True)
+
+    order = {st: i for i, st in enumerate(STAGE_ORDER)}
+    result = {
+        "traces": stats.traces,
+        "spans": stats.spans,
+        "orphan_spans": stats.orphans,
+        "traces_with_errors": stats.errors,
+        "end_to_end": percentiles(stats.total),
+        "stages": {k: percentiles(v) for k, v in sorted(stats.stage.items(),
+                                                        key=lambda kv: order.get(kv[0], 99))},
+        "handoffs": {k: percentiles(v) for k, v in stats.gap.items()},
+        "critical_path_ms": dict(sorted(stats.critical.items(), key=lambda kv: -kv[1])),
+        "self_time_ms": dict(sorted(stats.self_time.items(), key=lambda kv: -kv[1])),
+        "hops": dict(ranked(stats.hops)[:args.top]),
+        "slowest": [{"trace": t, "correlation_id": c, "ms": ms, "spans": n,
+                     "critical_path_ms": path}
+                    for ms, t, c, path, n in reversed(stats.slowest)],
+    }
+    if args.by_datasource:
+        result["datasources"] = dict(ranked(stats.datasource)[:args.top])
+
+    print(f"{stats.traces:,} traces, {stats.spans:,} spans, {stats.orphans:,} orphan spans, "
+          f"{stats.errors:,} traces with errors")
+    if not stats.traces:
+        return result
+    table("end to end", [("trace", result["end_to_end"])])
+    table("stage (first span start to last span end)",
+          [(k, v) for k, v in result["stages"].items() if v])
+    table("hand-off (next stage start - previous end)", list(result["handoffs"].items()))
+
+    critical_total = sum(stats.critical.values()) or 1
+    print(f"\n{'critical path':<48} {'total':>12} {'share':>7}")
+    for name, ms in result["critical_path_ms"].items():
+        print(f"{name[:48]:<48} {ms / 1000:>11.1f}s {ms / critical_total:>6.1%}")
+    print(f"\n{'service':<48} {'self time':>12} {'p90/trace':>12}")
+    for service, ms in result["self_time_ms"].items():
+        p = percentiles(stats.self_per_trace[service])
+        print(f"{service[:48]:<48} {ms / 1000:>11.1f}s {p['p90']:>10.1f}ms")
+
+    if result["hops"]:
+        table("slowest hops (wait before the child starts)", list(result["hops"].items()), width=60)
+    if args.by_datasource:
+        table("datasource (end to end)", list(result["datasources"].items()))
+    print("\nslowest traces:")
+    for entry in result["slowest"]:
+        path = ", ".join(f"{stage_of(name)} {ms:.0f}ms" for name, ms in
+                         sorted(entry["critical_path_ms"].items(), key=lambda kv: -kv[1])[:4])
+        corr = f" corr {entry['correlation_id']}" if entry["correlation_id"] else ""
+        print(f"  {entry['ms']:>10.1f}ms  {entry['trace']}{corr}  ({entry['spans']} spans; {path})")
+    return result
+
+
+def analyze(args):
+    paths = []
+    for pattern in args.inputs:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    for name, stage in (item.split("=", 1) for item in args.stage):
+        STAGES[name] = stage
+        if stage not in STAGE_ORDER:
+            STAGE_ORDER.append(stage)
+    size = sum(os.path.getsize(p) for p in paths)
+    partitions = args.partitions
+    if partitions == 0:
+        partitions = 1 if size <= args.memory_mb * 2**20 else -(-size // (args.memory_mb * 2**20)) * 2
+    started = time.time()
+
+    def progress(message):
+        print(f"[{time.time() - started:6.1f}s] {message}", file=sys.stderr)
+
+    stats = Stats(args.top)
+    for trace_id, spans in iter_traces(paths, partitions, args.tmpdir, progress):
+        stats.add(trace_id, spans, args.by_datasource)
+    progress(f"{size / 2**20:,.0f} MiB in {partitions} partition(s) analyzed")
+    result = report(stats, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nreport written to {args.json}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Synthetic dumps
+# ---------------------------------------------------------------------------
+
+def generate(args):
+    """Lifecycle traces: discovery publishes, processor, validation and output consume"""
+    rng = random.Random(args.seed)
+    services = list(STAGES)
+    out = sys.stdout
+    t0 = int(time.time() * 1e9) - args.traces * 10**9
+    jaeger_batch = []
+    for n in range(args.traces):
+        trace = f"{rng.getrandbits(128):032x}"
+        ds = f"ds-{rng.randrange(args.datasources):05d}"
+        corr = f"{rng.getrandbits(64):016x}"
+        spans = []
+        cursor = t0 + n * 10**9
+        parent = None
+        for i, service in enumerate(services):
+            slow = 8 if ds.endswith("7") and service.endswith("Validation") else 1
+            work = int(rng.lognormvariate(3, 0.6) * 1e6 * slow)
+            consume = f"{rng.getrandbits(64):016x}"
+            spans.append((service, consume, parent, f"Consume {i}", 5 if parent else 2, cursor, cursor + work))
+            publish = f"{rng.getrandbits(64):016x}"
+            if i < len(services) - 1:
+                spans.append((service, publish, consume, f"Publish {i + 1}", 4,
+                              cursor + work - 2_000_000, cursor + work - 1_000_000))
+            parent = publish
+            cursor += work + int(rng.expovariate(1 / 15) * 1e6)
+        if args.format == "otlp":
+            by_service = defaultdict(list)
+            for service, sid, pid, name, kind, start, end in spans:
+                by_service[service].append({
+                    "traceId": trace, "spanId": sid, "parentSpanId": pid or "", "name": name,
+                    "kind": kind, "startTimeUnixNano": str(start), "endTimeUnixNano": str(end),
+                    "attributes": [{"key": "data-source-id", "value": {"stringValue": ds}},
+                                   {"key": "correlation-id", "value": {"stringValue": corr}}]})
+            doc = {"resourceSpans": [
+                {"resource": {"attributes": [{"key": "service.name", "value": {"stringValue": s}}]},
+                 "scopeSpans": [{"spans": sp}]} for s, sp in by_service.items()]}
+            out.write(json.dumps(doc, separators=(",", ":")) + "\n")
+        else:
+            processes = {f"p{i}": {"serviceName": s} for i, s in enumerate(services)}
+            jaeger_batch.append({"traceID": trace, "processes": processes, "spans": [
+                {"traceID": trace, "spanID": sid, "operationName": name,
+                 "processID": f"p{services.index(service)}",
+                 "references": [{"refType": "CHILD_OF", "traceID": trace, "spanID": pid}] if pid else [],
+                 "startTime": start // 1000, "duration": (end - start) // 1000,
+                 "tags": [{"key": "data-source-id", "type": "string", "value": ds},
+                          {"key": "correlation-id", "type": "string", "value": corr},
+                          {"key": "span.kind", "type": "string",
+                           "value": OTLP_KINDS[kind]}]}
+                for service, sid, pid, name, kind, start, end in spans]})
+    if args.format == "jaeger":
+        out.write('{"data":[')
+        out.write(",".join(json.dumps(t, separators=(",", ":")) for t in jaeger_batch))
+        out.write(f'],"total":{len(jaeger_batch)},"limit":0,"offset":0,"errors":null}}\n')
+    return 0
+
+
+def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] == "generate":
+        parser = argparse.ArgumentParser(prog="trace_stages.py generate")
+        parser.add_argument("--traces", type=int, default=10000)
+        parser.add_argument("--datasources", type=int, default=50)
+        parser.add_argument("--format", choices=("otlp", "jaeger"), default="otlp")
+        parser.add_argument("--seed", type=int, default=1)
+        return generate(parser.parse_args(argv[1:]))
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Jaeger or OTLP JSON dumps (globs allowed)")
+    parser.add_argument("--by-datasource", action="store_true", help="Percentiles per datasource")
+    parser.add_argument("--stage", action="append", default=[],
+                        help="SERVICE=STAGE mapping in addition to the pipeline services")
+    parser.add_argument("--top", type=int, default=10, help="Hops, datasources and traces listed")
+    parser.add_argument("--memory-mb", type=int, default=1024,
+                        help="Inputs above this size are partitioned by trace on disk")
+    parser.add_argument("--partitions", type=int, default=0, help="Spill partitions (0 = from --memory-mb)")
+    parser.add_argument("--tmpdir", help="Directory for spill partitions")
+    parser.add_argument("--json", help="Write the report as JSON")
+    return analyze(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""Record-and-replay of captured API traffic at accelerated speed.
+
+Replays real frontend and automation traffic against another stack, keeping
+its original mix across the DataSource, Schema, Metrics and InvalidRecords
+APIs, and reports how latency and errors compare with the capture.
+
+Captures can be:
+
+- HAR exports (browser devtools, proxies): method, URL, headers, body, status,
+  time and response body per request
+- JSONL request logs, one request per line: CLEF (@t, RequestMethod,
+  RequestPath, StatusCode, Elapsed), Elastic documents with those properties
+  nested, or plain {method, url, status, elapsed_ms, body} records
+- Serilog file logs (logs/dataprocessing-*.txt), from the
+  UseDataProcessingRequestLogging line "HTTP GET /path responded 200 in 12.3 ms".
+  RequestPath has no query string, so list calls replay with their defaults.
+
+Each request is routed to a service by path, the same way as the frontend's
+nginx.conf (invalid-records, metrics and global-alerts have their own
+services; everything else under /api/ is DataSourceManagementService), and
+sent to that service's base URL from ezapi (EZ_<SERVICE>_URL).
+
+IDs differ between environments. Every 24-hex ObjectId in the path, query and
+JSON body is rewritten. The sources, in order:
+
+1. --id-map OLD=NEW pairs or a JSON {old: new} file
+2. schema_index.py indexes of both environments (--source-index, --target-index):
+   datasources, schemas, metrics and categories with the same name
+3. IDs created during the replay: when a captured POST returned an ID (HAR
+   response bodies), the replayed POST's ID replaces it. Later requests that
+   use it wait for that POST.
+4. --unmapped substitute: an ID of the same kind from the target index, picked
+   per captured ID so every use of it lands on the same target entity. The
+   kind comes from the path segment before the ID (datasource/{id}) or the
+   JSON/query key (dataSourceId).
+
+Requests keep their captured inter-arrival times divided by --speed and run
+open-loop on --workers threads. A replay that cannot keep up is reported as
+schedule lag, not hidden as extra latency.
+
+Usage:
+    python traffic_replay.py peak.har --speed 10 --dry-run
+    python traffic_replay.py prod-requests.jsonl --peak-hour --speed 10 --workers 128 \\
+        --source-index prod-index.sqlite --target-index staging-index.sqlite --unmapped substitute
+    python traffic_replay.py logs/dataprocessing-*.txt --read-only --speed 5 --json replay.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as WaitTimeout
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from ezapi import get_field, service_url, unwrap
+
+OBJECT_ID_RE = re.compile(r"(?<![0-9a-fA-F])[0-9a-fA-F]{24}(?![0-9a-fA-F])")
+GUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+# Every ObjectId in a body, with the JSON key in front of it when there is one
+BODY_ID_RE = re.compile(r'(?:"(\w+)"(\s*:\s*)")?(?<![0-9a-fA-F])([0-9a-fA-F]{24})(?![0-9a-fA-F])')
+SERILOG_LINE_RE = re.compile(r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d+ [+-]\d\d:?\d\d) .*?"
+                             r"HTTP (\w+) (\S+) responded (\d+) in ([\d.]+) ms")
+
+# Path prefix -> ezapi service, as nginx.conf and the API clients route them
+ROUTES = (
+    ("/api/v1/invalid-records", "invalid-records"),
+    ("/api/v1/metrics", "metrics"),
+    ("/api/v1/global-alerts", "metrics"),
+    ("/api/v1/scheduling", "scheduling"),
+    ("/api/", "datasource"),
+)
+# Path segment before an ID / JSON or query key holding one -> schema_index kind
+PATH_KINDS = {"datasource": "datasource", "schema": "schema", "metrics": "metric", "categories": "category",
+              "invalid-records": "invalid-record", "global-alerts": "alert"}
+KEY_KINDS = {"datasourceid": "datasource", "schemaid": "schema", "metricid": "metric", "categoryid": "category"}
+MUTATING = {"POST", "PUT", "PATCH", "DELETE"}
+CAPTURE_FIELDS = {
+    "method": ("method", "requestmethod", "http.request.method"),
+    "url": ("url", "requesturl", "url.full", "uri"),
+    "path": ("path", "requestpath", "url.path"),
+    "query": ("query", "querystring", "url.query"),
+    "time": ("@t", "@timestamp", "timestamp", "time", "startedDateTime"),
+    "status": ("status", "statuscode", "http.response.status_code"),
+    "elapsed": ("elapsed", "elapsed_ms", "duration_ms", "latency_ms", "event.duration_ms"),
+    "body": ("body", "requestbody", "postdata"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Captures
+# ---------------------------------------------------------------------------
+
+def parse_time(value):
+    if isinstance(value, (int, float)):
+        return float(value) / (1000 if value > 1e11 else 1)
+    text = str(value).strip().replace("Z", "+00:00")
+    for form in (None, "%Y-%m-%d %H:%M:%S.%f %z"):
+        try:
+            parsed = datetime.fromisoformat(text) if form is None else datetime.strptime(text, form)
+            return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised timestamp '{value}'")
+
+
+def request_record(method, url, at, status=None, elapsed=None, body=None, created=None):
+    parts = urlsplit(url)
+    return {"method": method.upper(), "path": parts.path, "query": parts.query, "at": at,
+            "status": int(status) if status not in (None, "") else None,
+            "elapsed": float(elapsed) / 1000 if elapsed not in (None, "") else None,
+            "body": body or None, "created": created}
+
+
+def created_id(method, text):
+    """ID in a POST response body (ApiResponse.Data.ID or a bare entity)"""
+    if method != "POST" or not text:
+        return None
+    try:
+        data = unwrap(json.loads(text))
+    except ValueError:
+        return None
+    value = get_field(data, "ID") or get_field(data, "Id") if isinstance(data, dict) else None
+    return value if isinstance(value, str) and OBJECT_ID_RE.fullmatch(value) else None
+
+
+def read_har(path):
+    with open(path, encoding="utf-8-sig") as f:
+        entries = json.load(f)["log"]["entries"]
+    for entry in entries:
+        request, response = entry["request"], entry.get("response") or {}
+        content = response.get("content") or {}
+        yield request_record(request["method"], request["url"], parse_time(entry["startedDateTime"]),
+                             response.get("status") or None, entry.get("time"),
+                             (request.get("postData") or {}).get("text"),
+                             created_id(request["method"].upper(), content.get("text")))
+
+
+def flatten(document, out=None):
+    """Lower-cased keys from a log document and its nested property objects"""
+    out = {} if out is None else out
+    for key, value in document.items():
+        if isinstance(value, dict):
+            flatten(value, out)
+        out.setdefault(key.lower(), value)
+    return out
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            fields = flatten(json.loads(line))
+
+            def pick(name):
+                return next((fields[a.lower()] for a in CAPTURE_FIELDS[name] if fields.get(a.lower()) not in
+                             (None, "")), None)
+
+            method, at = pick("method"), pick("time")
+            url = pick("url") or pick("path")
+            if not method or not url or at is None:
+                continue
+            query = pick("query")
+            if query and "?" not in url:
+                url = f"{url}?{str(query).lstrip('?')}"
+            body = pick("body")
+            yield request_record(method, url, parse_time(at), pick("status"), pick("elapsed"),
+                                 json.dumps(body) if isinstance(body, (dict, list)) else body)
+
+
+def read_serilog(path):
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            match = SERILOG_LINE_RE.match(line)
+            if match:
+                at, method, url, status, elapsed = match.groups()
+                yield request_record(method, url, parse_time(at), status, elapsed)
+
+
+def load_capture(paths):
+    records = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, encoding="utf-8-sig", errors="replace") as f:
+                head = f.read(4096).lstrip()
+            if path.endswith(".har") or head.startswith("{") and '"log"' in head[:200]:
+                reader = read_har
+            elif head.startswith("{"):
+                reader = read_jsonl
+            else:
+                reader = read_serilog
+            records.extend(r for r in reader(path) if r["path"].startswith("/api/"))
+    records.sort(key=lambda r: r["at"])
+    return records
+
+
+def select_window(records, args):
+    if args.start:
+        records = [r for r in records if r["at"] >= parse_time(args.start)]
+    if args.end:
+        records = [r for r in records if r["at"] < parse_time(args.end)]
+    if args.read_only:
+        records = [r for r in records if r["method"] not in MUTATING]
+    if args.peak_hour and records:
+        # Busiest --window seconds of the capture
+        times = np.asarray([r["at"] for r in records])
+        ends = np.searchsorted(times, times + args.window, "left")
+        first = int(np.argmax(ends - np.arange(times.size)))
+        records = records[first:int(ends[first])]
+    return records[:args.limit] if args.limit else records
+
+
+def route(path):
+    return next(service for prefix, service in ROUTES if path.lower().startswith(prefix))
+
+
+def template(path):
+    """Endpoint name with IDs and numbers folded, for grouping"""
+    path = OBJECT_ID_RE.sub("{id}", GUID_RE.sub("{guid}", path))
+    return re.sub(r"/\d+(?=/|$)", "/{n}", path)
+
+
+# ---------------------------------------------------------------------------
+# ID rewriting
+# ---------------------------------------------------------------------------
+
+def index_nodes(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT kind, id, name FROM nodes").fetchall()
+
+
+class IdMapper:
+    """Captured ObjectId -> target ObjectId, from explicit pairs, names, the replay itself or substitution"""
+
+    def __init__(self, args):
+        self.map, self.kinds, self.pools = {}, {}, defaultdict(list)
+        self.created = {}            # captured ID -> Future of the replayed ID
+        self.unmapped = args.unmapped
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        for pair in args.id_map or []:
+            if "=" in pair:
+                old, new = pair.split("=", 1)
+                self.map[old.lower()] = new
+            else:
+                with open(pair, encoding="utf-8") as f:
+                    self.map.update({k.lower(): v for k, v in json.load(f).items()})
+        self.explicit = len(self.map)
+        if args.target_index:
+            by_name = defaultdict(list)
+            for kind, node_id, name in index_nodes(args.target_index):
+                self.pools[kind].append(node_id)
+                by_name[(kind, name)].append(node_id)
+            self.by_name = 0
+            for kind, node_id, name in index_nodes(args.source_index) if args.source_index else []:
+                self.kinds[node_id.lower()] = kind
+                target = by_name.get((kind, name))
+                if target and len(target) == 1 and node_id.lower() not in self.map:
+                    self.map[node_id.lower()] = target[0]
+                    self.by_name += 1
+        for pool in self.pools.values():
+            pool.sort()
+
+    def expect(self, captured):
+        self.created[captured.lower()] = Future()
+
+    def learn(self, captured, replayed):
+        future = self.created.get(captured.lower())
+        if future and not future.done():
+            future.set_result(replayed)
+
+    def resolve(self, old, kind, timeout):
+        key = old.lower()
+        future = self.created.get(key)
+        if future is not None:
+            try:
+                new = future.result(timeout=timeout)
+            except WaitTimeout:
+                new = None
+            self._count("created" if new else "created-missing")
+            return new or old
+        new = self.map.get(key)
+        if new:
+            self._count("mapped")
+            return new
+        kind = kind or self.kinds.get(key)
+        pool = self.pools.get(kind)
+        if self.unmapped == "substitute" and pool:
+            # Stable per captured ID: every request that used it hits the same target entity
+            new = pool[int(hashlib.sha1(key.encode()).hexdigest(), 16) % len(pool)]
+            with self.lock:
+                self.map.setdefault(key, new)
+            self._count(f"substituted {kind}")
+            return new
+        self._count("kept")
+        return old
+
+    def _count(self, what):
+        with self.lock:
+            self.counts[what] += 1
+
+    def rewrite(self, record, timeout):
+        segments = record["path"].split("/")
+        for i, segment in enumerate(segments):
+            if OBJECT_ID_RE.fullmatch(segment):
+                kind = PATH_KINDS.get(segments[i - 1].lower()) if i else None
+                segments[i] = self.resolve(segment, kind, timeout)
+        path = "/".join(segments)
+        query = record["query"]
+        if query and OBJECT_ID_RE.search(query):
+            pairs = [(k, OBJECT_ID_RE.sub(lambda m, k=k: self.resolve(m.group(0), KEY_KINDS.get(k.lower()), timeout),
+                                          v)) for k, v in parse_qsl(query, keep_blank_values=True)]
+            query = urlencode(pairs)
+        body = record["body"]
+        if body and OBJECT_ID_RE.search(body):
+            # One pass, so an ID is resolved (and counted) once whether or not it has a key
+            body = BODY_ID_RE.sub(lambda m: (f'"{m.group(1)}"{m.group(2)}"' if m.group(1) else "")
+                                  + self.resolve(m.group(3), KEY_KINDS.get((m.group(1) or "").lower()), timeout),
+                                  body)
+        return path, query, body
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def replay(records, mapper, args):
+    bases = {}
+    local = threading.local()
+    results = [None] * len(records)
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            local.session.mount("http://", adapter)
+            local.session.mount("https://", adapter)
+        return local.session
+
+    def send(index, record, due):
+        started = time.monotonic()
+        path, query, body = mapper.rewrite(record, args.timeout)
+        service = route(record["path"])
+        if service not in bases:
+            bases[service] = args.target or service_url(service)
+        url = bases[service] + path + (f"?{query}" if query else "")
+        headers = {"Accept": "application/json", "X-Correlation-ID": f"replay-{index}"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        sent = time.monotonic()
+        try:
+            response = session().request(record["method"], url, data=body.encode("utf-8") if body else None,
+                                         headers=headers, timeout=args.timeout)
+            status, text = response.status_code, response.text if record["created"] else None
+        except requests.RequestException as e:
+            status, text = 0, None
+            record = {**record, "error": type(e).__name__}
+        finished = time.monotonic()
+        if record["created"]:
+            mapper.learn(record["created"], created_id("POST", text) if status < 400 else None)
+        results[index] = {"service": service, "endpoint": f"{record['method']} {template(record['path'])}",
+                          "captured_status": record["status"], "captured_s": record["elapsed"],
+                          "status": status, "latency_s": finished - sent, "lag_s": started - due,
+                          "error": record.get("error")}
+
+    origin = records[0]["at"]
+    began = time.monotonic()
+    last_report = began
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for index, record in enumerate(records):
+            due = began + (record["at"] - origin) / args.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, index, record, due)
+            now = time.monotonic()
+            if now - last_report >= 10:
+                last_report = now
+                print(f"  … {index + 1:,}/{len(records):,} sent, {now - began:.0f}s "
+                      f"(capture time {(record['at'] - origin) / 60:.1f} min)")
+    return [r for r in results if r], time.monotonic() - began
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def quantile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def failed(status):
+    return status is not None and (status == 0 or status >= 500)
+
+
+def compare(results):
+    groups = defaultdict(list)
+    for r in results:
+        groups[r["endpoint"]].append(r)
+    rows = []
+    for endpoint, group in groups.items():
+        captured = [r["captured_s"] for r in group if r["captured_s"] is not None]
+        replayed = [r["latency_s"] for r in group]
+        with_status = [r for r in group if r["captured_status"] is not None]
+        rows.append({
+            "endpoint": endpoint, "service": group[0]["service"], "requests": len(group),
+            "captured_p50": quantile(captured, 50), "captured_p95": quantile(captured, 95),
+            "replay_p50": quantile(replayed, 50), "replay_p95": quantile(replayed, 95),
+            "captured_errors": sum(failed(r["captured_status"]) for r in group) / len(group),
+            "replay_errors": sum(failed(r["status"]) for r in group) / len(group),
+            "status_changed": sum(r["captured_status"] != r["status"] for r in with_status),
+            "statuses": dict(Counter(str(r["status"]) for r in group).most_common(4)),
+        })
+    return rows
+
+
+def ms(value):
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+def print_report(records, results, elapsed, rows, mapper, args):
+    span = records[-1]["at"] - records[0]["at"] if records else 0
+    lags = [r["lag_s"] for r in results]
+    print(f"\nReplayed {len(results):,} requests from {span / 60:.1f} min of capture in {elapsed:.1f}s "
+          f"(x{span / elapsed if elapsed else 0:.1f} achieved, x{args.speed:g} asked)")
+    print(f"schedule lag p50 {ms(quantile(lags, 50))} ms, p99 {ms(quantile(lags, 99))} ms"
+          + ("  ← workers saturated; raise --workers" if (quantile(lags, 99) or 0) > 1 else ""))
+    print("IDs: " + ", ".join(f"{v:,} {k}" for k, v in mapper.counts.most_common()) if mapper.counts else "IDs: none")
+
+    print(f"\n{'endpoint':<58} {'reqs':>6} {'cap p50':>8} {'rep p50':>8} {'cap p95':>8} {'rep p95':>8} "
+          f"{'Δp95':>7} {'cap err':>8} {'rep err':>8} {'status≠':>8}")
+    def regression(row):
+        if row["captured_p95"] is None:
+            return -1
+        return row["replay_p95"] / max(row["captured_p95"], 1e-3)
+    for row in sorted(rows, key=lambda r: (-(r["replay_errors"] - r["captured_errors"]), -regression(r)))[:args.top]:
+        delta = "-" if row["captured_p95"] is None else f"{row['replay_p95'] / max(row['captured_p95'], 1e-3):.1f}x"
+        print(f"{row['endpoint'][:58]:<58} {row['requests']:>6,} {ms(row['captured_p50']):>8} "
+              f"{ms(row['replay_p50']):>8} {ms(row['captured_p95']):>8} {ms(row['replay_p95']):>8} {delta:>7} "
+              f"{row['captured_errors']:>8.1%} {row['replay_errors']:>8.1%} {row['status_changed']:>8,}")
+
+    by_service = defaultdict(list)
+    for r in results:
+        by_service[r["service"]].append(r)
+    print(f"\n{'service':<16} {'reqs':>8} {'cap p95 ms':>11} {'rep p95 ms':>11} {'cap err':>8} {'rep err':>8}")
+    for service, group in sorted(by_service.items()):
+        captured = [r["captured_s"] for r in group if r["captured_s"] is not None]
+        print(f"{service:<16} {len(group):>8,} {ms(quantile(captured, 95)):>11} "
+              f"{ms(quantile([r['latency_s'] for r in group], 95)):>11} "
+              f"{sum(failed(r['captured_status']) for r in group) / len(group):>8.1%} "
+              f"{sum(failed(r['status']) for r in group) / len(group):>8.1%}")
+    changed = sum(row["status_changed"] for row in rows)
+    if changed:
+        print(f"\n{changed:,} responses changed status; 404s usually mean an ID that was not mapped "
+              f"(--id-map, --source-index/--target-index, --unmapped substitute)")
+
+
+def print_plan(records, mapper, args):
+    span = records[-1]["at"] - records[0]["at"] if records else 0
+    services = Counter(route(r["path"]) for r in records)
+    endpoints = Counter(f"{r['method']} {template(r['path'])}" for r in records)
+    ids = Counter()
+    for r in records:
+        for text in (r["path"], r["query"], r["body"] or ""):
+            for match in OBJECT_ID_RE.finditer(text):
+                key = match.group(0).lower()
+                ids["mapped" if key in mapper.map else "created in replay" if key in mapper.created
+                    else "unmapped"] += 1
+    start = datetime.fromtimestamp(records[0]["at"], tz=timezone.utc) if records else None
+    print(f"{len(records):,} requests over {span / 60:.1f} min from {start:%Y-%m-%d %H:%M:%S} UTC "
+          f"→ {span / args.speed:.0f}s at x{args.speed:g} ({len(records) / max(span / args.speed, 1e-9):.1f} req/s)")
+    print("services: " + ", ".join(f"{s} {n:,}" for s, n in services.most_common()))
+    print("methods: " + ", ".join(f"{m} {n:,}" for m, n in Counter(r["method"] for r in records).most_common()))
+    print("ID occurrences: " + (", ".join(f"{n:,} {k}" for k, n in ids.most_common()) or "none"))
+    print(f"\n{'endpoint':<70} {'requests':>9}")
+    for endpoint, count in endpoints.most_common(args.top):
+        print(f"{endpoint[:70]:<70} {count:>9,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+", help="HAR, JSONL request logs or Serilog file logs (globs allowed)")
+    selection = parser.add_argument_group("selection")
+    selection.add_argument("--start", help="Only requests at or after this time (ISO 8601)")
+    selection.add_argument("--end", help="Only requests before this time")
+    selection.add_argument("--peak-hour", action="store_true", help="Only the busiest --window seconds")
+    selection.add_argument("--window", type=float, default=3600)
+    selection.add_argument("--read-only", action="store_true", help="Skip POST/PUT/PATCH/DELETE")
+    selection.add_argument("--limit", type=int, default=0)
+    ids = parser.add_argument_group("ID rewriting")
+    ids.add_argument("--id-map", action="append", metavar="OLD=NEW|FILE", help="Explicit ID pairs or a JSON map")
+    ids.add_argument("--source-index", help="schema_index.py index of the captured environment")
+    ids.add_argument("--target-index", help="schema_index.py index of the replay target")
+    ids.add_argument("--unmapped", choices=("keep", "substitute"), default="keep",
+                     help="IDs with no mapping: keep them, or use a target entity of the same kind")
+    replaying = parser.add_argument_group("replay")
+    replaying.add_argument("--target", help="Send everything to this base URL instead of the ezapi service URLs")
+    replaying.add_argument("--speed", type=float, default=1.0, help="Divide inter-arrival times by this factor")
+    replaying.add_argument("--workers", type=int, default=64, help="Requests in flight at most")
+    replaying.add_argument("--timeout", type=float, default=30)
+    replaying.add_argument("--dry-run", action="store_true", help="Summarize the capture and ID coverage only")
+    parser.add_argument("--top", type=int, default=25, help="Endpoints listed")
+    parser.add_argument("--json", help="Write per-endpoint comparison as JSON")
+    parser.add_argument("--out", help="Write one NDJSON line per replayed request")
+    args = parser.parse_args()
+    if args.target:
+        args.target = args.target.rstrip("/")
+    if args.source_index and not args.target_index:
+        parser.error("--source-index needs --target-index")
+
+    records = select_window(load_capture(args.captures), args)
+    if not records:
+        raise SystemExit("No /api/ requests in the capture (after --start/--end/--read-only)")
+    mapper = IdMapper(args)
+    for record in records:
+        if record["created"]:
+            mapper.expect(record["created"])
+    if args.target_index:
+        print(f"target index: {sum(len(p) for p in mapper.pools.values()):,} entities; "
+              f"{getattr(mapper, 'by_name', 0):,} captured IDs matched by name, {mapper.explicit:,} explicit")
+    print_plan(records, mapper, args)
+    if args.dry_run:
+        return 0
+
+    print(f"\nReplaying at x{args.speed:g} with {args.workers} workers …")
+    results, elapsed = replay(records, mapper, args)
+    rows = compare(results)
+    print_report(records, results, elapsed, rows, mapper, args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+        print(f"\nper-request results written to {args.out}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"requests": len(results), "elapsed_s": elapsed, "speed": args.speed,
+                       "ids": dict(mapper.counts), "endpoints": rows}, f, indent=2)
+        print(f"comparison written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""Conditional-request polling client for the wallboard statistics endpoints.
+
+Wallboards poll Dashboard/overview, DataSource/statistics,
+DataSource/{id}/statistics and invalid-records/statistics every few seconds
+and re-download the full payload each time. The Poller in this tool:
+
+- coalesces concurrent requests for the same URL into one upstream request, and
+  answers again from memory for --max-age seconds
+- revalidates with If-None-Match / If-Modified-Since when the service sent
+  ETag / Last-Modified, and treats 304 as unchanged
+- otherwise hashes the body: identical bytes skip JSON parsing, and
+  a canonical hash of the parsed JSON without the volatile fields
+  (correlationId, retrievedAt, calculatedAt, ...) decides whether anything
+  really changed. None of these endpoints sends validators today, and every
+  response carries a fresh correlation ID and timestamp.
+- pushes only the changed fields (path -> new value) to subscribers
+
+watch  Polls the endpoints and prints one NDJSON line per change.
+serve  Runs a hub that wallboards poll instead of the services. It serves the
+       same paths with a weak ETag, returns 304 to unchanged wallboards, and
+       streams changed fields as Server-Sent Events on /events. However many
+       wallboards poll, each upstream URL is fetched at most once per
+       --max-age.
+bench  Simulates --wallboards clients polling through one Poller and compares
+       the upstream requests, bytes and parses with polling directly.
+
+Usage:
+    python wallboard_poll.py watch --interval 5
+    python wallboard_poll.py watch --datasource 6751d3... --datasource 6751d4...
+    python wallboard_poll.py serve --port 8088 --max-age 3
+    python wallboard_poll.py bench --wallboards 40 --every 5 --duration 60
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from ezapi import new_session, service_url
+
+VOLATILE = ("correlationId", "retrievedAt", "calculatedAt", "generatedAt", "timestamp",
+            "requestId", "lastUpdated")
+
+# Wallboard paths and the service that answers them
+ROUTES = [
+    ("/api/v1/invalid-records", "invalid-records"),
+    ("/api/v1", "datasource"),
+]
+
+
+def upstream_url(path):
+    for prefix, service in ROUTES:
+        if path.lower().startswith(prefix.lower()):
+            return service_url(service) + path
+    raise KeyError(path)
+
+
+def default_paths(args):
+    paths = []
+    if not args.datasource or args.all:
+        paths += ["/api/v1/Dashboard/overview",
+                  "/api/v1/DataSource/statistics",
+                  "/api/v1/invalid-records/statistics"]
+    paths += [f"/api/v1/DataSource/{ds}/statistics" for ds in args.datasource]
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Content hashing and diffs
+# ---------------------------------------------------------------------------
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def canonical(value, volatile):
+    """The payload without volatile keys (matched case-insensitively)"""
+    if isinstance(value, dict):
+        return {k: canonical(v, volatile) for k, v in value.items() if k.lower() not in volatile}
+    if isinstance(value, list):
+        return [canonical(v, volatile) for v in value]
+    return value
+
+
+def flatten(value, prefix="", out=None):
+    """{"/a/b/0": leaf} for every leaf of a JSON value"""
+    if out is None:
+        out = {}
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            flatten(v, f"{prefix}/{k}", out)
+    elif isinstance(value, list) and value:
+        for i, v in enumerate(value):
+            flatten(v, f"{prefix}/{i}", out)
+    else:
+        out[prefix or "/"] = value
+    return out
+
+
+def diff(before, after):
+    """{path: new value} for changed and added leaves, None for removed ones"""
+    changes = {path: value for path, value in after.items()
+               if path not in before or before[path] != value}
+    changes.update({path: None for path in before if path not in after})
+    return changes
+
+
+# ---------------------------------------------------------------------------
+# Poller
+# ---------------------------------------------------------------------------
+
+class Entry:
+    __slots__ = ("url", "etag", "last_modified", "raw_hash", "digest", "body", "value",
+                 "flat", "version", "checked", "changed")
+
+    def __init__(self, url):
+        self.url = url
+        self.etag = self.last_modified = self.raw_hash = self.digest = None
+        self.body = b""
+        self.value = None
+        self.flat = {}
+        self.version = 0
+        self.checked = 0.0
+        self.changed = None
+
+
+class Poller:
+    """Coalescing, revalidating GET client shared by every subscriber"""
+
+    def __init__(self, session=None, max_age=2.0, timeout=30, volatile=VOLATILE):
+        self.session = session or new_session("wallboard-poll")
+        self.max_age = max_age
+        self.timeout = timeout
+        self.volatile = {k.lower() for k in volatile}
+        self.entries = {}
+        self.inflight = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys(("calls", "fresh", "coalesced", "requests", "not_modified",
+                                    "same_bytes", "same_content", "changed", "parsed",
+                                    "bytes", "errors"), 0)
+
+    def subscribe(self, callback):
+        """callback(url, version, changes) after every change"""
+        self.subscribers.append(callback)
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def get(self, url):
+        """Current Entry for url, fetching at most once per max_age across all callers"""
+        with self.lock:
+            self.stats["calls"] += 1
+            entry = self.entries.get(url)
+            if entry is not None and time.monotonic() - entry.checked < self.max_age:
+                self.stats["fresh"] += 1
+                return entry
+            future = self.inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self.inflight[url] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+        try:
+            entry = self._revalidate(url, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            self._count("errors")
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[url]
+
+    def _revalidate(self, url, entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        self._count("requests")
+        now = time.monotonic()
+        if response.status_code == 304 and entry is not None:
+            self._count("not_modified")
+            entry.checked = now
+            return entry
+        response.raise_for_status()
+        body = response.content
+        self._count("bytes", len(body))
+        raw_hash = digest(body)
+        if entry is not None and raw_hash == entry.raw_hash:
+            self._count("same_bytes")
+            entry.checked = now
+            return entry
+
+        value = response.json()
+        self._count("parsed")
+        canon = canonical(value, self.volatile)
+        content = digest(json.dumps(canon, sort_keys=True, separators=(",", ":")).encode())
+        fresh = Entry(url)
+        fresh.etag = response.headers.get("ETag")
+        fresh.last_modified = response.headers.get("Last-Modified")
+        fresh.raw_hash, fresh.digest, fresh.body, fresh.value = raw_hash, content, body, value
+        fresh.checked = now
+        if entry is not None and content == entry.digest:
+            # Only volatile fields moved: keep the version, refresh the body
+            self._count("same_content")
+            fresh.flat, fresh.version, fresh.changed = entry.flat, entry.version, entry.changed
+            with self.lock:
+                self.entries[url] = fresh
+            return fresh
+
+        fresh.flat = flatten(canon)
+        fresh.version = (entry.version if entry else 0) + 1
+        fresh.changed = time.time()
+        changes = diff(entry.flat if entry else {}, fresh.flat)
+        self._count("changed")
+        with self.lock:
+            self.entries[url] = fresh
+        for callback in list(self.subscribers):
+            callback(url, fresh.version, changes)
+        return fresh
+
+
+# ---------------------------------------------------------------------------
+# watch
+# ---------------------------------------------------------------------------
+
+def watch(args):
+    poller = Poller(max_age=0, timeout=args.timeout)
+    urls = [upstream_url(p) for p in default_paths(args)]
+    out = threading.Lock()
+
+    def emit(url, version, changes):
+        with out:
+            print(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "url": url,
+                              "version": version, "changes": changes}, ensure_ascii=False), flush=True)
+
+    poller.subscribe(emit)
+    polls = 0
+    with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as pool:
+        try:
+            while not args.count or polls < args.count:
+                started = time.monotonic()
+                for url, result in zip(urls, pool.map(lambda u: safe_get(poller, u), urls)):
+                    if isinstance(result, Exception):
+                        print(f"{url}: {result}", file=sys.stderr)
+                polls += 1
+                time.sleep(max(args.interval - (time.monotonic() - started), 0))
+        except KeyboardInterrupt:
+            pass
+    print_stats(poller, polls * len(urls))
+    return 0
+
+
+def safe_get(poller, url):
+    try:
+        return poller.get(url)
+    except (requests.RequestException, ValueError) as e:
+        return e
+
+
+def print_stats(poller, direct_requests=None, direct_bytes=None):
+    s = poller.stats
+    print(f"calls {s['calls']:,}: fresh {s['fresh']:,}, coalesced {s['coalesced']:,}, "
+          f"upstream {s['requests']:,} (304 {s['not_modified']:,}, same bytes {s['same_bytes']:,}, "
+          f"same content {s['same_content']:,}, changed {s['changed']:,}, errors {s['errors']:,})",
+          file=sys.stderr)
+    line = f"downloaded {s['bytes'] / 1024:,.1f} KiB, parsed {s['parsed']:,} payloads"
+    if direct_requests:
+        line += f"; polling directly: {direct_requests:,} requests/parses"
+        if direct_bytes:
+            line += f", {direct_bytes / 1024:,.1f} KiB"
+        if s["requests"]:
+            line += f" ({direct_requests / s['requests']:.1f}x requests, " \
+                    f"{direct_requests / max(s['parsed'], 1):.1f}x parses)"
+    print(line, file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# serve
+# ---------------------------------------------------------------------------
+
+class Hub:
+    def __init__(self, poller):
+        self.poller = poller
+        self.clients = []
+        self.lock = threading.Lock()
+        poller.subscribe(self.publish)
+
+    def publish(self, url, version, changes):
+        path = urlsplit(url).path
+        message = json.dumps({"path": path, "version": version, "changes": changes},
+                             ensure_ascii=False)
+        with self.lock:
+            clients = list(self.clients)
+        for q in clients:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                pass  # a stalled client misses changes and reloads on reconnect
+
+    def attach(self):
+        q = queue.Queue(maxsize=1000)
+        with self.lock:
+            self.clients.append(q)
+        return q
+
+    def detach(self, q):
+        with self.lock:
+            self.clients.remove(q)
+
+
+def make_handler(hub, paths, refresh):
+    allowed = {p.lower() for p in paths}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == "/events":
+                return self.events()
+            if path == "/stats":
+                return self.send_json(200, hub.poller.stats)
+            lower = path.lower()
+            if lower not in allowed and not (lower.startswith("/api/v1/datasource/")
+                                             and lower.endswith("/statistics")):
+                return self.send_json(404, {"error": f"not a wallboard path: {path}"})
+            try:
+                entry = hub.poller.get(upstream_url(path))
+            except requests.HTTPError as e:
+                return self.send_json(e.response.status_code, {"error": str(e)})
+            except (requests.RequestException, ValueError) as e:
+                return self.send_json(502, {"error": str(e)})
+            etag = f'W/"{entry.digest}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={int(hub.poller.max_age)}")
+            self.send_header("Content-Length", str(len(entry.body)))
+            self.end_headers()
+            self.wfile.write(entry.body)
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def events(self):
+            q = hub.attach()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while True:
+                    try:
+                        message = q.get(timeout=refresh)
+                        self.wfile.write(f"event: change\ndata: {message}\n\n".encode())
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                hub.detach(q)
+
+    return Handler
+
+
+def serve(args):
+    poller = Poller(max_age=args.max_age, timeout=args.timeout)
+    hub = Hub(poller)
+    paths = default_paths(args)
+
+    def refresher():
+        # Keep the SSE stream live even when no wallboard is polling
+        while True:
+            for path in paths:
+                safe_get(poller, upstream_url(path))
+            time.sleep(args.max_age)
+
+    if args.push:
+        threading.Thread(target=refresher, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(hub, paths, 15))
+    print(f"hub on http://{args.host}:{args.port} (events on /events, stats on /stats)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print_stats(poller)
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench
+# ---------------------------------------------------------------------------
+
+def bench(args):
+    poller = Poller(max_age=args.max_age, timeout=args.timeout)
+    urls = [upstream_url(p) for p in default_paths(args)]
+    deadline = time.monotonic() + args.duration
+    direct = [0]
+    lock = threading.Lock()
+
+    def wallboard(seed):
+        rng = random.Random(seed)
+        time.sleep(rng.uniform(0, args.every))
+        while time.monotonic() < deadline:
+            for url in urls:
+                safe_get(poller, url)
+            with lock:
+                direct[0] += len(urls)
+            time.sleep(args.every * rng.uniform(0.9, 1.1))
+
+    threads = [threading.Thread(target=wallboard, args=(i,), daemon=True)
+               for i in range(args.wallboards)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Direct polling downloads a full payload per call, the average observed size
+    body = poller.stats["bytes"] / max(poller.stats["requests"] - poller.stats["not_modified"], 1)
+    print_stats(poller, direct[0], direct[0] * body)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, func in (("watch", watch), ("serve", serve), ("bench", bench)):
+        p = sub.add_parser(name)
+        p.set_defaults(func=func)
+        p.add_argument("--datasource", action="append", default=[],
+                       help="Also poll DataSource/{id}/statistics (repeatable)")
+        p.add_argument("--all", action="store_true",
+                       help="With --datasource: keep the global endpoints too")
+        p.add_argument("--timeout", type=float, default=30)
+        if name == "watch":
+            p.add_argument("--interval", type=float, default=5)
+            p.add_argument("--count", type=int, default=0, help="Polls (0 = until interrupted)")
+        else:
+            p.add_argument("--max-age", type=float, default=3,
+                           help="Seconds a response answers repeated requests")
+        if name == "serve":
+            p.add_argument("--host", default="0.0.0.0")
+            p.add_argument("--port", type=int, default=8088)
+            p.add_argument("--push", action="store_true",
+                           help="Refresh every --max-age even without polling wallboards")
+        if name == "bench":
+            p.add_argument("--wallboards", type=int, default=20)
+            p.add_argument("--every", type=float, default=5, help="Seconds between a wallboard's polls")
+            p.add_argument("--duration", type=float, default=60)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())